@@ -19,6 +19,31 @@ class Settings(BaseSettings):
     
     # Parser Service
     PARSER_SERVICE_URL: str = "http://localhost:8001/v1"
+    PARSER_MAX_CONCURRENCY: int = 16
+    PARSER_BREAKER_THRESHOLD: int = 5
+    PARSER_BREAKER_RESET_SECONDS: float = 30.0
+    # Co-located installs only: run SMS/email parsing in-process when the parser service is unreachable
+    PARSER_INPROCESS_FALLBACK: bool = False
+    
+    # Instrumentation (/metrics, /metrics/debug)
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str = ""  # when set, /metrics* require 'Authorization: Bearer <token>'
+    SERVER_TIMING_ENABLED: bool = False
+    SLOW_QUERY_MS: float = 200.0
+    
+    # Market indices upstream for /mutual-funds/indices: "yahoo" or "fake" (offline/tests)
+    MARKET_INDICES_UPSTREAM: str = "yahoo"
+    
+    # Email sync: largest text part downloaded per message (partial IMAP fetch)
+    EMAIL_SYNC_MAX_PART_BYTES: int = 262144
+    
+    # mfapi.in base (scheme master, NAV history); point at a local mirror for offline runs/benchmarks
+    MFAPI_BASE_URL: str = "https://api.mfapi.in/mf"
+    
+    # DuckDB single writer: small writes queued together are committed as one transaction
+    DB_WRITER_MAX_BATCH: int = 64
+    DB_WRITER_TIMEOUT_SECONDS: float = 60.0
+    DB_WRITER_MAX_HOLD_SECONDS: float = 600.0
     
     model_config = ConfigDict(case_sensitive=True, env_file=".env", extra="ignore")
 
@@ -0,0 +1,382 @@
+"""
+Single writer for DuckDB.
+
+DuckDB runs one write transaction at a time; concurrent transactions that touch the same
+rows fail with "Conflict". Instead of a process-wide lock plus retry loops, writes are
+funnelled through one queue, served in submission order by one thread:
+
+- run(fn): fn(session) is a small unit of writes (insert an event, bump a balance). The
+  writer drains whatever is queued (up to DB_WRITER_MAX_BATCH units) into one session and
+  commits once (group commit), so N concurrent requests cost one commit, not N.
+- exclusive(session): multi-statement ORM work in the caller's own session (imports, holdings
+  rebuilds, bulk triage, request handlers editing a few rows). The caller waits for its turn
+  in the same queue and keeps the writer until it leaves the block, so it never interleaves
+  with queued units. The grant commits the session, which expires rows loaded before the
+  block: attribute changes made inside it are written against a fresh snapshot.
+
+run() returns once the unit is committed. If it is still queued after
+DB_WRITER_TIMEOUT_SECONDS it is cancelled (the writer skips it) and TimeoutError is raised,
+so a caller that gave up never has its write land later. exclusive() waits at most as long
+for its turn. A block holding the writer longer than DB_WRITER_MAX_HOLD_SECONDS has its turn
+revoked (logged): its next flush, commit, write statement or run() raises WriterTurnRevoked
+and the session is rolled back on exit. The writer keeps the turn until the block leaves, so
+queued units never interleave with it. Passing the caller's session commits it first
+(its pending rows land before the unit, as an inline commit used to) and ends its
+snapshot, so the caller's next query sees the unit's writes.
+
+Units must only write through the session they are given: if a batch fails, it is rolled
+back and its units are re-run one per transaction to isolate the failing one.
+"""
+import bisect
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.core.database import SessionLocal
+from backend.app.core.instrumentation import DEFAULT_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+Unit = Callable[[Session], Any]
+
+_TURN_KEY = "db_writer_turn"
+
+
+class WriterTurnRevoked(TimeoutError):
+    """An exclusive() block outlived DB_WRITER_MAX_HOLD_SECONDS; its writes are refused."""
+
+
+class _Job:
+    __slots__ = ("fn", "future", "context", "queued_at")
+
+    def __init__(self, fn: Unit):
+        self.fn = fn
+        self.future: Future = Future()
+        # Statements run by fn count against the submitting request (Server-Timing)
+        self.context = contextvars.copy_context()
+        self.queued_at = time.perf_counter()
+
+
+class _Turn:
+    """An exclusive() caller's place in the queue."""
+    __slots__ = ("granted", "released", "queued_at", "abandoned", "revoked", "lock")
+
+    def __init__(self):
+        self.granted = threading.Event()
+        self.released = threading.Event()
+        self.queued_at = time.perf_counter()
+        self.abandoned = False  # the caller timed out waiting; the writer skips the turn
+        self.revoked = False  # held past DB_WRITER_MAX_HOLD_SECONDS; the block may not write
+        self.lock = threading.Lock()
+
+    def grant(self) -> bool:
+        with self.lock:
+            if self.abandoned:
+                return False
+            self.granted.set()
+            return True
+
+    def check(self):
+        if self.revoked:
+            raise WriterTurnRevoked(
+                f"exclusive() held the DB writer for over {settings.DB_WRITER_MAX_HOLD_SECONDS}s"
+            )
+
+    def abandon(self) -> bool:
+        """False if the turn was granted in the meantime (the caller then takes it)."""
+        with self.lock:
+            if self.granted.is_set():
+                return False
+            self.abandoned = True
+            return True
+
+
+_STOP = object()
+
+
+class DbWriter:
+    """One writer thread per process; started on first use."""
+
+    def __init__(self, session_factory=SessionLocal, max_batch: Optional[int] = None):
+        self._session_factory = session_factory
+        self.max_batch = max_batch or settings.DB_WRITER_MAX_BATCH
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._local = threading.local()
+
+        self._stats_lock = threading.Lock()
+        self._commit_buckets = [0] * (len(DEFAULT_BUCKETS) + 1)
+        self._stats: Dict[str, float] = {
+            "units": 0, "failed_units": 0, "commits": 0, "commit_seconds": 0.0, "queue_wait_seconds": 0.0,
+            "exclusive": 0, "exclusive_wait_seconds": 0.0, "exclusive_hold_seconds": 0.0, "max_batch_seen": 0,
+        }
+
+    # --- Public API ---
+    def run(self, fn: Unit, session: Optional[Session] = None, wait: bool = True):
+        """
+        Queue fn(session) for the writer. With wait (default) returns fn's result once it is
+        committed, or raises its exception; otherwise returns the Future. Raises TimeoutError
+        (and drops the unit) if the writer has not started it within DB_WRITER_TIMEOUT_SECONDS.
+        """
+        if session is not None:
+            session.commit()
+        if self._holds_writer():
+            turn = getattr(self._local, "turn", None)
+            if turn is not None:
+                turn.check()
+            return self._run_inline(fn, wait)
+        job = _Job(fn)
+        self._submit(job)
+        if not wait:
+            return job.future
+        try:
+            return job.future.result(timeout=settings.DB_WRITER_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            if job.future.cancel():
+                raise TimeoutError("DB writer queue timeout") from None
+            # Already being committed: its outcome is moments away and must not be hidden
+            return job.future.result()
+
+    @contextmanager
+    def exclusive(self, session: Optional[Session] = None):
+        """
+        Hold the writer for a block of writes made in the caller's own session. Passing the
+        session commits it once the turn is granted, so the block reads a snapshot that
+        already includes every write queued before it (a stale snapshot would Conflict).
+        """
+        if self._holds_writer():  # nested, or already on the writer thread
+            turn = getattr(self._local, "turn", None)
+            if turn is not None:
+                turn.check()
+                if session is not None and _TURN_KEY not in session.info:
+                    session.info[_TURN_KEY] = turn
+                    try:
+                        yield
+                    finally:
+                        session.info.pop(_TURN_KEY, None)
+                    return
+            yield
+            return
+        turn = _Turn()
+        self._submit(turn)
+        if not turn.granted.wait(settings.DB_WRITER_TIMEOUT_SECONDS) and turn.abandon():
+            raise TimeoutError("DB writer exclusive turn timeout")
+        granted_at = time.perf_counter()
+        self._local.exclusive = True
+        self._local.turn = turn
+        try:
+            if session is not None:
+                session.commit()
+                session.info[_TURN_KEY] = turn
+            yield
+        finally:
+            if session is not None:
+                session.info.pop(_TURN_KEY, None)
+                if turn.revoked:
+                    session.rollback()
+            self._local.exclusive = False
+            self._local.turn = None
+            turn.released.set()
+            with self._stats_lock:
+                self._stats["exclusive"] += 1
+                self._stats["exclusive_wait_seconds"] += granted_at - turn.queued_at
+                self._stats["exclusive_hold_seconds"] += time.perf_counter() - granted_at
+
+    def stop(self, timeout: float = 10.0):
+        """Drain the queue and stop the thread (application shutdown)."""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    # --- Writer thread ---
+    def _holds_writer(self) -> bool:
+        return getattr(self._local, "exclusive", False) or threading.current_thread() is self._thread
+
+    def _submit(self, item):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="db-writer", daemon=True)
+                self._thread.start()
+            self._queue.put(item)
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._serve(batch)
+                    return
+                batch.append(item)
+            self._serve(batch)
+
+    def _serve(self, batch: List[Any]):
+        """Commit runs of units; hand the writer to exclusive() callers in queue order."""
+        units: List[_Job] = []
+        for item in batch:
+            if isinstance(item, _Turn):
+                self._commit(units)
+                units = []
+                if item.grant() and not item.released.wait(settings.DB_WRITER_MAX_HOLD_SECONDS):
+                    item.revoked = True
+                    logger.error(
+                        "exclusive() held the DB writer for over %ss; its turn is revoked and "
+                        "queued writes resume once the block exits", settings.DB_WRITER_MAX_HOLD_SECONDS
+                    )
+                    # Resuming now would interleave with the block's open transaction
+                    item.released.wait()
+            elif item.future.set_running_or_notify_cancel():  # False: the caller timed out
+                units.append(item)
+        self._commit(units)
+
+    def _commit(self, jobs: List[_Job]):
+        try:
+            self._commit_batch(jobs)
+        except Exception as e:  # e.g. the connection itself failed; never leave callers waiting
+            logger.exception("DB writer batch failed")
+            for job in jobs:
+                if not job.future.done():
+                    job.future.set_exception(e)
+
+    def _commit_batch(self, jobs: List[_Job]):
+        if not jobs:
+            return
+        started = time.perf_counter()
+        session = self._session_factory(expire_on_commit=False)
+        try:
+            results = [job.context.run(job.fn, session) for job in jobs]
+            # One flush for the batch: inserts of the same table go out as one executemany
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            session.close()
+            if len(jobs) > 1:
+                # One unit failed the batch: retry each on its own so only that one fails
+                for job in jobs:
+                    self._commit([job])
+                return
+            self._record(jobs, started, failed=True)
+            jobs[0].future.set_exception(e)
+            return
+        session.close()
+        self._record(jobs, started)
+        for job, result in zip(jobs, results):
+            job.future.set_result(result)
+
+    def _run_inline(self, fn: Unit, wait: bool):
+        """run() from a thread that already holds the writer: commit right away, no queueing."""
+        future: Future = Future()
+        session = self._session_factory(expire_on_commit=False)
+        try:
+            result = fn(session)
+            session.commit()
+            future.set_result(result)
+        except Exception as e:
+            session.rollback()
+            future.set_exception(e)
+        finally:
+            session.close()
+        return future.result() if wait else future
+
+    def _record(self, jobs: List[_Job], started: float, failed: bool = False):
+        now = time.perf_counter()
+        duration = now - started
+        with self._stats_lock:
+            if failed:
+                self._stats["failed_units"] += len(jobs)
+                return
+            self._stats["units"] += len(jobs)
+            self._stats["commits"] += 1
+            self._stats["commit_seconds"] += duration
+            self._stats["queue_wait_seconds"] += sum(started - job.queued_at for job in jobs)
+            self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(jobs))
+            self._commit_buckets[bisect.bisect_left(DEFAULT_BUCKETS, duration)] += 1
+
+    # --- Metrics (MetricsRegistry collector) ---
+    def render_prometheus(self, service: str) -> List[str]:
+        with self._stats_lock:
+            stats, buckets = dict(self._stats), list(self._commit_buckets)
+        labels = f'service="{service}"'
+        lines = [
+            "# HELP db_writer_queue_depth Units and exclusive turns waiting for the writer.",
+            "# TYPE db_writer_queue_depth gauge",
+            f"db_writer_queue_depth{{{labels}}} {self.queue_depth}",
+            "# HELP db_writer_commit_seconds Group-commit latency (units applied + commit).",
+            "# TYPE db_writer_commit_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, n in zip(DEFAULT_BUCKETS, buckets):
+            cumulative += n
+            lines.append(f'db_writer_commit_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'db_writer_commit_seconds_bucket{{{labels},le="+Inf"}} {stats["commits"]}')
+        lines.append(f'db_writer_commit_seconds_sum{{{labels}}} {stats["commit_seconds"]:.6f}')
+        lines.append(f'db_writer_commit_seconds_count{{{labels}}} {stats["commits"]}')
+        for name, key in (
+            ("db_writer_units_total", "units"), ("db_writer_failed_units_total", "failed_units"),
+            ("db_writer_queue_wait_seconds_total", "queue_wait_seconds"),
+            ("db_writer_exclusive_total", "exclusive"),
+            ("db_writer_exclusive_wait_seconds_total", "exclusive_wait_seconds"),
+            ("db_writer_exclusive_hold_seconds_total", "exclusive_hold_seconds"),
+        ):
+            value = stats[key]
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{{{labels}}} {value:.6f}" if isinstance(value, float) else f"{name}{{{labels}}} {value}")
+        return lines
+
+    def snapshot(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        commits, units = stats["commits"], stats["units"]
+        return {
+            "queue_depth": self.queue_depth,
+            "units": units,
+            "failed_units": stats["failed_units"],
+            "commits": commits,
+            "avg_batch": round(units / commits, 2) if commits else 0,
+            "max_batch": stats["max_batch_seen"],
+            "avg_commit_ms": round(stats["commit_seconds"] / commits * 1000, 2) if commits else 0,
+            "avg_queue_wait_ms": round(stats["queue_wait_seconds"] / units * 1000, 2) if units else 0,
+            "exclusive": stats["exclusive"],
+            "avg_exclusive_wait_ms": round(stats["exclusive_wait_seconds"] / stats["exclusive"] * 1000, 2) if stats["exclusive"] else 0,
+        }
+
+
+def _check_turn(session: Session, *args):
+    turn = session.info.get(_TURN_KEY)
+    if turn is not None:
+        turn.check()
+
+
+def _check_turn_execute(orm_execute_state):
+    if not orm_execute_state.is_select:
+        _check_turn(orm_execute_state.session)
+
+
+# A revoked exclusive() block must not land any more writes through its session
+event.listen(Session, "before_flush", _check_turn)
+event.listen(Session, "before_commit", _check_turn)
+event.listen(Session, "do_orm_execute", _check_turn_execute)
+
+db_writer = DbWriter()
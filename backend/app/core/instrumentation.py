@@ -0,0 +1,14 @@
+"""
+Backend metrics: the request/DB instrumentation shared with the parser
+(common/instrumentation.py) plus the backend's own collectors.
+"""
+from common.instrumentation import DEFAULT_BUCKETS, MetricsRegistry, install_instrumentation
+
+__all__ = ["DEFAULT_BUCKETS", "MetricsRegistry", "install_instrumentation", "add_backend_collectors"]
+
+
+def add_backend_collectors(registry: MetricsRegistry) -> MetricsRegistry:
+    """Export the DB writer's queue depth, commit latency and exclusive turns."""
+    from backend.app.core.db_writer import db_writer  # db_writer imports DEFAULT_BUCKETS from here
+    registry.add_collector("db_writer", db_writer)
+    return registry
@@ -0,0 +1,106 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Query
+
+# Bounded COUNT for "approximate" totals: counting stops after this many rows
+TOTAL_COUNT_CAP = 10000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _to_json(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _from_json(value: Any, expr):
+    if value is None:
+        return None
+    try:
+        python_type = expr.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return python_type(value)
+
+
+def encode_cursor(signature: str, values: Sequence[Any]) -> str:
+    raw = json.dumps({"s": signature, "k": [_to_json(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, signature: str, exprs: Sequence) -> List[Any]:
+    """Opaque token -> typed key values. A cursor from a different sort order is rejected."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["s"] != signature or len(data["k"]) != len(exprs):
+            raise InvalidCursor("Cursor does not match the requested sort order")
+        return [_from_json(v, e) for v, e in zip(data["k"], exprs)]
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+
+
+def keyset_predicate(exprs: Sequence, values: Sequence[Any], descending: bool):
+    """
+    Rows strictly after `values` in (exprs...) order, expanded as
+    a > va OR (a = va AND b > vb) ... so it runs on any backend (no row-value comparison).
+    """
+    clauses = []
+    for i, expr in enumerate(exprs):
+        step = expr < values[i] if descending else expr > values[i]
+        clauses.append(and_(*[exprs[j] == values[j] for j in range(i)], step))
+    return or_(*clauses)
+
+
+def keyset_page(
+    query: Query,
+    exprs: Sequence,
+    descending: bool,
+    limit: int,
+    cursor: Optional[str] = None,
+    signature: str = "",
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of `query` ordered by `exprs` (the last one must be unique, e.g. id).
+
+    Cost is independent of page depth: the cursor becomes a WHERE predicate instead of an
+    OFFSET, and limit+1 rows are read to detect a next page without a COUNT.
+    """
+    if cursor:
+        query = query.filter(keyset_predicate(exprs, decode_cursor(cursor, signature, exprs), descending))
+
+    order = [e.desc() if descending else e.asc() for e in exprs]
+    rows = query.add_columns(*exprs).order_by(None).order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(signature, list(rows[-1])[1:])
+    return [row[0] for row in rows], next_cursor
+
+
+def capped_count(query: Query, cap: int = TOTAL_COUNT_CAP) -> Tuple[int, bool]:
+    """COUNT that stops at `cap` rows. Returns (count, exact)."""
+    subq = query.order_by(None).limit(cap + 1).subquery()
+    count = query.session.execute(select(func.count()).select_from(subq)).scalar() or 0
+    if count > cap:
+        return cap, False
+    return count, True
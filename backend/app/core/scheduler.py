@@ -8,6 +8,7 @@ from backend.app.modules.ingestion.email_sync import EmailSyncService
 from backend.app.modules.ingestion import models as ingestion_models
 import logging
 import asyncio
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
@@ -88,6 +89,57 @@ def auto_sync_job():
     finally:
         db.close()
 
+def scheme_master_refresh_job():
+    """
+    Job to pull new/changed mutual fund schemes into the local scheme master.
+    """
+    from backend.app.modules.finance.services.scheme_master import SchemeMaster
+    logger.info("[SchemeMaster] Refreshing scheme master...")
+    result = SchemeMaster.refresh()
+    logger.info(f"[SchemeMaster] {result}")
+
+def nav_refresh_job():
+    """
+    Job to refresh NAVs of every held scheme (all tenants) after AMFI publishes.
+    """
+    from backend.app.modules.finance.services.nav_refresh import NavRefreshService
+    logger.info("[NavRefresh] Refreshing NAVs for held schemes...")
+    result = NavRefreshService.refresh()
+    logger.info(f"[NavRefresh] {result}")
+
+def market_indices_refresh_job():
+    """
+    Job to keep the market indices cache warm while clients are polling /indices.
+    """
+    from backend.app.modules.finance.services.market_indices import get_indices_cache
+    get_indices_cache().refresh_if_active()
+
+def search_index_job():
+    """
+    Job to build the transaction search index for tenants that don't have one yet.
+    """
+    from backend.app.modules.finance.services.transaction_search import TransactionSearch
+    result = TransactionSearch.ensure_built()
+    if result:
+        logger.info(f"[SearchIndex] Built index for {len(result)} tenant(s): {result}")
+
+def search_index_compact_job():
+    """
+    Job to rebuild every tenant's search index, dropping entries of deleted transactions.
+    """
+    from backend.app.modules.finance.services.transaction_search import TransactionSearch
+    db: Session = SessionLocal()
+    try:
+        tenants = [t for (t,) in db.query(models.TransactionSearchState.tenant_id).all()]
+        for tenant_id in tenants:
+            try:
+                TransactionSearch.rebuild(db, tenant_id)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"[SearchIndex] Rebuild failed for tenant {tenant_id}: {e}")
+    finally:
+        db.close()
+
 def start_scheduler():
     # Run daily at 00:01 UTC (or server time)
     trigger = CronTrigger(hour=0, minute=1)
@@ -100,6 +152,19 @@ def start_scheduler():
     # Run email sync every 15 minutes
     scheduler.add_job(auto_sync_job, 'interval', minutes=15, id="auto_sync_job", replace_existing=True)
     
+    # Scheme master delta refresh (AMFI adds/renames schemes rarely; daily is plenty)
+    scheduler.add_job(scheme_master_refresh_job, CronTrigger(hour=5, minute=30), id="scheme_master_refresh_job", replace_existing=True)
+    
+    # AMFI publishes NAVs by ~23:00 IST (mfapi.in mirrors shortly after); the morning run catches late publishers
+    scheduler.add_job(nav_refresh_job, CronTrigger(hour="0,7", minute=15, timezone="Asia/Kolkata"), id="nav_refresh_job", replace_existing=True)
+    
+    # Indices: warm on startup, then every minute while the dashboard is being viewed
+    scheduler.add_job(market_indices_refresh_job, 'interval', seconds=60, next_run_time=datetime.now(), id="market_indices_refresh_job", replace_existing=True)
+    
+    # Search index: backfill unindexed tenants on startup and hourly; compact (drop deleted rows) nightly
+    scheduler.add_job(search_index_job, 'interval', hours=1, next_run_time=datetime.now(), id="search_index_job", replace_existing=True)
+    scheduler.add_job(search_index_compact_job, CronTrigger(hour=3, minute=30), id="search_index_compact_job", replace_existing=True)
+    
     scheduler.start()
     logger.info("APScheduler started.")
 
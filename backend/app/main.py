@@ -12,6 +12,8 @@ from backend.app.core.config import settings
 from backend.app.core.exceptions import http_exception_handler, generic_exception_handler
 from backend.app.core.database import engine, Base, SessionLocal
 from backend.app.core.migration import run_auto_migrations
+from backend.app.core.instrumentation import add_backend_collectors, install_instrumentation
+from backend.app.core.db_writer import db_writer
 
 # Routers
 from backend.app.modules.auth.router import router as auth_router
@@ -22,6 +24,7 @@ from backend.app.modules.mobile.router import router as mobile_router
 
 # Background Tasks
 from backend.app.modules.ingestion.email_sync import EmailSyncService
+from backend.app.modules.ingestion.parser_client import close_parser_client
 from backend.app.modules.ingestion import models as ingestion_models
 from backend.app.core.scheduler import start_scheduler, stop_scheduler
 
@@ -40,6 +43,14 @@ def create_application() -> FastAPI:
         allow_headers=["*"],
     )
 
+    if settings.METRICS_ENABLED:
+        add_backend_collectors(install_instrumentation(
+            application, engine, service="backend",
+            server_timing=settings.SERVER_TIMING_ENABLED,
+            slow_query_ms=settings.SLOW_QUERY_MS,
+            token=settings.METRICS_TOKEN
+        ))
+
     # Exception Handlers
     application.add_exception_handler(StarletteHTTPException, http_exception_handler)
     application.add_exception_handler(Exception, generic_exception_handler)
@@ -85,6 +96,8 @@ def create_application() -> FastAPI:
     @application.on_event("shutdown")
     async def stop_scheduler_event():
         stop_scheduler()
+        db_writer.stop()
+        close_parser_client()
 
     return application
 
@@ -5,6 +5,7 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from backend.app.core.database import get_db
 from backend.app.core.config import settings
+from backend.app.core.db_writer import db_writer
 from backend.app.modules.auth import schemas, services, security, models as auth_models
 from backend.app.modules.auth.dependencies import get_current_user
 
@@ -65,8 +66,9 @@ def update_tenant(
     tenant = db.query(auth_models.Tenant).filter(auth_models.Tenant.id == tenant_id).first()
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
-    tenant.name = payload.name
-    db.commit()
+    with db_writer.exclusive(db):
+        tenant.name = payload.name
+        db.commit()
     db.refresh(tenant)
     return tenant
 
@@ -101,8 +103,9 @@ def create_family_member(
         dob=payload.dob,
         pan_number=payload.pan_number
     )
-    db.add(new_user)
-    db.commit()
+    with db_writer.exclusive(db):
+        db.add(new_user)
+        db.commit()
     db.refresh(new_user)
     return new_user
 
@@ -121,19 +124,21 @@ def update_family_member(
     if not member:
         raise HTTPException(status_code=404, detail="Member not found")
     
-    if payload.full_name is not None:
-        member.full_name = payload.full_name
-    if payload.avatar is not None:
-        member.avatar = payload.avatar
-    if payload.role is not None:
-        member.role = payload.role
-    if payload.dob is not None:
-        member.dob = payload.dob
-    if payload.pan_number is not None:
-        member.pan_number = payload.pan_number
-    if payload.password:
-        member.password_hash = security.get_password_hash(payload.password)
-        
-    db.commit()
+    # Hash before taking the writer: it is the slow part of this request
+    password_hash = security.get_password_hash(payload.password) if payload.password else None
+    with db_writer.exclusive(db):
+        if payload.full_name is not None:
+            member.full_name = payload.full_name
+        if payload.avatar is not None:
+            member.avatar = payload.avatar
+        if payload.role is not None:
+            member.role = payload.role
+        if payload.dob is not None:
+            member.dob = payload.dob
+        if payload.pan_number is not None:
+            member.pan_number = payload.pan_number
+        if password_hash:
+            member.password_hash = password_hash
+        db.commit()
     db.refresh(member)
     return member
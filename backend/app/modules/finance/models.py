@@ -97,6 +97,35 @@ class Transaction(Base):
     
     loan = relationship("Loan", backref="emi_transactions")
 
+class TransactionSearchToken(Base):
+    """Inverted index: one row per (token, transaction). Maintained by TransactionSearch."""
+    __tablename__ = "transaction_search_tokens"
+
+    # No database-level key: rows are only written set-based, and an ART index on this
+    # (largest) table would cost more on every rebuild than it saves on lookups
+    tenant_id = Column(String, nullable=False)
+    token = Column(String, nullable=False)
+    transaction_id = Column(String, nullable=False)
+
+    __mapper_args__ = {"primary_key": [tenant_id, token, transaction_id]}
+
+class TransactionSearchVocab(Base):
+    """Per-tenant token vocabulary split into trigrams, for substring lookups of tokens."""
+    __tablename__ = "transaction_search_vocab"
+
+    tenant_id = Column(String, nullable=False)
+    token = Column(String, nullable=False)
+    gram = Column(String, nullable=False)
+
+    __mapper_args__ = {"primary_key": [tenant_id, gram, token]}
+
+class TransactionSearchState(Base):
+    """Marks tenants whose search index has been fully built (queries fall back to ILIKE otherwise)."""
+    __tablename__ = "transaction_search_state"
+
+    tenant_id = Column(String, primary_key=True)
+    built_at = Column(DateTime, default=datetime.utcnow)
+
 
 class CategoryRule(Base):
     __tablename__ = "category_rules"
@@ -232,6 +261,26 @@ class MutualFundsMeta(Base):
     category = Column(String, nullable=True)
     updated_at = Column(DateTime, default=datetime.utcnow)
 
+class MutualFundScheme(Base):
+    """Local copy of the mfapi.in / AMFI scheme master (search + CAS mapping)"""
+    __tablename__ = "mutual_fund_schemes"
+
+    scheme_code = Column(String, primary_key=True)
+    scheme_name = Column(String, nullable=False)
+    isin_growth = Column(String, nullable=True)
+    isin_reinvest = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class MutualFundNav(Base):
+    """Latest NAV + recent history per held scheme, written by the scheduled NAV refresh"""
+    __tablename__ = "mutual_fund_navs"
+
+    scheme_code = Column(String, primary_key=True)
+    nav = Column(Numeric(15, 4), nullable=False)
+    nav_date = Column(DateTime, nullable=True)
+    sparkline = Column(String, nullable=True)  # JSON array of the last 30 NAVs, oldest first
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
 class SelectionType(enum.Enum):
     MANUAL = "MANUAL"
     AUTO = "AUTO"
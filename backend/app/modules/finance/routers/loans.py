@@ -61,6 +61,21 @@ def get_loan_details(
         raise HTTPException(status_code=404, detail="Loan not found")
     return details
 
+@router.post("/loans/{loan_id}/simulate", response_model=schemas.LoanScenarioResult)
+def simulate_loan_scenario(
+    loan_id: str,
+    scenario: schemas.LoanScenario,
+    current_user: auth_models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    What-if analysis: compare the current schedule against prepayments / rate changes.
+    """
+    try:
+        return service.simulate_scenario(db, loan_id, scenario, str(current_user.tenant_id))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
 @router.post("/loans/portfolio/insights")
 def generate_portfolio_insights(
     current_user: auth_models.User = Depends(get_current_user),
@@ -3,11 +3,9 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel
-import shutil
-import tempfile
-import os
 
 from backend.app.core.database import get_db
+from backend.app.core.db_writer import db_writer
 from backend.app.modules.auth import models as auth_models
 from backend.app.modules.auth.dependencies import get_current_user
 from backend.app.modules.finance.services.mutual_funds import MutualFundService
@@ -193,15 +191,9 @@ def preview_cas_pdf(
     db: Session = Depends(get_db)
 ):
     """Parse PDF and return mapped transactions for review."""
-    temp_path = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            shutil.copyfileobj(file.file, tmp)
-            temp_path = tmp.name
-        # File is now closed, safe to read on Windows
-        
         # 1. Parse raw transactions
-        raw_transactions = CASParser.parse_pdf(temp_path, password)
+        raw_transactions = CASParser.parse_bytes(file.file.read(), password)
         
         # 2. Map to schemes
         mapped_transactions = MutualFundService.map_transactions_to_schemes(raw_transactions)
@@ -220,11 +212,6 @@ def preview_cas_pdf(
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except: pass
 
 @router.post("/preview-cas-email")
 def preview_cas_email(
@@ -309,8 +296,9 @@ def confirm_import(
             ).first()
             if config:
                 from datetime import datetime
-                config.cas_last_sync_at = datetime.utcnow()
-                db.commit()
+                with db_writer.exclusive(db):
+                    config.cas_last_sync_at = datetime.utcnow()
+                    db.commit()
 
     return stats
 
@@ -1,12 +1,14 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from backend.app.core.database import get_db
+from backend.app.core.pagination import InvalidCursor
 from backend.app.modules.auth import models as auth_models
 from backend.app.modules.auth.dependencies import get_current_user
 from backend.app.modules.finance import schemas
 from backend.app.modules.finance.services.transaction_service import TransactionService
+from backend.app.modules.finance.services.transaction_search import TransactionSearch
 
 router = APIRouter()
 
@@ -29,9 +31,39 @@ def read_transactions(
     category: Optional[str] = None,
     sort_by: Optional[str] = "date",
     sort_order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     current_user: auth_models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """
+    Offset mode (page=N) returns an exact total. Cursor mode (cursor="" for the first page,
+    then next_cursor) costs the same at any depth; include_total adds a bounded estimate.
+    """
+    if cursor is not None:
+        filters = dict(
+            account_id=account_id, start_date=start_date, end_date=end_date,
+            search=search, category=category, user_role=current_user.role
+        )
+        try:
+            items, next_cursor = TransactionService.get_transactions_page(
+                db, str(current_user.tenant_id), cursor or None, limit,
+                sort_by=sort_by, sort_order=sort_order, **filters
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total, exact = None, True
+        if include_total:
+            total, exact = TransactionService.estimate_transactions(db, str(current_user.tenant_id), **filters)
+        return {
+            "items": items,
+            "total": total,
+            "total_exact": exact,
+            "page": page,
+            "size": limit,
+            "next_cursor": next_cursor
+        }
+
     skip = (page - 1) * limit
     items = TransactionService.get_transactions(
         db, str(current_user.tenant_id), account_id, skip, limit, start_date, end_date, 
@@ -59,6 +91,18 @@ def bulk_delete_transactions(
     count = TransactionService.bulk_delete_transactions(db, payload.transaction_ids, str(current_user.tenant_id))
     return {"message": f"Deleted {count} transactions", "count": count}
 
+@router.get("/transactions/search", response_model=List[schemas.TransactionRead])
+def search_transactions(
+    q: str,
+    limit: int = 20,
+    current_user: auth_models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Relevance-ranked search over description/recipient (token, prefix and substring terms).
+    """
+    return TransactionSearch.search(db, str(current_user.tenant_id), q, limit=min(limit, 100))
+
 @router.put("/transactions/{transaction_id}", response_model=schemas.TransactionRead)
 def update_transaction(
     transaction_id: str,
@@ -92,10 +136,11 @@ def smart_categorize_transaction(
 @router.post("/transactions/rules/{rule_id}/apply-retrospective")
 def apply_rule_retrospectively(
     rule_id: str,
+    preview: bool = False,
     current_user: auth_models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return TransactionService.apply_rule_retrospectively(db, rule_id, str(current_user.tenant_id))
+    return TransactionService.apply_rule_retrospectively(db, rule_id, str(current_user.tenant_id), preview=preview)
 
 @router.post("/transactions/match-count")
 def get_match_count(
@@ -115,6 +160,9 @@ def bulk_rename_transactions(
     db: Session = Depends(get_db)
 ):
     count = TransactionService.bulk_rename(
-        db, payload.old_name, payload.new_name, str(current_user.tenant_id), payload.sync_to_parser
+        db, payload.old_name, payload.new_name, str(current_user.tenant_id), payload.sync_to_parser,
+        preview=payload.preview
     )
+    if payload.preview:
+        return {"message": f"{count} transactions would be renamed", "count": count}
     return {"message": f"Renamed {count} transactions", "count": count}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List, Union
+from typing import Literal, Optional, List, Union
 from datetime import datetime
 from decimal import Decimal
 from uuid import UUID
@@ -117,9 +117,12 @@ class TransactionRead(TransactionBase):
 
 class TransactionPagination(BaseModel):
     items: List[TransactionRead]
-    total: int
+    total: Optional[int] = None
     page: int
     size: int
+    # Cursor mode only: token for the next page (None on the last page), and whether total is exact
+    next_cursor: Optional[str] = None
+    total_exact: bool = True
 
 class BulkDeleteRequest(BaseModel):
     transaction_ids: List[str]
@@ -339,6 +342,7 @@ class LoanRead(LoanBase):
     paid_principal: Decimal = Decimal('0.0')
     progress_percentage: float = 0.0
     next_emi_date: Optional[datetime] = None
+    paid_emi_count: int = 0
     
     created_at: datetime
     
@@ -365,6 +369,33 @@ class LoanRepayment(BaseModel):
     installment_no: Optional[int] = None
     description: Optional[str] = None
 
+class LoanPrepayment(BaseModel):
+    installment_no: int # Applied right after this installment
+    amount: Decimal
+
+class LoanRateChange(BaseModel):
+    installment_no: int # Effective from this installment
+    interest_rate: Decimal # New annual rate %
+
+class LoanScenario(BaseModel):
+    prepayments: List[LoanPrepayment] = []
+    rate_changes: List[LoanRateChange] = []
+    strategy: Literal["REDUCE_TENURE", "REDUCE_EMI"] = "REDUCE_TENURE"
+    include_schedule: bool = True
+
+class LoanScenarioSummary(BaseModel):
+    installments: int
+    total_interest: Decimal
+    total_paid: Decimal
+    payoff_date: Optional[datetime] = None
+
+class LoanScenarioResult(BaseModel):
+    baseline: LoanScenarioSummary
+    scenario: LoanScenarioSummary
+    interest_saved: Decimal
+    months_saved: int
+    amortization_schedule: List[AmortizationScheduleItem] = []
+
 # Investment Goals
 class InvestmentGoalBase(BaseModel):
     name: str
@@ -437,3 +468,4 @@ class BulkRenameRequest(BaseModel):
     old_name: str
     new_name: str
     sync_to_parser: bool = False
+    preview: bool = False # Only count matching rows
@@ -1,6 +1,7 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
 import logging
+from backend.app.core.db_writer import db_writer
 from backend.app.modules.finance import models, schemas
 
 logger = logging.getLogger(__name__)
@@ -16,8 +17,9 @@ class AccountService:
         if hasattr(db_account, 'owner_id') and db_account.owner_id:
              db_account.owner_id = str(db_account.owner_id) # Ensure string
 
-        db.add(db_account)
-        db.commit()
+        with db_writer.exclusive(db):
+            db.add(db_account)
+            db.commit()
         db.refresh(db_account)
         return db_account
 
@@ -78,21 +80,22 @@ class AccountService:
         if not update_data:
             return db_account
         
-        # Apply updates
-        for key, value in update_data.items():
-            if key in ['tenant_id', 'owner_id'] and value:
-                value = str(value)
-            setattr(db_account, key, value)
+        with db_writer.exclusive(db):
+            # Apply updates
+            for key, value in update_data.items():
+                if key in ['tenant_id', 'owner_id'] and value:
+                    value = str(value)
+                setattr(db_account, key, value)
         
-        try:
-            db.commit()
-            db.refresh(db_account)
-            return db_account
-        except Exception as e:
-            db.rollback()
-            # DuckDB limitation: Cannot update accounts that have transactions
-            pass
-            raise
+            try:
+                db.commit()
+                db.refresh(db_account)
+                return db_account
+            except Exception as e:
+                db.rollback()
+                # DuckDB limitation: Cannot update accounts that have transactions
+                pass
+                raise
 
     @staticmethod
     def delete_account(db: Session, account_id: str, tenant_id: str) -> bool:
@@ -104,6 +107,7 @@ class AccountService:
         if not db_account:
             return False
             
-        db.delete(db_account)
-        db.commit()
+        with db_writer.exclusive(db):
+            db.delete(db_account)
+            db.commit()
         return True
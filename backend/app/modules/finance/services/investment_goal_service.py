@@ -1,101 +1,148 @@
+from collections import defaultdict
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, case
 from backend.app.modules.finance import models, schemas
 from decimal import Decimal
 
 class InvestmentGoalService:
     @staticmethod
-    def get_goals(db: Session, tenant_id: str) -> List[schemas.InvestmentGoalProgress]:
-        from sqlalchemy.orm import joinedload
-        goals = db.query(models.InvestmentGoal).options(
-            joinedload(models.InvestmentGoal.assets).joinedload(models.GoalAsset.linked_account),
-            joinedload(models.InvestmentGoal.holdings).joinedload(models.MutualFundHolding.meta)
+    def _holding_value_expr():
+        # Mirrors the Python fallback: stored value, else units * last NAV
+        return func.coalesce(
+            models.MutualFundHolding.current_value,
+            models.MutualFundHolding.units * models.MutualFundHolding.last_nav,
+            0
+        )
+
+    @staticmethod
+    def _asset_value_expr():
+        return case(
+            (models.GoalAsset.type == models.GoalAssetType.BANK_ACCOUNT, func.coalesce(models.Account.balance, 0)),
+            (models.GoalAsset.type == models.GoalAssetType.MANUAL, func.coalesce(models.GoalAsset.manual_amount, 0)),
+            else_=0
+        )
+
+    @staticmethod
+    def get_goals(db: Session, tenant_id: str) -> List[dict]:
+        """
+        Goals with progress in a constant number of queries (3), independent of goal count:
+        1. goals + aggregated holdings / asset value per goal
+        2. holding detail rows for all goals
+        3. asset detail rows for all goals
+        Rows are serialized straight to dicts; no ORM -> pydantic -> dict round trips.
+        """
+        Holding, Asset, Goal = models.MutualFundHolding, models.GoalAsset, models.InvestmentGoal
+
+        holding_totals = db.query(
+            Holding.goal_id.label("goal_id"),
+            func.sum(InvestmentGoalService._holding_value_expr()).label("value"),
+            func.count(Holding.id).label("count")
         ).filter(
-            models.InvestmentGoal.tenant_id == tenant_id
+            Holding.tenant_id == tenant_id,
+            Holding.goal_id.isnot(None)
+        ).group_by(Holding.goal_id).subquery()
+
+        asset_totals = db.query(
+            Asset.goal_id.label("goal_id"),
+            func.sum(InvestmentGoalService._asset_value_expr()).label("value")
+        ).outerjoin(
+            models.Account, models.Account.id == Asset.linked_account_id
+        ).filter(
+            Asset.tenant_id == tenant_id
+        ).group_by(Asset.goal_id).subquery()
+
+        goal_rows = db.query(
+            Goal,
+            holding_totals.c.value, holding_totals.c.count,
+            asset_totals.c.value
+        ).outerjoin(
+            holding_totals, holding_totals.c.goal_id == Goal.id
+        ).outerjoin(
+            asset_totals, asset_totals.c.goal_id == Goal.id
+        ).filter(Goal.tenant_id == tenant_id).all()
+
+        if not goal_rows:
+            return []
+
+        holdings_by_goal = defaultdict(list)
+        holding_rows = db.query(
+            Holding.id, Holding.goal_id, Holding.scheme_code, Holding.folio_number,
+            models.MutualFundsMeta.scheme_name,
+            InvestmentGoalService._holding_value_expr().label("value")
+        ).outerjoin(
+            models.MutualFundsMeta, models.MutualFundsMeta.scheme_code == Holding.scheme_code
+        ).filter(
+            Holding.tenant_id == tenant_id,
+            Holding.goal_id.isnot(None)
         ).all()
-        
+        for h in holding_rows:
+            if h.scheme_name:
+                name = h.scheme_name
+            elif h.folio_number:
+                name = f"Fund (Folio: {h.folio_number})"
+            else:
+                name = f"Fund ({h.scheme_code})"
+            holdings_by_goal[h.goal_id].append({
+                "id": h.id,
+                "scheme_name": name,
+                "folio_number": h.folio_number,
+                "current_value": Decimal(str(h.value or 0))
+            })
+
+        assets_by_goal = defaultdict(list)
+        asset_rows = db.query(
+            Asset.id, Asset.goal_id, Asset.type, Asset.name, Asset.manual_amount,
+            Asset.interest_rate, Asset.linked_account_id, Asset.created_at,
+            models.Account.name.label("account_name"),
+            InvestmentGoalService._asset_value_expr().label("value")
+        ).outerjoin(
+            models.Account, models.Account.id == Asset.linked_account_id
+        ).filter(Asset.tenant_id == tenant_id).all()
+        for a in asset_rows:
+            type_str = str(a.type.value if hasattr(a.type, 'value') else a.type).upper()
+            if type_str == "BANK_ACCOUNT":
+                display_name = a.account_name or a.name or "Linked Bank Account"
+            else:
+                display_name = a.name or "Unnamed Asset"
+            assets_by_goal[a.goal_id].append({
+                "id": a.id,
+                "goal_id": a.goal_id,
+                "type": type_str,
+                "name": a.name,
+                "display_name": display_name,
+                "manual_amount": a.manual_amount,
+                "interest_rate": a.interest_rate,
+                "linked_account_id": a.linked_account_id,
+                "current_value": Decimal(str(a.value or 0)),
+                "created_at": a.created_at
+            })
+
         results = []
-        for goal in goals:
-            # 1. Process MF Holdings (Explicit Query)
-            mf_holdings = db.query(models.MutualFundHolding).options(
-                joinedload(models.MutualFundHolding.meta)
-            ).filter(
-                models.MutualFundHolding.goal_id == goal.id,
-                models.MutualFundHolding.tenant_id == tenant_id
-            ).all()
-
-            mf_amount = Decimal('0.0')
-            processed_holdings = []
-            for h in mf_holdings:
-                # Calculate amount
-                h_val = Decimal('0.0')
-                if h.current_value:
-                    h_val = Decimal(str(h.current_value))
-                elif h.units and h.last_nav:
-                    h_val = Decimal(str(float(h.units) * float(h.last_nav)))
-                
-                mf_amount += h_val
-                
-                # Build detail object
-                processed_holdings.append(schemas.GoalHoldingRead(
-                    id=h.id,
-                    scheme_name=h.scheme_name,
-                    folio_number=h.folio_number,
-                    current_value=h_val
-                ))
-            
-            # 2. Process Assets (Explicit Query)
-            goal_assets = db.query(models.GoalAsset).options(
-                joinedload(models.GoalAsset.linked_account)
-            ).filter(
-                models.GoalAsset.goal_id == goal.id,
-                models.GoalAsset.tenant_id == tenant_id
-            ).all()
-
-            asset_amount = Decimal('0.0')
-            processed_assets = []
-            for a in goal_assets:
-                # Calculate amount
-                asset_val = Decimal('0.0')
-                type_str = str(a.type.value if hasattr(a.type, 'value') else a.type).upper()
-                if type_str == "BANK_ACCOUNT" and a.linked_account:
-                    asset_val = Decimal(str(a.linked_account.balance or 0))
-                elif type_str == "MANUAL":
-                    asset_val = Decimal(str(a.manual_amount or 0))
-                
-                asset_amount += asset_val
-                
-                # Build detail object
-                processed_assets.append(schemas.GoalAssetRead(
-                    id=a.id,
-                    goal_id=goal.id,
-                    type=type_str,
-                    name=a.name,
-                    display_name=a.display_name,
-                    manual_amount=a.manual_amount,
-                    current_value=asset_val,
-                    created_at=a.created_at
-                ))
-
-            current_amount = mf_amount + asset_amount
+        for goal, mf_value, holdings_count, asset_value in goal_rows:
+            current_amount = Decimal(str(mf_value or 0)) + Decimal(str(asset_value or 0))
             progress = 0.0
             if goal.target_amount > 0:
                 progress = min(float(current_amount) / float(goal.target_amount) * 100, 100.0)
-            
-            # Convert to schema
-            goal_data = schemas.InvestmentGoalRead.from_orm(goal)
-
-            results.append(schemas.InvestmentGoalProgress(
-                **goal_data.dict(exclude={'holdings', 'assets'}),
-                holdings=[h.dict() for h in processed_holdings],
-                assets=[a.dict() for a in processed_assets],
-                current_amount=current_amount,
-                progress_percentage=progress,
-                holdings_count=len(processed_holdings),
-                remaining_amount=max(Decimal('0.0'), goal.target_amount - current_amount)
-            ))
-        
+
+            results.append({
+                "id": goal.id,
+                "tenant_id": goal.tenant_id,
+                "name": goal.name,
+                "target_amount": goal.target_amount,
+                "target_date": goal.target_date,
+                "icon": goal.icon,
+                "color": goal.color,
+                "is_completed": goal.is_completed,
+                "created_at": goal.created_at,
+                "holdings": holdings_by_goal.get(goal.id, []),
+                "assets": assets_by_goal.get(goal.id, []),
+                "current_amount": current_amount,
+                "progress_percentage": progress,
+                "holdings_count": holdings_count or 0,
+                "remaining_amount": max(Decimal('0.0'), goal.target_amount - current_amount)
+            })
+
         return results
 
     @staticmethod
@@ -1,8 +1,12 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from backend.app.core.db_writer import db_writer
 from backend.app.modules.finance.models import Account, AccountType, Loan, Transaction, TransactionType
 from backend.app.modules.finance import schemas
+from backend.app.modules.finance.utils.amortization import build_schedule, AmortizationSchedule
 from datetime import datetime
 from decimal import Decimal
+from typing import Optional
 import uuid
 from dateutil.relativedelta import relativedelta
 
@@ -21,25 +25,26 @@ class LoanService:
             billing_day=loan_data.emi_date,
             is_verified=True
         )
-        db.add(new_account)
-        db.flush() # Generate ID
+        with db_writer.exclusive(db):
+            db.add(new_account)
+            db.flush() # Generate ID
         
-        # 2. Create the Loan details
-        new_loan = Loan(
-            id=str(uuid.uuid4()),
-            tenant_id=tenant_id,
-            account_id=new_account.id,
-            principal_amount=loan_data.principal_amount,
-            interest_rate=loan_data.interest_rate,
-            start_date=loan_data.start_date,
-            tenure_months=loan_data.tenure_months,
-            emi_amount=loan_data.emi_amount,
-            emi_date=loan_data.emi_date,
-            loan_type=loan_data.loan_type,
-            bank_account_id=str(loan_data.bank_account_id) if loan_data.bank_account_id else None
-        )
-        db.add(new_loan)
-        db.commit()
+            # 2. Create the Loan details
+            new_loan = Loan(
+                id=str(uuid.uuid4()),
+                tenant_id=tenant_id,
+                account_id=new_account.id,
+                principal_amount=loan_data.principal_amount,
+                interest_rate=loan_data.interest_rate,
+                start_date=loan_data.start_date,
+                tenure_months=loan_data.tenure_months,
+                emi_amount=loan_data.emi_amount,
+                emi_date=loan_data.emi_date,
+                loan_type=loan_data.loan_type,
+                bank_account_id=str(loan_data.bank_account_id) if loan_data.bank_account_id else None
+            )
+            db.add(new_loan)
+            db.commit()
         db.refresh(new_loan)
         
         return self._map_to_read_schema(new_loan, new_account)
@@ -47,74 +52,149 @@ class LoanService:
     def record_repayment(self, db: Session, loan_id: str, repayment: schemas.LoanRepayment, tenant_id: str) -> schemas.LoanRead:
         from backend.app.modules.finance.services.transaction_service import TransactionService
         
-        loan = db.query(Loan).filter(Loan.id == loan_id, Loan.tenant_id == tenant_id).first()
-        if not loan:
-            raise ValueError("Loan not found")
+        with db_writer.exclusive(db):
+            loan = db.query(Loan).filter(Loan.id == loan_id, Loan.tenant_id == tenant_id).first()
+            if not loan:
+                raise ValueError("Loan not found")
             
-        # 1. Create Source Transaction (Debit from Bank)
-        source_data = schemas.TransactionCreate(
-            account_id=repayment.bank_account_id,
-            amount=-repayment.amount,
-            date=repayment.date,
-            description=repayment.description or f"EMI Payment for {loan.account.name}",
-            recipient=loan.account.name,
-            category="Loan Repayment",
-            is_emi=True,
-            loan_id=loan.id,
-            source="LOAN_SERVICE"
-        )
-        source_txn = TransactionService.create_transaction(db, source_data, tenant_id)
+            # 1. Create Source Transaction (Debit from Bank)
+            source_data = schemas.TransactionCreate(
+                account_id=repayment.bank_account_id,
+                amount=-repayment.amount,
+                date=repayment.date,
+                description=repayment.description or f"EMI Payment for {loan.account.name}",
+                recipient=loan.account.name,
+                category="Loan Repayment",
+                is_emi=True,
+                loan_id=loan.id,
+                source="LOAN_SERVICE"
+            )
+            source_txn = TransactionService.create_transaction(db, source_data, tenant_id)
         
-        # 2. Create Target Transaction (Credit to Loan)
-        target_data = schemas.TransactionCreate(
-            account_id=loan.account_id,
-            amount=repayment.amount,
-            date=repayment.date,
-            description=repayment.description or f"Repayment Received",
-            category="Transfer",
-            is_transfer=True,
-            is_emi=True,
-            loan_id=loan.id,
-            linked_transaction_id=str(source_txn.id),
-            source="LOAN_SERVICE"
-        )
-        target_txn = TransactionService.create_transaction(db, target_data, tenant_id)
+            # 2. Create Target Transaction (Credit to Loan)
+            target_data = schemas.TransactionCreate(
+                account_id=loan.account_id,
+                amount=repayment.amount,
+                date=repayment.date,
+                description=repayment.description or f"Repayment Received",
+                category="Transfer",
+                is_transfer=True,
+                is_emi=True,
+                loan_id=loan.id,
+                linked_transaction_id=str(source_txn.id),
+                source="LOAN_SERVICE"
+            )
+            target_txn = TransactionService.create_transaction(db, target_data, tenant_id)
         
-        # Link source back to target (TransactionService doesn't do this automatically for existing txns)
-        source_txn.linked_transaction_id = str(target_txn.id)
-        db.add(source_txn)
-        db.commit()
+            # Link source back to target (TransactionService doesn't do this automatically for existing txns)
+            source_txn.linked_transaction_id = str(target_txn.id)
+            db.add(source_txn)
+            db.commit()
         
         account = db.query(Account).filter(Account.id == loan.account_id).first()
         return self._map_to_read_schema(loan, account)
 
-    def get_loans(self, db: Session, tenant_id: str) -> list[schemas.LoanRead]:
-        loans = db.query(Loan).filter(Loan.tenant_id == tenant_id).all()
+    def _load_loans(self, db: Session, tenant_id: str, loan_id: Optional[str] = None) -> list[tuple]:
+        """
+        Loans, their liability accounts and paid EMI months in a single round trip.
+        Paid months come back as a 'YYYY-MM' list aggregated per loan.
+        """
+        paid = db.query(
+            Transaction.loan_id.label("loan_id"),
+            func.string_agg(func.distinct(func.strftime(Transaction.date, '%Y-%m')), ',').label("paid_months")
+        ).filter(
+            Transaction.tenant_id == tenant_id,
+            Transaction.loan_id.isnot(None),
+            Transaction.is_emi == True,
+            Transaction.type == TransactionType.CREDIT # Repayment entering the loan account
+        ).group_by(Transaction.loan_id).subquery()
+
+        query = db.query(Loan, Account, paid.c.paid_months).join(
+            Account, Account.id == Loan.account_id
+        ).outerjoin(
+            paid, paid.c.loan_id == Loan.id
+        ).filter(Loan.tenant_id == tenant_id)
+
+        if loan_id:
+            query = query.filter(Loan.id == loan_id)
+
         results = []
-        for loan in loans:
-            # Fetch associated account to get current balance
-            account = db.query(Account).filter(Account.id == loan.account_id).first()
-            if account:
-                results.append(self._map_to_read_schema(loan, account))
+        for loan, account, months in query.all():
+            paid_months = frozenset(
+                (int(m[:4]), int(m[5:7])) for m in months.split(',')
+            ) if months else frozenset()
+            results.append((loan, account, paid_months))
         return results
 
+    def get_loans(self, db: Session, tenant_id: str) -> list[schemas.LoanRead]:
+        return [
+            self._map_to_read_schema(loan, account, paid_months)
+            for loan, account, paid_months in self._load_loans(db, tenant_id)
+        ]
+
     def get_loan_details(self, db: Session, loan_id: str, tenant_id: str) -> schemas.LoanDetail:
-        loan = db.query(Loan).filter(Loan.id == loan_id, Loan.tenant_id == tenant_id).first()
-        if not loan:
+        rows = self._load_loans(db, tenant_id, loan_id=loan_id)
+        if not rows:
             return None
-        
-        account = db.query(Account).filter(Account.id == loan.account_id).first()
-        base_read = self._map_to_read_schema(loan, account)
-        
+
+        loan, account, paid_months = rows[0]
+        base_read = self._map_to_read_schema(loan, account, paid_months)
+
         # Generate Amortization Schedule
-        schedule = self._generate_amortization_schedule(db, loan)
-        
+        schedule = self._schedule_for(loan)
+
         return schemas.LoanDetail(
             **base_read.dict(),
-            amortization_schedule=schedule
+            amortization_schedule=schedule.to_rows(paid_months)
         )
 
-    def _map_to_read_schema(self, loan: Loan, account: Account) -> schemas.LoanRead:
+    def simulate_scenario(self, db: Session, loan_id: str, scenario: schemas.LoanScenario, tenant_id: str) -> schemas.LoanScenarioResult:
+        """
+        What-if comparison of the contracted schedule against prepayments and/or rate changes.
+        """
+        rows = self._load_loans(db, tenant_id, loan_id=loan_id)
+        if not rows:
+            raise ValueError("Loan not found")
+        loan, _, paid_months = rows[0]
+
+        baseline = self._schedule_for(loan)
+        projected = self._schedule_for(
+            loan,
+            prepayments=tuple(sorted((p.installment_no, float(p.amount)) for p in scenario.prepayments)),
+            rate_changes=tuple(sorted((c.installment_no, float(c.interest_rate)) for c in scenario.rate_changes)),
+            strategy=scenario.strategy
+        )
+
+        return schemas.LoanScenarioResult(
+            baseline=self._summarize(baseline),
+            scenario=self._summarize(projected),
+            interest_saved=round(baseline.total_interest - projected.total_interest, 2),
+            months_saved=len(baseline) - len(projected),
+            amortization_schedule=projected.to_rows(paid_months) if scenario.include_schedule else []
+        )
+
+    @staticmethod
+    def _schedule_for(loan: Loan, **scenario) -> AmortizationSchedule:
+        # build_schedule is memoized on the loan terms, so repeat detail views are free
+        return build_schedule(
+            float(loan.principal_amount),
+            float(loan.interest_rate),
+            loan.start_date,
+            int(loan.tenure_months),
+            float(loan.emi_amount),
+            **scenario
+        )
+
+    @staticmethod
+    def _summarize(schedule: AmortizationSchedule) -> schemas.LoanScenarioSummary:
+        return schemas.LoanScenarioSummary(
+            installments=len(schedule),
+            total_interest=round(schedule.total_interest, 2),
+            total_paid=round(schedule.total_paid, 2),
+            payoff_date=schedule.payoff_date
+        )
+
+    def _map_to_read_schema(self, loan: Loan, account: Account, paid_months: frozenset = frozenset()) -> schemas.LoanRead:
         outstanding = account.balance
         principal = loan.principal_amount
         paid = principal - outstanding
@@ -144,61 +224,6 @@ class LoanService:
             paid_principal=paid,
             progress_percentage=round(float(progress), 2),
             next_emi_date=next_date,
+            paid_emi_count=len(paid_months),
             created_at=loan.created_at
         )
-
-    def _generate_amortization_schedule(self, db: Session, loan: Loan) -> list[schemas.AmortizationScheduleItem]:
-        # Fetch actual transactions to determine exact status
-        paid_emi_txns = db.query(Transaction).filter(
-            Transaction.loan_id == loan.id,
-            Transaction.is_emi == True,
-            Transaction.type == TransactionType.CREDIT # Repayment entering the loan account
-        ).all()
-
-        paid_months = set((t.date.year, t.date.month) for t in paid_emi_txns)
-
-        schedule = []
-        balance = loan.principal_amount
-        r = (loan.interest_rate / 12) / 100 # Monthly interest rate
-        
-        current_date = loan.start_date
-        
-        for i in range(1, int(loan.tenure_months) + 1):
-            interest = balance * r
-            principal_part = loan.emi_amount - interest
-            
-            # Handling last installment rounding
-            if balance < loan.emi_amount and i == int(loan.tenure_months):
-                principal_part = balance
-                emi = principal_part + interest
-            else:
-                emi = loan.emi_amount
-            
-            closing_balance = balance - principal_part
-            if closing_balance < 0: closing_balance = 0
-            
-            # Determine status
-            status = "PENDING"
-            if (current_date.year, current_date.month) in paid_months:
-                status = "PAID"
-            elif current_date < datetime.utcnow():
-                status = "OVERDUE"
-            
-            schedule.append(schemas.AmortizationScheduleItem(
-                installment_no=i,
-                due_date=current_date,
-                opening_balance=round(balance, 2),
-                emi=round(emi, 2),
-                principal_component=round(principal_part, 2),
-                interest_component=round(interest, 2),
-                closing_balance=round(closing_balance, 2),
-                status=status
-            ))
-            
-            balance = closing_balance
-            current_date = current_date + relativedelta(months=1)
-            
-            if balance <= 0:
-                break
-                
-        return schedule
@@ -0,0 +1,165 @@
+import logging
+import math
+import random
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Protocol
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+INDICES = (
+    ("NIFTY 50", "^NSEI"),
+    ("SENSEX", "^BSESN"),
+    ("BANK NIFTY", "^NSEBANK"),
+)
+SPARKLINE_POINTS = 20
+
+# Served as-is for FRESH_SECONDS; after that the next read (or the refresher) revalidates in the background
+FRESH_SECONDS = 60
+# The scheduled refresher stops polling the upstream when nobody has asked for this long
+IDLE_SECONDS = 600
+
+
+@dataclass(frozen=True)
+class IndexQuote:
+    name: str
+    price: float
+    previous_close: float
+    sparkline: array  # array('f'): 4 bytes per point
+
+    def to_dict(self) -> dict:
+        change = self.price - self.previous_close
+        percent = (change / self.previous_close) * 100 if self.previous_close else 0.0
+        return {
+            "name": self.name,
+            "value": f"{self.price:,.2f}",
+            "change": f"{change:+.2f}",
+            "percent": f"{percent:+.2f}%",
+            "isUp": change >= 0,
+            "sparkline": [round(v, 2) for v in self.sparkline],
+        }
+
+
+def _placeholder(name: str, value: str = "Unavailable") -> dict:
+    return {"name": name, "value": value, "change": "0.00", "percent": "0.00%", "isUp": True}
+
+
+class IndicesUpstream(Protocol):
+    def fetch(self, symbol: str, name: str) -> Optional[IndexQuote]: ...
+
+
+class YahooChartUpstream:
+    """Yahoo chart API over one pooled client (keep-alive across refreshes)."""
+    URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=5m&range=1d"
+
+    def __init__(self, timeout: float = 5.0):
+        self._client = httpx.Client(timeout=timeout, headers={"User-Agent": "Mozilla/5.0"})
+
+    def fetch(self, symbol: str, name: str) -> Optional[IndexQuote]:
+        response = self._client.get(self.URL.format(symbol=symbol))
+        if response.status_code != 200:
+            return None
+        result = response.json()["chart"]["result"][0]
+        meta = result["meta"]
+        closes = [c for c in result["indicators"]["quote"][0].get("close", []) if c is not None]
+        return IndexQuote(
+            name=name,
+            price=float(meta["regularMarketPrice"]),
+            previous_close=float(meta["chartPreviousClose"]),
+            sparkline=array("f", closes[-SPARKLINE_POINTS:]),
+        )
+
+
+class FakeIndicesUpstream:
+    """Deterministic offline upstream (tests, demo mode, air-gapped installs)."""
+    BASES = {"^NSEI": 24000.0, "^BSESN": 79000.0, "^NSEBANK": 51000.0}
+
+    def __init__(self, seed: int = 7):
+        self._seed = seed
+        self.calls = 0
+
+    def fetch(self, symbol: str, name: str) -> Optional[IndexQuote]:
+        self.calls += 1
+        rng = random.Random(f"{self._seed}:{symbol}:{self.calls}")
+        base = self.BASES.get(symbol, 1000.0)
+        points = [base * (1 + 0.002 * math.sin(i / 3) + rng.uniform(-0.001, 0.001)) for i in range(SPARKLINE_POINTS)]
+        return IndexQuote(name=name, price=points[-1], previous_close=base, sparkline=array("f", points))
+
+
+class MarketIndicesCache:
+    """
+    Process-wide stale-while-revalidate cache for the /indices payload.
+
+    Readers always get the last snapshot from memory; a stale snapshot schedules one
+    background refresh (single-flight). On a failed upstream call the previous quote
+    for that index is kept, so a Yahoo hiccup never blanks the dashboard.
+    """
+
+    def __init__(self, upstream: IndicesUpstream, fresh_seconds: float = FRESH_SECONDS):
+        self.upstream = upstream
+        self.fresh_seconds = fresh_seconds
+        self._quotes: Dict[str, IndexQuote] = {}
+        self._payload: Optional[List[dict]] = None
+        self._fetched_at = 0.0
+        self._last_read = 0.0
+        self._refreshing = threading.Lock()
+
+    def get(self) -> List[dict]:
+        self._last_read = time.monotonic()
+        if time.monotonic() - self._fetched_at >= self.fresh_seconds:
+            self.revalidate_async()
+        if self._payload is None:
+            return [_placeholder(name) for name, _ in INDICES]
+        return self._payload
+
+    def revalidate_async(self):
+        if self._refreshing.locked():
+            return
+        threading.Thread(target=self.refresh, name="indices-refresh", daemon=True).start()
+
+    def refresh(self) -> bool:
+        """Fetch every index once; returns False if another refresh is already running."""
+        if not self._refreshing.acquire(blocking=False):
+            return False
+        try:
+            quotes = dict(self._quotes)
+            for name, symbol in INDICES:
+                try:
+                    quote = self.upstream.fetch(symbol, name)
+                    if quote is not None:
+                        quotes[symbol] = quote
+                except Exception as e:
+                    logger.warning(f"Index fetch failed for {symbol}: {e}")
+            self._quotes = quotes
+            self._payload = [
+                quotes[symbol].to_dict() if symbol in quotes else _placeholder(name)
+                for name, symbol in INDICES
+            ]
+            self._fetched_at = time.monotonic()
+            return True
+        finally:
+            self._refreshing.release()
+
+    def refresh_if_active(self):
+        """Scheduler hook: warm the cache once, then keep it warm only while clients are polling."""
+        if self._payload is None or time.monotonic() - self._last_read < IDLE_SECONDS:
+            self.refresh()
+
+
+_cache: Optional[MarketIndicesCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_indices_cache() -> MarketIndicesCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from backend.app.core.config import settings
+                upstream = FakeIndicesUpstream() if settings.MARKET_INDICES_UPSTREAM == "fake" else YahooChartUpstream()
+                _cache = MarketIndicesCache(upstream)
+    return _cache
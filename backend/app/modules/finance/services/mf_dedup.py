@@ -0,0 +1,117 @@
+from datetime import datetime, date
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from backend.app.modules.finance.models import MutualFundOrder
+
+# Keys round to the comparison tolerance used historically (units < 0.001, amount < 0.01)
+UNITS_DECIMALS = 3
+AMOUNT_DECIMALS = 2
+
+BUY_TYPES = {"BUY", "DEBIT", "PURCHASE", "PURCHASE_SIP", "SWITCH_IN", "SIP", "STP_IN"}
+SELL_TYPES = {"SELL", "CREDIT", "REDEMPTION", "SWITCH_OUT", "STP_OUT"}
+
+
+def normalize_type(t_str) -> str:
+    t = str(t_str or "BUY").upper().strip()
+    if t in BUY_TYPES: return "BUY"
+    if t in SELL_TYPES: return "SELL"
+    return t
+
+
+def parse_order_date(raw) -> Optional[date]:
+    """Accepts datetime/date or the string shapes CAS previews send back."""
+    if isinstance(raw, datetime):
+        return raw.date()
+    if isinstance(raw, date):
+        return raw
+    if isinstance(raw, str):
+        value = raw.split('T')[0] if 'T' in raw else raw
+        for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S"):
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+    return None
+
+
+def order_key(scheme_code, order_date, txn_type, units, amount) -> Optional[Tuple]:
+    d = parse_order_date(order_date)
+    if d is None:
+        return None
+    return (
+        str(scheme_code).strip(),
+        d,
+        normalize_type(txn_type),
+        round(abs(float(units or 0)), UNITS_DECIMALS),
+        round(abs(float(amount or 0)), AMOUNT_DECIMALS),
+    )
+
+
+class MFOrderDedupIndex:
+    """
+    Hash index over a tenant's existing MF orders for the schemes touched by a batch.
+
+    Loaded with one query; duplicate checks are then dict lookups. The same instance is
+    used by CAS preview (flagging) and import (idempotency), and import registers each new
+    order so repeated rows inside one statement are caught too.
+    Matching rules: external_id per user; field key per user, also matching legacy orders
+    that have no user_id.
+    """
+
+    def __init__(self):
+        self._by_external: Dict[Tuple[Optional[str], str], object] = {}
+        self._by_key: Dict[Tuple[Optional[str], Tuple], object] = {}
+
+    @classmethod
+    def load(cls, db: Session, tenant_id: str, scheme_codes: Iterable) -> "MFOrderDedupIndex":
+        index = cls()
+        codes = sorted({str(c).strip() for c in scheme_codes if c})
+        if not codes:
+            return index
+        rows = db.query(
+            MutualFundOrder.id, MutualFundOrder.user_id, MutualFundOrder.scheme_code,
+            MutualFundOrder.order_date, MutualFundOrder.type, MutualFundOrder.units,
+            MutualFundOrder.amount, MutualFundOrder.external_id
+        ).filter(
+            MutualFundOrder.tenant_id == tenant_id,
+            MutualFundOrder.scheme_code.in_(codes)
+        ).all()
+        for row in rows:
+            index._register(row, row.user_id, row.external_id,
+                            order_key(row.scheme_code, row.order_date, row.type, row.units, row.amount))
+        return index
+
+    def _register(self, order, user_id, external_id, key):
+        if external_id:
+            self._by_external.setdefault((user_id, external_id), order)
+        if key is not None:
+            self._by_key.setdefault((user_id, key), order)
+
+    def add(self, order: MutualFundOrder):
+        """Register a freshly created order (must expose id/user_id/... attributes)."""
+        self._register(order, order.user_id, order.external_id,
+                       order_key(order.scheme_code, order.order_date, order.type, order.units, order.amount))
+
+    def find(self, txn: dict) -> Optional[object]:
+        """Existing order (row with .id) that `txn` duplicates, if any."""
+        if not txn.get('scheme_code'):
+            return None
+        user_id = txn.get('user_id')
+        external_id = txn.get('external_id')
+        if external_id:
+            hit = self._by_external.get((user_id, external_id))
+            if hit is not None:
+                return hit
+
+        key = order_key(txn['scheme_code'], txn.get('date'), txn.get('type', 'BUY'), txn.get('units'), txn.get('amount'))
+        if key is None:
+            return None
+        hit = self._by_key.get((user_id, key))
+        if hit is None and user_id is not None:
+            hit = self._by_key.get((None, key))
+        return hit
+
+    def flag(self, transactions: List[dict]) -> List[dict]:
+        for txn in transactions:
+            txn['is_duplicate'] = self.find(txn) is not None
+        return transactions
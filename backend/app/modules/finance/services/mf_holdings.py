@@ -0,0 +1,216 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from backend.app.modules.finance.models import MutualFundHolding, MutualFundOrder
+
+# A holding is identified by (user_id, scheme_code, folio_number); user and folio may be NULL
+HoldingKey = Tuple[Optional[str], str, Optional[str]]
+
+
+@dataclass
+class Position:
+    units: float = 0.0
+    average_price: float = 0.0
+    first_nav: Optional[float] = None
+    first_date: Optional[datetime] = None
+
+    def apply(self, order_type: str, units, amount, nav, order_date: datetime) -> "Position":
+        """Fold one order into the position (weighted average cost on BUY, clamp at zero on SELL)."""
+        units = float(units or 0.0)
+        if order_type == "BUY":
+            amount = float(amount or 0.0)
+            txn_cost = amount if amount > 0 else float(nav or 0.0) * units
+            total_units = self.units + units
+            self.average_price = (self.average_price * self.units + txn_cost) / total_units if total_units > 0 else 0.0
+            self.units = total_units
+        elif order_type == "SELL":
+            self.units = max(0.0, self.units - units)
+
+        if not self.first_nav:
+            self.first_nav = float(nav or 0.0) or None
+            self.first_date = order_date
+        return self
+
+
+class HoldingsEngine:
+    """
+    Derives MutualFundHolding rows from MutualFundOrder rows.
+
+    - rebuild(): one ordered scan of the scoped orders, folded per holding key in memory,
+      then bulk insert/update/delete of holdings and one UPDATE ... FROM to link orders.
+    - apply_order(): O(1) delta for an order appended after the holding's latest order;
+      back-dated orders replay only their own scheme.
+    Existing holding rows are updated in place, so ids, goal links and refreshed NAVs survive.
+    """
+
+    @staticmethod
+    def _key(user_id, scheme_code, folio_number) -> HoldingKey:
+        return (user_id, str(scheme_code), folio_number or None)
+
+    @staticmethod
+    def aggregate(rows: Iterable) -> Dict[HoldingKey, Position]:
+        """rows: (user_id, scheme_code, folio_number, type, units, amount, nav, order_date), date ordered."""
+        positions: Dict[HoldingKey, Position] = {}
+        for user_id, scheme_code, folio, order_type, units, amount, nav, order_date in rows:
+            key = HoldingsEngine._key(user_id, scheme_code, folio)
+            pos = positions.get(key)
+            if pos is None:
+                pos = positions[key] = Position()
+            pos.apply(order_type, units, amount, nav, order_date)
+        return positions
+
+    @staticmethod
+    def _scope(query, model, tenant_id: str, user_id: Optional[str], scheme_codes: Optional[List[str]]):
+        query = query.filter(model.tenant_id == tenant_id)
+        if user_id:
+            query = query.filter(model.user_id == user_id)
+        if scheme_codes is not None:
+            query = query.filter(model.scheme_code.in_(scheme_codes))
+        return query
+
+    @staticmethod
+    def rebuild(db: Session, tenant_id: str, user_id: Optional[str] = None,
+                scheme_codes: Optional[Iterable[str]] = None) -> int:
+        """Recompute holdings for the scope (whole tenant by default). Returns orders processed. Caller commits."""
+        codes = sorted({str(c) for c in scheme_codes if c}) if scheme_codes is not None else None
+        if codes == []:
+            return 0
+        # Sessions do not autoflush: orders the caller just added must be visible to the scan
+        db.flush()
+
+        order_rows = HoldingsEngine._scope(db.query(
+            MutualFundOrder.user_id, MutualFundOrder.scheme_code, MutualFundOrder.folio_number,
+            MutualFundOrder.type, MutualFundOrder.units, MutualFundOrder.amount,
+            MutualFundOrder.nav, MutualFundOrder.order_date
+        ), MutualFundOrder, tenant_id, user_id, codes).order_by(
+            MutualFundOrder.order_date, MutualFundOrder.created_at
+        ).all()
+        positions = HoldingsEngine.aggregate(order_rows)
+
+        existing = HoldingsEngine._scope(db.query(
+            MutualFundHolding.id, MutualFundHolding.user_id, MutualFundHolding.scheme_code,
+            MutualFundHolding.folio_number, MutualFundHolding.last_nav, MutualFundHolding.last_updated_at
+        ), MutualFundHolding, tenant_id, user_id, codes).all()
+
+        current: Dict[HoldingKey, tuple] = {}
+        stale_ids = []
+        for row in existing:
+            key = HoldingsEngine._key(row.user_id, row.scheme_code, row.folio_number)
+            if key in positions and key not in current:
+                current[key] = row
+            else:
+                stale_ids.append(row.id)  # no orders left, or a duplicate row for the same key
+
+        inserts, updates = [], []
+        for key, pos in positions.items():
+            row = current.get(key)
+            if row is not None and row.last_nav and float(row.last_nav) > 0:
+                last_nav, nav_date = float(row.last_nav), row.last_updated_at
+            else:
+                last_nav, nav_date = pos.first_nav, pos.first_date
+            values = {
+                "units": pos.units,
+                "average_price": pos.average_price,
+                "last_nav": last_nav,
+                "last_updated_at": nav_date,
+                "current_value": pos.units * (last_nav or 0.0),
+            }
+            if row is not None:
+                updates.append({"id": row.id, **values})
+            else:
+                user, scheme_code, folio = key
+                inserts.append({
+                    "id": str(uuid.uuid4()), "tenant_id": tenant_id, "user_id": user,
+                    "scheme_code": scheme_code, "folio_number": folio, **values
+                })
+
+        if stale_ids:
+            db.query(MutualFundHolding).filter(MutualFundHolding.id.in_(stale_ids)).delete(synchronize_session=False)
+        if updates:
+            db.bulk_update_mappings(MutualFundHolding, updates)
+        if inserts:
+            db.bulk_insert_mappings(MutualFundHolding, inserts)
+
+        if positions:
+            link = update(MutualFundOrder).where(
+                MutualFundOrder.tenant_id == tenant_id,
+                MutualFundHolding.tenant_id == tenant_id,
+                MutualFundHolding.scheme_code == MutualFundOrder.scheme_code,
+                MutualFundHolding.user_id.is_not_distinct_from(MutualFundOrder.user_id),
+                MutualFundHolding.folio_number.is_not_distinct_from(MutualFundOrder.folio_number),
+            ).values(holding_id=MutualFundHolding.id)
+            if user_id:
+                link = link.where(MutualFundOrder.user_id == user_id)
+            if codes is not None:
+                link = link.where(MutualFundOrder.scheme_code.in_(codes))
+            db.execute(link, execution_options={"synchronize_session": False})
+        db.flush()
+        return len(order_rows)
+
+    @staticmethod
+    def apply_order(db: Session, tenant_id: str, order: MutualFundOrder) -> MutualFundOrder:
+        """Incrementally fold a new (pending or flushed) order into its holding. Caller commits."""
+        key = HoldingsEngine._key(order.user_id, order.scheme_code, order.folio_number)
+        user_id, scheme_code, folio = key
+
+        query = db.query(MutualFundHolding).filter(
+            MutualFundHolding.tenant_id == tenant_id,
+            MutualFundHolding.user_id == user_id,
+            MutualFundHolding.scheme_code == scheme_code,
+            MutualFundHolding.folio_number == folio if folio else MutualFundHolding.folio_number.is_(None)
+        )
+        holding = query.first()
+
+        if holding is not None:
+            later = db.query(MutualFundOrder.id).filter(
+                MutualFundOrder.tenant_id == tenant_id,
+                MutualFundOrder.user_id == user_id,
+                MutualFundOrder.scheme_code == scheme_code,
+                MutualFundOrder.folio_number == folio if folio else MutualFundOrder.folio_number.is_(None),
+                MutualFundOrder.order_date > order.order_date
+            ).first()
+            if later:
+                # Back-dated: average cost is path dependent, replay just this scheme
+                HoldingsEngine.rebuild(db, tenant_id, user_id=user_id, scheme_codes=[scheme_code])
+                return order
+        else:
+            holding = MutualFundHolding(
+                id=str(uuid.uuid4()), tenant_id=tenant_id, user_id=user_id, scheme_code=scheme_code,
+                folio_number=folio, units=0, average_price=0
+            )
+            db.add(holding)
+
+        pos = Position(
+            units=float(holding.units or 0.0),
+            average_price=float(holding.average_price or 0.0),
+            first_nav=float(holding.last_nav) if holding.last_nav else None,
+            first_date=holding.last_updated_at,
+        ).apply(order.type, order.units, order.amount, order.nav, order.order_date)
+
+        holding.units = pos.units
+        holding.average_price = pos.average_price
+        if not holding.last_nav or float(holding.last_nav) == 0:
+            holding.last_nav = pos.first_nav
+            holding.last_updated_at = order.order_date
+        holding.current_value = pos.units * float(holding.last_nav or 0.0)
+
+        order.holding_id = holding.id
+        db.flush()
+        return order
+
+    @staticmethod
+    def remove_orders(db: Session, tenant_id: str, order_ids: List[str]) -> int:
+        """Delete orders and re-derive only the schemes they belonged to. Caller commits."""
+        if not order_ids:
+            return 0
+        rows = db.query(MutualFundOrder.scheme_code).filter(
+            MutualFundOrder.tenant_id == tenant_id, MutualFundOrder.id.in_(order_ids)
+        ).all()
+        db.query(MutualFundOrder).filter(
+            MutualFundOrder.tenant_id == tenant_id, MutualFundOrder.id.in_(order_ids)
+        ).delete(synchronize_session=False)
+        HoldingsEngine.rebuild(db, tenant_id, scheme_codes={sc for (sc,) in rows})
+        return len(rows)  # DuckDB reports -1 for DELETE rowcount
@@ -1,34 +1,19 @@
-import threading
 import time
 import httpx
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import List, Optional
+from backend.app.core.config import settings
+from backend.app.core.db_writer import db_writer
 from backend.app.modules.finance.models import MutualFundsMeta, MutualFundHolding, MutualFundOrder
+from backend.app.modules.finance.services.scheme_master import SchemeMaster
+from backend.app.modules.finance.services.mf_dedup import MFOrderDedupIndex
+from backend.app.modules.finance.services.mf_holdings import HoldingsEngine
 
-MFAPI_BASE_URL = "https://api.mfapi.in/mf"
-
-# Global lock for DuckDB writes to prevent Conflict on Update within this process
-_db_write_lock = threading.Lock()
+MFAPI_BASE_URL = settings.MFAPI_BASE_URL
 
 class MutualFundService:
     
-    @staticmethod
-    def _safe_commit(db: Session, max_retries: int = 5):
-        """Helper to commit with retries. With global lock, this is mostly a fallback."""
-        for i in range(max_retries):
-            try:
-                db.commit()
-                return
-            except Exception as e:
-                if "Conflict" in str(e) and i < max_retries - 1:
-                    import time
-                    time.sleep(0.1 * (2 ** i))
-                    db.rollback()
-                    # CRITICAL: We don't continue because rollback cleared the session.
-                    # This should now be prevented by the global lock.
-                raise e
-    
     @staticmethod
     def get_mock_returns(scheme_code: str) -> float:
         try:
@@ -42,55 +27,14 @@ class MutualFundService:
             return 12.0
 
     @staticmethod
-    def search_funds(query: Optional[str] = None, category: Optional[str] = None, amc: Optional[str] = None, limit: int = 20, offset: int = 0, sort_by: str = 'relevance', all_funds_cache: Optional[List[dict]] = None):
+    def search_funds(query: Optional[str] = None, category: Optional[str] = None, amc: Optional[str] = None, limit: int = 20, offset: int = 0, sort_by: str = 'relevance'):
+        """Served from the local scheme master index (no network on the request path)."""
         try:
-            # Fetch the main list from MFAPI if not provided
-            if all_funds_cache:
-                all_funds = all_funds_cache
-            else:
-                response = httpx.get(f"{MFAPI_BASE_URL}")
-                if response.status_code == 200:
-                    all_funds = response.json()
-                else:
-                    return []
-            
-            # Continue with processing...
-            if True: # indent preservation wrapper
-                query_low = query.lower() if query else None
-                cat_low = category.lower() if category else None
-                amc_low = amc.lower() if amc else None
-
-                # Optimization: Direct filter if possible, otherwise iterate
-                filtered_funds = []
-                for f in all_funds:
-                    scheme_name = f.get('schemeName', '').lower()
-                    
-                    # Filtering logic
-                    match = True
-                    if query_low and query_low not in scheme_name:
-                        match = False
-                    if cat_low and cat_low not in scheme_name: 
-                        match = False
-                    if amc_low and amc_low not in scheme_name: 
-                        match = False
-                        
-                    if match:
-                        filtered_funds.append(f)
-
-                # Sorting
-                if sort_by == 'returns_desc':
-                    filtered_funds.sort(key=lambda x: MutualFundService.get_mock_returns(str(x.get('schemeCode'))), reverse=True)
-                elif sort_by == 'returns_asc':
-                    filtered_funds.sort(key=lambda x: MutualFundService.get_mock_returns(str(x.get('schemeCode'))))
-                # Default 'relevance' keeps original order (usually by scheme code or alphabetical from API)
-
-                # Pagination
-                start = offset
-                end = offset + limit
-                results = filtered_funds[start:end]
-                            
-                return results
-            return []
+            index = SchemeMaster.get_index()
+            return index.search(
+                query=query, category=category, amc=amc, limit=limit, offset=offset, sort_by=sort_by,
+                returns_key=lambda f: MutualFundService.get_mock_returns(str(f.get('schemeCode')))
+            )
         except Exception as e:
             return []
 
@@ -110,34 +54,19 @@ class MutualFundService:
 
     @staticmethod
     def map_transactions_to_schemes(transactions: List[dict]):
-        """Map raw transaction names/AMFI codes to MFAPI scheme codes."""
+        """Map raw transaction names/AMFI codes/ISINs to MFAPI scheme codes via the local scheme master."""
         if not transactions:
             return []
             
-        all_funds = []
-        amfi_map = {}
-        try:
-            import httpx
-            resp = httpx.get("https://api.mfapi.in/mf", timeout=10.0)
-            if resp.status_code == 200:
-                all_funds = resp.json()
-                amfi_map = {str(f['schemeCode']): f for f in all_funds}
-        except Exception:
-            pass
+        index = SchemeMaster.get_index()
+        matches = {}  # A CAS repeats the same few schemes across hundreds of rows
         mapped_results = []
         for txn in transactions:
-            matched_scheme = None
-            amfi_code = txn.get('amfi')
-            
-            # 1. Try AMFI lookup
-            if amfi_code and str(amfi_code) in amfi_map:
-                matched_scheme = amfi_map[str(amfi_code)]
-            
-            # 2. Fallback to Name Search - Pass cache to avoid redundant fetches
-            if not matched_scheme:
-                results = MutualFundService.search_funds(txn['scheme_name'], all_funds_cache=all_funds)
-                if results:
-                    matched_scheme = results[0]
+            # AMFI code -> ISIN -> exact name -> fuzzy name (all in-memory)
+            key = (txn.get('scheme_name'), txn.get('amfi'), txn.get('isin'))
+            if key not in matches:
+                matches[key] = index.match(key[0], amfi=key[1], isin=key[2])
+            matched_scheme = matches[key]
             
             if matched_scheme:
                 txn['scheme_code'] = matched_scheme['schemeCode']
@@ -159,104 +88,20 @@ class MutualFundService:
         """
         Check which transactions are duplicates of existing orders.
         Returns the same list with 'is_duplicate' flag set.
+        Candidate orders for all touched schemes are loaded once (see MFOrderDedupIndex).
         """
-        from sqlalchemy import func
-        from datetime import datetime, date
-        
-        for txn in transactions:
-            is_duplicate = False
-            
-            # Only check if successfully mapped
-            if txn.get('scheme_code'):
-                user_id = txn.get('user_id')
-                scheme_code = str(txn.get('scheme_code'))
-                external_id = txn.get('external_id')
-                
-                # Priority 1: Check by external_id
-                if external_id:
-                    existing = db.query(MutualFundOrder.id).filter(
-                        MutualFundOrder.tenant_id == tenant_id,
-                        MutualFundOrder.user_id == user_id,
-                        MutualFundOrder.external_id == external_id
-                    ).first()
-                    if existing:
-                        is_duplicate = True
-                
-                # Priority 2: Check by field match
-                if not is_duplicate:
-                    txn_date_raw = txn.get('date')
-                    if isinstance(txn_date_raw, str):
-                        # Handle ISO format with T
-                        if 'T' in txn_date_raw:
-                             txn_date_raw = txn_date_raw.split('T')[0]
-                        
-                        # Parse string date
-                        for fmt in ("%Y-%m-%d", "%d-%m-%Y", "%Y-%m-%d %H:%M:%S"):
-                            try:
-                                txn_date_raw = datetime.strptime(txn_date_raw, fmt)
-                                break
-                            except: continue
-                    
-                    if isinstance(txn_date_raw, (datetime, date)):
-                        txn_date = txn_date_raw.date() if isinstance(txn_date_raw, datetime) else txn_date_raw
-                        # Fix: Normalize type and sign for comparison
-                        txn_type = txn.get('type', 'BUY')
-                        if txn_type == "DEBIT": txn_type = "BUY"
-                        elif txn_type == "CREDIT": txn_type = "SELL"
-                        
-                        rounded_units = abs(round(float(txn.get('units', 0)), 4))
-                        rounded_amount = abs(round(float(txn.get('amount', 0)), 2))
-
-                        # Ensure scheme_code is string for DB query
-                        scheme_code_str = str(scheme_code).strip()
-                        
-                        # Candidate search: Fetch ALL orders for this scheme (safer to filter in Python)
-                        # Relax user_id check to include legacy (NULL) records
-                        candidates = db.query(MutualFundOrder).filter(
-                            MutualFundOrder.tenant_id == tenant_id,
-                            (MutualFundOrder.user_id == user_id) | (MutualFundOrder.user_id.is_(None)),
-                            MutualFundOrder.scheme_code == scheme_code_str
-                        ).all()
-                        
-                        def normalize_type(t_str):
-                            t = str(t_str).upper().strip()
-                            if t in ["BUY", "DEBIT", "PURCHASE", "PURCHASE_SIP", "SWITCH_IN", "SIP", "STP_IN"]: return "BUY"
-                            if t in ["SELL", "CREDIT", "REDEMPTION", "SWITCH_OUT", "STP_OUT"]: return "SELL"
-                            return t
-
-                        # Python-side robust matching
-                        for result in candidates:
-                            # 1. Date Check
-                            db_date = result.order_date.date() if hasattr(result.order_date, 'date') else result.order_date
-                            if db_date != txn_date:
-                                continue
-
-                            # 2. Units/Amount Check (Epsilon)
-                            db_units = abs(float(result.units))
-                            db_amount = abs(float(result.amount))
-                            
-                            if not (abs(db_units - rounded_units) < 0.001 and abs(db_amount - rounded_amount) < 0.01):
-                                continue
-
-                            # 3. Type Check (Robust Normalization)
-                            db_type_norm = normalize_type(result.type)
-                            input_type_norm = normalize_type(txn_type)
-                            
-                            if db_type_norm == input_type_norm:
-                                is_duplicate = True
-                                break
-            
-            txn['is_duplicate'] = is_duplicate
-        
-        return transactions
+        index = MFOrderDedupIndex.load(db, tenant_id, (t.get('scheme_code') for t in transactions))
+        return index.flag(transactions)
 
     @staticmethod
     def import_mapped_transactions(db: Session, tenant_id: str, transactions: List[dict]):
-        """Bulk ingest transactions under a global lock."""
+        """Bulk ingest transactions while holding the DB writer."""
         stats = {"processed": 0, "failed": 0, "details": {"imported": [], "failed": []}}
         
         
-        with _db_write_lock:
+        with db_writer.exclusive(db):
+            # One candidate load for the whole batch; new orders are registered as they are added
+            dedup_index = MFOrderDedupIndex.load(db, tenant_id, (t.get('scheme_code') for t in transactions))
             for idx, txn in enumerate(transactions):
                 try:
                     # add_transaction_logic expects 'date' as datetime or date object
@@ -272,7 +117,9 @@ class MutualFundService:
                                 except: continue
                         except: pass
                     
-                    result = MutualFundService._add_transaction_logic(db, tenant_id, txn)
+                    result = MutualFundService._add_transaction_logic(
+                        db, tenant_id, txn, dedup_index=dedup_index, update_holding=False
+                    )
                     
                     if result and hasattr(result, 'id'):
                         stats["processed"] += 1
@@ -286,20 +133,23 @@ class MutualFundService:
                     stats["failed"] += 1
                     stats["details"]["failed"].append(txn)
             
-            MutualFundService._safe_commit(db)
+            if stats["processed"]:
+                HoldingsEngine.rebuild(db, tenant_id, scheme_codes={str(t['scheme_code']) for t in stats["details"]["imported"]})
+            db.commit()
             
         return stats
 
     @staticmethod
     def add_transaction(db: Session, tenant_id: str, data: dict):
-        """Public method that wraps logic in a global lock for DuckDB safety."""
-        with _db_write_lock:
+        """Public method that holds the DB writer for the whole unit (DuckDB has one writer)."""
+        with db_writer.exclusive(db):
             result = MutualFundService._add_transaction_logic(db, tenant_id, data)
-            MutualFundService._safe_commit(db)
+            db.commit()
             return result
 
     @staticmethod
-    def _add_transaction_logic(db: Session, tenant_id: str, data: dict):
+    def _add_transaction_logic(db: Session, tenant_id: str, data: dict, dedup_index: Optional[MFOrderDedupIndex] = None,
+                               update_holding: bool = True):
         # 1. Ensure Meta exists
         scheme_code = str(data['scheme_code'])
         meta = db.query(MutualFundsMeta).filter(MutualFundsMeta.scheme_code == scheme_code).first()
@@ -320,46 +170,19 @@ class MutualFundService:
             else:
                 raise ValueError("Invalid Scheme Code or API Error")
 
-        # 2. Check for duplicate order (Idempotency)
+        # 2. Check for duplicate order (Idempotency) against the batch index
         user_id = data.get('user_id')
         external_id = data.get('external_id')
-        
-        # Priority 1: Check by External ID
-        if external_id:
-            existing_order = db.query(MutualFundOrder).filter(
-                MutualFundOrder.tenant_id == tenant_id,
-                MutualFundOrder.user_id == user_id,
-                MutualFundOrder.external_id == external_id
-            ).first()
-            if existing_order:
-                return existing_order
+        if dedup_index is None:
+            dedup_index = MFOrderDedupIndex.load(db, tenant_id, [scheme_code])
+
+        existing_order = dedup_index.find({**data, 'scheme_code': scheme_code})
+        if existing_order is not None:
+            return existing_order
 
-        # Priority 2: Check by exact match with precision handling
-        # Use rounding to avoid float representation issues in DuckDB/Python
-        from sqlalchemy import func
-        from datetime import date
-        
-        txn_date = data['date'].date() if isinstance(data['date'], datetime) else data['date']
-        # Fix: Normalize type and sign logic
         txn_type = data.get('type', 'BUY')
         if txn_type == "DEBIT": txn_type = "BUY"
         elif txn_type == "CREDIT": txn_type = "SELL"
-        
-        rounded_units = abs(round(float(data['units']), 4))
-        rounded_amount = abs(round(float(data['amount']), 2))
-        
-        existing_order = db.query(MutualFundOrder).filter(
-            MutualFundOrder.tenant_id == tenant_id,
-            MutualFundOrder.user_id == user_id,
-            MutualFundOrder.scheme_code == scheme_code,
-            func.date(MutualFundOrder.order_date) == txn_date,
-            MutualFundOrder.type == txn_type,
-            func.round(func.abs(MutualFundOrder.units), 4) == rounded_units,
-            func.round(func.abs(MutualFundOrder.amount), 2) == rounded_amount
-        ).first()
-
-        if existing_order:
-            return existing_order
 
         # 3. Create Order
         order = MutualFundOrder(
@@ -376,161 +199,52 @@ class MutualFundService:
             import_source=data.get('import_source', 'MANUAL')
         )
         db.add(order)
+        dedup_index.add(order)
         
-        # 3. Update Holding
-        return MutualFundService._update_holding_with_order(db, tenant_id, order, data.get('folio_number'))
-
-    @staticmethod
-    def _update_holding_with_order(db: Session, tenant_id: str, order: MutualFundOrder, folio_number: Optional[str] = None):
-        """Internal helper to shared between live ingestion and recalculation"""
-        user_id = order.user_id
-        scheme_code = order.scheme_code
-        
-        # Find/Create Holding
-        query = db.query(MutualFundHolding).filter(
-            MutualFundHolding.tenant_id == tenant_id,
-            MutualFundHolding.user_id == user_id,
-            MutualFundHolding.scheme_code == scheme_code
-        )
-        
-        if folio_number:
-            query = query.filter(MutualFundHolding.folio_number == folio_number)
-        else:
-            query = query.filter(MutualFundHolding.folio_number.is_(None))
-            
-        holding = query.first()
-
-        if not holding:
-            holding = MutualFundHolding(
-                tenant_id=tenant_id,
-                user_id=user_id,
-                scheme_code=scheme_code,
-                folio_number=folio_number,
-                units=0,
-                average_price=0
-            )
-            db.add(holding)
-            db.flush() 
-        else:
-            if folio_number:
-                holding.folio_number = folio_number
-        
-        # Update Balance
-        if order.type == "BUY":
-            current_units = float(holding.units or 0.0)
-            current_avg = float(holding.average_price or 0.0)
-            
-            order_units = float(order.units)
-            order_amount = float(order.amount)
-            txn_cost = order_amount if order_amount > 0 else (float(order.nav) * order_units)
-            
-            total_cost = (current_avg * current_units) + txn_cost
-            total_units = current_units + order_units
-            
-            holding.average_price = total_cost / total_units if total_units > 0 else 0.0
-            holding.units = total_units
-        elif order.type == "SELL":
-            current_units = float(holding.units or 0.0)
-            holding.units = max(0, current_units - float(order.units))
-        
-        # Update NAV Info
-        if not holding.last_nav or float(holding.last_nav) == 0:
-            holding.last_nav = order.nav
-            holding.last_updated_at = order.order_date
-        
-        holding.current_value = float(holding.units) * float(holding.last_nav or 0.0)
-
-        # Ensure holding has an ID before linking
-        if not holding.id:
-            db.flush()  # Force ID generation
-        
-        order.holding_id = holding.id
-        db.flush() 
-        return order
+        # 3. Update Holding (batch imports defer this to one HoldingsEngine.rebuild)
+        if not update_holding:
+            return order
+        return HoldingsEngine.apply_order(db, tenant_id, order)
 
     @staticmethod
     def cleanup_duplicates(db: Session, tenant_id: str):
-        """Find and remove duplicate orders, then rebuild holdings."""
-        with _db_write_lock:
-            # 1. Find duplicate groups
+        """Find and remove duplicate orders (keeping the oldest), then rebuild affected holdings."""
+        with db_writer.exclusive(db):
             from sqlalchemy import func
-            duplicates = db.query(
-                MutualFundOrder.scheme_code, 
-                MutualFundOrder.order_date, 
-                MutualFundOrder.units, 
-                MutualFundOrder.amount, 
-                MutualFundOrder.type
-            ).filter(MutualFundOrder.tenant_id == tenant_id).group_by(
-                MutualFundOrder.scheme_code, 
-                MutualFundOrder.order_date, 
-                MutualFundOrder.units, 
-                MutualFundOrder.amount, 
-                MutualFundOrder.type
-            ).having(func.count('*') > 1).all()
-            
-            removed_count = 0
-            for sc, d, u, a, t in duplicates:
-                all_matches = db.query(MutualFundOrder).filter(
-                    MutualFundOrder.tenant_id == tenant_id,
-                    MutualFundOrder.scheme_code == sc,
-                    MutualFundOrder.order_date == d,
-                    MutualFundOrder.units == u,
-                    MutualFundOrder.amount == a,
-                    MutualFundOrder.type == t
-                ).order_by(MutualFundOrder.created_at).all()
-                
-                to_delete = all_matches[1:]
-                for order in to_delete:
-                    db.delete(order)
-                    removed_count += 1
-                    
-            MutualFundService._safe_commit(db)
-            
-            # 2. Recalculate holdings (nested call, same lock thread)
-            # Actually _update_holding_with_order is used inside recalculate_holdings
-            # We call the internal logic to avoid re-taking the lock if it's already held by us
-            # But threading.Lock() is NOT re-entrant. 
-            # I should use an RLock or call an internal method.
-            MutualFundService._recalculate_holdings_logic(db, tenant_id)
-            
+            rank = func.row_number().over(
+                partition_by=(
+                    MutualFundOrder.scheme_code,
+                    MutualFundOrder.order_date,
+                    MutualFundOrder.units,
+                    MutualFundOrder.amount,
+                    MutualFundOrder.type
+                ),
+                order_by=(MutualFundOrder.created_at, MutualFundOrder.id)
+            ).label("rank")
+            ranked = db.query(MutualFundOrder.id, rank).filter(
+                MutualFundOrder.tenant_id == tenant_id
+            ).subquery()
+            duplicate_ids = [order_id for (order_id,) in db.query(ranked.c.id).filter(ranked.c.rank > 1)]
+
+            removed_count = HoldingsEngine.remove_orders(db, tenant_id, duplicate_ids)
+            db.commit()
             return removed_count
 
     @staticmethod
     def recalculate_holdings(db: Session, tenant_id: str, user_id: Optional[str] = None):
-        with _db_write_lock:
+        with db_writer.exclusive(db):
             return MutualFundService._recalculate_holdings_logic(db, tenant_id, user_id)
 
     @staticmethod
     def _recalculate_holdings_logic(db: Session, tenant_id: str, user_id: Optional[str] = None):
         """Internal logic without lock for nested calls"""
-        # 1. Get all orders sorted by date
-        query = db.query(MutualFundOrder).filter(MutualFundOrder.tenant_id == tenant_id)
-        if user_id:
-            query = query.filter(MutualFundOrder.user_id == user_id)
-        
-        orders = query.order_by(MutualFundOrder.order_date).all()
-        
-        # 2. Delete existing holdings
-        h_query = db.query(MutualFundHolding).filter(MutualFundHolding.tenant_id == tenant_id)
-        if user_id:
-            h_query = h_query.filter(MutualFundHolding.user_id == user_id)
-        
-        h_query.delete(synchronize_session=False)
-        db.flush()
-        
-        # 3. Process each order
-        processed_orders = []
-        for order in orders:
-            MutualFundService._update_holding_with_order(db, tenant_id, order, order.folio_number)
-            processed_orders.append(order)
-        
-        # 4. Special Commit
-        MutualFundService._safe_commit(db)
-        return len(processed_orders)
+        processed = HoldingsEngine.rebuild(db, tenant_id, user_id=user_id)
+        db.commit()
+        return processed
 
     @staticmethod
     def delete_holding(db: Session, tenant_id: str, holding_id: str):
-        with _db_write_lock:
+        with db_writer.exclusive(db):
             holding = db.query(MutualFundHolding).filter(
                 MutualFundHolding.id == holding_id,
                 MutualFundHolding.tenant_id == tenant_id
@@ -548,149 +262,66 @@ class MutualFundService:
             
             # Then delete the holding itself
             db.delete(holding)
-            MutualFundService._safe_commit(db)
+            db.commit()
             return True
 
     @staticmethod
     def get_portfolio(db: Session, tenant_id: str, user_id: Optional[str] = None):
-        import asyncio
-        
-        query = db.query(MutualFundHolding).filter(MutualFundHolding.tenant_id == tenant_id)
+        """
+        Read-only: values come from the NAVs stored by the scheduled NavRefreshService run.
+        Schemes that were never refreshed (fresh imports) fall back to the holding's order NAV
+        and get a background refresh queued.
+        """
+        import json
+        from backend.app.modules.finance.models import MutualFundNav
+        from backend.app.modules.finance.services.nav_refresh import NavRefreshService
+
+        query = db.query(
+            MutualFundHolding, MutualFundsMeta.scheme_name, MutualFundsMeta.category,
+            MutualFundNav.nav, MutualFundNav.nav_date, MutualFundNav.sparkline
+        ).outerjoin(
+            MutualFundsMeta, MutualFundsMeta.scheme_code == MutualFundHolding.scheme_code
+        ).outerjoin(
+            MutualFundNav, MutualFundNav.scheme_code == MutualFundHolding.scheme_code
+        ).filter(MutualFundHolding.tenant_id == tenant_id)
         if user_id:
             query = query.filter(MutualFundHolding.user_id == user_id)
-        
-        holdings = query.all()
-        results = []
-        
-        # Check for updates needed (Stale > 24h or None)
-        updates_made = False
-        today = datetime.utcnow().date()
-        
-        async def fetch_nav_and_sparkline(scheme_code):
-            """Fetch both current NAV and 30-day history concurrently"""
-            try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=5.0)
-                    
-                if response.status_code == 200:
-                    fund_data = response.json()
-                    raw_data = fund_data.get("data", [])
-                    
-                    def parse_date(d_str):
-                        try:
-                            return datetime.strptime(d_str, "%d-%m-%Y")
-                        except:
-                            return datetime.min
 
-                    # Sort by date descending
-                    sorted_data = sorted(raw_data, key=lambda x: parse_date(x.get("date", "")), reverse=True)
-                    
-                    # Latest NAV
-                    latest_nav = 0.0
-                    nav_date_str = ""
-                    if sorted_data:
-                        latest_nav_data = sorted_data[0]
-                        latest_nav = float(latest_nav_data.get("nav", 0.0))
-                        nav_date_str = latest_nav_data.get("date", "")
-                    
-                    # Sparkline (last 30 days)
-                    sparkline_data = sorted_data[:30]  # Get last 30 entries
-                    sparkline_data.reverse()  # Reverse to chronological order
-                    sparkline = [float(d.get("nav", 0.0)) for d in sparkline_data if d.get("nav")]
-                    
-                    return {
-                        "latest_nav": latest_nav,
-                        "nav_date": nav_date_str,
-                        "sparkline": sparkline
-                    }
-                else:
-                    return {"latest_nav": 0.0, "nav_date": "", "sparkline": []}
-            except Exception as e:
-                return {"latest_nav": 0.0, "nav_date": "", "sparkline": []}
-        
-        # Fetch all NAV data concurrently
-        async def fetch_all_nav_data():
-            tasks = [fetch_nav_and_sparkline(h.scheme_code) for h in holdings]
-            return await asyncio.gather(*tasks)
-        
-        nav_data_list = asyncio.run(fetch_all_nav_data())
-        
-        # Phase 1: Update Holdings (Write Lock)
-        updates_made = False
-        with _db_write_lock:
-            try:
-                for h, nav_data in zip(holdings, nav_data_list):
-                    latest_nav = nav_data.get("latest_nav", 0.0)
-                    nav_date_str = nav_data.get("nav_date", "")
-                    
-                    if latest_nav > 0:
-                        has_changed = False
-                        # NAV Update
-                        if not h.last_nav or abs(float(h.last_nav) - latest_nav) > 0.0001:
-                            h.last_nav = latest_nav
-                            has_changed = True
-                        
-                        # Value Update
-                        current_units = float(h.units or 0.0)
-                        new_value = current_units * latest_nav
-                        if not h.current_value or abs(float(h.current_value) - new_value) > 0.01:
-                            h.current_value = new_value
-                            has_changed = True
-                        
-                        # Date Update
-                        def parse_date_local(d_str):
-                            try:
-                                return datetime.strptime(d_str, "%d-%m-%Y")
-                            except: return None
-                        
-                        new_date = parse_date_local(nav_date_str)
-                        if new_date and (not h.last_updated_at or h.last_updated_at != new_date):
-                            h.last_updated_at = new_date
-                            has_changed = True
-                            
-                        if has_changed:
-                            updates_made = True
-                
-                if updates_made:
-                    MutualFundService._safe_commit(db)
-            except Exception as e:
-                db.rollback()
-
-        # Phase 2: Build Results (Read-Only)
-        # Objects might be expired after commit, so accessing properties will trigger refresh (SELECT)
-        # This is safe as we are outside the write lock and transaction.
-        for h, nav_data in zip(holdings, nav_data_list):
-            sparkline = nav_data.get("sparkline", [])
-            
-            # Accessing properties triggers reload if needed
+        results = []
+        missing_nav = set()
+        for h, scheme_name, category, nav, nav_date, sparkline in query.all():
             units = float(h.units or 0.0)
             avg_price = float(h.average_price or 0.0)
-            current_val = float(h.current_value or 0.0)
+            if nav is None:
+                missing_nav.add(h.scheme_code)
+                last_nav = float(h.last_nav or 0.0)
+                nav_date = h.last_updated_at
+            else:
+                last_nav = float(nav)
+            current_val = units * last_nav if last_nav > 0 else float(h.current_value or 0.0)
             invested = units * avg_price
             pl = (current_val - invested) if current_val > 0 else 0.0
-            last_updated_str = h.last_updated_at.strftime("%d-%b-%Y") if h.last_updated_at else "N/A"
-            
-            # Fetch meta (Autoflush irrelevant now as no pending changes)
-            meta = db.query(MutualFundsMeta).filter(MutualFundsMeta.scheme_code == h.scheme_code).first()
 
             results.append({
                 "id": h.id,
                 "scheme_code": h.scheme_code,
-                "scheme_name": meta.scheme_name if meta else "Unknown Fund",
-                "category": meta.category if meta else "Other",
+                "scheme_name": scheme_name or "Unknown Fund",
+                "category": category or "Other",
                 "folio_number": h.folio_number,
                 "units": units,
                 "average_price": avg_price,
                 "current_value": current_val,
                 "invested_value": invested,
-                "last_nav": float(h.last_nav or 0.0),
+                "last_nav": last_nav,
                 "profit_loss": pl,
-                "last_updated": last_updated_str,
-                "sparkline": sparkline,
+                "last_updated": nav_date.strftime("%d-%b-%Y") if nav_date else "N/A",
+                "sparkline": json.loads(sparkline) if sparkline else [],
                 "user_id": h.user_id,
                 "goal_id": h.goal_id
             })
-            
+
+        if missing_nav:
+            NavRefreshService.request_refresh(missing_nav)
         return results
 
     @staticmethod
@@ -769,7 +400,7 @@ class MutualFundService:
             from datetime import datetime
             
             # Re-using the simplified fetch logic
-            response = requests.get(f"https://api.mfapi.in/mf/{holding.scheme_code}", timeout=3)
+            response = requests.get(f"{MFAPI_BASE_URL}/{holding.scheme_code}", timeout=3)
             
             if response.status_code == 200:
                 mf_data = response.json()
@@ -917,7 +548,7 @@ class MutualFundService:
             import requests
             from datetime import datetime
             
-            response = requests.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=3)
+            response = requests.get(f"{MFAPI_BASE_URL}/{scheme_code}", timeout=3)
             if response.status_code == 200:
                 mf_data = response.json()
                 raw_history = mf_data.get("data", [])
@@ -1018,7 +649,7 @@ class MutualFundService:
 
     @staticmethod
     def update_holding(db: Session, tenant_id: str, holding_id: str, data: dict):
-        with _db_write_lock:
+        with db_writer.exclusive(db):
             holding = db.query(MutualFundHolding).filter(
                 MutualFundHolding.id == holding_id,
                 MutualFundHolding.tenant_id == tenant_id
@@ -1036,59 +667,14 @@ class MutualFundService:
                 ).update({"user_id": data["user_id"]})
             
             db.flush()
-            MutualFundService._safe_commit(db)
+            db.commit()
             return holding
 
     @staticmethod
     def get_market_indices():
-        import asyncio
-        
-        async def fetch_index_data(idx):
-            try:
-                url = f"https://query1.finance.yahoo.com/v8/finance/chart/{idx['symbol']}?interval=5m&range=1d"
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(url, headers=headers, timeout=5.0)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    meta = data['chart']['result'][0]['meta']
-                    current_price = meta['regularMarketPrice']
-                    previous_close = meta['chartPreviousClose']
-                    change = current_price - previous_close
-                    percent = (change / previous_close) * 100
-                    
-                    indicators = data['chart']['result'][0]['indicators']['quote'][0]
-                    closes = indicators.get('close', [])
-                    valid_closes = [c for c in closes if c is not None]
-                    sparkline = valid_closes[-20:] if len(valid_closes) > 20 else valid_closes
-
-                    return {
-                        "name": idx['name'],
-                        "value": f"{current_price:,.2f}",
-                        "change": f"{change:+.2f}",
-                        "percent": f"{percent:+.2f}%",
-                        "isUp": change >= 0,
-                        "sparkline": sparkline
-                    }
-                else:
-                    return {"name": idx['name'], "value": "Unavailable", "change": "0.00", "percent": "0.00%", "isUp": True}
-            except Exception as e:
-                pass
-                return {"name": idx['name'], "value": "Error", "change": "0.00", "percent": "0.00%", "isUp": True}
-        
-        async def fetch_all():
-            indices = [
-                {"name": "NIFTY 50", "symbol": "^NSEI"},
-                {"name": "SENSEX", "symbol": "^BSESN"},
-                {"name": "BANK NIFTY", "symbol": "^NSEBANK"}
-            ]
-            tasks = [fetch_index_data(idx) for idx in indices]
-            return await asyncio.gather(*tasks)
-        
-        # Run async tasks
-        return asyncio.run(fetch_all())
+        """Served from the shared stale-while-revalidate cache; never waits on Yahoo."""
+        from backend.app.modules.finance.services.market_indices import get_indices_cache
+        return get_indices_cache().get()
 
     @staticmethod
     def get_portfolio_analytics(db: Session, tenant_id: str, user_id: Optional[str] = None):
@@ -1343,7 +929,7 @@ class MutualFundService:
             
             try:
                 import httpx
-                resp = httpx.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=10.0)
+                resp = httpx.get(f"{MFAPI_BASE_URL}/{scheme_code}", timeout=10.0)
                 if resp.status_code == 200:
                     data = resp.json()
                     nav_map = {entry['date']: float(entry['nav']) for entry in data.get('data', [])}
@@ -1499,8 +1085,8 @@ class MutualFundService:
         
         # Commit cache entries to database
         try:
-            with _db_write_lock:
-                MutualFundService._safe_commit(db)
+            with db_writer.exclusive(db):
+                db.commit()
         except Exception as e:
             # Silent fail or log properly
             db.rollback()
@@ -1574,7 +1160,7 @@ class MutualFundService:
         
         try:
             # mfapi.in provides historical data in reverse chronological order
-            response = httpx.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=5.0)
+            response = httpx.get(f"{MFAPI_BASE_URL}/{scheme_code}", timeout=5.0)
             response.raise_for_status()
             data = response.json()
             
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+import httpx
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.core.database import SessionLocal
+from backend.app.core.db_writer import db_writer
+from backend.app.modules.finance.models import MutualFundHolding, MutualFundNav
+
+logger = logging.getLogger(__name__)
+
+MFAPI_BASE_URL = settings.MFAPI_BASE_URL
+SPARKLINE_POINTS = 30
+FETCH_CONCURRENCY = 8
+FETCH_TIMEOUT = 10.0
+# On-demand refreshes for a scheme are attempted at most this often (unknown codes never get a NAV row)
+REQUEST_COOLDOWN_SECONDS = 900
+
+
+def _parse_nav_date(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, "%d-%m-%Y")
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_nav_history(scheme_code: str, payload: dict) -> Optional[dict]:
+    """mfapi.in response -> mutual_fund_navs row (None if the scheme has no usable NAV)."""
+    points = []
+    for entry in payload.get("data", []):
+        d = _parse_nav_date(entry.get("date"))
+        try:
+            nav = float(entry.get("nav"))
+        except (TypeError, ValueError):
+            continue
+        if d and nav > 0:
+            points.append((d, nav))
+    if not points:
+        return None
+    points.sort(key=lambda p: p[0])
+    recent = points[-SPARKLINE_POINTS:]
+    return {
+        "scheme_code": str(scheme_code),
+        "nav": recent[-1][1],
+        "nav_date": recent[-1][0],
+        "sparkline": json.dumps([round(nav, 4) for _, nav in recent]),
+    }
+
+
+async def _fetch_from_mfapi(scheme_codes: List[str]) -> List[dict]:
+    semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+
+    async with httpx.AsyncClient(timeout=FETCH_TIMEOUT) as client:
+        async def fetch_one(code):
+            async with semaphore:
+                try:
+                    response = await client.get(f"{MFAPI_BASE_URL}/{code}")
+                    if response.status_code == 200:
+                        return parse_nav_history(code, response.json())
+                except Exception as e:
+                    logger.warning(f"NAV fetch failed for {code}: {e}")
+                return None
+
+        results = await asyncio.gather(*(fetch_one(code) for code in scheme_codes))
+    return [r for r in results if r]
+
+
+class NavRefreshService:
+    """
+    Pulls the latest NAVs for every scheme held by any tenant and writes them once per run:
+    an upsert into mutual_fund_navs plus one set-based UPDATE of the affected holdings.
+    get_portfolio only reads these columns, so the request path never calls mfapi.in
+    or takes the MF write lock.
+    """
+    _last_requested: Dict[str, float] = {}
+    _request_lock = threading.Lock()
+
+    @staticmethod
+    def held_scheme_codes(db: Session) -> List[str]:
+        return [code for (code,) in db.query(MutualFundHolding.scheme_code).distinct().all()]
+
+    @staticmethod
+    def refresh(db: Optional[Session] = None, scheme_codes: Optional[Iterable[str]] = None,
+                fetch: Optional[Callable[[List[str]], List[dict]]] = None) -> dict:
+        """
+        Refresh NAVs for `scheme_codes` (default: everything held). `fetch` maps codes to
+        mutual_fund_navs rows and can be injected for tests; defaults to mfapi.in.
+        """
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            codes = sorted({str(c) for c in (scheme_codes if scheme_codes is not None
+                                              else NavRefreshService.held_scheme_codes(db))})
+            if not codes:
+                return {"status": "success", "schemes": 0, "updated": 0}
+
+            rows = fetch(codes) if fetch else asyncio.run(_fetch_from_mfapi(codes))
+            if not rows:
+                return {"status": "success", "schemes": len(codes), "updated": 0}
+            now = datetime.utcnow()
+            for row in rows:
+                row["refreshed_at"] = now
+
+            with db_writer.exclusive(db):
+                for i in range(0, len(rows), 1000):
+                    stmt = pg_insert(MutualFundNav).values(rows[i:i + 1000])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[MutualFundNav.scheme_code],
+                        set_={
+                            "nav": stmt.excluded.nav,
+                            "nav_date": stmt.excluded.nav_date,
+                            "sparkline": stmt.excluded.sparkline,
+                            "refreshed_at": stmt.excluded.refreshed_at,
+                        }
+                    )
+                    db.execute(stmt)
+
+                refreshed = [r["scheme_code"] for r in rows]
+                db.execute(
+                    update(MutualFundHolding).where(
+                        MutualFundHolding.scheme_code == MutualFundNav.scheme_code,
+                        MutualFundNav.scheme_code.in_(refreshed)
+                    ).values(
+                        last_nav=MutualFundNav.nav,
+                        current_value=MutualFundHolding.units * MutualFundNav.nav,
+                        last_updated_at=MutualFundNav.nav_date
+                    ),
+                    execution_options={"synchronize_session": False}
+                )
+                db.commit()
+
+            logger.info(f"NAV refresh: {len(rows)}/{len(codes)} schemes updated")
+            return {"status": "success", "schemes": len(codes), "updated": len(rows)}
+        except Exception as e:
+            db.rollback()
+            logger.error(f"NAV refresh failed: {e}")
+            return {"status": "error", "reason": str(e)}
+        finally:
+            if own_session:
+                db.close()
+
+    @staticmethod
+    def request_refresh(scheme_codes: Iterable[str]):
+        """Fire-and-forget refresh for schemes that have no NAV row yet (e.g. right after an import)."""
+        now = time.monotonic()
+        with NavRefreshService._request_lock:
+            codes = {
+                str(c) for c in scheme_codes
+                if now - NavRefreshService._last_requested.get(str(c), float("-inf")) >= REQUEST_COOLDOWN_SECONDS
+            }
+            if not codes:
+                return
+            for code in codes:
+                NavRefreshService._last_requested[code] = now
+
+        threading.Thread(
+            target=NavRefreshService.refresh, kwargs={"scheme_codes": codes}, name="nav-refresh", daemon=True
+        ).start()
@@ -2,6 +2,7 @@ from typing import List, Optional
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from sqlalchemy.orm import Session
+from backend.app.core.db_writer import db_writer
 from backend.app.modules.finance import models, schemas
 
 class RecurringService:
@@ -58,57 +59,58 @@ class RecurringService:
         Returns count of generated transactions.
         """
         # Fetch active due items
-        due_items = db.query(models.RecurringTransaction).filter(
-            models.RecurringTransaction.tenant_id == tenant_id,
-            models.RecurringTransaction.is_active == True,
-            models.RecurringTransaction.next_run_date <= datetime.utcnow()
-        ).all()
+        with db_writer.exclusive(db):
+            due_items = db.query(models.RecurringTransaction).filter(
+                models.RecurringTransaction.tenant_id == tenant_id,
+                models.RecurringTransaction.is_active == True,
+                models.RecurringTransaction.next_run_date <= datetime.utcnow()
+            ).all()
         
-        count = 0
+            count = 0
         
-        for item in due_items:
-            # Generate Transaction
-            txn = models.Transaction(
-                tenant_id=tenant_id,
-                account_id=item.account_id,
-                amount=item.amount,
-                date=item.next_run_date, # Use the scheduled date, not "now"
-                description=item.name,
-                recipient=item.name,
-                category=item.category,
-                type=item.type,
-                source="RECURRING",
-                external_id=f"rec_{item.id}_{item.next_run_date.strftime('%Y%m%d')}", # De-dup key
-                exclude_from_reports=item.exclude_from_reports
-            )
+            for item in due_items:
+                # Generate Transaction
+                txn = models.Transaction(
+                    tenant_id=tenant_id,
+                    account_id=item.account_id,
+                    amount=item.amount,
+                    date=item.next_run_date, # Use the scheduled date, not "now"
+                    description=item.name,
+                    recipient=item.name,
+                    category=item.category,
+                    type=item.type,
+                    source="RECURRING",
+                    external_id=f"rec_{item.id}_{item.next_run_date.strftime('%Y%m%d')}", # De-dup key
+                    exclude_from_reports=item.exclude_from_reports
+                )
             
-            exists = db.query(models.Transaction).filter(
-                models.Transaction.tenant_id == tenant_id,
-                models.Transaction.external_id == txn.external_id
-            ).first()
+                exists = db.query(models.Transaction).filter(
+                    models.Transaction.tenant_id == tenant_id,
+                    models.Transaction.external_id == txn.external_id
+                ).first()
             
-            if not exists:
-                db.add(txn)
-                # Update Account Balance
-                acc = db.query(models.Account).filter(models.Account.id == item.account_id).first()
-                if acc:
-                     acc.balance = (acc.balance or 0) + item.amount
+                if not exists:
+                    db.add(txn)
+                    # Update Account Balance
+                    acc = db.query(models.Account).filter(models.Account.id == item.account_id).first()
+                    if acc:
+                         acc.balance = (acc.balance or 0) + item.amount
                 
-                count += 1
-                item.last_run_date = datetime.utcnow()
+                    count += 1
+                    item.last_run_date = datetime.utcnow()
             
-            # Update Next Run Date
-            next_date = item.next_run_date
-            if item.frequency == models.Frequency.DAILY:
-                next_date += relativedelta(days=1)
-            elif item.frequency == models.Frequency.WEEKLY:
-                next_date += relativedelta(weeks=1)
-            elif item.frequency == models.Frequency.MONTHLY:
-                next_date += relativedelta(months=1)
-            elif item.frequency == models.Frequency.YEARLY:
-                next_date += relativedelta(years=1)
+                # Update Next Run Date
+                next_date = item.next_run_date
+                if item.frequency == models.Frequency.DAILY:
+                    next_date += relativedelta(days=1)
+                elif item.frequency == models.Frequency.WEEKLY:
+                    next_date += relativedelta(weeks=1)
+                elif item.frequency == models.Frequency.MONTHLY:
+                    next_date += relativedelta(months=1)
+                elif item.frequency == models.Frequency.YEARLY:
+                    next_date += relativedelta(years=1)
             
-            item.next_run_date = next_date
+                item.next_run_date = next_date
             
-        db.commit()
+            db.commit()
         return count
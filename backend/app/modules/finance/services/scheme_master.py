@@ -0,0 +1,305 @@
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+import httpx
+from rapidfuzz import fuzz, process
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.core.database import SessionLocal
+from backend.app.modules.finance.models import MutualFundScheme
+
+logger = logging.getLogger(__name__)
+
+MFAPI_SCHEMES_URL = settings.MFAPI_BASE_URL
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Mapping thresholds for CAS scheme names (rapidfuzz 0-100 scale)
+MATCH_SCORE_CUTOFF = 80
+MATCH_CANDIDATES = 200
+# Above this many candidates (e.g. a 2-letter prefix) fuzzy ranking is skipped for a cheap length order
+FUZZY_RANK_LIMIT = 2000
+# With no local master and a failed download, get_index() retries after this (doubling) delay
+EMPTY_RETRY_MIN_SECONDS = 30
+EMPTY_RETRY_MAX_SECONDS = 1800
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_tokens(text))
+
+
+class SchemeIndex:
+    """
+    Immutable in-memory index over the scheme master.
+
+    - code / ISIN / normalized name -> scheme: dict lookups, O(1)
+    - token -> scheme ids: inverted index for AND / overlap candidate sets
+    - sorted vocabulary: prefix expansion of the last query token via bisect, O(log V + k)
+    Ranking uses rapidfuzz over the candidate set only, never the full master.
+    """
+
+    def __init__(self, schemes: List[dict]):
+        self.schemes = schemes  # API shape: schemeCode, schemeName, isinGrowth, isinDivReinvestment
+        self.names = [_normalize(s["schemeName"]) for s in schemes]
+        self.by_code: Dict[str, int] = {}
+        self.by_isin: Dict[str, int] = {}
+        self.by_name: Dict[str, int] = {}
+        postings: Dict[str, Set[int]] = {}
+
+        for i, s in enumerate(schemes):
+            self.by_code[str(s["schemeCode"])] = i
+            for key in ("isinGrowth", "isinDivReinvestment"):
+                if s.get(key):
+                    self.by_isin.setdefault(s[key].upper(), i)
+            self.by_name.setdefault(self.names[i], i)
+            for tok in set(self.names[i].split()):
+                postings.setdefault(tok, set()).add(i)
+
+        self.postings = {tok: frozenset(ids) for tok, ids in postings.items()}
+        self.vocab = sorted(self.postings)
+
+    def __len__(self) -> int:
+        return len(self.schemes)
+
+    # --- Lookups ---
+    def get_by_code(self, code) -> Optional[dict]:
+        i = self.by_code.get(str(code)) if code is not None else None
+        return self.schemes[i] if i is not None else None
+
+    def get_by_isin(self, isin: Optional[str]) -> Optional[dict]:
+        i = self.by_isin.get(isin.upper()) if isin else None
+        return self.schemes[i] if i is not None else None
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        ids: Set[int] = set()
+        start = bisect.bisect_left(self.vocab, prefix)
+        for tok in self.vocab[start:]:
+            if not tok.startswith(prefix):
+                break
+            ids |= self.postings[tok]
+        return ids
+
+    def _all_terms(self, terms: List[str], last_is_prefix: bool) -> Optional[Set[int]]:
+        """Ids containing every term (last one as prefix). None means 'no constraint'."""
+        if not terms:
+            return None
+        sets = []
+        for i, term in enumerate(terms):
+            if last_is_prefix and i == len(terms) - 1:
+                sets.append(self._prefix_ids(term))
+            else:
+                sets.append(self.postings.get(term, frozenset()))
+        sets.sort(key=len)
+        result = set(sets[0])
+        for s in sets[1:]:
+            result &= s
+            if not result:
+                break
+        return result
+
+    # --- Search (API) ---
+    def search(self, query: Optional[str] = None, category: Optional[str] = None, amc: Optional[str] = None,
+               limit: int = 20, offset: int = 0, sort_by: str = 'relevance', returns_key=None) -> List[dict]:
+        constraints = []
+        q_terms = _tokens(query)
+        if q_terms:
+            constraints.append(self._all_terms(q_terms, last_is_prefix=True))
+        for extra in (category, amc):
+            terms = _tokens(extra)
+            if terms:
+                constraints.append(self._all_terms(terms, last_is_prefix=False))
+
+        if not constraints:
+            return []
+        ids = constraints[0]
+        for c in constraints[1:]:
+            ids = ids & c
+        if not ids:
+            return []
+
+        if sort_by in ('returns_desc', 'returns_asc') and returns_key:
+            ordered = sorted(ids, key=lambda i: returns_key(self.schemes[i]), reverse=(sort_by == 'returns_desc'))
+        elif q_terms and len(ids) > FUZZY_RANK_LIMIT:
+            # Broad prefix: shortest names are the closest completions
+            ordered = heapq.nsmallest(offset + limit, ids, key=lambda i: (len(self.names[i]), i))
+        elif q_terms:
+            needed = offset + limit
+            q_norm = " ".join(q_terms)
+            ranked = process.extract(
+                q_norm, {i: self.names[i] for i in ids}, scorer=fuzz.WRatio, limit=needed
+            )
+            # Stable: score desc, then master order
+            ordered = [key for _, _, key in sorted(ranked, key=lambda r: (-r[1], r[2]))]
+        else:
+            ordered = sorted(ids)
+
+        return [self.schemes[i] for i in ordered[offset:offset + limit]]
+
+    # --- Mapping (CAS) ---
+    def match(self, name: Optional[str], amfi: Optional[str] = None, isin: Optional[str] = None) -> Optional[dict]:
+        """Best scheme for a CAS row: AMFI code, ISIN, exact name, then fuzzy over overlapping candidates."""
+        hit = self.get_by_code(amfi) if amfi else None
+        if hit:
+            return hit
+        hit = self.get_by_isin(isin)
+        if hit:
+            return hit
+
+        norm = _normalize(name)
+        if not norm:
+            return None
+        if norm in self.by_name:
+            return self.schemes[self.by_name[norm]]
+
+        # Greedy AND over known tokens, rarest first; a token that would empty the set is skipped
+        # (CAS names carry extra words like "(Non-Demat)" or "formerly ...")
+        terms = sorted(
+            (t for t in set(norm.split()) if t in self.postings),
+            key=lambda t: len(self.postings[t])
+        )
+        if not terms:
+            return None
+        pool = set(self.postings[terms[0]])
+        for term in terms[1:]:
+            narrowed = pool & self.postings[term]
+            if narrowed:
+                pool = narrowed
+            if len(pool) <= MATCH_CANDIDATES:
+                break
+
+        candidates = {i: self.names[i] for i in sorted(pool)[:MATCH_CANDIDATES * 5]}
+        best = process.extractOne(norm, candidates, scorer=fuzz.token_set_ratio, score_cutoff=MATCH_SCORE_CUTOFF)
+        return self.schemes[best[2]] if best else None
+
+
+class SchemeMaster:
+    """
+    Process-wide holder of the current SchemeIndex, backed by the mutual_fund_schemes table.
+    Readers never wait on the network: the index is swapped atomically after a refresh.
+    An empty index is never cached: until the master is populated, get_index() returns an
+    empty index and retries the download with exponential backoff.
+    """
+    _index: Optional[SchemeIndex] = None
+    _load_lock = threading.Lock()
+    _refresh_lock = threading.Lock()
+    _retry_at = 0.0
+    _retry_delay = EMPTY_RETRY_MIN_SECONDS
+
+    @classmethod
+    def get_index(cls) -> SchemeIndex:
+        if cls._index is not None:
+            return cls._index
+        with cls._load_lock:
+            if cls._index is not None:
+                return cls._index
+            if time.monotonic() < cls._retry_at:
+                return _EMPTY_INDEX
+            db = SessionLocal()
+            try:
+                index = cls._load_from_db(db)
+                if not len(index):
+                    # First boot: populate the local master
+                    cls.refresh(db)
+                    index = cls._index or index
+            finally:
+                db.close()
+            if len(index):
+                cls._index = index
+                cls._retry_delay = EMPTY_RETRY_MIN_SECONDS
+                return index
+            logger.warning(f"Scheme master is empty; retrying in {cls._retry_delay}s")
+            cls._retry_at = time.monotonic() + cls._retry_delay
+            cls._retry_delay = min(cls._retry_delay * 2, EMPTY_RETRY_MAX_SECONDS)
+            return _EMPTY_INDEX
+
+    @staticmethod
+    def _load_from_db(db: Session) -> SchemeIndex:
+        rows = db.query(
+            MutualFundScheme.scheme_code, MutualFundScheme.scheme_name,
+            MutualFundScheme.isin_growth, MutualFundScheme.isin_reinvest
+        ).all()
+        return SchemeIndex([
+            {"schemeCode": int(code) if code.isdigit() else code, "schemeName": name,
+             "isinGrowth": isin_g, "isinDivReinvestment": isin_r}
+            for code, name, isin_g, isin_r in rows
+        ])
+
+    @classmethod
+    def refresh(cls, db: Optional[Session] = None, fetch=None) -> dict:
+        """
+        Delta refresh: download the master, upsert only new/changed schemes, rebuild the index.
+        `fetch` can be injected (tests / offline mirrors); defaults to mfapi.in.
+        """
+        if not cls._refresh_lock.acquire(blocking=False):
+            return {"status": "skipped", "reason": "refresh in progress"}
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            try:
+                remote = fetch() if fetch else httpx.get(MFAPI_SCHEMES_URL, timeout=30.0).json()
+            except Exception as e:
+                logger.error(f"Scheme master download failed: {e}")
+                return {"status": "error", "reason": str(e)}
+
+            current = cls._index if cls._index is not None else cls._load_from_db(db)
+            now = datetime.utcnow()
+            changed = []
+            for s in remote:
+                code = str(s.get("schemeCode") or "").strip()
+                name = s.get("schemeName")
+                if not code or not name:
+                    continue
+                known = current.get_by_code(code)
+                if known and known.get("schemeName") == name \
+                        and known.get("isinGrowth") == s.get("isinGrowth") \
+                        and known.get("isinDivReinvestment") == s.get("isinDivReinvestment"):
+                    continue
+                changed.append({
+                    "scheme_code": code, "scheme_name": name,
+                    "isin_growth": s.get("isinGrowth"), "isin_reinvest": s.get("isinDivReinvestment"),
+                    "updated_at": now
+                })
+
+            for i in range(0, len(changed), 2000):
+                stmt = pg_insert(MutualFundScheme).values(changed[i:i + 2000])
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[MutualFundScheme.scheme_code],
+                    set_={
+                        "scheme_name": stmt.excluded.scheme_name,
+                        "isin_growth": stmt.excluded.isin_growth,
+                        "isin_reinvest": stmt.excluded.isin_reinvest,
+                        "updated_at": stmt.excluded.updated_at,
+                    }
+                )
+                db.execute(stmt)
+            db.commit()
+
+            if changed or cls._index is None:
+                index = cls._load_from_db(db)
+                if len(index):
+                    cls._index = index
+            total = len(cls._index) if cls._index is not None else 0
+            logger.info(f"Scheme master refreshed: {len(changed)} new/changed, {total} total")
+            return {"status": "success", "changed": len(changed), "total": total}
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Scheme master refresh failed: {e}")
+            return {"status": "error", "reason": str(e)}
+        finally:
+            if own_session:
+                db.close()
+            cls._refresh_lock.release()
+
+
+_EMPTY_INDEX = SchemeIndex([])
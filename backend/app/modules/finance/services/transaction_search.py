@@ -0,0 +1,331 @@
+import logging
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import bindparam, delete, event, false, insert, inspect, or_, select, text
+from sqlalchemy.orm import Session, aliased
+
+from backend.app.core.database import SessionLocal
+from backend.app.core.db_writer import db_writer
+from backend.app.modules.finance import models
+
+logger = logging.getLogger(__name__)
+
+_SPLIT_RE = re.compile(r"[^a-z0-9]+")
+MIN_TOKEN_LENGTH = 2
+# Above this many hits a term is unselective; a plain scan stopped by LIMIT is as fast as the index
+MAX_CANDIDATES = 2000
+
+# Set-based tokenization; must agree with tokenize() below (used for rebuilds and Core-level updates).
+# Rows are written sorted so zonemaps can skip blocks on token/gram lookups.
+_INDEX_TOKENS_SQL = """
+INSERT INTO transaction_search_tokens (tenant_id, token, transaction_id)
+SELECT DISTINCT tenant_id, tk, id FROM (
+    SELECT tenant_id, id, unnest(regexp_split_to_array(
+        lower(coalesce(description, '') || ' ' || coalesce(recipient, '')), '[^a-z0-9]+')) AS tk
+    FROM transactions
+    WHERE tenant_id = :tenant_id {scope}
+) WHERE length(tk) >= 2 AND regexp_matches(tk, '[a-z]')
+ORDER BY tenant_id, tk
+"""
+
+_INDEX_VOCAB_SQL = """
+INSERT INTO transaction_search_vocab (tenant_id, token, gram)
+SELECT DISTINCT n.tenant_id, n.token, substr(n.token, k, 3) FROM (
+    SELECT DISTINCT t.tenant_id, t.token FROM transaction_search_tokens t
+    WHERE t.tenant_id = :tenant_id {scope}
+      AND NOT EXISTS (
+          SELECT 1 FROM transaction_search_vocab v WHERE v.tenant_id = t.tenant_id AND v.token = t.token
+      )
+) n, range(1, greatest(length(n.token) - 1, 2)) r(k)
+ORDER BY 1, 3
+"""
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric runs that contain a letter; bare numbers (refs, amounts) are not indexed."""
+    tokens = []
+    for tk in _SPLIT_RE.split((value or "").lower()):
+        if len(tk) >= MIN_TOKEN_LENGTH and not tk.isdigit() and tk not in tokens:
+            tokens.append(tk)
+    return tokens
+
+
+def trigrams(token: str) -> List[str]:
+    return [token[k:k + 3] for k in range(max(len(token) - 2, 1))]
+
+
+def _ilike(entity, phrases: Sequence[str]):
+    clauses = []
+    for phrase in phrases:
+        pattern = f"%{phrase}%"
+        clauses.append(entity.description.ilike(pattern))
+        clauses.append(entity.recipient.ilike(pattern))
+    return or_(*clauses)
+
+
+class TransactionSearch:
+    """
+    Search index over transaction description + recipient.
+
+    transaction_search_tokens is an inverted index (token -> transaction ids);
+    transaction_search_vocab splits each tenant's distinct tokens into trigrams so a
+    substring of a token ("wigg") resolves to the tokens containing it ("swiggy") without
+    scanning transactions. Queries AND their terms, rank exact > prefix > substring token
+    hits, and only ever narrow the candidate set: ILIKE still decides the final match,
+    so index results are identical to the old scans.
+
+    Maintenance: ORM inserts/updates/deletes are indexed in the same flush (see
+    _index_flush); ORM bulk deletes (query.delete(), delete(Transaction)) drop their rows'
+    postings in the same transaction (_index_bulk_delete); Core-level inserts and text
+    updates call reindex(); rebuild() backfills a tenant.
+    Until a tenant has been built, queries fall back to ILIKE scans.
+    """
+    # --- Maintenance ---
+    @staticmethod
+    def rebuild(db: Session, tenant_id: str) -> int:
+        with db_writer.exclusive(db):
+            db.execute(delete(models.TransactionSearchToken).where(models.TransactionSearchToken.tenant_id == tenant_id))
+            db.execute(delete(models.TransactionSearchVocab).where(models.TransactionSearchVocab.tenant_id == tenant_id))
+            db.execute(text(_INDEX_TOKENS_SQL.format(scope="")), {"tenant_id": tenant_id})
+            db.execute(text(_INDEX_VOCAB_SQL.format(scope="")), {"tenant_id": tenant_id})
+
+            state = db.get(models.TransactionSearchState, tenant_id)
+            if state:
+                state.built_at = datetime.utcnow()
+            else:
+                db.add(models.TransactionSearchState(tenant_id=tenant_id))
+            db.commit()
+        return db.query(models.TransactionSearchToken).filter(models.TransactionSearchToken.tenant_id == tenant_id).count()
+
+    @staticmethod
+    def reindex(db: Session, tenant_id: str, transaction_ids: Sequence[str]):
+        """Re-tokenize specific rows after a Core-level (bulk) text update. Caller commits."""
+        if not transaction_ids:
+            return
+        ids = list(transaction_ids)
+        db.execute(delete(models.TransactionSearchToken).where(
+            models.TransactionSearchToken.tenant_id == tenant_id,
+            models.TransactionSearchToken.transaction_id.in_(ids)
+        ))
+        params = {"tenant_id": tenant_id, "ids": ids}
+        db.execute(text(_INDEX_TOKENS_SQL.format(scope="AND id IN :ids")).bindparams(bindparam("ids", expanding=True)), params)
+        db.execute(text(_INDEX_VOCAB_SQL.format(scope="AND t.transaction_id IN :ids")).bindparams(bindparam("ids", expanding=True)), params)
+
+    @staticmethod
+    def ensure_built(db: Optional[Session] = None) -> Dict[str, int]:
+        """Backfill every tenant that has transactions but no index yet (startup job)."""
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            built = {t for (t,) in db.query(models.TransactionSearchState.tenant_id).all()}
+            tenants = [t for (t,) in db.query(models.Transaction.tenant_id).distinct().all() if t not in built]
+            return {tenant_id: TransactionSearch.rebuild(db, tenant_id) for tenant_id in tenants}
+        finally:
+            if own_session:
+                db.close()
+
+    @staticmethod
+    def is_built(db: Session, tenant_id: str) -> bool:
+        # Checked in the caller's own snapshot: a session that started before a rebuild
+        # committed must not see "built" while the index rows are still invisible to it
+        return db.get(models.TransactionSearchState, tenant_id) is not None
+
+    # --- Queries ---
+    @staticmethod
+    def _term_sql(i: int, term: str, params: dict) -> str:
+        params[f"t{i}"] = term
+        score = f"CASE WHEN token = :t{i} THEN 3 WHEN starts_with(token, :t{i}) THEN 2 ELSE 1 END"
+        if len(term) < 3:
+            return (f"SELECT DISTINCT {i} AS idx, token, {score} AS score FROM transaction_search_vocab "
+                    f"WHERE tenant_id = :tenant_id AND contains(token, :t{i})")
+        grams = sorted(set(trigrams(term)))
+        for j, gram in enumerate(grams):
+            params[f"g{i}_{j}"] = gram
+        gram_list = ", ".join(f":g{i}_{j}" for j in range(len(grams)))
+        return (f"SELECT {i} AS idx, token, {score} AS score FROM transaction_search_vocab "
+                f"WHERE tenant_id = :tenant_id AND gram IN ({gram_list}) "
+                f"GROUP BY token HAVING count(DISTINCT gram) = {len(grams)} AND contains(token, :t{i})")
+
+    @staticmethod
+    def candidates(db: Session, tenant_id: str, query: str) -> Optional[List[Tuple[str, int]]]:
+        """
+        (transaction_id, score) for rows containing every indexable term of `query`, best first.
+        Returns None when the index cannot answer: not built, no indexable terms, or even the
+        rarest term has more than MAX_CANDIDATES postings (a LIMITed scan is cheaper then).
+        """
+        terms = tokenize(query)
+        if not terms or not TransactionSearch.is_built(db, tenant_id):
+            return None
+        params = {"tenant_id": tenant_id, "cap": MAX_CANDIDATES + 1}
+        term_sqls = [TransactionSearch._term_sql(i, term, params) for i, term in enumerate(terms)]
+
+        # Bounded posting counts (each stops after cap rows) pick the rarest term as the seed
+        sizes = []
+        for term_sql in term_sqls:
+            sizes.append(db.execute(text(f"""
+                SELECT count(*) FROM (
+                    SELECT 1 FROM transaction_search_tokens s
+                    WHERE s.tenant_id = :tenant_id AND s.token IN (SELECT token FROM ({term_sql}))
+                    LIMIT :cap
+                )"""), params).scalar())
+        seed = min(range(len(terms)), key=lambda i: sizes[i])
+        if sizes[seed] > MAX_CANDIDATES:
+            return None
+        if sizes[seed] == 0:
+            return []
+
+        sql = f"""
+            WITH terms AS ({" UNION ALL ".join(term_sqls)}),
+            seed AS (
+                SELECT s.transaction_id FROM transaction_search_tokens s JOIN terms ON s.token = terms.token
+                WHERE s.tenant_id = :tenant_id AND terms.idx = {seed}
+            )
+            SELECT s.transaction_id, sum(terms.score) AS score
+            FROM transaction_search_tokens s JOIN terms ON s.token = terms.token
+            WHERE s.tenant_id = :tenant_id AND s.transaction_id IN (SELECT transaction_id FROM seed)
+            GROUP BY s.transaction_id
+            HAVING count(DISTINCT terms.idx) = {len(terms)}
+            ORDER BY score DESC
+        """
+        return [(row[0], int(row[1])) for row in db.execute(text(sql), params)]
+
+    @staticmethod
+    def _candidate_ids(db: Session, tenant_id: str, phrases: Sequence[str]) -> Optional[Set[str]]:
+        """Union of index hits for OR-ed phrases; None if any phrase needs a scan."""
+        ids: Set[str] = set()
+        for phrase in phrases:
+            hits = TransactionSearch.candidates(db, tenant_id, phrase)
+            if hits is None:
+                return None
+            ids.update(t for t, _ in hits)
+            if len(ids) > MAX_CANDIDATES:
+                return None
+        return ids
+
+    @staticmethod
+    def match_filter(db: Session, tenant_id: str, phrases: Sequence[str]):
+        """
+        Predicate on models.Transaction equivalent to (description ILIKE %p% OR recipient ILIKE %p%)
+        for any phrase, narrowed to index candidates when the index can serve the phrases.
+        """
+        ids = TransactionSearch._candidate_ids(db, tenant_id, phrases)
+        if ids is None:
+            return _ilike(models.Transaction, phrases)
+        if not ids:
+            return false()
+        return models.Transaction.id.in_(ids) & _ilike(models.Transaction, phrases)
+
+    @staticmethod
+    def hits_entity(db: Session, tenant_id: str, search: str):
+        """
+        For listing queries: an alias of Transaction over a MATERIALIZED CTE holding only the
+        index candidates, so filters/sorting run on a handful of rows instead of the whole
+        tenant. (DuckDB only uses the primary-key index for a bare id IN (...) lookup.)
+        Returns None when the caller should scan with _ilike instead.
+        """
+        ids = TransactionSearch._candidate_ids(db, tenant_id, [search])
+        if ids is None:
+            return None
+        if not ids:
+            ids = {""}
+        cte = select(models.Transaction).where(models.Transaction.id.in_(ids)).cte("search_hits").prefix_with("MATERIALIZED")
+        return aliased(models.Transaction, cte)
+
+    @staticmethod
+    def search(db: Session, tenant_id: str, query: str, limit: int = 20) -> List[models.Transaction]:
+        """Relevance-ranked search: all terms must match a token (exact > prefix > substring)."""
+        hits = TransactionSearch.candidates(db, tenant_id, query)
+        if hits is None:
+            # Same AND-of-terms semantics as the index, newest first
+            terms = _SPLIT_RE.split(query.lower())
+            return db.query(models.Transaction).filter(
+                models.Transaction.tenant_id == tenant_id,
+                *[_ilike(models.Transaction, [term]) for term in terms if term]
+            ).order_by(models.Transaction.date.desc()).limit(limit).all()
+        if not hits:
+            return []
+        # Load every row tied with the last one that makes the cut, then break ties by recency
+        cutoff = hits[min(limit, len(hits)) - 1][1]
+        scores = {i: score for i, score in hits if score >= cutoff}
+        rows = db.query(models.Transaction).filter(models.Transaction.id.in_(list(scores))).all()
+        rows.sort(key=lambda t: (-scores[t.id], -t.date.timestamp()))
+        return rows[:limit]
+
+
+# --- Flush-time maintenance for ORM writes ---
+_TEXT_FIELDS = ("description", "recipient")
+
+
+def _index_flush(session: Session, flush_context):
+    stale: Dict[str, List[str]] = {}
+    fresh: List[models.Transaction] = []
+    for obj in session.new:
+        if isinstance(obj, models.Transaction):
+            fresh.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, models.Transaction):
+            state = inspect(obj)
+            if any(state.attrs[f].history.has_changes() for f in _TEXT_FIELDS):
+                stale.setdefault(obj.tenant_id, []).append(obj.id)
+                fresh.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, models.Transaction):
+            stale.setdefault(obj.tenant_id, []).append(obj.id)
+    if not fresh and not stale:
+        return
+
+    conn = session.connection()
+    for tenant_id, ids in stale.items():
+        conn.execute(delete(models.TransactionSearchToken).where(
+            models.TransactionSearchToken.tenant_id == tenant_id,
+            models.TransactionSearchToken.transaction_id.in_(ids)
+        ))
+
+    rows = []
+    by_tenant: Dict[str, Set[str]] = {}
+    for txn in fresh:
+        for token in tokenize(f"{txn.description or ''} {txn.recipient or ''}"):
+            rows.append({"tenant_id": txn.tenant_id, "token": token, "transaction_id": txn.id})
+            by_tenant.setdefault(txn.tenant_id, set()).add(token)
+    if not rows:
+        return
+    conn.execute(insert(models.TransactionSearchToken), rows)
+
+    for tenant_id, tokens in by_tenant.items():
+        known = {t for (t,) in conn.execute(
+            select(models.TransactionSearchVocab.token).where(
+                models.TransactionSearchVocab.tenant_id == tenant_id,
+                models.TransactionSearchVocab.token.in_(tokens)
+            ).distinct()
+        )}
+        vocab = [
+            {"tenant_id": tenant_id, "token": token, "gram": gram}
+            for token in tokens - known for gram in set(trigrams(token))
+        ]
+        if vocab:
+            conn.execute(insert(models.TransactionSearchVocab), vocab)
+
+
+event.listen(SessionLocal, "after_flush", _index_flush)
+
+
+def _index_bulk_delete(orm_execute_state):
+    """Bulk deletes bypass the flush: drop the postings of the rows about to be deleted."""
+    if not orm_execute_state.is_delete:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not models.Transaction:
+        return
+    doomed = select(models.Transaction.id)
+    where = orm_execute_state.statement.whereclause
+    if where is not None:
+        doomed = doomed.where(where)
+    orm_execute_state.session.connection().execute(
+        delete(models.TransactionSearchToken).where(models.TransactionSearchToken.transaction_id.in_(doomed)),
+        orm_execute_state.parameters or {}
+    )
+
+
+event.listen(SessionLocal, "do_orm_execute", _index_bulk_delete)
@@ -1,15 +1,20 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 import json
 import uuid
+from types import SimpleNamespace
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 import logging
+from backend.app.core.db_writer import db_writer
+from backend.app.core.pagination import keyset_page, capped_count, TOTAL_COUNT_CAP
 from backend.app.modules.finance import models, schemas
 
 logger = logging.getLogger(__name__)
 from backend.app.modules.finance.models import TransactionType
 from backend.app.modules.finance.services.category_service import CategoryService
 from backend.app.modules.finance.services.transfer_service import TransferService
+from backend.app.modules.finance.services.transaction_search import TransactionSearch
 from backend.app.modules.ingestion import models as ingestion_models
 
 class TransactionService:
@@ -52,26 +57,19 @@ class TransactionService:
         final_exclude = transaction.exclude_from_reports or transaction.is_transfer
         
         if (not final_category or final_category == "Uncategorized") and (transaction.description or transaction.recipient):
-            rules = db.query(models.CategoryRule).filter(models.CategoryRule.tenant_id == tenant_id).order_by(models.CategoryRule.priority.desc()).all()
-            
-            desc_lower = (transaction.description or "").lower()
-            recipient_lower = (transaction.recipient or "").lower()
-            
-            for rule in rules:
-                try:
-                    keywords = json.loads(rule.keywords)
-                    if any(k.lower() in desc_lower or k.lower() in recipient_lower for k in keywords):
-                        final_category = rule.category
-                        if rule.exclude_from_reports:
-                            final_exclude = True
-                        break
-                except Exception as e:
-                    pass
+            rule = TransactionService._match_rule(
+                TransactionService._load_rules(db, tenant_id), transaction.description, transaction.recipient
+            )
+            if rule:
+                final_category = rule.category
+                if rule.exclude_from_reports:
+                    final_exclude = True
         # ---------------------------------
         
         txn_type = models.TransactionType.DEBIT if transaction.amount < 0 else models.TransactionType.CREDIT
 
         db_transaction = models.Transaction(
+            id=str(uuid.uuid4()),
             account_id=str(transaction.account_id),
             tenant_id=tenant_id,
             amount=transaction.amount,
@@ -91,30 +89,51 @@ class TransactionService:
             loan_id=getattr(transaction, 'loan_id', None)
         )
         
-        # Update Account Balance
-        db_account = db.query(models.Account).filter(models.Account.id == str(transaction.account_id)).first()
-        if db_account:
-            current_bal = db_account.balance or 0
-            # If it's a liability (Loan/Credit Card), adding money (Credit) reduces the balance owed
-            # Spending money (Debit/Negative) increases the balance owed
-            if db_account.type in [models.AccountType.LOAN, models.AccountType.CREDIT_CARD]:
-                db_account.balance = current_bal - transaction.amount
-            else:
-                db_account.balance = current_bal + transaction.amount
-            db.add(db_account)
-
-        db.add(db_transaction)
-        db.commit()
-        db.refresh(db_transaction)
+        # Insert + balance update as one DB writer unit (group-committed with other requests'
+        # writes). The balance is re-read inside the unit, so concurrent transactions on the
+        # same account apply in queue order instead of overwriting each other.
+        def write(session: Session):
+            db_account = session.get(models.Account, str(transaction.account_id))
+            if db_account:
+                current_bal = db_account.balance or 0
+                # If it's a liability (Loan/Credit Card), adding money (Credit) reduces the balance owed
+                # Spending money (Debit/Negative) increases the balance owed
+                if db_account.type in [models.AccountType.LOAN, models.AccountType.CREDIT_CARD]:
+                    db_account.balance = current_bal - transaction.amount
+                else:
+                    db_account.balance = current_bal + transaction.amount
+            session.add(db_transaction)
+
+        db_writer.run(write, session=db)
+        db_transaction = db.get(models.Transaction, db_transaction.id)
         return db_transaction
 
     @staticmethod
-    def get_transactions(
-        db: Session, 
-        tenant_id: str, 
-        account_id: Optional[str] = None, 
-        skip: int = 0,
-        limit: int = 50,
+    def _load_rules(db: Session, tenant_id: str) -> List[Tuple[models.CategoryRule, List[str]]]:
+        """Category rules by priority with their keywords parsed and lower-cased once."""
+        rules = db.query(models.CategoryRule).filter(models.CategoryRule.tenant_id == tenant_id).order_by(models.CategoryRule.priority.desc()).all()
+        parsed = []
+        for rule in rules:
+            try:
+                parsed.append((rule, [k.lower() for k in json.loads(rule.keywords)]))
+            except Exception:
+                continue
+        return parsed
+
+    @staticmethod
+    def _match_rule(rules: List[Tuple[models.CategoryRule, List[str]]], description: Optional[str], recipient: Optional[str]) -> Optional[models.CategoryRule]:
+        desc_lower = (description or "").lower()
+        recipient_lower = (recipient or "").lower()
+        for rule, keywords in rules:
+            if any(k in desc_lower or k in recipient_lower for k in keywords):
+                return rule
+        return None
+
+    @staticmethod
+    def _filtered_query(
+        db: Session,
+        tenant_id: str,
+        account_id: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         search: Optional[str] = None,
@@ -122,62 +141,118 @@ class TransactionService:
         user_role: str = "ADULT",
         user_id: Optional[str] = None,
         exclude_from_reports: bool = False,
-        exclude_transfers: bool = False,
-        sort_by: str = "date",
-        sort_order: str = "desc"
-    ) -> List[models.Transaction]:
-        query = db.query(models.Transaction).filter(models.Transaction.tenant_id == tenant_id)
-        
+        exclude_transfers: bool = False
+    ):
+        """
+        Returns (query, entity). With a selective `search` the entity is an alias over the
+        search-index hits rather than the transactions table, so filter/sort via `entity`.
+        """
+        txn = models.Transaction
+        if search:
+            txn = TransactionSearch.hits_entity(db, tenant_id, search) or models.Transaction
+
+        query = db.query(txn).filter(txn.tenant_id == tenant_id)
+
+        if user_role == "CHILD" or user_id:
+            query = query.join(models.Account, txn.account_id == models.Account.id)
         if user_role == "CHILD":
-            query = query.join(models.Account, models.Transaction.account_id == models.Account.id)\
-                         .filter(models.Account.type.notin_(["INVESTMENT", "CREDIT"]))
+            query = query.filter(models.Account.type.notin_(["INVESTMENT", "CREDIT"]))
 
         if account_id:
-            query = query.filter(models.Transaction.account_id == account_id)
+            query = query.filter(txn.account_id == account_id)
         if start_date:
-            query = query.filter(models.Transaction.date >= start_date)
+            query = query.filter(txn.date >= start_date)
         if end_date:
-            query = query.filter(models.Transaction.date <= end_date)
-        
+            query = query.filter(txn.date <= end_date)
+
         if search:
             search_pattern = f"%{search}%"
-            from sqlalchemy import or_
             query = query.filter(or_(
-                models.Transaction.description.ilike(search_pattern),
-                models.Transaction.recipient.ilike(search_pattern)
+                txn.description.ilike(search_pattern),
+                txn.recipient.ilike(search_pattern)
             ))
-            
+
         if category:
-            query = query.filter(models.Transaction.category == category)
+            query = query.filter(txn.category == category)
 
         if exclude_from_reports:
-            query = query.filter(models.Transaction.exclude_from_reports == False)
+            query = query.filter(txn.exclude_from_reports == False)
         if exclude_transfers:
-            query = query.filter(models.Transaction.is_transfer == False)
+            query = query.filter(txn.is_transfer == False)
 
         if user_id:
             # Filter by account ownership: show user's accounts OR shared accounts
-            from sqlalchemy import or_
-            query = query.join(models.Account, models.Transaction.account_id == models.Account.id)\
-                         .filter(or_(models.Account.owner_id == user_id, models.Account.owner_id == None))
-            
-        sort_column = models.Transaction.date
-        if sort_by == "amount":
-            sort_column = models.Transaction.amount
-        elif sort_by == "description":
-            sort_column = models.Transaction.description
-        elif sort_by == "recipient":
-            sort_column = models.Transaction.recipient
-        elif sort_by == "category":
-            sort_column = models.Transaction.category
+            query = query.filter(or_(models.Account.owner_id == user_id, models.Account.owner_id == None))
+
+        return query, txn
+
+    @staticmethod
+    def _sort_keys(sort_by: str, txn=models.Transaction) -> list:
+        """Sort expression plus id as a unique tie-breaker (stable pages, valid keyset cursors)."""
+        sort_column = {
+            "amount": txn.amount,
+            # Nullable text columns are coalesced so every row has a comparable key
+            "description": func.coalesce(txn.description, ""),
+            "recipient": func.coalesce(txn.recipient, ""),
+            "category": func.coalesce(txn.category, ""),
+        }.get(sort_by, txn.date)
+        return [sort_column, txn.id]
 
+    @staticmethod
+    def get_transactions(
+        db: Session, 
+        tenant_id: str, 
+        account_id: Optional[str] = None, 
+        skip: int = 0,
+        limit: int = 50,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        search: Optional[str] = None,
+        category: Optional[str] = None,
+        user_role: str = "ADULT",
+        user_id: Optional[str] = None,
+        exclude_from_reports: bool = False,
+        exclude_transfers: bool = False,
+        sort_by: str = "date",
+        sort_order: str = "desc"
+    ) -> List[models.Transaction]:
+        query, txn = TransactionService._filtered_query(
+            db, tenant_id, account_id, start_date, end_date, search, category,
+            user_role, user_id, exclude_from_reports, exclude_transfers
+        )
+        keys = TransactionService._sort_keys(sort_by, txn)
         if sort_order == "asc":
-            query = query.order_by(sort_column.asc())
+            query = query.order_by(*[k.asc() for k in keys])
         else:
-            query = query.order_by(sort_column.desc())
+            query = query.order_by(*[k.desc() for k in keys])
 
         return query.offset(skip).limit(limit).all()
 
+    @staticmethod
+    def get_transactions_page(
+        db: Session,
+        tenant_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        sort_by: str = "date",
+        sort_order: str = "desc",
+        **filters
+    ) -> Tuple[List[models.Transaction], Optional[str]]:
+        """
+        Keyset-paginated listing: returns (items, next_cursor). Page N costs the same as page 1.
+        `filters` are the same keyword filters as get_transactions. Raises InvalidCursor.
+        """
+        sort_by = sort_by if sort_by in ("amount", "description", "recipient", "category") else "date"
+        query, txn = TransactionService._filtered_query(db, tenant_id, **filters)
+        return keyset_page(
+            query,
+            TransactionService._sort_keys(sort_by, txn),
+            descending=sort_order != "asc",
+            limit=limit,
+            cursor=cursor,
+            signature=f"txn:{sort_by}:{sort_order}",
+        )
+
     @staticmethod
     def count_transactions(
         db: Session, 
@@ -189,150 +264,134 @@ class TransactionService:
         category: Optional[str] = None,
         user_role: str = "ADULT",
         exclude_from_reports: bool = False,
-        exclude_transfers: bool = False
+        exclude_transfers: bool = False,
+        user_id: Optional[str] = None
     ) -> int:
-        query = db.query(models.Transaction).filter(models.Transaction.tenant_id == tenant_id)
-
-        if user_role == "CHILD":
-            query = query.join(models.Account, models.Transaction.account_id == models.Account.id)\
-                         .filter(models.Account.type.notin_(["INVESTMENT", "CREDIT"]))
-
-        if account_id:
-            query = query.filter(models.Transaction.account_id == account_id)
-        if start_date:
-            query = query.filter(models.Transaction.date >= start_date)
-        if end_date:
-            query = query.filter(models.Transaction.date <= end_date)
-            
-        if search:
-            search_pattern = f"%{search}%"
-            from sqlalchemy import or_
-            query = query.filter(or_(
-                models.Transaction.description.ilike(search_pattern),
-                models.Transaction.recipient.ilike(search_pattern)
-            ))
-            
-        if category:
-            query = query.filter(models.Transaction.category == category)
-            
-        if exclude_from_reports:
-            query = query.filter(models.Transaction.exclude_from_reports == False)
-        if exclude_transfers:
-            query = query.filter(models.Transaction.is_transfer == False)
-            
+        query, _ = TransactionService._filtered_query(
+            db, tenant_id, account_id, start_date, end_date, search, category,
+            user_role, user_id, exclude_from_reports, exclude_transfers
+        )
         return query.count()
 
+    @staticmethod
+    def estimate_transactions(db: Session, tenant_id: str, cap: int = TOTAL_COUNT_CAP, **filters) -> Tuple[int, bool]:
+        """Bounded count for cursor pagination: (count, exact). Stops scanning after `cap` rows."""
+        query, _ = TransactionService._filtered_query(db, tenant_id, **filters)
+        return capped_count(query, cap)
+
     @staticmethod
     def bulk_delete_transactions(db: Session, transaction_ids: List[str], tenant_id: str) -> int:
         if not transaction_ids: return 0
-        try:
-            query = db.query(models.Transaction).filter(
-                models.Transaction.id.in_(transaction_ids),
-                models.Transaction.tenant_id == tenant_id
-            )
-            count = query.delete(synchronize_session=False)
-            db.commit()
-            return count
-        except Exception as e:
-            db.rollback()
-            raise e
+        with db_writer.exclusive(db):
+            try:
+                query = db.query(models.Transaction).filter(
+                    models.Transaction.id.in_(transaction_ids),
+                    models.Transaction.tenant_id == tenant_id
+                )
+                count = query.delete(synchronize_session=False)
+                db.commit()
+                return count
+            except Exception as e:
+                db.rollback()
+                raise e
 
     @staticmethod
     def update_transaction(db: Session, txn_id: str, txn_update: schemas.TransactionUpdate, tenant_id: str) -> Optional[models.Transaction]:
-        db_txn = db.query(models.Transaction).filter(
-            models.Transaction.id == txn_id,
-            models.Transaction.tenant_id == tenant_id
-        ).first()
+        with db_writer.exclusive(db):
+            db_txn = db.query(models.Transaction).filter(
+                models.Transaction.id == txn_id,
+                models.Transaction.tenant_id == tenant_id
+            ).first()
         
-        if not db_txn:
-            return None
+            if not db_txn:
+                return None
             
-        update_data = txn_update.model_dump(exclude_unset=True)
+            update_data = txn_update.model_dump(exclude_unset=True)
         
-        is_transfer_update = update_data.get('is_transfer')
-        to_account_id = update_data.get('to_account_id')
+            is_transfer_update = update_data.get('is_transfer')
+            to_account_id = update_data.get('to_account_id')
         
-        if is_transfer_update is True:
-            db_txn.is_transfer = True
-            db_txn.exclude_from_reports = True
+            if is_transfer_update is True:
+                db_txn.is_transfer = True
+                db_txn.exclude_from_reports = True
             
-            # Case A: User selected an EXISTING transaction to link (Manual Match)
-            if update_data.get('linked_transaction_id'):
-                # 1. Unlink any old one
-                if db_txn.linked_transaction_id:
-                     old_linked = db.query(models.Transaction).filter(models.Transaction.id == db_txn.linked_transaction_id).first()
-                     # If the old one was auto-generated (same amount, diff sign, transfer category), maybe delete? 
-                     # For safety, let's just unlink it. User can delete manually if needed.
-                     if old_linked:
-                        old_linked.linked_transaction_id = None
-                        db.add(old_linked)
-
-                # 2. Link the new target
-                target_id = update_data['linked_transaction_id']
-                target_txn = db.query(models.Transaction).filter(models.Transaction.id == target_id).first()
+                # Case A: User selected an EXISTING transaction to link (Manual Match)
+                if update_data.get('linked_transaction_id'):
+                    # 1. Unlink any old one
+                    if db_txn.linked_transaction_id:
+                         old_linked = db.query(models.Transaction).filter(models.Transaction.id == db_txn.linked_transaction_id).first()
+                         # If the old one was auto-generated (same amount, diff sign, transfer category), maybe delete? 
+                         # For safety, let's just unlink it. User can delete manually if needed.
+                         if old_linked:
+                            old_linked.linked_transaction_id = None
+                            db.add(old_linked)
+
+                    # 2. Link the new target
+                    target_id = update_data['linked_transaction_id']
+                    target_txn = db.query(models.Transaction).filter(models.Transaction.id == target_id).first()
                 
-                if target_txn:
-                    db_txn.linked_transaction_id = target_txn.id
-                    target_txn.linked_transaction_id = db_txn.id
-                    target_txn.is_transfer = True
-                    target_txn.category = "Transfer"
-                    target_txn.exclude_from_reports = True # Ensure both are hidden
+                    if target_txn:
+                        db_txn.linked_transaction_id = target_txn.id
+                        target_txn.linked_transaction_id = db_txn.id
+                        target_txn.is_transfer = True
+                        target_txn.category = "Transfer"
+                        target_txn.exclude_from_reports = True # Ensure both are hidden
+                        db.add(target_txn)
+
+                # Case B: User selected an ACCOUNT to transfer to (Auto Create)
+                elif to_account_id:
+                    if db_txn.linked_transaction_id:
+                         old_linked = db.query(models.Transaction).filter(models.Transaction.id == db_txn.linked_transaction_id).first()
+                         if old_linked: db.delete(old_linked)
+                
+                    target_txn = models.Transaction(
+                        id=str(uuid.uuid4()),
+                        tenant_id=tenant_id,
+                        account_id=to_account_id,
+                        amount=-db_txn.amount if 'amount' not in update_data else -update_data['amount'],
+                        date=db_txn.date if 'date' not in update_data else update_data['date'],
+                        description=f"Transfer from {db_txn.account_id} (Linked)",
+                        recipient=db_txn.recipient,
+                        category="Transfer",
+                        type=TransactionType.CREDIT if (db_txn.amount < 0) else TransactionType.DEBIT,
+                        is_transfer=True,
+                        source=db_txn.source,
+                        linked_transaction_id=db_txn.id,
+                        exclude_from_reports=True
+                    )
                     db.add(target_txn)
+                    db_txn.linked_transaction_id = target_txn.id
+                    db_txn.category = "Transfer"
+                    update_data['category'] = "Transfer"
 
-            # Case B: User selected an ACCOUNT to transfer to (Auto Create)
-            elif to_account_id:
+            elif is_transfer_update is False:
+                db_txn.is_transfer = False
                 if db_txn.linked_transaction_id:
-                     old_linked = db.query(models.Transaction).filter(models.Transaction.id == db_txn.linked_transaction_id).first()
-                     if old_linked: db.delete(old_linked)
+                    # If we are un-marking transfer, check if the linked txn was auto-generated
+                    linked = db.query(models.Transaction).filter(models.Transaction.id == db_txn.linked_transaction_id).first()
+                    if linked:
+                        # HEURISTIC: If linked txn is also "Transfer" and "Hidden", unlink it. 
+                        # If it looks like a manual match, just unlink. 
+                        # If it looks like auto-gen, maybe delete? 
+                        # Safest is just to unlink and let user clean up. 
+                        linked.linked_transaction_id = None
+                        linked.is_transfer = False # Should we reset? Maybe.
+                        db.add(linked)
+
+                    db_txn.linked_transaction_id = None
+        
+            for key, value in update_data.items():
+                if key in ['is_transfer', 'to_account_id']: continue
+                if key == 'tags' and value is not None:
+                    setattr(db_txn, key, json.dumps(value))
+                elif key in ['linked_transaction_id', 'expense_group_id', 'loan_id'] and value == "":
+                    setattr(db_txn, key, None)
+                else:
+                    setattr(db_txn, key, value)
                 
-                target_txn = models.Transaction(
-                    id=str(uuid.uuid4()),
-                    tenant_id=tenant_id,
-                    account_id=to_account_id,
-                    amount=-db_txn.amount if 'amount' not in update_data else -update_data['amount'],
-                    date=db_txn.date if 'date' not in update_data else update_data['date'],
-                    description=f"Transfer from {db_txn.account_id} (Linked)",
-                    recipient=db_txn.recipient,
-                    category="Transfer",
-                    type=TransactionType.CREDIT if (db_txn.amount < 0) else TransactionType.DEBIT,
-                    is_transfer=True,
-                    source=db_txn.source,
-                    linked_transaction_id=db_txn.id,
-                    exclude_from_reports=True
-                )
-                db.add(target_txn)
-                db_txn.linked_transaction_id = target_txn.id
-                db_txn.category = "Transfer"
-                update_data['category'] = "Transfer"
-
-        elif is_transfer_update is False:
-            db_txn.is_transfer = False
-            if db_txn.linked_transaction_id:
-                # If we are un-marking transfer, check if the linked txn was auto-generated
-                linked = db.query(models.Transaction).filter(models.Transaction.id == db_txn.linked_transaction_id).first()
-                if linked:
-                    # HEURISTIC: If linked txn is also "Transfer" and "Hidden", unlink it. 
-                    # If it looks like a manual match, just unlink. 
-                    # If it looks like auto-gen, maybe delete? 
-                    # Safest is just to unlink and let user clean up. 
-                    linked.linked_transaction_id = None
-                    linked.is_transfer = False # Should we reset? Maybe.
-                    db.add(linked)
-
-                db_txn.linked_transaction_id = None
-        
-        for key, value in update_data.items():
-            if key in ['is_transfer', 'to_account_id']: continue
-            if key == 'tags' and value is not None:
-                setattr(db_txn, key, json.dumps(value))
-            elif key in ['linked_transaction_id', 'expense_group_id', 'loan_id'] and value == "":
-                setattr(db_txn, key, None)
-            else:
-                setattr(db_txn, key, value)
-                
-        db.commit()
-        db.refresh(db_txn)
-        return db_txn
+            db.commit()
+            db.refresh(db_txn)
+            return db_txn
 
     @staticmethod
     def get_suggested_category(db: Session, tenant_id: str, description: Optional[str], recipient: Optional[str]) -> str:
@@ -386,107 +445,81 @@ class TransactionService:
         exclude_from_reports_override: Optional[bool] = None,
         create_rule: bool = False
     ):
-        pending = db.query(ingestion_models.PendingTransaction).filter(
-            ingestion_models.PendingTransaction.id == pending_id,
-            ingestion_models.PendingTransaction.tenant_id == tenant_id
-        ).first()
-        if not pending: return None
-        
-        final_is_transfer = is_transfer_override or pending.is_transfer
-        final_to_account_id = to_account_id_override or pending.to_account_id
-        final_category = category_override or pending.category or "Uncategorized"
-        final_exclude = exclude_from_reports_override if exclude_from_reports_override is not None else pending.exclude_from_reports
-        
-        # Sync exclude if it was forced to transfer here
-        if is_transfer_override:
-            final_exclude = True
-        
-        if create_rule and pending.description:
-            rule_create = schemas.CategoryRuleCreate(
-                name=f"Rule for {pending.description[:20]}...",
+        with db_writer.exclusive(db):
+            pending = db.query(ingestion_models.PendingTransaction).filter(
+                ingestion_models.PendingTransaction.id == pending_id,
+                ingestion_models.PendingTransaction.tenant_id == tenant_id
+            ).first()
+            if not pending: return None
+        
+            final_is_transfer = is_transfer_override or pending.is_transfer
+            final_to_account_id = to_account_id_override or pending.to_account_id
+            final_category = category_override or pending.category or "Uncategorized"
+            final_exclude = exclude_from_reports_override if exclude_from_reports_override is not None else pending.exclude_from_reports
+        
+            # Sync exclude if it was forced to transfer here
+            if is_transfer_override:
+                final_exclude = True
+        
+            if create_rule and pending.description:
+                rule_create = schemas.CategoryRuleCreate(
+                    name=f"Rule for {pending.description[:20]}...",
+                    category=final_category,
+                    keywords=[pending.description],
+                    is_transfer=final_is_transfer,
+                    to_account_id=final_to_account_id,
+                    priority=10
+                )
+                CategoryService.create_category_rule(db, rule_create, tenant_id)
+
+            txn_create = schemas.TransactionCreate(
+                account_id=pending.account_id,
+                amount=pending.amount,
+                date=pending.date,
+                description=pending.description,
+                recipient=pending.recipient,
                 category=final_category,
-                keywords=[pending.description],
+                external_id=pending.external_id,
+                source=pending.source,
                 is_transfer=final_is_transfer,
                 to_account_id=final_to_account_id,
-                priority=10
+                tags=[],
+                exclude_from_reports=final_exclude
             )
-            CategoryService.create_category_rule(db, rule_create, tenant_id)
-
-        txn_create = schemas.TransactionCreate(
-            account_id=pending.account_id,
-            amount=pending.amount,
-            date=pending.date,
-            description=pending.description,
-            recipient=pending.recipient,
-            category=final_category,
-            external_id=pending.external_id,
-            source=pending.source,
-            is_transfer=final_is_transfer,
-            to_account_id=final_to_account_id,
-            tags=[],
-            exclude_from_reports=final_exclude
-        )
-        
-        if txn_create.is_transfer and txn_create.to_account_id:
-            pending.is_transfer = final_is_transfer
-            pending.to_account_id = final_to_account_id
-            pending.exclude_from_reports = final_exclude
-            real_txn = TransferService.approve_transfer(db, pending, tenant_id)
-        else:
-            real_txn = TransactionService.create_transaction(db, txn_create, tenant_id, exclude_pending_id=pending_id)
         
-        if pending.balance is not None or pending.credit_limit is not None:
-            account = db.query(models.Account).filter(models.Account.id == pending.account_id).first()
-            if account:
-                if pending.balance is not None:
-                    account.balance = pending.balance
-                if pending.credit_limit is not None:
-                    account.credit_limit = pending.credit_limit
-
-        db.delete(pending)
-        db.commit()
-        return real_txn
-
-    @staticmethod
-    def reject_pending_transaction(db: Session, pending_id: str, tenant_id: str, create_ignore_rule: bool = False):
-        pending = db.query(ingestion_models.PendingTransaction).filter(
-            ingestion_models.PendingTransaction.id == pending_id,
-            ingestion_models.PendingTransaction.tenant_id == tenant_id
-        ).first()
-        if not pending: return False
+            if txn_create.is_transfer and txn_create.to_account_id:
+                pending.is_transfer = final_is_transfer
+                pending.to_account_id = final_to_account_id
+                pending.exclude_from_reports = final_exclude
+                real_txn = TransferService.approve_transfer(db, pending, tenant_id)
+            else:
+                real_txn = TransactionService.create_transaction(db, txn_create, tenant_id, exclude_pending_id=pending_id)
         
-        if create_ignore_rule:
-            pattern = pending.recipient or pending.description
-            if pattern:
-                # Check if already exists
-                existing = db.query(ingestion_models.IgnoredPattern).filter(
-                    ingestion_models.IgnoredPattern.tenant_id == tenant_id,
-                    ingestion_models.IgnoredPattern.pattern == pattern
-                ).first()
-                if not existing:
-                    new_ignore = ingestion_models.IgnoredPattern(
-                        tenant_id=tenant_id,
-                        pattern=pattern,
-                        source=pending.source
-                    )
-                    db.add(new_ignore)
+            if pending.balance is not None or pending.credit_limit is not None:
+                account = db.query(models.Account).filter(models.Account.id == pending.account_id).first()
+                if account:
+                    if pending.balance is not None:
+                        account.balance = pending.balance
+                    if pending.credit_limit is not None:
+                        account.credit_limit = pending.credit_limit
 
-        db.delete(pending)
-        db.commit()
-        return True
+            db.delete(pending)
+            db.commit()
+            return real_txn
 
     @staticmethod
-    def bulk_reject_pending_transactions(db: Session, pending_ids: List[str], tenant_id: str, create_ignore_rules: bool = False):
-        if not pending_ids: return 0
-        
-        if create_ignore_rules:
-            pendings = db.query(ingestion_models.PendingTransaction).filter(
-                ingestion_models.PendingTransaction.id.in_(pending_ids),
+    def reject_pending_transaction(db: Session, pending_id: str, tenant_id: str, create_ignore_rule: bool = False):
+        with db_writer.exclusive(db):
+            pending = db.query(ingestion_models.PendingTransaction).filter(
+                ingestion_models.PendingTransaction.id == pending_id,
                 ingestion_models.PendingTransaction.tenant_id == tenant_id
-            ).all()
-            for p in pendings:
-                pattern = p.recipient or p.description
+            ).first()
+            if not pending: return False
+        
+            if create_ignore_rule:
+                pattern = pending.recipient or pending.description
                 if pattern:
+                    # Check if already exists
                     existing = db.query(ingestion_models.IgnoredPattern).filter(
                         ingestion_models.IgnoredPattern.tenant_id == tenant_id,
                         ingestion_models.IgnoredPattern.pattern == pattern
@@ -495,16 +528,292 @@ class TransactionService:
                         new_ignore = ingestion_models.IgnoredPattern(
                             tenant_id=tenant_id,
                             pattern=pattern,
-                            source=p.source
+                            source=pending.source
                         )
                         db.add(new_ignore)
-        
-        count = db.query(ingestion_models.PendingTransaction).filter(
-            ingestion_models.PendingTransaction.id.in_(pending_ids),
-            ingestion_models.PendingTransaction.tenant_id == tenant_id
-        ).delete(synchronize_session=False)
-        db.commit()
-        return count
+
+            db.delete(pending)
+            db.commit()
+            return True
+
+    @staticmethod
+    def bulk_reject_pending_transactions(db: Session, pending_ids: List[str], tenant_id: str, create_ignore_rules: bool = False) -> List[dict]:
+        """
+        Reject many triage items with one lookup, one ignore-pattern check and one DELETE.
+        Returns {"pending_id", "status"} per requested id (rejected / not_found).
+        """
+        if not pending_ids: return []
+        Pending = ingestion_models.PendingTransaction
+        ids = list(dict.fromkeys(pending_ids))
+
+        with db_writer.exclusive(db):
+            rows = db.query(Pending.id, Pending.recipient, Pending.description, Pending.source).filter(
+                Pending.id.in_(ids),
+                Pending.tenant_id == tenant_id
+            ).all()
+            found = {row.id for row in rows}
+
+            if create_ignore_rules:
+                # First occurrence of each pattern decides its source, as the one-by-one loop did
+                patterns = {}
+                for row in rows:
+                    pattern = row.recipient or row.description
+                    if pattern and pattern not in patterns:
+                        patterns[pattern] = row.source
+                if patterns:
+                    existing = {p for (p,) in db.query(ingestion_models.IgnoredPattern.pattern).filter(
+                        ingestion_models.IgnoredPattern.tenant_id == tenant_id,
+                        ingestion_models.IgnoredPattern.pattern.in_(list(patterns))
+                    ).all()}
+                    db.add_all([
+                        ingestion_models.IgnoredPattern(tenant_id=tenant_id, pattern=pattern, source=source)
+                        for pattern, source in patterns.items() if pattern not in existing
+                    ])
+
+            if found:
+                db.query(Pending).filter(
+                    Pending.id.in_(list(found)),
+                    Pending.tenant_id == tenant_id
+                ).delete(synchronize_session=False)
+            db.commit()
+            return [{"pending_id": pid, "status": "rejected" if pid in found else "not_found"} for pid in ids]
+
+    @staticmethod
+    def _dedup_lookup(db: Session, model, tenant_id: str, pendings: list, hashes: dict, exclude_ids: Optional[List[str]] = None) -> dict:
+        """
+        Batched version of TransactionDeduplicator.check_raw_duplicate's three probes against one
+        table (confirmed or triage): external ids, content hashes and same-day field candidates,
+        each fetched with a single IN query for the whole batch.
+        """
+        from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator
+        refs = set()
+        for p in pendings:
+            ref_id = TransactionDeduplicator.normalize_ref_id(p.external_id)
+            if ref_id:
+                refs.update((ref_id, p.external_id))
+
+        def scoped(*columns):
+            query = db.query(*columns).filter(model.tenant_id == tenant_id)
+            if exclude_ids:
+                query = query.filter(model.id.notin_(exclude_ids))
+            return query
+
+        by_ref, by_hash, by_fields = {}, {}, {}
+        if refs:
+            for row_id, ext in scoped(model.id, model.external_id).filter(model.external_id.in_(list(refs))).all():
+                by_ref.setdefault(ext, row_id)
+        for row_id, content_hash in scoped(model.id, model.content_hash).filter(model.content_hash.in_(list(set(hashes.values())))).all():
+            by_hash.setdefault(content_hash, row_id)
+
+        days = [p.date.date() for p in pendings]
+        candidates = scoped(model.id, model.account_id, model.amount, model.date, model.description, model.recipient).filter(
+            model.account_id.in_(list({p.account_id for p in pendings})),
+            model.amount.in_(list({p.amount for p in pendings})),
+            func.date(model.date) >= min(days),
+            func.date(model.date) <= max(days)
+        ).all()
+        for row in candidates:
+            by_fields.setdefault((row.account_id, row.amount, row.date.date()), []).append(row)
+        return {"ref": by_ref, "hash": by_hash, "fields": by_fields}
+
+    @staticmethod
+    def _dedup_match(confirmed: dict, triage: dict, p, content_hash: str) -> Optional[Tuple[str, str, str]]:
+        """
+        (table, kind, existing_id) for the first probe that matches, in check_raw_duplicate's
+        order: each level (ref, hash, fields) tries confirmed transactions, then triage.
+        """
+        from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator
+        ref_id = TransactionDeduplicator.normalize_ref_id(p.external_id)
+        if ref_id:
+            for table, lookup in (("confirmed", confirmed), ("triage", triage)):
+                existing = lookup["ref"].get(ref_id) or lookup["ref"].get(p.external_id)
+                if existing: return table, "ref", existing
+        for table, lookup in (("confirmed", confirmed), ("triage", triage)):
+            existing = lookup["hash"].get(content_hash)
+            if existing: return table, "hash", existing
+        for table, lookup in (("confirmed", confirmed), ("triage", triage)):
+            for row in lookup["fields"].get((p.account_id, p.amount, p.date.date()), []):
+                if p.recipient:
+                    same = row.description == p.description or row.recipient == p.recipient
+                elif p.description or table == "triage":
+                    # None compares like SQL IS NULL; only the confirmed probe drops the filter
+                    same = row.description == p.description
+                else:
+                    same = True
+                if same: return table, "fields", row.id
+        return None
+
+    @staticmethod
+    def bulk_approve_pending_transactions(
+        db: Session,
+        pending_ids: List[str],
+        tenant_id: str,
+        category_override: Optional[str] = None,
+        exclude_from_reports_override: Optional[bool] = None
+    ) -> List[dict]:
+        """
+        Approve many triage items in one DB transaction. Dedup probes are batched per table,
+        rules are loaded once, new transactions go in as one multi-row INSERT, balances move with
+        one UPDATE per account and the pending rows go with one DELETE.
+
+        Items resolve in request order, so an item identical to an earlier one in the batch is a
+        duplicate of it. Returns one {"pending_id", "status", "transaction_id", "detail"} per id:
+        - approved: transaction created (transfers create both legs)
+        - duplicate: already confirmed; the triage item is removed
+        - skipped: duplicates another triage item outside this batch; left in triage
+        - not_found
+        """
+        from sqlalchemy import insert
+        from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator
+        if not pending_ids: return []
+        Pending = ingestion_models.PendingTransaction
+        ids = list(dict.fromkeys(pending_ids))
+
+        with db_writer.exclusive(db):
+            pendings = {p.id: p for p in db.query(Pending).filter(
+                Pending.id.in_(ids),
+                Pending.tenant_id == tenant_id
+            ).all()}
+            ordered = [pendings[pid] for pid in ids if pid in pendings]
+            results = {pid: {"pending_id": pid, "status": "not_found", "transaction_id": None, "detail": None} for pid in ids}
+            if not ordered:
+                return list(results.values())
+
+            transfers = {p.id for p in ordered if p.is_transfer and p.to_account_id}
+            regular = [p for p in ordered if p.id not in transfers]
+            hashes = {p.id: TransactionDeduplicator.generate_hash(
+                tenant_id, p.account_id, p.date, p.amount, p.description, p.recipient
+            ) for p in regular}
+            confirmed = TransactionService._dedup_lookup(db, models.Transaction, tenant_id, regular, hashes) if regular else None
+            triage = TransactionService._dedup_lookup(db, Pending, tenant_id, regular, hashes, exclude_ids=ids) if regular else None
+            rules = TransactionService._load_rules(db, tenant_id)
+            liabilities = {a for (a,) in db.query(models.Account.id).filter(
+                models.Account.id.in_(list({p.account_id for p in ordered})),
+                models.Account.type.in_([models.AccountType.LOAN, models.AccountType.CREDIT_CARD])
+            ).all()}
+
+            rows = []
+            balance_set, balance_delta, credit_limits = {}, {}, {}
+            now = datetime.utcnow()
+            for p in ordered:
+                result = results[p.id]
+                if p.id in transfers:
+                    # Transfers never went through dedup or balance deltas; keep that behaviour
+                    result.update(status="approved", transaction_id=TransferService.approve_transfer(db, p, tenant_id).id)
+                else:
+                    match = TransactionService._dedup_match(confirmed, triage, p, hashes[p.id])
+                    if match and match[0] == "triage":
+                        result.update(status="skipped", detail=f"Duplicates triage item {match[2]} ({match[1]} match)")
+                        continue
+                    if match:
+                        result.update(status="duplicate", transaction_id=match[2], detail=f"Already confirmed ({match[1]} match)")
+                    else:
+                        category = category_override or p.category or "Uncategorized"
+                        exclude = exclude_from_reports_override if exclude_from_reports_override is not None else p.exclude_from_reports
+                        exclude = bool(exclude or p.is_transfer)
+                        if category == "Uncategorized" and (p.description or p.recipient):
+                            rule = TransactionService._match_rule(rules, p.description, p.recipient)
+                            if rule:
+                                category = rule.category
+                                exclude = exclude or bool(rule.exclude_from_reports)
+
+                        txn_id = str(uuid.uuid4())
+                        rows.append({
+                            "id": txn_id,
+                            "tenant_id": tenant_id,
+                            "account_id": p.account_id,
+                            "type": models.TransactionType.DEBIT if p.amount < 0 else models.TransactionType.CREDIT,
+                            "amount": p.amount,
+                            "date": p.date,
+                            "description": p.description,
+                            "recipient": p.recipient,
+                            "category": category,
+                            "tags": None,
+                            "content_hash": hashes[p.id],
+                            "external_id": p.external_id or str(uuid.uuid4()),
+                            "is_transfer": bool(p.is_transfer),
+                            "source": p.source,
+                            "exclude_from_reports": exclude,
+                            "is_emi": False,
+                            "created_at": now
+                        })
+                        result.update(status="approved", transaction_id=txn_id)
+
+                        # Later items in the batch see this one as confirmed
+                        key = (p.account_id, p.amount, p.date.date())
+                        ref_id = TransactionDeduplicator.normalize_ref_id(p.external_id)
+                        if ref_id:
+                            confirmed["ref"].setdefault(ref_id, txn_id)
+                            confirmed["ref"].setdefault(p.external_id, txn_id)
+                        confirmed["hash"].setdefault(hashes[p.id], txn_id)
+                        confirmed["fields"].setdefault(key, []).append(
+                            SimpleNamespace(id=txn_id, description=p.description, recipient=p.recipient)
+                        )
+
+                        delta = -p.amount if p.account_id in liabilities else p.amount
+                        balance_delta[p.account_id] = balance_delta.get(p.account_id, 0) + delta
+
+                # A statement balance replaces everything applied before it, as in the one-by-one flow
+                if p.balance is not None:
+                    balance_set[p.account_id] = p.balance
+                    balance_delta[p.account_id] = 0
+                if p.credit_limit is not None:
+                    credit_limits[p.account_id] = p.credit_limit
+
+            try:
+                if rows:
+                    db.execute(insert(models.Transaction), rows)
+                    # Core INSERT bypasses the flush hook
+                    TransactionSearch.reindex(db, tenant_id, [r["id"] for r in rows])
+
+                for account_id in set(balance_set) | set(balance_delta) | set(credit_limits):
+                    values = {}
+                    if account_id in balance_set or balance_delta.get(account_id):
+                        base = balance_set.get(account_id)
+                        base = base if base is not None else func.coalesce(models.Account.balance, 0)
+                        values[models.Account.balance] = base + balance_delta.get(account_id, 0)
+                    if account_id in credit_limits:
+                        values[models.Account.credit_limit] = credit_limits[account_id]
+                    if values:
+                        db.query(models.Account).filter(
+                            models.Account.id == account_id,
+                            models.Account.tenant_id == tenant_id
+                        ).update(values, synchronize_session=False)
+
+                resolved = [pid for pid, r in results.items() if r["status"] in ("approved", "duplicate")]
+                if resolved:
+                    db.query(Pending).filter(
+                        Pending.id.in_(resolved),
+                        Pending.tenant_id == tenant_id
+                    ).delete(synchronize_session=False)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            return list(results.values())
+
+        # --- Set-based bulk updates ---
+    @staticmethod
+    def _keyword_filter(db: Session, tenant_id: str, keywords: List[str]):
+        """(description ILIKE %k% OR recipient ILIKE %k%) for any keyword, narrowed by the search index."""
+        return TransactionSearch.match_filter(db, tenant_id, keywords)
+
+    @staticmethod
+    def _uncategorized_filter():
+        return (models.Transaction.category == "Uncategorized") | (models.Transaction.category == None)
+
+    @staticmethod
+    def _set_based_update(db: Session, filters: list, values: dict, preview: bool = False) -> int:
+        """
+        Run `UPDATE transactions SET ... WHERE <filters>` without loading rows into the session.
+        Returns the affected count (DuckDB reports rowcount -1, so it is taken with a COUNT on the
+        same predicate). `preview` only counts. Callers hold db_writer.exclusive(db) and commit.
+        """
+        base = db.query(models.Transaction).filter(*filters)
+        affected = base.count()
+        if affected and not preview:
+            base.update(values, synchronize_session=False)
+        return affected
 
     @staticmethod
     def batch_update_category_and_create_rule(
@@ -516,167 +825,147 @@ class TransactionService:
         apply_to_similar: bool = False,
         exclude_from_reports: bool = False
     ) -> dict:
-        db_txn = db.query(models.Transaction).filter(
-            models.Transaction.id == txn_id,
-            models.Transaction.tenant_id == tenant_id
-        ).first()
-        
-        if not db_txn:
-            return {"success": False, "message": "Transaction not found"}
-            
-        old_category = db_txn.category
-        db_txn.category = category
-        if exclude_from_reports:
-            db_txn.exclude_from_reports = True
-        db.add(db_txn)
-        
-        affected_count = 1
-        rule_created = False
-        
-        pattern = db_txn.recipient or db_txn.description
-        if not pattern:
-            db.commit()
-            return {"success": True, "affected": affected_count, "rule_created": False}
-
-        if create_rule:
-            existing_rule = db.query(models.CategoryRule).filter(
-                models.CategoryRule.tenant_id == tenant_id,
-                models.CategoryRule.name == f"Auto: {pattern}"
+        with db_writer.exclusive(db):
+            db_txn = db.query(models.Transaction).filter(
+                models.Transaction.id == txn_id,
+                models.Transaction.tenant_id == tenant_id
             ).first()
+        
+            if not db_txn:
+                return {"success": False, "message": "Transaction not found"}
             
-            if not existing_rule:
-                new_rule = models.CategoryRule(
-                    tenant_id=tenant_id,
-                    name=f"Auto: {pattern}",
-                    category=category,
-                    keywords=json.dumps([pattern]),
-                    priority=1,
-                    exclude_from_reports=exclude_from_reports
-                )
-                db.add(new_rule)
-                rule_created = True
-            else:
-                # Update existing rule to reflect new decision
-                existing_rule.category = category
-                existing_rule.exclude_from_reports = exclude_from_reports
-                db.add(existing_rule)
-                rule_created = True
-
-        if apply_to_similar:
-            from sqlalchemy import or_
-            query = db.query(models.Transaction).filter(
-                models.Transaction.tenant_id == tenant_id,
-                models.Transaction.id != txn_id,
-                (models.Transaction.category == "Uncategorized") | (models.Transaction.category == None)
-            )
+            old_category = db_txn.category
+            db_txn.category = category
+            if exclude_from_reports:
+                db_txn.exclude_from_reports = True
+            db.add(db_txn)
+        
+            affected_count = 1
+            rule_created = False
+        
+            pattern = db_txn.recipient or db_txn.description
+            if not pattern:
+                db.commit()
+                return {"success": True, "affected": affected_count, "rule_created": False}
+
+            if create_rule:
+                existing_rule = db.query(models.CategoryRule).filter(
+                    models.CategoryRule.tenant_id == tenant_id,
+                    models.CategoryRule.name == f"Auto: {pattern}"
+                ).first()
             
-            search_pattern = f"%{pattern}%"
-            query = query.filter(or_(
-                models.Transaction.description.ilike(search_pattern),
-                models.Transaction.recipient.ilike(search_pattern)
-            ))
-                
-            similar_txns = query.all()
-            for st in similar_txns:
-                st.category = category
+                if not existing_rule:
+                    new_rule = models.CategoryRule(
+                        tenant_id=tenant_id,
+                        name=f"Auto: {pattern}",
+                        category=category,
+                        keywords=json.dumps([pattern]),
+                        priority=1,
+                        exclude_from_reports=exclude_from_reports
+                    )
+                    db.add(new_rule)
+                    rule_created = True
+                else:
+                    # Update existing rule to reflect new decision
+                    existing_rule.category = category
+                    existing_rule.exclude_from_reports = exclude_from_reports
+                    db.add(existing_rule)
+                    rule_created = True
+
+            if apply_to_similar:
+                values = {models.Transaction.category: category}
                 if exclude_from_reports:
-                    st.exclude_from_reports = True
-                db.add(st)
-                affected_count += 1
-
-        db.commit()
-        return {
-            "success": True, 
-            "affected": affected_count, 
-            "rule_created": rule_created,
-            "pattern": pattern
-        }
+                    values[models.Transaction.exclude_from_reports] = True
+                affected_count += TransactionService._set_based_update(db, [
+                    models.Transaction.tenant_id == tenant_id,
+                    models.Transaction.id != txn_id,
+                    TransactionService._uncategorized_filter(),
+                    TransactionService._keyword_filter(db, tenant_id, [pattern])
+                ], values)
+
+            db.commit()
+            return {
+                "success": True, 
+                "affected": affected_count, 
+                "rule_created": rule_created,
+                "pattern": pattern
+            }
 
     @staticmethod
-    def apply_rule_retrospectively(db: Session, rule_id: str, tenant_id: str) -> dict:
-        rule = db.query(models.CategoryRule).filter(
-            models.CategoryRule.id == rule_id,
-            models.CategoryRule.tenant_id == tenant_id
-        ).first()
+    def apply_rule_retrospectively(db: Session, rule_id: str, tenant_id: str, preview: bool = False) -> dict:
+        with db_writer.exclusive(db):
+            rule = db.query(models.CategoryRule).filter(
+                models.CategoryRule.id == rule_id,
+                models.CategoryRule.tenant_id == tenant_id
+            ).first()
         
-        if not rule:
-            return {"success": False, "message": "Rule not found"}
+            if not rule:
+                return {"success": False, "message": "Rule not found"}
         
-        keywords = json.loads(rule.keywords)
-        if not keywords:
-            return {"success": True, "affected": 0}
+            keywords = json.loads(rule.keywords)
+            if not keywords:
+                return {"success": True, "affected": 0}
             
-        # Find transactions that match keywords AND are uncategorized
-        from sqlalchemy import or_
-        query = db.query(models.Transaction).filter(
-            models.Transaction.tenant_id == tenant_id,
-            (models.Transaction.category == "Uncategorized") | (models.Transaction.category == None)
-        )
-        
-        # Build OR clause for keywords
-        filters = []
-        for k in keywords:
-            pattern = f"%{k}%"
-            filters.append(models.Transaction.description.ilike(pattern))
-            filters.append(models.Transaction.recipient.ilike(pattern))
-            
-        query = query.filter(or_(*filters))
-        
-        target_txns = query.all()
-        affected_count = 0
-        for txn in target_txns:
-            txn.category = rule.category
+            # Transactions that match keywords AND are uncategorized
+            filters = [
+                models.Transaction.tenant_id == tenant_id,
+                TransactionService._uncategorized_filter(),
+                TransactionService._keyword_filter(db, tenant_id, keywords)
+            ]
+
+            values = {models.Transaction.category: rule.category}
             if rule.exclude_from_reports:
-                txn.exclude_from_reports = True
+                values[models.Transaction.exclude_from_reports] = True
             if rule.is_transfer and rule.to_account_id:
-                txn.is_transfer = True
                 # Note: We don't auto-create the other leg here to avoid mess, 
                 # but we could if needed. For retrospective, usually just the category/hidden flag is enough.
-            db.add(txn)
-            affected_count += 1
-            
-        db.commit()
-        return {"success": True, "affected": affected_count, "category": rule.category}
+                values[models.Transaction.is_transfer] = True
+
+            affected_count = TransactionService._set_based_update(db, filters, values, preview=preview)
+            if not preview:
+                db.commit()
+            return {"success": True, "affected": affected_count, "category": rule.category, "preview": preview}
 
     @staticmethod
     def get_matching_count(db: Session, keywords: List[str], tenant_id: str, only_uncategorized: bool = True) -> int:
         if not keywords: return 0
-        from sqlalchemy import or_
-        query = db.query(models.Transaction).filter(
-            models.Transaction.tenant_id == tenant_id
-        )
+        filters = [models.Transaction.tenant_id == tenant_id, TransactionService._keyword_filter(db, tenant_id, keywords)]
         if only_uncategorized:
-            query = query.filter((models.Transaction.category == "Uncategorized") | (models.Transaction.category == None))
-            
-        filters = []
-        for k in keywords:
-            pattern = f"%{k}%"
-            filters.append(models.Transaction.description.ilike(pattern))
-            filters.append(models.Transaction.recipient.ilike(pattern))
-        query = query.filter(or_(*filters))
-        return query.count()
+            filters.append(TransactionService._uncategorized_filter())
+        return db.query(models.Transaction).filter(*filters).count()
 
     @staticmethod
-    def bulk_rename(db: Session, old_name: str, new_name: str, tenant_id: str, sync_to_parser: bool = False) -> int:
-        from sqlalchemy import or_
-        pattern = f"%{old_name}%"
-        query = db.query(models.Transaction).filter(
+    def bulk_rename(db: Session, old_name: str, new_name: str, tenant_id: str, sync_to_parser: bool = False, preview: bool = False) -> int:
+        from sqlalchemy import or_, case
+        # Only exact recipient/description matches are renamed, so filter on equality directly
+        filters = [
             models.Transaction.tenant_id == tenant_id,
             or_(
-                models.Transaction.recipient.ilike(pattern),
-                models.Transaction.description.ilike(pattern)
+                models.Transaction.recipient == old_name,
+                models.Transaction.description == old_name
             )
-        )
-        
-        txns = query.all()
-        for t in txns:
-            if t.recipient == old_name:
-                t.recipient = new_name
-            if t.description == old_name:
-                t.description = new_name
-            db.add(t)
-        
-        db.commit()
+        ]
+        values = {
+            models.Transaction.recipient: case(
+                (models.Transaction.recipient == old_name, new_name), else_=models.Transaction.recipient
+            ),
+            models.Transaction.description: case(
+                (models.Transaction.description == old_name, new_name), else_=models.Transaction.description
+            )
+        }
+
+        with db_writer.exclusive(db):
+            affected = TransactionService._set_based_update(db, filters, values, preview=preview)
+            if preview:
+                return affected
+            if affected and old_name != new_name:
+                # Core-level UPDATE bypasses the flush hook, so re-tokenize the renamed rows here
+                renamed = [t for (t,) in db.query(models.Transaction.id).filter(
+                    models.Transaction.tenant_id == tenant_id,
+                    or_(models.Transaction.recipient == new_name, models.Transaction.description == new_name)
+                ).all()]
+                TransactionSearch.reindex(db, tenant_id, renamed)
+            db.commit()
         
         if sync_to_parser and old_name != new_name:
              try:
@@ -685,4 +974,4 @@ class TransactionService:
              except Exception as e:
                  logger.error(f"Failed to sync alias to parser: {e}")
                  
-        return len(txns)
+        return affected
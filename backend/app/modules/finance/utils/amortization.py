@@ -0,0 +1,229 @@
+import calendar
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Strategies for what-if scenarios once a prepayment or rate change lands
+REDUCE_TENURE = "REDUCE_TENURE"  # Keep EMI, finish earlier
+REDUCE_EMI = "REDUCE_EMI"        # Keep end date, re-derive EMI for remaining months
+STRATEGIES = (REDUCE_TENURE, REDUCE_EMI)
+
+
+def _add_months(source: datetime, months: int) -> datetime:
+    """
+    source + relativedelta(months=months): the day is anchored on the start date and clamped
+    to month end (Jan 31 + 1 -> Feb 29, Jan 31 + 2 -> Mar 31). The per-month loop this replaced
+    chained +1 month steps, which drifted after a short month (Jan 31 -> Feb 29 -> Mar 29);
+    schedules starting on the 29th-31st now keep their EMI day instead.
+    """
+    month_index = source.month - 1 + months
+    year = source.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(source.day, calendar.monthrange(year, month)[1])
+    return source.replace(year=year, month=month, day=day)
+
+
+def standard_emi(principal: float, annual_rate: float, months: int) -> float:
+    """Closed-form EMI for a fully amortizing loan."""
+    if months <= 0:
+        return 0.0
+    r = annual_rate / 12 / 100
+    if r == 0:
+        return principal / months
+    growth = (1 + r) ** months
+    return principal * r * growth / (growth - 1)
+
+
+@dataclass(frozen=True)
+class AmortizationSchedule:
+    """
+    Column-oriented schedule. Arrays are read-only because instances are
+    shared through the build cache.
+    """
+    installment_no: np.ndarray
+    due_dates: Tuple[datetime, ...]
+    opening_balance: np.ndarray
+    emi: np.ndarray
+    principal_component: np.ndarray
+    interest_component: np.ndarray
+    prepayment: np.ndarray
+    closing_balance: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.installment_no)
+
+    @property
+    def total_interest(self) -> float:
+        return float(self.interest_component.sum())
+
+    @property
+    def total_paid(self) -> float:
+        return float(self.emi.sum() + self.prepayment.sum())
+
+    @property
+    def payoff_date(self) -> Optional[datetime]:
+        return self.due_dates[-1] if self.due_dates else None
+
+    def to_rows(self, paid_months: frozenset = frozenset(), now: Optional[datetime] = None) -> List[dict]:
+        """
+        Materialize plain dict rows (with PAID / OVERDUE / PENDING status) for the API layer.
+        Status is evaluated per call since it depends on today's date and repayments.
+        """
+        now = now or datetime.utcnow()
+        opening = np.round(self.opening_balance, 2).tolist()
+        emi = np.round(self.emi, 2).tolist()
+        principal = np.round(self.principal_component, 2).tolist()
+        interest = np.round(self.interest_component, 2).tolist()
+        closing = np.round(self.closing_balance, 2).tolist()
+
+        rows = []
+        for i, due in enumerate(self.due_dates):
+            if (due.year, due.month) in paid_months:
+                status = "PAID"
+            elif due < now:
+                status = "OVERDUE"
+            else:
+                status = "PENDING"
+            rows.append({
+                "installment_no": i + 1,
+                "due_date": due,
+                "opening_balance": opening[i],
+                "emi": emi[i],
+                "principal_component": principal[i],
+                "interest_component": interest[i],
+                "closing_balance": closing[i],
+                "status": status,
+            })
+        return rows
+
+
+def _segment(balance: float, r: float, emi: float, n: int) -> Tuple[np.ndarray, bool]:
+    """
+    Closing balances for n installments at constant rate and EMI:
+        B_k = B_0 (1+r)^k - E ((1+r)^k - 1) / r
+    Returns (closing balances truncated at payoff, paid_off flag).
+    """
+    k = np.arange(1, n + 1, dtype=np.float64)
+    if r == 0:
+        closing = balance - emi * k
+    else:
+        growth = np.power(1 + r, k)
+        closing = balance * growth - emi * (growth - 1) / r
+
+    paid_off = np.nonzero(closing <= 1e-9)[0]
+    if paid_off.size:
+        closing = closing[:paid_off[0] + 1].copy()
+        closing[-1] = 0.0
+        return closing, True
+    return closing, False
+
+
+@lru_cache(maxsize=512)
+def build_schedule(
+    principal: float,
+    annual_rate: float,
+    start_date: datetime,
+    tenure_months: int,
+    emi_amount: float,
+    prepayments: Tuple[Tuple[int, float], ...] = (),
+    rate_changes: Tuple[Tuple[int, float], ...] = (),
+    strategy: str = REDUCE_TENURE,
+) -> AmortizationSchedule:
+    """
+    Build an amortization schedule with array math instead of a per-month loop.
+
+    The horizon is split at every event (rate change effective from installment i,
+    prepayment applied after installment i) and each segment is solved in closed form.
+    All arguments are hashable so the cache key *is* the loan version: editing any
+    loan term, or asking for a different scenario, produces a fresh entry.
+    Raises ValueError for a strategy other than REDUCE_TENURE / REDUCE_EMI.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}; expected one of {', '.join(STRATEGIES)}")
+    tenure = int(tenure_months)
+    prepay_at: Dict[int, float] = {}
+    for no, amount in prepayments:
+        if 1 <= no <= tenure and amount > 0:
+            prepay_at[no] = prepay_at.get(no, 0.0) + float(amount)
+    rate_from: Dict[int, float] = {no: float(rate) for no, rate in rate_changes if 1 <= no <= tenure}
+
+    # Segment boundaries: installments that *start* a new segment
+    starts = {1} | set(rate_from) | {no + 1 for no in prepay_at if no < tenure}
+    starts = sorted(starts)
+
+    opening_parts, closing_parts = [], []
+    emi_parts, interest_parts = [], []
+
+    balance = float(principal)
+    rate = float(annual_rate)
+    emi = float(emi_amount)
+    for idx, seg_start in enumerate(starts):
+        if balance <= 0:
+            break
+        seg_end = starts[idx + 1] - 1 if idx + 1 < len(starts) else tenure
+        if seg_start in rate_from:
+            rate = rate_from[seg_start]
+        r = rate / 12 / 100
+        if strategy == REDUCE_EMI and seg_start > 1:
+            emi = standard_emi(balance, rate, tenure - seg_start + 1)
+
+        closing, paid_off = _segment(balance, r, emi, seg_end - seg_start + 1)
+        opening = np.concatenate(([balance], closing[:-1]))
+        interest = opening * r
+        seg_emi = np.full(len(closing), emi)
+        if paid_off:
+            # Final installment only pays what is left
+            seg_emi[-1] = opening[-1] + interest[-1]
+
+        prepay = prepay_at.get(seg_start + len(closing) - 1, 0.0) if not paid_off else 0.0
+        if prepay:
+            prepay = min(prepay, closing[-1])
+            closing = closing.copy()
+            closing[-1] -= prepay
+
+        opening_parts.append(opening)
+        closing_parts.append(closing)
+        emi_parts.append(seg_emi)
+        interest_parts.append(interest)
+        balance = float(closing[-1])
+
+        if paid_off:
+            break
+
+    if not opening_parts:
+        empty = np.zeros(0)
+        return AmortizationSchedule(empty, (), empty, empty, empty, empty, empty, empty)
+
+    opening = np.concatenate(opening_parts)
+    closing = np.clip(np.concatenate(closing_parts), 0.0, None)
+    emi_col = np.concatenate(emi_parts)
+    interest = np.concatenate(interest_parts)
+    if len(opening) == tenure and closing[-1] > 0 and opening[-1] < emi_col[-1]:
+        # Last installment absorbs EMI rounding residue
+        emi_col[-1] = opening[-1] + interest[-1]
+        closing[-1] = 0.0
+    principal_col = emi_col - interest
+    numbers = np.arange(1, len(opening) + 1)
+    prepay_col = np.zeros(len(opening))
+    for no, amount in prepay_at.items():
+        if no <= len(opening):
+            prepay_col[no - 1] = opening[no - 1] - principal_col[no - 1] - closing[no - 1]
+
+    columns = (numbers, opening, emi_col, principal_col, interest, prepay_col, closing)
+    for col in columns:
+        col.setflags(write=False)
+
+    due_dates = tuple(_add_months(start_date, i) for i in range(len(opening)))
+    return AmortizationSchedule(
+        installment_no=numbers,
+        due_dates=due_dates,
+        opening_balance=opening,
+        emi=emi_col,
+        principal_component=principal_col,
+        interest_component=interest,
+        prepayment=prepay_col,
+        closing_balance=closing,
+    )
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional
 from pydantic import BaseModel
 from backend.app.core.database import get_db
+from backend.app.core.db_writer import db_writer
 from backend.app.modules.auth import models as auth_models
 from backend.app.modules.auth.dependencies import get_current_user
 from backend.app.modules.ingestion import models as ingestion_models
@@ -66,21 +67,22 @@ def update_ai_settings(
         ingestion_models.AIConfiguration.tenant_id == str(current_user.tenant_id)
     ).first()
 
-    if not config:
-        config = ingestion_models.AIConfiguration(
-            tenant_id=str(current_user.tenant_id)
-        )
-        db.add(config)
-
-    config.provider = payload.provider
-    config.model_name = payload.model_name
-    config.is_enabled = payload.is_enabled
-    config.prompts_json = json.dumps(payload.prompts)
+    with db_writer.exclusive(db):
+        if not config:
+            config = ingestion_models.AIConfiguration(
+                tenant_id=str(current_user.tenant_id)
+            )
+            db.add(config)
+
+        config.provider = payload.provider
+        config.model_name = payload.model_name
+        config.is_enabled = payload.is_enabled
+        config.prompts_json = json.dumps(payload.prompts)
     
-    if payload.api_key:
-        config.api_key = payload.api_key
+        if payload.api_key:
+            config.api_key = payload.api_key
 
-    db.commit()
+        db.commit()
     
     # Sync with External Parser
     try:
@@ -1,119 +1,122 @@
-from typing import List, Dict, Any, Optional
-import os
-import tempfile
+from typing import List, Dict, Any, Optional, Iterator
+import hashlib
 import imaplib
-import email
-from email.header import decode_header
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.app.modules.ingestion.imap_utils import parse_bodystructure, find_attachment_parts, fetch_attachment
 
 logger = logging.getLogger(__name__)
 
+# Parallel CAS uploads to the parser service (which parses them in its process pool)
+CAS_PARSE_CONCURRENCY = 4
+
+
 class CASParser:
     """
     Parses Consolidated Account Statements (CAS) using the External Parser Service.
     """
 
     @staticmethod
-    def parse_pdf(file_path: str, password: Optional[str] = None) -> List[Dict[str, Any]]:
-        """
-        Parses a CAS PDF using the External Parser Microservice.
-        """
-        try:
-             # Read file content
-            with open(file_path, "rb") as f:
-                content = f.read()
-
-            from backend.app.modules.ingestion.parser_service import ExternalParserService
-            
-            # Call Microservice
-            response = ExternalParserService.parse_cas(content, password or "")
-            
-            if not response or response.get("status") != "success":
-                raise ValueError(f"CAS Parsing failed via microservice: {response.get('logs') if response else 'Unknown Error'}")
-
-            # Microservice returns List[ParsedItem] in 'results'
-            results = response.get("results", [])
-            transactions = []
-            for item in results:
-                if item.get("transaction"):
-                    # The backend expects raw dicts that it mapping logic can handle
-                    # but since these are already standardized, we need to ensure they have 
-                    # the keys expected by MutualFundService.map_transactions_to_schemes
-                    t = item["transaction"]
-                    meta = item.get("metadata", {})
-                    transactions.append({
-                        "date": t.get("date"),
-                        "amount": t.get("amount"),
-                        "type": t.get("type"),
-                        "scheme_name": t.get("description") or t.get("merchant", {}).get("cleaned"),
-                        "folio_number": t.get("ref_id") or t.get("account", {}).get("mask"),
-                        "units": meta.get("units", 0),
-                        "nav": meta.get("nav", 0),
-                        "amfi": meta.get("amfi"),
-                        "isin": meta.get("isin")
-                    })
-
-            return transactions
+    def _to_raw_txn(item: Dict[str, Any]) -> Dict[str, Any]:
+        # Shape expected by MutualFundService.map_transactions_to_schemes
+        t = item["transaction"]
+        meta = item.get("metadata") or {}
+        return {
+            "date": t.get("date"),
+            "amount": t.get("amount"),
+            "type": t.get("type"),
+            "scheme_name": t.get("description") or (t.get("merchant") or {}).get("cleaned"),
+            "folio_number": t.get("ref_id") or (t.get("account") or {}).get("mask"),
+            "units": meta.get("units", 0),
+            "nav": meta.get("nav", 0),
+            "amfi": meta.get("amfi"),
+            "isin": meta.get("isin")
+        }
 
+    @staticmethod
+    def iter_pdf_bytes(content: bytes, password: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Stream raw transactions from a CAS PDF as the parser service emits them."""
+        from backend.app.modules.ingestion.parser_service import ExternalParserService
+
+        for item in ExternalParserService.stream_cas(content, password or ""):
+            if item.get("transaction"):
+                yield CASParser._to_raw_txn(item)
+
+    @staticmethod
+    def parse_bytes(content: bytes, password: Optional[str] = None) -> List[Dict[str, Any]]:
+        try:
+            return list(CASParser.iter_pdf_bytes(content, password))
         except Exception as e:
             logger.error(f"Error parsing CAS via microservice: {e}")
             raise e
 
+    @staticmethod
+    def parse_pdf(file_path: str, password: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Parses a CAS PDF using the External Parser Microservice.
+        """
+        with open(file_path, "rb") as f:
+            content = f.read()
+        return CASParser.parse_bytes(content, password)
+
     @staticmethod
     def scan_cas_emails(
-        email_config: object, 
+        email_config: object,
         password: str
     ) -> List[Dict[str, Any]]:
         """
         Scan emails for CAS, parse PDFs, and return a flattened list of all raw transactions.
         Does NOT ingest into DB. Mapping and ingestion happen in MutualFundService.
+
+        Only BODYSTRUCTURE and the PDF parts are downloaded (not full messages), identical
+        PDFs (same statement mailed twice) are parsed once, and PDFs are parsed concurrently.
         """
-        all_found_transactions = []
-        
+        pdfs: Dict[str, bytes] = {}
+
+        mail = imaplib.IMAP4_SSL(email_config.imap_server)
         try:
-            mail = imaplib.IMAP4_SSL(email_config.imap_server)
             mail.login(email_config.email, email_config.password)
             mail.select(email_config.folder)
-            
+
             search_query = '(OR (SUBJECT "Consolidated Account Statement") (FROM "camsonline"))'
             if email_config.cas_last_sync_at:
                 imap_date = email_config.cas_last_sync_at.strftime("%d-%b-%Y")
                 search_query = f'({search_query} SINCE {imap_date})'
-                
+
             status, messages = mail.search(None, search_query)
             if status != "OK":
                 return []
-                
-            email_ids = messages[0].split()
-
-            for e_id in email_ids:
-                _, msg_data = mail.fetch(e_id, "(BODY.PEEK[])")
-                raw_email = msg_data[0][1]
-                msg = email.message_from_bytes(raw_email)
-                
-                for part in msg.walk():
-                    if part.get_content_maintype() == 'multipart' or part.get('Content-Disposition') is None:
+
+            for e_id in messages[0].split():
+                status, msg_data = mail.fetch(e_id, "(BODYSTRUCTURE)")
+                if status != "OK":
+                    continue
+                structure = parse_bodystructure(msg_data)
+                for part in find_attachment_parts(structure or []):
+                    if not part.filename.lower().endswith('.pdf'):
                         continue
-                     
-                    filename = part.get_filename()
-                    if filename and filename.lower().endswith('.pdf'):
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as f:
-                            f.write(part.get_payload(decode=True))
-                            temp_path = f.name
-                            
-                            try:
-                                transactions = CASParser.parse_pdf(temp_path, password)
-                                all_found_transactions.extend(transactions)
-                            except Exception:
-                                pass
-                            finally:
-                                if os.path.exists(temp_path):
-                                    os.remove(temp_path)
+                    content = fetch_attachment(mail, e_id, part)
+                    if content:
+                        pdfs.setdefault(hashlib.sha256(content).hexdigest(), content)
 
             mail.close()
-            mail.logout()
-            
-        except Exception as e:
-            raise e
-            
+        finally:
+            try:
+                mail.logout()
+            except Exception:
+                pass
+
+        def parse_one(content: bytes) -> List[Dict[str, Any]]:
+            try:
+                return CASParser.parse_bytes(content, password)
+            except Exception:
+                return []  # e.g. a statement protected with a different password
+
+        all_found_transactions = []
+        if pdfs:
+            with ThreadPoolExecutor(max_workers=min(CAS_PARSE_CONCURRENCY, len(pdfs))) as pool:
+                for transactions in pool.map(parse_one, pdfs.values()):
+                    all_found_transactions.extend(transactions)
+
         return all_found_transactions
@@ -1,6 +1,4 @@
 import imaplib
-import email
-from email.header import decode_header
 import re
 from datetime import datetime
 from email.utils import parsedate_to_datetime
@@ -8,9 +6,54 @@ from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from backend.app.modules.ingestion import models as ingestion_models
 # from backend.app.modules.ingestion.registry import EmailParserRegistry
+from backend.app.core.config import settings
 from backend.app.modules.ingestion.services import IngestionService
+from backend.app.modules.ingestion.imap_utils import (
+    decode_header_value, fetch_headers, fetch_text, find_text_parts, html_to_text, looks_like_html, parse_bodystructure
+)
+
+HEADER_FETCH_BATCH = 100
+
+# Subjects that are never transactions (matched against the lowercased subject in one scan)
+NOISE_SUBJECT_PATTERN = re.compile("|".join(map(re.escape, [
+    "otp", "login alert", "successful login", "welcome", "your statement is ready",
+    "appointment", "newsletter", "verify your email"
+])))
+
+# Bulk senders whose mail is never a transaction alert (matched against the lowercased From header)
+NOISE_SENDER_PATTERN = re.compile("|".join(map(re.escape, [
+    "newsletter", "marketing", "promotions", "promo@", "offers@", "deals@"
+])))
+
+# Unparsed emails containing any of these are kept for interactive training
+TRANSACTION_HINT_PATTERN = re.compile("|".join(map(re.escape, [
+    "bill", "mutual fund", "paid", "sent", "upi", "rs", "spent", "debited", "vpa", "txn", "transaction"
+])))
 
 class EmailSyncService:
+    @staticmethod
+    def _fetch_body(mail, e_id) -> str:
+        """
+        Text of one message without downloading it whole: BODYSTRUCTURE picks the inline
+        text/plain part (text/html as fallback) and only that part is fetched, capped at
+        EMAIL_SYNC_MAX_PART_BYTES.
+        """
+        status, msg_data = mail.fetch(e_id, "(BODYSTRUCTURE)")
+        if status != "OK":
+            return ""
+        parts = find_text_parts(parse_bodystructure(msg_data) or [])
+        body = ""
+        for content_type in ("text/plain", "text/html"):
+            part = next((p for p in parts if p.content_type == content_type and p.size), None)
+            if part is None:
+                continue
+            body, _ = fetch_text(mail, e_id, part, settings.EMAIL_SYNC_MAX_PART_BYTES)
+            if body.strip():
+                break
+        if looks_like_html(body):
+            body = html_to_text(body)
+        return body
+
     @staticmethod
     def sync_emails(
         db: Session, 
@@ -63,155 +106,101 @@ class EmailSyncService:
             email_ids = messages[0].split()
             stats["total_fetched"] = len(email_ids)
 
+            # Stage 1: headers only, many messages per round trip. Noise is dropped here,
+            # before anything of its body (images, attachments) is downloaded.
+            headers = fetch_headers(mail, email_ids, batch=HEADER_FETCH_BATCH)
+
             for e_id in email_ids:
                 try:
-                    # Fetch the email message by ID (PEEK to avoid marking as read)
-                    # Use RFC822 for full message, but wrapped in BODY.PEEK[] if supported, 
-                    # but standard python imaplib with RFC822 usually marks as seen. 
-                    # To peek, we technically need BODY.PEEK[] which returns the body structure.
-                    # However, for full raw email with headers, standard is RFC822.
-                    # To avoid marking as read, many servers support BODY.PEEK[] effectively returning content.
-                    # But simpler is to fetching BODY.PEEK[] 
-                    
-                    status, msg_data = mail.fetch(e_id, "(BODY.PEEK[])")
-                    if status != "OK":
+                    msg = headers.get(e_id)
+                    if msg is None:
+                        continue
+                    subject = decode_header_value(msg["Subject"])
+                    sender_id = msg.get("From")
+
+                    # --- QUICK FILTER: Ignore obvious non-transactional noise ---
+                    if NOISE_SUBJECT_PATTERN.search(subject.lower()) or NOISE_SENDER_PATTERN.search((sender_id or "").lower()):
+                        stats["failed"] += 1
+                        stats["errors"].append(f"Skipped noise: {subject[:30]}...")
                         continue
+
+                    # Extract Email Header Date as Fallback
+                    email_date = None
+                    try:
+                        email_date = parsedate_to_datetime(msg.get("Date"))
+                    except: pass
+
+                    # Stage 2: BODYSTRUCTURE, then just the text part (size-capped)
+                    body = EmailSyncService._fetch_body(mail, e_id)
+
+                    # Parse via External Microservice
+                    from backend.app.modules.ingestion.parser_service import ExternalParserService
+                    from backend.app.modules.ingestion.base import ParsedTransaction
+
+                    parser_response = ExternalParserService.parse_email(subject, body, sender_id)
                     
-                    for response_part in msg_data:
-                        if isinstance(response_part, tuple):
-                            msg = email.message_from_bytes(response_part[1])
-                            
-                            # Decode subject
-                            subject_header = msg["Subject"]
-                            subject, encoding = decode_header(subject_header)[0]
-                            if isinstance(subject, bytes):
-                                subject = subject.decode(encoding if encoding else "utf-8")
+                    status = parser_response.get("status") if parser_response else "offline"
+                    
+                    if parser_response and status in ["processed", "success", "duplicate_submission"]:
+                        if status == "duplicate_submission":
+                            continue
+
+                        results = parser_response.get("results", [])
+                        if not results:
+                            stats["failed"] += 1
+                            stats["errors"].append(f"No transactions found in email: {subject[:30]}")
+                            continue
                             
+                        for item in results:
+                            t = item.get("transaction")
+                            if not t: continue
                             
-                            # Extract body
-                            body = ""
-                            html_body = ""
-                            if msg.is_multipart():
-                                for part in msg.walk():
-                                    content_type = part.get_content_type()
-                                    content_disposition = str(part.get("Content-Disposition"))
-                                    if "attachment" in content_disposition:
-                                        continue
-                                    if content_type == "text/plain":
-                                        payload = part.get_payload(decode=True)
-                                        if payload: body = payload.decode(errors='ignore')
-                                    elif content_type == "text/html":
-                                        payload = part.get_payload(decode=True)
-                                        if payload: html_body = payload.decode(errors='ignore')
-                            else:
-                                content_type = msg.get_content_type()
-                                payload = msg.get_payload(decode=True)
-                                if payload:
-                                    content = payload.decode(errors='ignore')
-                                    if content_type == "text/html":
-                                        html_body = content
-                                    else:
-                                        body = content
-
-                            # Fallback to HTML if plain text is empty
-                            if not body.strip() and html_body.strip():
-                                body = html_body
-
-                            # Clean HTML if necessary
-                            if "<html" in body.lower() or "<div" in body.lower() or "<p" in body.lower():
-                                body = re.sub('<script.*?>.*?</script>', ' ', body, flags=re.DOTALL | re.IGNORECASE)
-                                body = re.sub('<style.*?>.*?</style>', ' ', body, flags=re.DOTALL | re.IGNORECASE)
-                                body = re.sub('<[^<]+?>', ' ', body)
-                                body = " ".join(body.split())
-
-                            # Extract Email Header Date as Fallback
-                            email_date = None
-                            try:
-                                email_date = parsedate_to_datetime(msg.get("Date"))
-                            except: pass
-
-                            # --- QUICK FILTER: Ignore obvious non-transactional noise ---
-                            noise_keywords = ["otp", "login alert", "successful login", "welcome", "your statement is ready", "appointment", "newsletter", "verify your email"]
-                            subject_lower = subject.lower()
-                            if any(nk in subject_lower for nk in noise_keywords):
-                                stats["failed"] += 1
-                                stats["errors"].append(f"Skipped noise: {subject[:30]}...")
-                                continue
-
-                            # Parse via External Microservice
-                            from backend.app.modules.ingestion.parser_service import ExternalParserService
-                            from backend.app.modules.ingestion.base import ParsedTransaction
-
-                            sender_id = msg.get("From")
-                            parser_response = ExternalParserService.parse_email(subject, body, sender_id)
+                            # Map to ParsedTransaction
+                            parsed = ParsedTransaction(
+                                amount=t.get("amount"),
+                                date=datetime.fromisoformat(t.get("date").replace("Z", "+00:00")),
+                                description=t.get("description") or subject,
+                                type=t.get("type"),
+                                account_mask=t.get("account", {}).get("mask"),
+                                recipient=t.get("recipient") or t.get("merchant", {}).get("cleaned"),
+                                category=t.get("category"),
+                                ref_id=t.get("ref_id"),
+                                balance=t.get("balance"),
+                                credit_limit=t.get("credit_limit"),
+                                raw_message=t.get("raw_message") or body,
+                                source="EMAIL",
+                                is_ai_parsed=item.get("metadata", {}).get("parser_used") == "AI"
+                            )
                             
-                            status = parser_response.get("status") if parser_response else "offline"
+                            result = IngestionService.process_transaction(db, tenant_id, parsed)
+                            status = result.get("status")
                             
-                            if parser_response and status in ["processed", "success", "duplicate_submission"]:
-                                if status == "duplicate_submission":
-                                    continue
-
-                                results = parser_response.get("results", [])
-                                if not results:
-                                    stats["failed"] += 1
-                                    stats["errors"].append(f"No transactions found in email: {subject[:30]}")
-                                    continue
-                                    
-                                for item in results:
-                                    t = item.get("transaction")
-                                    if not t: continue
-                                    
-                                    # Map to ParsedTransaction
-                                    parsed = ParsedTransaction(
-                                        amount=t.get("amount"),
-                                        date=datetime.fromisoformat(t.get("date").replace("Z", "+00:00")),
-                                        description=t.get("description") or subject,
-                                        type=t.get("type"),
-                                        account_mask=t.get("account", {}).get("mask"),
-                                        recipient=t.get("recipient") or t.get("merchant", {}).get("cleaned"),
-                                        category=t.get("category"),
-                                        ref_id=t.get("ref_id"),
-                                        balance=t.get("balance"),
-                                        credit_limit=t.get("credit_limit"),
-                                        raw_message=t.get("raw_message") or body,
-                                        source="EMAIL",
-                                        is_ai_parsed=item.get("metadata", {}).get("parser_used") == "AI"
-                                    )
-                                    
-                                    result = IngestionService.process_transaction(db, tenant_id, parsed)
-                                    status = result.get("status")
-                                    
-                                    if status in ["success", "triaged"]:
-                                        stats["processed"] += 1
-                                    elif result.get("deduplicated"):
-                                        pass
-                                    else:
-                                        stats["failed"] += 1
-                                        reason = result.get('message') or result.get('reason') or "Unknown Error"
-                                        err_msg = f"Ingestion failed for '{subject[:30]}...': {reason}"
-                                        stats["errors"].append(err_msg)
+                            if status in ["success", "triaged"]:
+                                stats["processed"] += 1
+                            elif result.get("deduplicated"):
+                                pass
                             else:
                                 stats["failed"] += 1
-                                err_msg = f"External parser failed for: {subject[:30]}..."
+                                reason = result.get('message') or result.get('reason') or "Unknown Error"
+                                err_msg = f"Ingestion failed for '{subject[:30]}...': {reason}"
                                 stats["errors"].append(err_msg)
-                                
-                                # --- INTERACTIVE TRAINING CAPTURE ---
-                                # Check for transaction-related keywords
-                                keywords = ["bill", "mutual fund", "paid", "sent", "upi", "rs", "spent", "debited", "vpa", "txn", "transaction"]
-                                combined_text = (subject + " " + body).lower()
-                                if any(k in combined_text for k in keywords):
-                                    IngestionService.capture_unparsed(
-                                        db=db,
-                                        tenant_id=tenant_id,
-                                        source="EMAIL",
-                                        raw_content=f"Subject: {subject}\nBody: {body}",
-                                        subject=subject,
-                                        sender=msg.get("From")
-                                    )
-                                
-                                # Print body snippet for debugging
-                                if any(k in combined_text for k in ["txn", "upi", "hdfc", "spent", "debited", "transaction"]):
-                                    clean_body = body.replace("\n", " ").strip()
+                    else:
+                        stats["failed"] += 1
+                        err_msg = f"External parser failed for: {subject[:30]}..."
+                        stats["errors"].append(err_msg)
+                        
+                        # --- INTERACTIVE TRAINING CAPTURE ---
+                        # Check for transaction-related keywords
+                        combined_text = (subject + " " + body).lower()
+                        if TRANSACTION_HINT_PATTERN.search(combined_text):
+                            IngestionService.capture_unparsed(
+                                db=db,
+                                tenant_id=tenant_id,
+                                source="EMAIL",
+                                raw_content=f"Subject: {subject}\nBody: {body}",
+                                subject=subject,
+                                sender=msg.get("From")
+                            )
 
                 except Exception as e:
                     stats["errors"].append(f"Error processing message {e_id}: {str(e)}")
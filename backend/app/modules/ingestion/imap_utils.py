@@ -0,0 +1,266 @@
+import base64
+import binascii
+import html
+import quopri
+import re
+from dataclasses import dataclass
+from email.header import decode_header
+from email.message import Message
+from email.parser import BytesHeaderParser
+from typing import Dict, Iterable, List, Optional, Tuple
+
+_LITERAL_RE = re.compile(rb"\{(\d+)\}$")
+_ATOM_RE = re.compile(rb'[^\s()"]+')
+
+
+# Tags that carry no readable text, markup and comments; one pass replaces them all with spaces
+_HTML_SKIP_RE = re.compile(r"<(script|style)\b[^>]*>.*?</\1\s*>|<!--.*?-->|<[^<>]*>", re.DOTALL | re.IGNORECASE)
+_HTML_MARKERS = ("<html", "<div", "<p", "<table", "<br")
+
+
+@dataclass
+class AttachmentPart:
+    part: str          # IMAP section number, e.g. "2" or "1.2"
+    filename: str
+    content_type: str  # lowercase "type/subtype"
+    encoding: str      # lowercase Content-Transfer-Encoding
+    size: int
+
+
+@dataclass
+class TextPart:
+    part: str          # IMAP section number
+    content_type: str  # "text/plain" or "text/html"
+    encoding: str      # lowercase Content-Transfer-Encoding
+    charset: str
+    size: int          # encoded size in bytes, as reported by BODYSTRUCTURE
+
+
+def _join_fetch_response(msg_data) -> bytes:
+    """
+    imaplib splits literals ({n}\\r\\n...) out into (prefix, literal) tuples.
+    Stitch them back as quoted strings so the response is one parseable line.
+    """
+    out = b""
+    for item in msg_data:
+        if isinstance(item, tuple):
+            prefix, literal = item[0], item[1]
+            prefix = _LITERAL_RE.sub(b"", prefix.rstrip())
+            escaped = literal.replace(b"\\", b"\\\\").replace(b'"', b'\\"').replace(b"\r\n", b" ")
+            out += prefix + b'"' + escaped + b'"'
+        elif isinstance(item, bytes):
+            out += item
+    return out
+
+
+def _parse_sexp(data: bytes, pos: int = 0):
+    """Parse one IMAP parenthesized list starting at data[pos] == '('. Returns (list, next_pos)."""
+    assert data[pos:pos + 1] == b"("
+    pos += 1
+    items = []
+    while pos < len(data):
+        ch = data[pos:pos + 1]
+        if ch in (b" ", b"\r", b"\n"):
+            pos += 1
+        elif ch == b"(":
+            sub, pos = _parse_sexp(data, pos)
+            items.append(sub)
+        elif ch == b")":
+            return items, pos + 1
+        elif ch == b'"':
+            pos += 1
+            buf = bytearray()
+            while pos < len(data) and data[pos:pos + 1] != b'"':
+                if data[pos:pos + 1] == b"\\":
+                    pos += 1
+                buf += data[pos:pos + 1]
+                pos += 1
+            items.append(bytes(buf).decode("utf-8", errors="replace"))
+            pos += 1
+        else:
+            m = _ATOM_RE.match(data, pos)
+            atom = m.group(0).decode("ascii", errors="replace")
+            items.append(None if atom.upper() == "NIL" else atom)
+            pos = m.end()
+    return items, pos
+
+
+def parse_bodystructure(msg_data) -> Optional[list]:
+    raw = _join_fetch_response(msg_data)
+    idx = raw.upper().find(b"BODYSTRUCTURE (")
+    if idx < 0:
+        return None
+    structure, _ = _parse_sexp(raw, idx + len(b"BODYSTRUCTURE "))
+    return structure
+
+
+def decode_header_value(value: Optional[str]) -> str:
+    """RFC 2047 header (subject, filename) to text; every encoded word, not just the first."""
+    if not value:
+        return ""
+    parts = []
+    for text, charset in decode_header(value):
+        if isinstance(text, bytes):
+            try:
+                text = text.decode(charset or "utf-8", errors="replace")
+            except LookupError:
+                text = text.decode("utf-8", errors="replace")
+        parts.append(text)
+    return "".join(parts)
+
+
+def _params(value) -> dict:
+    if not isinstance(value, list):
+        return {}
+    return {str(value[i]).lower(): value[i + 1] for i in range(0, len(value) - 1, 2) if value[i]}
+
+
+def _filename_for(node: list) -> Optional[str]:
+    name = _params(node[2]).get("name")
+    if not name:
+        # Disposition sits at a type-dependent offset; look for ("attachment" ("filename" ...))
+        for ext in node[7:]:
+            if isinstance(ext, list) and len(ext) == 2 and isinstance(ext[0], str) and isinstance(ext[1], list):
+                name = _params(ext[1]).get("filename")
+                if name:
+                    break
+    return decode_header_value(name) if name else None
+
+
+def find_attachment_parts(structure: list, prefix: str = "") -> List[AttachmentPart]:
+    """Walk a BODYSTRUCTURE tree and return every leaf part that carries a filename."""
+    if not structure:
+        return []
+    if isinstance(structure[0], list):
+        # multipart: children..., subtype, [extensions]
+        found = []
+        child_no = 0
+        for node in structure:
+            if not isinstance(node, list):
+                break
+            child_no += 1
+            found.extend(find_attachment_parts(node, f"{prefix}{child_no}."))
+        return found
+
+    part = prefix[:-1] if prefix else "1"
+    filename = _filename_for(structure)
+    if not filename:
+        return []
+    try:
+        size = int(structure[6] or 0)
+    except (TypeError, ValueError, IndexError):
+        size = 0
+    return [AttachmentPart(
+        part=part,
+        filename=filename,
+        content_type=f"{structure[0]}/{structure[1]}".lower(),
+        encoding=str(structure[5] or "7bit").lower(),
+        size=size,
+    )]
+
+
+def find_text_parts(structure: list, prefix: str = "") -> List[TextPart]:
+    """Inline text/plain and text/html leaves of a BODYSTRUCTURE tree (attachments excluded)."""
+    if not structure:
+        return []
+    if isinstance(structure[0], list):
+        found = []
+        child_no = 0
+        for node in structure:
+            if not isinstance(node, list):
+                break
+            child_no += 1
+            found.extend(find_text_parts(node, f"{prefix}{child_no}."))
+        return found
+
+    content_type = f"{structure[0]}/{structure[1]}".lower()
+    if content_type not in ("text/plain", "text/html") or _filename_for(structure):
+        return []
+    try:
+        size = int(structure[6] or 0)
+    except (TypeError, ValueError, IndexError):
+        size = 0
+    return [TextPart(
+        part=prefix[:-1] if prefix else "1",
+        content_type=content_type,
+        encoding=str(structure[5] or "7bit").lower(),
+        charset=str(_params(structure[2]).get("charset") or "utf-8"),
+        size=size,
+    )]
+
+
+def decode_part(payload: bytes, encoding: str) -> bytes:
+    if encoding == "base64":
+        return base64.b64decode(payload)
+    if encoding == "quoted-printable":
+        return quopri.decodestring(payload)
+    return payload
+
+
+def fetch_attachment(mail, msg_id, part: AttachmentPart) -> Optional[bytes]:
+    """Download a single MIME part (not the whole message) and undo its transfer encoding."""
+    status, msg_data = mail.fetch(msg_id, f"(BODY.PEEK[{part.part}])")
+    if status != "OK":
+        return None
+    for item in msg_data:
+        if isinstance(item, tuple) and len(item) > 1:
+            return decode_part(item[1], part.encoding)
+    return None
+
+
+def fetch_headers(mail, msg_ids: Iterable[bytes], fields: Tuple[str, ...] = ("SUBJECT", "FROM", "DATE"),
+                  batch: int = 100) -> Dict[bytes, Message]:
+    """
+    Only the named header fields, for many messages per FETCH command (one round trip per
+    `batch` ids). Returns {msg_id: headers-only Message}; ids the server skipped are absent.
+    """
+    ids = list(msg_ids)
+    headers: Dict[bytes, Message] = {}
+    parser = BytesHeaderParser()
+    section = f"BODY.PEEK[HEADER.FIELDS ({' '.join(fields)})]"
+    for i in range(0, len(ids), batch):
+        status, msg_data = mail.fetch(b",".join(ids[i:i + batch]), f"({section})")
+        if status != "OK":
+            continue
+        for item in msg_data:
+            # (b'12 (BODY[HEADER.FIELDS (SUBJECT FROM DATE)] {84}', b'Subject: ...') ; bare b')' separators
+            if isinstance(item, tuple) and len(item) > 1 and item[1] is not None:
+                msg_id = item[0].split(b" ", 1)[0]
+                headers[msg_id] = parser.parsebytes(item[1])
+    return headers
+
+
+def fetch_text(mail, msg_id, part: TextPart, max_bytes: int) -> Tuple[str, bool]:
+    """
+    Download at most `max_bytes` of one text part (partial FETCH) and decode it.
+    Returns (text, truncated). A cut base64 tail is dropped; a cut multi-byte character is ignored.
+    """
+    status, msg_data = mail.fetch(msg_id, f"(BODY.PEEK[{part.part}]<0.{max_bytes}>)")
+    if status != "OK":
+        return "", False
+    payload = next((item[1] for item in msg_data if isinstance(item, tuple) and len(item) > 1 and item[1]), b"")
+    truncated = part.size > max_bytes or len(payload) >= max_bytes
+    if part.encoding == "base64" and truncated:
+        payload = re.sub(rb"\s+", b"", payload)
+        payload = payload[:len(payload) - len(payload) % 4]
+    try:
+        raw = decode_part(payload, part.encoding)
+    except (ValueError, binascii.Error):
+        return "", truncated
+    try:
+        return raw.decode(part.charset, errors="ignore"), truncated
+    except LookupError:
+        return raw.decode("utf-8", errors="ignore"), truncated
+
+
+def looks_like_html(text: str) -> bool:
+    head = text[:2048].lower()
+    return any(marker in head for marker in _HTML_MARKERS)
+
+
+def html_to_text(markup: str) -> str:
+    """
+    Readable text of an HTML body: script/style blocks, comments and tags become spaces in a
+    single regex pass, entities are unescaped and whitespace collapsed.
+    """
+    return " ".join(html.unescape(_HTML_SKIP_RE.sub(" ", markup)).split())
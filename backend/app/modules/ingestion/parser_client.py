@@ -0,0 +1,307 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import httpx
+
+from backend.app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Read timeouts per parser endpoint group (seconds); connect is always short so a dead host fails fast
+ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    "sms": 10.0,
+    "email": 10.0,
+    "file": 30.0,
+    "cas": 120.0,
+    "config": 10.0,
+}
+CONNECT_TIMEOUT = 2.0
+# How long a call waits for a free slot before failing; independent of the endpoint's read timeout
+SLOT_WAIT_SECONDS = 1.0
+_SLOT_POLL_SECONDS = 0.01
+
+
+class ParserUnavailable(Exception):
+    """Parser service is down, overloaded, or the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; while open every call
+    fails immediately. After `reset_timeout` one probe call is let through (half-open):
+    success closes the circuit, failure re-opens it. A probe that ends without an outcome
+    (cancelled, or a non-HTTP error) must be handed back with abort_probe().
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> Optional[str]:
+        """"closed" or "probe" if the call may proceed, None if the circuit is open."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return "closed"
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return "probe"
+            return None
+
+    def abort_probe(self, ticket: Optional[str]):
+        """Release a probe taken by allow() that recorded neither success nor failure."""
+        if ticket == "probe":
+            with self._lock:
+                self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class ParserClient:
+    """
+    Process-wide pooled client for PARSER_SERVICE_URL.
+
+    - One keep-alive httpx.Client (sync callers) and one AsyncClient per event loop (async callers)
+    - Per-endpoint read timeouts (ENDPOINT_TIMEOUTS)
+    - At most PARSER_MAX_CONCURRENCY in-flight calls per process, sync and async together;
+      excess callers wait up to SLOT_WAIT_SECONDS, then fail
+    - Connection errors, timeouts and 5xx feed the circuit breaker
+    """
+
+    def __init__(self, base_url: str, max_concurrency: int, breaker: CircuitBreaker):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        self._limits = limits
+        self._client = httpx.Client(base_url=self.base_url, limits=limits)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        # id(loop) -> (weakref to the loop, AsyncClient); connections are bound to their loop
+        self._async_clients: Dict[int, tuple] = {}
+        self._async_lock = threading.Lock()
+        self._closing = set()  # aclose() tasks, kept referenced until they finish
+
+    @staticmethod
+    def _timeout(endpoint: str) -> httpx.Timeout:
+        return httpx.Timeout(ENDPOINT_TIMEOUTS.get(endpoint, 10.0), connect=CONNECT_TIMEOUT)
+
+    def _check_response(self, response: httpx.Response) -> httpx.Response:
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def _admit(self) -> str:
+        """Breaker check, made after a slot is held so a probe never waits on the semaphore."""
+        ticket = self.breaker.allow()
+        if not ticket:
+            raise ParserUnavailable("Parser circuit is open")
+        return ticket
+
+    # --- Sync ---
+    def _acquire_slot(self):
+        if not self._slots.acquire(timeout=SLOT_WAIT_SECONDS):
+            raise ParserUnavailable("Parser client concurrency limit reached")
+
+    def request(self, method: str, path: str, endpoint: str, **kwargs) -> httpx.Response:
+        self._acquire_slot()
+        try:
+            ticket = self._admit()
+            try:
+                response = self._client.request(method, path, timeout=self._timeout(endpoint), **kwargs)
+            except httpx.HTTPError as e:
+                self.breaker.record_failure()
+                raise ParserUnavailable(str(e)) from e
+            except BaseException:
+                self.breaker.abort_probe(ticket)
+                raise
+        finally:
+            self._slots.release()
+        return self._check_response(response)
+
+    @contextmanager
+    def stream(self, method: str, path: str, endpoint: str, **kwargs):
+        self._acquire_slot()
+        try:
+            ticket = self._admit()
+            try:
+                cm = self._client.stream(method, path, timeout=self._timeout(endpoint), **kwargs)
+                response = cm.__enter__()
+            except httpx.HTTPError as e:
+                self.breaker.record_failure()
+                raise ParserUnavailable(str(e)) from e
+            except BaseException:
+                self.breaker.abort_probe(ticket)
+                raise
+            try:
+                yield self._check_response(response)
+            finally:
+                cm.__exit__(None, None, None)
+        finally:
+            self._slots.release()
+
+    # --- Async ---
+    async def _aacquire_slot(self):
+        """Take a slot from the same semaphore as sync callers, without blocking the loop."""
+        deadline = time.monotonic() + SLOT_WAIT_SECONDS
+        while not self._slots.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                raise ParserUnavailable("Parser client concurrency limit reached")
+            await asyncio.sleep(_SLOT_POLL_SECONDS)
+
+    def _async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            entry = self._async_clients.get(id(loop))
+            if entry is not None and entry[0]() is loop:
+                return entry[1]
+            # Retire clients whose loop is gone or closed; this includes the entry under a
+            # reused id, whose loop has been collected
+            stale = [key for key, (ref, _) in self._async_clients.items() if ref() is None or ref().is_closed()]
+            retired = [self._async_clients.pop(key) for key in stale]
+            client = httpx.AsyncClient(base_url=self.base_url, limits=self._limits)
+            self._async_clients[id(loop)] = (weakref.ref(loop), client)
+        for ref, old in retired:
+            self._retire(ref(), old)
+        return client
+
+    def _retire(self, loop, client: httpx.AsyncClient):
+        """Close an AsyncClient on its own loop if that loop can still run, else on this thread's."""
+        async def aclose():
+            try:
+                await client.aclose()
+            except Exception as e:  # its connections may belong to a closed loop
+                logger.debug(f"Closing parser AsyncClient failed: {e}")
+
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        usable = loop is not None and not loop.is_closed()
+        if usable and loop is not current and loop.is_running():
+            asyncio.run_coroutine_threadsafe(aclose(), loop)
+        elif usable and current is None:
+            loop.run_until_complete(aclose())
+        elif current is not None:
+            task = current.create_task(aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        else:
+            asyncio.run(aclose())
+
+    async def arequest(self, method: str, path: str, endpoint: str, **kwargs) -> httpx.Response:
+        client = self._async_client()
+        await self._aacquire_slot()
+        try:
+            ticket = self._admit()
+            try:
+                response = await client.request(method, path, timeout=self._timeout(endpoint), **kwargs)
+            except httpx.HTTPError as e:
+                self.breaker.record_failure()
+                raise ParserUnavailable(str(e)) from e
+            except BaseException:  # cancelled, or not a transport error: no verdict on the parser
+                self.breaker.abort_probe(ticket)
+                raise
+        finally:
+            self._slots.release()
+        return self._check_response(response)
+
+    def close(self):
+        """Close the sync client and every per-loop AsyncClient."""
+        self._client.close()
+        with self._async_lock:
+            entries = list(self._async_clients.values())
+            self._async_clients.clear()
+        for ref, client in entries:
+            self._retire(ref(), client)
+
+
+_client: Optional[ParserClient] = None
+_client_lock = threading.Lock()
+
+
+def get_parser_client() -> ParserClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ParserClient(
+                    settings.PARSER_SERVICE_URL,
+                    max_concurrency=settings.PARSER_MAX_CONCURRENCY,
+                    breaker=CircuitBreaker(
+                        failure_threshold=settings.PARSER_BREAKER_THRESHOLD,
+                        reset_timeout=settings.PARSER_BREAKER_RESET_SECONDS,
+                    ),
+                )
+    return _client
+
+
+def close_parser_client():
+    """Application shutdown: close the shared client's connections."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+
+
+class InProcessParser:
+    """
+    Fallback for co-located deployments: runs the parser's IngestionPipeline in this process.
+    Only usable when the parser package is importable and its DuckDB file is not held open
+    by a running parser service (DuckDB allows a single writer process).
+    """
+    _lock = threading.Lock()
+    _initialized = False
+
+    @staticmethod
+    def run(content: str, source: str, **kwargs) -> Optional[dict]:
+        try:
+            import parser.api.ingestion  # noqa: F401  (registers bank parsers)
+            from parser.core.pipeline import IngestionPipeline
+            from parser.db.database import SessionLocal, init_db
+        except Exception as e:
+            logger.error(f"In-process parser unavailable: {e}")
+            return None
+
+        with InProcessParser._lock:
+            if not InProcessParser._initialized:
+                init_db()
+                InProcessParser._initialized = True
+            db = SessionLocal()
+            try:
+                return IngestionPipeline(db).run(content, source, **kwargs).model_dump(mode="json")
+            except Exception as e:
+                logger.error(f"In-process parser failed: {e}")
+                return None
+            finally:
+                db.close()
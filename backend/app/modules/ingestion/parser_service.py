@@ -1,29 +1,42 @@
-import requests
-from typing import Optional, Dict, Any, List
+import json
+from typing import Optional, Dict, Any, Iterator, List
 from datetime import datetime
 import logging
 from backend.app.core.config import settings
+from backend.app.modules.ingestion.parser_client import get_parser_client, ParserUnavailable, InProcessParser
 
 logger = logging.getLogger(__name__)
 
 class ExternalParserService:
+    """
+    Thin wrappers over the pooled ParserClient (keep-alive, per-endpoint timeouts,
+    bounded concurrency, circuit breaker). Return conventions per call are unchanged.
+    """
+
+    @staticmethod
+    def _fallback(content: str, source: str, **kwargs) -> Optional[Dict[str, Any]]:
+        if not settings.PARSER_INPROCESS_FALLBACK:
+            return None
+        logger.warning(f"Parser service unavailable, parsing {source} in-process")
+        return InProcessParser.run(content, source, **kwargs)
+
     @staticmethod
     def parse_sms(sender: str, body: str, received_at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
         """
         Call the external parser microservice for SMS ingestion.
         """
+        # Parser expects 'sender' and 'body'
+        payload = {"sender": sender, "body": body}
+        if received_at:
+            payload["received_at"] = received_at.isoformat()
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/ingest/sms"
-            # Parser expects 'sender' and 'body'
-            payload = {"sender": sender, "body": body}
-            if received_at:
-                payload["received_at"] = received_at.isoformat()
-                
-            response = requests.post(url, json=payload, timeout=10)
-            
+            response = get_parser_client().request("POST", "/ingest/sms", "sms", json=payload)
             if response.status_code == 200:
                 return response.json()
             return None
+        except ParserUnavailable as e:
+            logger.error(f"Error calling external parser: {e}")
+            return ExternalParserService._fallback(body, "SMS", sender=sender, date_hint=payload.get("received_at"))
         except Exception as e:
             logger.error(f"Error calling external parser: {e}")
             return None
@@ -33,22 +46,24 @@ class ExternalParserService:
         """
         Call the external parser microservice for Email ingestion.
         """
+        # Parser expects 'subject', 'body_text', 'sender'
+        payload = {
+            "subject": subject,
+            "body_text": body_text,
+            "sender": sender
+        }
+        if received_at:
+            payload["received_at"] = received_at.isoformat()
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/ingest/email"
-            # Parser expects 'subject', 'body_text', 'sender'
-            payload = {
-                "subject": subject, 
-                "body_text": body_text,
-                "sender": sender
-            }
-            if received_at:
-                payload["received_at"] = received_at.isoformat()
-                
-            response = requests.post(url, json=payload, timeout=10)
-            
+            response = get_parser_client().request("POST", "/ingest/email", "email", json=payload)
             if response.status_code == 200:
                 return response.json()
             return None
+        except ParserUnavailable as e:
+            logger.error(f"Error calling external parser: {e}")
+            return ExternalParserService._fallback(
+                body_text, "EMAIL", sender=sender, subject=subject, date_hint=payload.get("received_at")
+            )
         except Exception as e:
             logger.error(f"Error calling external parser: {e}")
             return None
@@ -59,58 +74,99 @@ class ExternalParserService:
         Push AI configuration to the microservice.
         """
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/config/ai"
             payload = {
                 "api_key": api_key,
                 "model_name": model_name,
                 "is_enabled": is_enabled
             }
-            response = requests.post(url, json=payload, timeout=10)
+            response = get_parser_client().request("POST", "/config/ai", "config", json=payload)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Error syncing AI config: {e}")
             return False
 
+    @staticmethod
+    def _file_request(file_content: bytes, filename: str, mapping: Optional[Dict], header_row_index: Optional[int], password: Optional[str]) -> Dict[str, Any]:
+        data = {}
+        if mapping:
+            data['mapping_override'] = json.dumps(mapping)
+        if header_row_index is not None:
+            data['header_row_index'] = str(header_row_index)
+        if password:
+            data['password'] = password
+        return {"files": {'file': (filename, file_content)}, "data": data}
+
+    @staticmethod
+    def _file_result(response) -> Dict[str, Any]:
+        if response.status_code == 200:
+            return response.json()
+        return {"status": "error", "message": f"Parser returned {response.status_code}", "logs": [response.text]}
+
     @staticmethod
     def parse_file(file_content: bytes, filename: str, mapping: Optional[Dict] = None, header_row_index: Optional[int] = None, password: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Call the external parser microservice for File ingestion.
         """
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/ingest/file"
-            
-            files = {'file': (filename, file_content)}
-            data = {}
-            if mapping:
-                import json
-                data['mapping_override'] = json.dumps(mapping)
-            if header_row_index is not None:
-                data['header_row_index'] = header_row_index
-            if password:
-                data['password'] = password
-                
-            response = requests.post(url, files=files, data=data, timeout=30)
-            
-            if response.status_code == 200:
-                return response.json()
-            return {"status": "error", "message": f"Parser returned {response.status_code}", "logs": [response.text]}
+            kwargs = ExternalParserService._file_request(file_content, filename, mapping, header_row_index, password)
+            response = get_parser_client().request("POST", "/ingest/file", "file", **kwargs)
+            return ExternalParserService._file_result(response)
         except Exception as e:
             logger.error(f"Error calling external parser: {e}")
             return {"status": "error", "message": str(e)}
 
+    @staticmethod
+    async def aparse_file(file_content: bytes, filename: str, mapping: Optional[Dict] = None, header_row_index: Optional[int] = None, password: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Async variant of parse_file for async route handlers (does not block the event loop).
+        """
+        try:
+            kwargs = ExternalParserService._file_request(file_content, filename, mapping, header_row_index, password)
+            response = await get_parser_client().arequest("POST", "/ingest/file", "file", **kwargs)
+            return ExternalParserService._file_result(response)
+        except Exception as e:
+            logger.error(f"Error calling external parser: {e}")
+            return {"status": "error", "message": str(e)}
+
+    @staticmethod
+    async def submit_file_job(file_content: bytes, filename: str, mapping: Dict, header_row_index: int = 0, scope: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a background import on the parser (returns the job's progress right away).
+        Resubmitting the same file/mapping for the same scope returns the existing job.
+        """
+        try:
+            kwargs = ExternalParserService._file_request(file_content, filename, mapping, header_row_index, None)
+            if scope:
+                kwargs["data"]["scope"] = scope
+            response = await get_parser_client().arequest("POST", "/ingest/file/jobs", "file", **kwargs)
+            return ExternalParserService._file_result(response)
+        except Exception as e:
+            logger.error(f"Error calling external parser: {e}")
+            return {"status": "error", "message": str(e)}
+
+    @staticmethod
+    async def get_file_job(job_id: str, scope: Optional[str] = None, results: bool = False, **params) -> Optional[Dict[str, Any]]:
+        """Progress of an import job, or with results=True one page of its output. None if unknown."""
+        path = f"/ingest/file/jobs/{job_id}" + ("/results" if results else "")
+        if scope:
+            params["scope"] = scope
+        response = await get_parser_client().arequest("GET", path, "config", params=params)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
     @staticmethod
     def parse_cas(file_content: bytes, password: str) -> Optional[Dict[str, Any]]:
         """
         Call the external parser microservice for CAS parsing.
         """
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/ingest/cas"
-            
             files = {'file': ('cas.pdf', file_content, 'application/pdf')}
             data = {'password': password}
-            
-            response = requests.post(url, files=files, data=data, timeout=60)
-            
+
+            response = get_parser_client().request("POST", "/ingest/cas", "cas", files=files, data=data)
+
             if response.status_code == 200:
                 return response.json() 
             return None
@@ -118,19 +174,42 @@ class ExternalParserService:
             logger.error(f"Error calling external parser: {e}")
             return None
 
+    @staticmethod
+    def stream_cas(file_content: bytes, password: str) -> Iterator[Dict[str, Any]]:
+        """
+        Call the parser's NDJSON CAS endpoint and yield ParsedItem dicts as lines arrive.
+        Raises ValueError with the parser's message on failure (e.g. wrong password).
+        """
+        files = {'file': ('cas.pdf', file_content, 'application/pdf')}
+        data = {'password': password}
+
+        try:
+            with get_parser_client().stream("POST", "/ingest/cas/stream", "cas", files=files, data=data) as response:
+                if response.status_code != 200:
+                    response.read()
+                    try:
+                        detail = response.json().get("detail")
+                    except ValueError:
+                        detail = response.text
+                    raise ValueError(f"CAS Parsing failed via microservice: {detail}")
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+        except ParserUnavailable as e:
+            raise ValueError(f"CAS Parsing failed via microservice: {e}")
+
     @staticmethod
     def create_pattern(source: str, regex_pattern: str, mapping: Dict[str, Any]) -> bool:
         """
         Push a new regex pattern to the microservice.
         """
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/config/patterns"
             payload = {
                 "source": source,
                 "regex_pattern": regex_pattern,
                 "mapping": mapping
             }
-            response = requests.post(url, json=payload, timeout=10)
+            response = get_parser_client().request("POST", "/config/patterns", "config", json=payload)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Error creating pattern in external parser: {e}")
@@ -142,9 +221,8 @@ class ExternalParserService:
         Push a new merchant alias to the microservice.
         """
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/config/aliases"
             payload = {"pattern": pattern, "alias": alias}
-            response = requests.post(url, json=payload, timeout=10)
+            response = get_parser_client().request("POST", "/config/aliases", "config", json=payload)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Error creating alias in external parser: {e}")
@@ -156,8 +234,7 @@ class ExternalParserService:
         Get all merchant aliases from the microservice.
         """
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/config/aliases"
-            response = requests.get(url, timeout=10)
+            response = get_parser_client().request("GET", "/config/aliases", "config")
             if response.status_code == 200:
                 return response.json()
             return []
@@ -171,8 +248,7 @@ class ExternalParserService:
         Delete a merchant alias.
         """
         try:
-            url = f"{settings.PARSER_SERVICE_URL}/config/aliases/{alias_id}"
-            response = requests.delete(url, timeout=10)
+            response = get_parser_client().request("DELETE", f"/config/aliases/{alias_id}", "config")
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Error deleting alias: {e}")
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Body, UploadFile, File, F
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from backend.app.core.database import get_db
+from backend.app.core.db_writer import db_writer
 
 from backend.app.modules.auth import models as auth_models
 from backend.app.modules.auth.dependencies import get_current_user
@@ -121,8 +122,8 @@ def ingest_sms(
             return {"status": "skipped", "reason": "Ingestion disabled for this device"}
             
         # Update last seen
-        device.last_seen_at = datetime.utcnow()
-        db.commit()
+        device_pk, seen_at = device.id, datetime.utcnow()
+        db_writer.run(lambda s: IngestionService.touch_device(s, device_pk, seen_at), session=db)
 
     # 2. Parsing (Call External Microservice)
     from backend.app.modules.ingestion.parser_service import ExternalParserService
@@ -328,8 +329,9 @@ def create_email_config(
         tenant_id=str(current_user.tenant_id),
         **payload.dict()
     )
-    db.add(config)
-    db.commit()
+    with db_writer.exclusive(db):
+        db.add(config)
+        db.commit()
     db.refresh(config)
     return config
 
@@ -348,19 +350,20 @@ def update_email_config(
         raise HTTPException(status_code=404, detail="Config not found")
     
     # Update fields
-    if payload.email is not None: config.email = payload.email
-    if payload.password is not None: config.password = payload.password
-    if payload.imap_server is not None: config.imap_server = payload.imap_server
-    if payload.folder is not None: config.folder = payload.folder
-    if payload.user_id is not None: config.user_id = payload.user_id
-
-    if payload.auto_sync_enabled is not None: config.auto_sync_enabled = payload.auto_sync_enabled
-    if payload.reset_sync_history:
-        config.last_sync_at = None
-    if payload.last_sync_at is not None:
-        config.last_sync_at = payload.last_sync_at
+    with db_writer.exclusive(db):
+        if payload.email is not None: config.email = payload.email
+        if payload.password is not None: config.password = payload.password
+        if payload.imap_server is not None: config.imap_server = payload.imap_server
+        if payload.folder is not None: config.folder = payload.folder
+        if payload.user_id is not None: config.user_id = payload.user_id
+
+        if payload.auto_sync_enabled is not None: config.auto_sync_enabled = payload.auto_sync_enabled
+        if payload.reset_sync_history:
+            config.last_sync_at = None
+        if payload.last_sync_at is not None:
+            config.last_sync_at = payload.last_sync_at
     
-    db.commit()
+        db.commit()
     db.refresh(config)
     return config
 
@@ -376,8 +379,9 @@ def delete_email_config(
     ).first()
     if not config:
         raise HTTPException(status_code=404, detail="Config not found")
-    db.delete(config)
-    db.commit()
+    with db_writer.exclusive(db):
+        db.delete(config)
+        db.commit()
     return {"status": "deleted"}
 
 @router.get("/email/logs", response_model=Dict)
@@ -464,8 +468,9 @@ def sync_specific_email(
     )
     
     if result.get("status") == "completed":
-        config.last_sync_at = datetime.utcnow()
-        db.commit()
+        with db_writer.exclusive(db):
+            config.last_sync_at = datetime.utcnow()
+            db.commit()
         
     return result
 
@@ -482,7 +487,7 @@ async def analyze_file(
         
         # Call External Parser without mapping to trigger analysis
         from backend.app.modules.ingestion.parser_service import ExternalParserService
-        response = ExternalParserService.parse_file(content, file.filename)
+        response = await ExternalParserService.aparse_file(content, file.filename)
         
         # Microservice returns "analysis_required" and puts analysis JSON in logs[0]
         # logic from parser/api/ingestion.py: logs=["No mapping found. Analysis: " + json.dumps(analysis)]
@@ -519,7 +524,7 @@ async def parse_file(
         content = await file.read()
         
         from backend.app.modules.ingestion.parser_service import ExternalParserService
-        response = ExternalParserService.parse_file(content, file.filename, mapping_dict, header_row_index=header_row_index)
+        response = await ExternalParserService.aparse_file(content, file.filename, mapping_dict, header_row_index=header_row_index)
         
         if response:
              if response.get("status") == "success":
@@ -544,6 +549,66 @@ async def parse_file(
         traceback.print_exc()
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/csv/jobs")
+async def submit_import_job(
+    file: UploadFile = File(...),
+    mapping: str = Form(...), # JSON string
+    header_row_index: int = Form(0),
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """
+    Background variant of /csv/parse for large statements: returns a job id immediately.
+    Uploading the same file with the same mapping again returns the existing job.
+    """
+    try:
+        mapping_dict = json.loads(mapping)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid mapping JSON")
+    content = await file.read()
+
+    from backend.app.modules.ingestion.parser_service import ExternalParserService
+    response = await ExternalParserService.submit_file_job(
+        content, file.filename, mapping_dict, header_row_index=header_row_index, scope=str(current_user.tenant_id)
+    )
+    if not response.get("job_id"):
+        raise HTTPException(status_code=502, detail=f"Import job submission failed: {response.get('message') or response.get('logs')}")
+    return response
+
+@router.get("/csv/jobs/{job_id}")
+async def get_import_job(
+    job_id: str,
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    from backend.app.modules.ingestion.parser_service import ExternalParserService
+    job = await ExternalParserService.get_file_job(job_id, scope=str(current_user.tenant_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+@router.get("/csv/jobs/{job_id}/results")
+async def get_import_job_results(
+    job_id: str,
+    after: int = -1,
+    limit: int = 500,
+    current_user: auth_models.User = Depends(get_current_user)
+):
+    """
+    One page of parsed rows in the same flat shape as /csv/parse. Pass next_after back as
+    `after` until it is null; rows of a running job appear as its chunks finish.
+    """
+    from backend.app.modules.ingestion.parser_service import ExternalParserService
+    page = await ExternalParserService.get_file_job(
+        job_id, scope=str(current_user.tenant_id), results=True, after=after, limit=limit
+    )
+    if not page:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return {
+        "job_id": job_id,
+        "status": page["status"],
+        "items": [item["transaction"] for item in page["items"] if item.get("transaction")],
+        "next_after": page["next_after"]
+    }
+
 class ImportItem(BaseModel):
     date: str
     description: str
@@ -700,16 +765,40 @@ class BulkTriageRequest(BaseModel):
     pending_ids: List[str]
     create_ignore_rules: bool = False
 
+class BulkTriageApproveRequest(BaseModel):
+    pending_ids: List[str]
+    category: Optional[str] = None
+    exclude_from_reports: Optional[bool] = None
+
+@router.post("/triage/bulk-approve")
+def bulk_approve_triage(
+    payload: BulkTriageApproveRequest,
+    current_user: auth_models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    results = TransactionService.bulk_approve_pending_transactions(
+        db, payload.pending_ids, str(current_user.tenant_id),
+        category_override=payload.category,
+        exclude_from_reports_override=payload.exclude_from_reports
+    )
+    return {
+        "status": "completed",
+        "approved": sum(1 for r in results if r["status"] == "approved"),
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "results": results
+    }
+
 @router.post("/triage/bulk-reject")
 def bulk_reject_triage(
     payload: BulkTriageRequest,
     current_user: auth_models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    count = TransactionService.bulk_reject_pending_transactions(
+    results = TransactionService.bulk_reject_pending_transactions(
         db, payload.pending_ids, str(current_user.tenant_id), create_ignore_rules=payload.create_ignore_rules
     )
-    return {"status": "deleted", "count": count}
+    count = sum(1 for r in results if r["status"] == "rejected")
+    return {"status": "deleted", "count": count, "results": results}
 
 # --- Interactive Training ---
 
@@ -781,8 +870,9 @@ def label_message(
             is_verified=False,
             balance=0.0
         )
-        db.add(account)
-        db.commit()
+        with db_writer.exclusive(db):
+            db.add(account)
+            db.commit()
         db.refresh(account)
 
     effective_ref = payload.ref_id
@@ -831,8 +921,9 @@ def label_message(
             logger.error(f"Error creating pattern: {e}")
             pass
         
-    db.delete(msg)
-    db.commit()
+    with db_writer.exclusive(db):
+        db.delete(msg)
+        db.commit()
     
     return {"status": "labeled", "pending_id": pending.id}
 
@@ -867,8 +958,9 @@ def dismiss_training_message(
                 )
                 db.add(new_ignore)
 
-    db.delete(msg)
-    db.commit()
+    with db_writer.exclusive(db):
+        db.delete(msg)
+        db.commit()
     return {"status": "dismissed"}
 
 class BulkTrainingRequest(BaseModel):
@@ -902,11 +994,12 @@ def bulk_dismiss_training(
                         source=m.source
                     ))
 
-    count = db.query(ingestion_models.UnparsedMessage).filter(
-        ingestion_models.UnparsedMessage.id.in_(payload.message_ids),
-        ingestion_models.UnparsedMessage.tenant_id == str(current_user.tenant_id)
-    ).delete(synchronize_session=False)
-    db.commit()
+    with db_writer.exclusive(db):
+        count = db.query(ingestion_models.UnparsedMessage).filter(
+            ingestion_models.UnparsedMessage.id.in_(payload.message_ids),
+            ingestion_models.UnparsedMessage.tenant_id == str(current_user.tenant_id)
+        ).delete(synchronize_session=False)
+        db.commit()
     return {"status": "deleted", "count": count}
 
 @router.post("/ai/sync-to-parser")
@@ -985,9 +1078,10 @@ def bulk_delete_events(
     current_user: auth_models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    db.query(ingestion_models.IngestionEvent).filter(
-        ingestion_models.IngestionEvent.id.in_(payload.event_ids),
-        ingestion_models.IngestionEvent.tenant_id == str(current_user.tenant_id)
-    ).delete(synchronize_session=False)
-    db.commit()
+    with db_writer.exclusive(db):
+        db.query(ingestion_models.IngestionEvent).filter(
+            ingestion_models.IngestionEvent.id.in_(payload.event_ids),
+            ingestion_models.IngestionEvent.tenant_id == str(current_user.tenant_id)
+        ).delete(synchronize_session=False)
+        db.commit()
     return {"status": "deleted", "count": len(payload.event_ids)}
@@ -1,22 +1,31 @@
 import json
+import uuid
+from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 import hashlib
+import re
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
+from backend.app.core.db_writer import db_writer
 from backend.app.modules.finance import models as finance_models
 from backend.app.modules.finance.services.transaction_service import TransactionService
 from backend.app.modules.finance import schemas as finance_schemas
 from backend.app.modules.ingestion import models as ingestion_models
 from backend.app.modules.ingestion.base import ParsedTransaction
-from backend.app.modules.ingestion.transfer_detector import TransferDetector
+from backend.app.modules.ingestion.transfer_detector import TransferDetector, TransferMatcherCache
+
+@lru_cache(maxsize=256)
+def _ignore_matcher(patterns: tuple) -> Optional[re.Pattern]:
+    """A tenant's ignore patterns as one compiled substring scan (cached per pattern set)."""
+    if not patterns:
+        return None
+    return re.compile("|".join(map(re.escape, patterns)))
 
 class IngestionService:
     @staticmethod
-    def log_event(db: Session, tenant_id: str, event_type: str, status: str, message: Optional[str] = None, data: Optional[dict] = None, device_id: Optional[str] = None):
-        """
-        Log an ingestion event for auditing.
-        """
-        event = ingestion_models.IngestionEvent(
+    def new_event(tenant_id: str, event_type: str, status: str, message: Optional[str] = None, data: Optional[dict] = None, device_id: Optional[str] = None) -> ingestion_models.IngestionEvent:
+        return ingestion_models.IngestionEvent(
             tenant_id=tenant_id,
             device_id=device_id,
             event_type=event_type,
@@ -24,8 +33,21 @@ class IngestionService:
             message=message,
             data_json=json.dumps(data) if data else None
         )
-        db.add(event)
-        db.commit()
+
+    @staticmethod
+    def log_event(db: Session, tenant_id: str, event_type: str, status: str, message: Optional[str] = None, data: Optional[dict] = None, device_id: Optional[str] = None):
+        """
+        Log an ingestion event for auditing (group-committed by the DB writer).
+        """
+        event = IngestionService.new_event(tenant_id, event_type, status, message, data, device_id)
+        db_writer.run(lambda s: s.add(event), session=db)
+
+    @staticmethod
+    def touch_device(session: Session, device_pk: str, seen_at: datetime):
+        """DB writer unit: bump a device's last_seen_at."""
+        session.query(ingestion_models.MobileDevice).filter(
+            ingestion_models.MobileDevice.id == device_pk
+        ).update({"last_seen_at": seen_at}, synchronize_session=False)
 
     @staticmethod
     def match_account(db: Session, tenant_id: str, mask: str) -> Optional[finance_models.Account]:
@@ -36,20 +58,12 @@ class IngestionService:
         if not mask or len(mask) < 2:
             return None
             
-        # Basic suffix match
-        # DuckDB/SQLAlchemy 'like' or 'endswith'
+        # Suffix match against the tenant's cached mask index
         # We assume the mask in DB (e.g. "XX1234") ends with the SMS mask (e.g. "1234")
-        # or simplified: just check if DB account_mask ends with the provided digits
-        
-        accounts = db.query(finance_models.Account).filter(
-            finance_models.Account.tenant_id == tenant_id,
-            finance_models.Account.account_mask != None
-        ).all()
-        
-        for acc in accounts:
-            if acc.account_mask and acc.account_mask.endswith(mask[-4:]):
-                return acc
-        return None
+        account_id = TransferMatcherCache.get(db, tenant_id).match_mask(mask)
+        if not account_id:
+            return None
+        return db.query(finance_models.Account).filter(finance_models.Account.id == account_id).first()
 
     @staticmethod
     def process_transaction(db: Session, tenant_id: str, parsed: ParsedTransaction, extra_data: Optional[dict] = None):
@@ -64,6 +78,7 @@ class IngestionService:
             # Auto-Discovery: Create new untrusted account
             source_label = parsed.source if parsed.source else "Auto"
             account = finance_models.Account(
+                id=str(uuid.uuid4()),
                 tenant_id=tenant_id,
                 name=f"Detected: {source_label} (XX{parsed.account_mask[-4:]})",
                 type=finance_models.AccountType.BANK, # Default to Bank
@@ -71,9 +86,8 @@ class IngestionService:
                 is_verified=False,
                 balance=0.0
             )
-            db.add(account)
-            db.commit()
-            db.refresh(account)
+            db_writer.run(lambda s: s.add(account), session=db)
+            account = db.get(finance_models.Account, account.id)
             
         if not account:
              # Fallback if no mask was present in SMS at all
@@ -110,11 +124,8 @@ class IngestionService:
                 return {"status": "skipped", "reason": f"Ignored by user pattern: {ip.pattern}"}
         
         
-        # 1. Try to detect internal transfer
-        all_accounts = db.query(finance_models.Account).filter(finance_models.Account.tenant_id == tenant_id).all()
-        all_rules = db.query(finance_models.CategoryRule).filter(finance_models.CategoryRule.tenant_id == tenant_id).all()
-        
-        is_transfer, to_account_id = TransferDetector.detect(parsed.description, parsed.recipient, all_accounts, all_rules)
+        # 1. Try to detect internal transfer (compiled per-tenant matcher, cached)
+        is_transfer, to_account_id = TransferDetector.detect_for_tenant(db, tenant_id, parsed.description, parsed.recipient)
         
         # 2. Try to auto-categorize
         # Prioritize category from parser if available (e.g. from Learned Patterns)
@@ -159,6 +170,7 @@ class IngestionService:
         else:
             # Low confidence -> Move to Triage
             pending = ingestion_models.PendingTransaction(
+                id=str(uuid.uuid4()),
                 tenant_id=tenant_id,
                 account_id=str(account.id),
                 amount=final_amount,
@@ -179,9 +191,7 @@ class IngestionService:
                 longitude=extra_data.get("longitude") if extra_data else None,
                 location_name=None 
             )
-            db.add(pending)
-            db.commit()
-            db.refresh(pending)
+            db_writer.run(lambda s: s.add(pending), session=db)
             return {"status": "triaged", "pending_id": pending.id, "account": account.name}
 
     @staticmethod
@@ -193,12 +203,12 @@ class IngestionService:
 
         # 1. Ignore Pattern Check
         check_text = f"{(subject or '')} {(raw_content or '')}".lower()
-        ignored_patterns = db.query(ingestion_models.IgnoredPattern).filter(
+        ignored_patterns = db.query(ingestion_models.IgnoredPattern.pattern).filter(
             ingestion_models.IgnoredPattern.tenant_id == tenant_id
         ).all()
-        for ip in ignored_patterns:
-            if ip.pattern.lower() in check_text:
-                return # Skip noise
+        matcher = _ignore_matcher(tuple(sorted({p.lower() for (p,) in ignored_patterns})))
+        if matcher and matcher.search(check_text):
+            return # Skip noise
 
         # 2. Check if already exists to avoid spam
         existing = db.query(ingestion_models.UnparsedMessage).filter(
@@ -1,47 +1,222 @@
 import json
 import re
-from typing import Optional, List
+import threading
+import time
+from typing import Optional, List, Dict, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
 from backend.app.modules.finance.models import CategoryRule, Account
 
+# Safety net for multi-process deployments where invalidation events are process-local
+MATCHER_TTL_SECONDS = 600
+
+
+class TransferMatcher:
+    """
+    Compiled, single-scan transfer matcher for one tenant.
+
+    Every signal (rule keyword, account mask digits, account name) is a plain
+    lowercase substring, so all of them are folded into one alternation wrapped in a
+    lookahead. `finditer` then visits every start position once and reports the
+    best-ranked literal there; alternatives are ordered by (rank, -length) so the
+    regex engine itself resolves ties at a position.
+
+    Ranks reproduce the sequential checks this replaced: transfer rules in list order,
+    then each account in list order with its mask before its name. The lowest rank found
+    anywhere in the text wins, so a later account's mask never beats an earlier account's name.
+    """
+
+    def __init__(self, literals: Dict[str, Tuple[int, Optional[str]]], masks: List[Tuple[str, str]]):
+        self._targets = literals
+        self._masks = masks  # (raw account_mask, account_id) for match_mask()
+        self._suffix_index: Dict[str, str] = {}
+        for raw, acc_id in masks:
+            if len(raw) >= 4:
+                self._suffix_index.setdefault(raw[-4:], acc_id)
+
+        if literals:
+            ordered = sorted(literals, key=lambda lit: (literals[lit][0], -len(lit)))
+            self._pattern = re.compile("(?=(" + "|".join(re.escape(lit) for lit in ordered) + "))")
+        else:
+            self._pattern = None
+
+    @classmethod
+    def build(cls, accounts: List[Account], rules: Optional[List[CategoryRule]] = None) -> "TransferMatcher":
+        literals: Dict[str, Tuple[int, Optional[str]]] = {}
+
+        def add(literal: str, rank: int, target: Optional[str]):
+            current = literals.get(literal)
+            if current is None or rank < current[0]:
+                literals[literal] = (rank, target)
+
+        rank = 0
+        for rule in rules or []:
+            if not rule.is_transfer:
+                continue
+            try:
+                keywords = json.loads(rule.keywords) if rule.keywords else []
+            except (TypeError, ValueError):
+                continue
+            for k in keywords:
+                if k and str(k).strip():
+                    add(str(k).lower(), rank, rule.to_account_id)
+            rank += 1
+
+        masks = []
+        for acc in accounts:
+            if acc.account_mask:
+                masks.append((acc.account_mask, acc.id))
+                # '(card|a/c|to ...)XX1234' always contains the bare digits, so the digits suffice
+                digits = acc.account_mask.lower().replace('x', '').replace('*', '')
+                if digits and len(digits) >= 4:
+                    add(digits, rank, acc.id)
+            if acc.name and len(acc.name) > 3:
+                add(acc.name.lower(), rank + 1, acc.id)
+            rank += 2
+
+        return cls(literals, masks)
+
+    def match(self, description: Optional[str], recipient: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Returns (is_transfer, to_account_id) after a single scan of the text."""
+        if not self._pattern or (not description and not recipient):
+            return False, None
+
+        text = f"{description or ''} {recipient or ''}".lower()
+        best = None
+        for m in self._pattern.finditer(text):
+            rank, target = self._targets[m.group(1)]
+            if best is None or rank < best[0]:
+                best = (rank, target)
+                if rank == 0:
+                    break
+        if best is None:
+            return False, None
+        return True, best[1]
+
+    def match_mask(self, mask: str) -> Optional[str]:
+        """Account id whose stored mask ends with the last 4 digits of `mask`."""
+        if not mask or len(mask) < 2:
+            return None
+        suffix = mask[-4:]
+        if len(suffix) == 4:
+            return self._suffix_index.get(suffix)
+        for raw, acc_id in self._masks:
+            if raw.endswith(suffix):
+                return acc_id
+        return None
+
+
+class TransferMatcherCache:
+    """
+    Per-tenant matcher cache. A tenant's entry is dropped when a transaction that changed
+    its matcher inputs (see MATCHER_INPUTS) commits or rolls back; other writes to the same
+    rows (e.g. the balance bump on every new transaction) keep the entry.
+    """
+    _entries: Dict[str, Tuple[float, TransferMatcher]] = {}
+    _lock = threading.Lock()
+    _generation = 0  # bumped by invalidate(); a build that raced one is not stored
+
+    @classmethod
+    def get(cls, db: Session, tenant_id: str) -> TransferMatcher:
+        entry = cls._entries.get(tenant_id)
+        if entry and time.monotonic() - entry[0] < MATCHER_TTL_SECONDS:
+            return entry[1]
+
+        generation = cls._generation
+        accounts = db.query(Account).filter(Account.tenant_id == tenant_id).all()
+        rules = db.query(CategoryRule).filter(
+            CategoryRule.tenant_id == tenant_id,
+            CategoryRule.is_transfer == True
+        ).all()
+        matcher = TransferMatcher.build(accounts, rules)
+        with cls._lock:
+            if cls._generation == generation:
+                cls._entries[tenant_id] = (time.monotonic(), matcher)
+        return matcher
+
+    @classmethod
+    def invalidate(cls, tenant_id: Optional[str] = None):
+        with cls._lock:
+            cls._generation += 1
+            if tenant_id is None:
+                cls._entries.clear()
+            else:
+                cls._entries.pop(str(tenant_id), None)
+
+
+# Columns a TransferMatcher is built from
+MATCHER_INPUTS = {
+    Account: ("id", "tenant_id", "name", "account_mask"),
+    CategoryRule: ("tenant_id", "keywords", "is_transfer", "to_account_id"),
+}
+_STALE_KEY = "transfer_matcher_stale"  # session.info: tenant ids to drop at transaction end
+_ALL_TENANTS = "*"
+
+
+def _mark_stale(session: Session, tenant_ids):
+    session.info.setdefault(_STALE_KEY, set()).update(str(t) for t in tenant_ids if t)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_matcher_changes(session, flush_context):
+    # Pre-flush state and attribute history are still available here
+    for obj in list(session.new) + list(session.deleted):
+        if type(obj) in MATCHER_INPUTS:
+            _mark_stale(session, [obj.tenant_id])
+    for obj in session.dirty:
+        columns = MATCHER_INPUTS.get(type(obj))
+        if not columns:
+            continue
+        attrs = inspect(obj).attrs
+        if any(attrs[c].history.has_changes() for c in columns):
+            # A moved row is stale for both its old and new tenant
+            tenant = attrs["tenant_id"].history
+            _mark_stale(session, [obj.tenant_id, *tenant.deleted])
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_matcher_changes(orm_execute_state):
+    # query.update()/query.delete() bypass the unit of work; the tenant is not known here
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    columns = MATCHER_INPUTS.get(mapper.class_) if mapper is not None else None
+    if not columns:
+        return
+    if orm_execute_state.is_update:
+        values = getattr(orm_execute_state.statement, "_values", None)
+        if values is not None and not {getattr(k, "key", k) for k in values} & set(columns):
+            return
+    _mark_stale(orm_execute_state.session, [_ALL_TENANTS])
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_stale_matchers(session):
+    # Rollback too: a get() in this transaction may have cached its uncommitted rows
+    for tenant_id in session.info.pop(_STALE_KEY, ()):
+        TransferMatcherCache.invalidate(None if tenant_id == _ALL_TENANTS else tenant_id)
+
+
 class TransferDetector:
     """
     Modular logic for detecting if a transaction is a self-transfer to another tracked account.
     """
-    
+
     @staticmethod
     def detect(description: Optional[str], recipient: Optional[str], accounts: List[Account], rules: List[CategoryRule] = None) -> (bool, Optional[str]):
         """
         Analyzes description and recipient to find a destination account ID.
         Returns (is_transfer, to_account_id).
+        Builds a throwaway matcher; prefer detect_for_tenant() on hot paths.
         """
         if not description and not recipient:
             return False, None
-            
-        text = f"{description or ''} {recipient or ''}".lower()
-        
-        # 0. Check Rules first (User defined/learned)
-        if rules:
-            for rule in rules:
-                if not rule.is_transfer: continue
-                keywords = json.loads(rule.keywords)
-                if any(k.lower() in text for k in keywords):
-                    return True, rule.to_account_id
-
-        # 1. Match by Account Mask (e.g., *1234 or XX1234)
-        for acc in accounts:
-            if acc.account_mask:
-                mask = acc.account_mask.lower().replace('x', '').replace('*', '')
-                if mask and len(mask) >= 4:
-                    patterns = [
-                        rf"(?i)(?:card|a/c|acc|to|paying|bill\s*for)\s*(?:[x\*]*){mask}",
-                        rf"{mask}"
-                    ]
-                    for p in patterns:
-                        if re.search(p, text):
-                            return True, acc.id
-            
-            # 2. Match by Account Name (direct match)
-            if len(acc.name) > 3 and acc.name.lower() in text:
-                return True, acc.id
-                
-        return False, None
+        return TransferMatcher.build(accounts, rules).match(description, recipient)
+
+    @staticmethod
+    def detect_for_tenant(db: Session, tenant_id: str, description: Optional[str], recipient: Optional[str]) -> (bool, Optional[str]):
+        """Same as detect(), using the tenant's cached compiled matcher."""
+        if not description and not recipient:
+            return False, None
+        return TransferMatcherCache.get(db, tenant_id).match(description, recipient)
@@ -6,6 +6,7 @@ from pydantic import BaseModel
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from backend.app.core.database import get_db
+from backend.app.core.db_writer import db_writer
 from backend.app.core.config import settings
 from backend.app.modules.auth import models as auth_models
 from backend.app.modules.auth import security, services as auth_services
@@ -43,22 +44,23 @@ def mobile_login(
         ingestion_models.MobileDevice.tenant_id == str(user.tenant_id)
     ).first()
     
-    if not device:
-        device = ingestion_models.MobileDevice(
-            tenant_id=str(user.tenant_id),
-            device_id=payload.device_id,
-            device_name=payload.device_name,
-            is_approved=False, # Default to unapproved
-            is_enabled=True,
-            user_id=str(user.id)
-        )
-        db.add(device)
-    else:
-        # Update name and seen time
-        device.device_name = payload.device_name
-        device.last_seen_at = datetime.utcnow()
+    with db_writer.exclusive(db):
+        if not device:
+            device = ingestion_models.MobileDevice(
+                tenant_id=str(user.tenant_id),
+                device_id=payload.device_id,
+                device_name=payload.device_name,
+                is_approved=False, # Default to unapproved
+                is_enabled=True,
+                user_id=str(user.id)
+            )
+            db.add(device)
+        else:
+            # Update name and seen time
+            device.device_name = payload.device_name
+            device.last_seen_at = datetime.utcnow()
         
-    db.commit()
+        db.commit()
     db.refresh(device)
     
     IngestionService.log_event(
@@ -100,23 +102,24 @@ def register_device_manually(
         ingestion_models.MobileDevice.tenant_id == str(current_user.tenant_id)
     ).first()
     
-    if not device:
-        device = ingestion_models.MobileDevice(
-            tenant_id=str(current_user.tenant_id),
-            device_id=payload.device_id,
-            device_name=payload.device_name,
-            fcm_token=payload.fcm_token,
-            is_approved=False,
-            user_id=str(current_user.id)
-        )
-        db.add(device)
-    else:
-        device.device_name = payload.device_name
-        if payload.fcm_token:
-            device.fcm_token = payload.fcm_token
-        device.last_seen_at = datetime.utcnow()
+    with db_writer.exclusive(db):
+        if not device:
+            device = ingestion_models.MobileDevice(
+                tenant_id=str(current_user.tenant_id),
+                device_id=payload.device_id,
+                device_name=payload.device_name,
+                fcm_token=payload.fcm_token,
+                is_approved=False,
+                user_id=str(current_user.id)
+            )
+            db.add(device)
+        else:
+            device.device_name = payload.device_name
+            if payload.fcm_token:
+                device.fcm_token = payload.fcm_token
+            device.last_seen_at = datetime.utcnow()
         
-    db.commit()
+        db.commit()
     db.refresh(device)
     return device
 
@@ -156,20 +159,22 @@ def device_heartbeat(
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
         
-    device.last_seen_at = datetime.utcnow()
-    db.commit()
-    db.refresh(device)
-    
-    IngestionService.log_event(
-        db, 
+    # Last-seen bump and its audit event in one DB writer unit
+    device_pk, seen_at = device.id, datetime.utcnow()
+    event = IngestionService.new_event(
         str(current_user.tenant_id), 
         "heartbeat", 
         "success", 
         f"Heartbeat from {device.device_name}", 
         device_id=device.device_id
     )
-    
-    return device
+
+    def write(session: Session):
+        IngestionService.touch_device(session, device_pk, seen_at)
+        session.add(event)
+
+    db_writer.run(write, session=db)
+    return db.get(ingestion_models.MobileDevice, device_pk)
 
 # --- Web Dashboard Management Endpoints (also under /mobile namespace) ---
 
@@ -207,8 +212,9 @@ def approve_device(
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
         
-    device.is_approved = payload.is_approved
-    db.commit()
+    with db_writer.exclusive(db):
+        device.is_approved = payload.is_approved
+        db.commit()
     db.refresh(device)
     return device
 
@@ -235,8 +241,9 @@ def delete_device(
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
         
-    db.delete(device)
-    db.commit()
+    with db_writer.exclusive(db):
+        db.delete(device)
+        db.commit()
     return {"status": "deleted"}
 
 @router.patch("/devices/{device_id}", response_model=schemas.DeviceResponse)
@@ -257,16 +264,17 @@ def update_device(
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
         
-    if payload.device_name is not None:
-        device.device_name = payload.device_name
-    if payload.is_enabled is not None:
-        device.is_enabled = payload.is_enabled
-    if payload.is_ignored is not None:
-        device.is_ignored = payload.is_ignored
-    if payload.user_id is not None:
-        device.user_id = payload.user_id
+    with db_writer.exclusive(db):
+        if payload.device_name is not None:
+            device.device_name = payload.device_name
+        if payload.is_enabled is not None:
+            device.is_enabled = payload.is_enabled
+        if payload.is_ignored is not None:
+            device.is_ignored = payload.is_ignored
+        if payload.user_id is not None:
+            device.user_id = payload.user_id
         
-    db.commit()
+        db.commit()
     db.refresh(device)
     return device
 
@@ -288,11 +296,9 @@ def toggle_device_enabled(
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
         
-    device.is_enabled = enabled
-    db.commit()
-    db.refresh(device)
-    device.is_enabled = enabled
-    db.commit()
+    with db_writer.exclusive(db):
+        device.is_enabled = enabled
+        db.commit()
     db.refresh(device)
     return device
 
@@ -314,12 +320,13 @@ def toggle_device_ignored(
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
         
-    device.is_ignored = ignored
-    if ignored:
-        device.is_approved = False # Auto-revoke approval if ignored
+    with db_writer.exclusive(db):
+        device.is_ignored = ignored
+        if ignored:
+            device.is_approved = False # Auto-revoke approval if ignored
         
 
-    db.commit()
+        db.commit()
     db.refresh(device)
     return device
 
@@ -344,8 +351,9 @@ def assign_device_user(
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
         
-    device.user_id = payload.user_id
-    db.commit()
+    with db_writer.exclusive(db):
+        device.user_id = payload.user_id
+        db.commit()
     db.refresh(device)
     return device
 
@@ -509,41 +517,46 @@ def list_mobile_transactions(
     page_size: int = 20,
     month: Optional[int] = None,
     year: Optional[int] = None,
+    cursor: Optional[str] = None,
     current_user: auth_models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Paginated transactions list for infinite scroll.
+    Pass back `next_cursor` to fetch the next page; `page` is kept for older app builds.
     """
-    from backend.app.modules.finance import models
-    from sqlalchemy import or_
-    
-    query = db.query(models.Transaction).filter(
-        models.Transaction.tenant_id == str(current_user.tenant_id),
-        models.Transaction.is_transfer == False,
-        models.Transaction.exclude_from_reports == False
-    )
-    
-    # Filter by user ownership
-    query = query.join(
-        models.Account, models.Transaction.account_id == models.Account.id
-    ).filter(
-        or_(models.Account.owner_id == str(current_user.id), models.Account.owner_id == None)
-    )
-    
+    from backend.app.modules.finance.services.transaction_service import TransactionService
+    from backend.app.core.pagination import InvalidCursor
+
+    start_date = end_date = None
     if month and year:
         start_date = datetime(year, month, 1)
         last_day = calendar.monthrange(year, month)[1]
         end_date = datetime(year, month, last_day, 23, 59, 59)
-        query = query.filter(models.Transaction.date >= start_date, models.Transaction.date <= end_date)
-        
-    total_count = query.count()
-    
-    transactions = query.order_by(models.Transaction.date.desc()) \
-                        .offset((page - 1) * page_size) \
-                        .limit(page_size) \
-                        .all()
-                        
+
+    filters = dict(
+        start_date=start_date, end_date=end_date, user_id=str(current_user.id),
+        exclude_from_reports=True, exclude_transfers=True
+    )
+    tenant_id = str(current_user.tenant_id)
+
+    if cursor or page <= 1:
+        try:
+            transactions, next_cursor = TransactionService.get_transactions_page(
+                db, tenant_id, cursor, page_size, **filters
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        has_next = next_cursor is not None
+    else:
+        # Legacy page-number clients: fetch one extra row instead of counting
+        transactions = TransactionService.get_transactions(
+            db, tenant_id, skip=(page - 1) * page_size, limit=page_size + 1, **filters
+        )
+        has_next = len(transactions) > page_size
+        transactions = transactions[:page_size]
+        next_cursor = None
+
     # Enrich with owner info (simplified) or mapped
     enriched = []
     for txn in transactions:
@@ -554,12 +567,11 @@ def list_mobile_transactions(
             "amount": float(txn.amount),
             "category": txn.category
         })
-        
-    has_next = (page * page_size) < total_count
-    
+
     return {
         "items": enriched,
-        "next_page": page + 1 if has_next else None
+        "next_page": page + 1 if has_next else None,
+        "next_cursor": next_cursor
     }
     
 class CreateTransactionRequest(BaseModel):
@@ -602,8 +614,9 @@ def create_mobile_transaction(
         is_transfer=False # Simple manual entry usually not transfer
     )
     
-    db.add(txn)
-    db.commit()
+    with db_writer.exclusive(db):
+        db.add(txn)
+        db.commit()
     db.refresh(txn)
     
     return {
@@ -697,8 +710,9 @@ def update_transaction_category(
     if not txn:
         raise HTTPException(status_code=404, detail="Transaction not found")
         
-    txn.category = payload.category
-    db.commit()
+    with db_writer.exclusive(db):
+        txn.category = payload.category
+        db.commit()
     
     # 2. Create Rule if requested
     if payload.create_rule and payload.rule_keywords:
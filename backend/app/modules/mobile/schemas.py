@@ -98,6 +98,7 @@ class MemberResponse(BaseModel):
 class TransactionResponse(BaseModel):
     items: List[RecentTransaction]
     next_page: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 class FundHolding(BaseModel):
     scheme_code: str
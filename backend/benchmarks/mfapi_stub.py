@@ -0,0 +1,183 @@
+"""
+Local stand-in for api.mfapi.in.
+
+Serves the two endpoints the backend uses, with the same JSON shapes:
+- GET /mf           scheme master: [{"schemeCode", "schemeName", "isinGrowth", "isinDivReinvestment"}]
+- GET /mf/{code}    {"meta": {...}, "data": [{"date": "dd-mm-YYYY", "nav": "123.4567"}, ...], "status": "SUCCESS"}
+                    (newest first, business days only)
+
+NAV histories are a seeded random walk per scheme, so every run and every process sees
+the same numbers. Point the backend at it with MFAPI_BASE_URL=http://127.0.0.1:<port>/mf.
+"""
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+AMCS = ["HDFC", "ICICI Prudential", "SBI", "Axis", "Kotak", "Nippon India", "Mirae Asset",
+        "Parag Parikh", "UTI", "Aditya Birla Sun Life"]
+CATEGORIES = [("Flexi Cap Fund", "Equity Scheme - Flexi Cap Fund"),
+              ("Nifty 50 Index Fund", "Other Scheme - Index Funds"),
+              ("Large Cap Fund", "Equity Scheme - Large Cap Fund"),
+              ("Mid Cap Fund", "Equity Scheme - Mid Cap Fund"),
+              ("Small Cap Fund", "Equity Scheme - Small Cap Fund"),
+              ("ELSS Tax Saver Fund", "Equity Scheme - ELSS"),
+              ("Liquid Fund", "Debt Scheme - Liquid Fund"),
+              ("Short Duration Fund", "Debt Scheme - Short Duration Fund"),
+              ("Balanced Advantage Fund", "Hybrid Scheme - Dynamic Asset Allocation")]
+FIRST_CODE = 150001
+HISTORY_YEARS = 10
+
+
+def scheme_codes(count: int) -> List[str]:
+    return [str(FIRST_CODE + i) for i in range(count)]
+
+
+def scheme(code: str) -> dict:
+    i = int(code) - FIRST_CODE
+    amc = AMCS[i % len(AMCS)]
+    name, category = CATEGORIES[(i // len(AMCS)) % len(CATEGORIES)]
+    plan = "Direct Plan" if (i // (len(AMCS) * len(CATEGORIES))) % 2 == 0 else "Regular Plan"
+    return {
+        "schemeCode": int(code),
+        "schemeName": f"{amc} {name} - {plan} - Growth",
+        "fundHouse": f"{amc} Mutual Fund",
+        "schemeCategory": category,
+        "isinGrowth": f"INF{i:06d}G01",
+        "isinDivReinvestment": f"INF{i:06d}R01",
+    }
+
+
+@lru_cache(maxsize=None)
+def nav_points(code: str, end: Optional[date] = None) -> tuple:
+    """(date, nav) pairs, oldest first, for HISTORY_YEARS of business days up to `end`."""
+    end = end or date.today()
+    rng = random.Random(int(code))
+    is_debt = "Debt" in scheme(code)["schemeCategory"]
+    drift, vol = (0.00025, 0.0008) if is_debt else (0.0005, 0.011)
+    day = end - timedelta(days=365 * HISTORY_YEARS)
+    nav = rng.uniform(10, 150)
+    points = []
+    while day <= end:
+        if day.weekday() < 5:
+            nav = max(1.0, nav * (1 + rng.gauss(drift, vol)))
+            points.append((day, round(nav, 4)))
+        day += timedelta(days=1)
+    return tuple(points)
+
+
+def history(code: str) -> dict:
+    meta = scheme(code)
+    return {
+        "meta": {
+            "fund_house": meta["fundHouse"],
+            "scheme_type": "Open Ended Schemes",
+            "scheme_category": meta["schemeCategory"],
+            "scheme_code": meta["schemeCode"],
+            "scheme_name": meta["schemeName"],
+            "isin_growth": meta["isinGrowth"],
+            "isin_div_reinvestment": meta["isinDivReinvestment"],
+        },
+        "data": [{"date": d.strftime("%d-%m-%Y"), "nav": f"{nav:.4f}"} for d, nav in reversed(nav_points(code))],
+        "status": "SUCCESS",
+    }
+
+
+def nav_on(code: str, day: date) -> float:
+    """NAV on `day` or the closest earlier business day (what seeded orders are priced at)."""
+    best = None
+    for d, nav in nav_points(code):
+        if d > day:
+            break
+        best = nav
+    return best if best is not None else nav_points(code)[0][1]
+
+
+class MfapiStub:
+    """Threaded HTTP server; use as a context manager or start()/stop()."""
+
+    def __init__(self, schemes: int = 200, port: int = 0, latency_ms: float = 0.0):
+        self.codes = set(scheme_codes(schemes))
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/mf"
+
+    def _body(self, path: str) -> Optional[bytes]:
+        if path not in self._cache:
+            parts = path.strip("/").split("/")
+            if parts == ["mf"]:
+                payload = [{k: v for k, v in scheme(c).items() if k in ("schemeCode", "schemeName", "isinGrowth", "isinDivReinvestment")}
+                           for c in sorted(self.codes)]
+            elif len(parts) == 2 and parts[0] == "mf" and parts[1] in self.codes:
+                payload = history(parts[1])
+            else:
+                return None
+            self._cache[path] = json.dumps(payload).encode()
+        return self._cache[path]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = stub._body(self.path.split("?")[0])
+                if body is None:
+                    self.send_response(404)
+                    body = b'{"status": "ERROR"}'
+                else:
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MfapiStub":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mfapi-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Serve a local mfapi.in stand-in")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--schemes", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = MfapiStub(args.schemes, args.port, args.latency_ms)
+    print(f"mfapi stub on {stub.base_url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,340 @@
+"""
+Backend load test against a freshly seeded DuckDB.
+
+    python -m backend.benchmarks.run --tenants 5 --accounts 4 --years 3 --requests 2000 --concurrency 8
+    python -m backend.benchmarks.run --mix mixed --output out.json --compare backend/benchmarks/baselines/read.json
+
+By default: seeds a throwaway database (see seed.py), starts the local mfapi stub, serves
+the app in-process on uvicorn (lifespan off: no scheduler, no demo seeder) and drives it
+with a thread pool of HTTP clients. With --base-url the requests go to a running server
+instead; it must have been seeded by this harness (`--seed-only --database PATH`) and
+started with MFAPI_BASE_URL pointing at a stub.
+
+Per endpoint the report has p50/p95/p99/mean latency, error counts and, from the
+Server-Timing header, statements and DB time per request. Reports are JSON so they can
+be diffed or compared against a stored baseline (--compare, exit status 1 on regression).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+DEFAULT_THRESHOLD = 0.25
+# metric suffix -> (direction, absolute noise floor)
+DIRECTIONS = {
+    "throughput_per_s": ("higher", 2.0),
+    "p50_ms": ("lower", 2.0),
+    "p95_ms": ("lower", 5.0),
+    "p99_ms": ("lower", 10.0),
+    "queries_avg": ("lower", 0.5),
+}
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def configure_environment(database: str, mfapi_base_url: str):
+    """Must run before anything imports backend.app (settings are read at import time)."""
+    os.environ["APP_DATABASE_URL"] = f"duckdb:///{database}"
+    os.environ["MFAPI_BASE_URL"] = mfapi_base_url
+    os.environ["SERVER_TIMING_ENABLED"] = "true"
+    os.environ["METRICS_ENABLED"] = "true"
+    os.environ["MARKET_INDICES_UPSTREAM"] = "fake"
+    os.environ.setdefault("PARSER_SERVICE_URL", "http://127.0.0.1:9")  # never reached by the mixes
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 2)
+
+
+def _summarize(samples: List[dict]) -> dict:
+    latencies = [s["ms"] for s in samples]
+    queries = [s["queries"] for s in samples if s["queries"] is not None]
+    db_ms = [s["db_ms"] for s in samples if s["db_ms"] is not None]
+    return {
+        "count": len(samples),
+        "errors": sum(1 for s in samples if s["status"] >= 400 or s["status"] == 0),
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": _percentile(latencies, 0.50),
+        "p95_ms": _percentile(latencies, 0.95),
+        "p99_ms": _percentile(latencies, 0.99),
+        "queries_avg": round(sum(queries) / len(queries), 2) if queries else None,
+        "queries_max": max(queries) if queries else None,
+        "db_ms_avg": round(sum(db_ms) / len(db_ms), 2) if db_ms else None,
+    }
+
+
+class InProcessServer:
+    """uvicorn on a background thread (signal handlers stay with the main thread)."""
+
+    def __init__(self, app, port: int):
+        import uvicorn
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan="off",
+                                                    log_level="warning", access_log=False))
+        self.thread = threading.Thread(target=self.server.run, name="bench-uvicorn", daemon=True)
+        self.base_url = f"http://127.0.0.1:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.time() + 30
+        while not self.server.started:
+            if time.time() > deadline or not self.thread.is_alive():
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def _targets_from_seed(seeded: dict) -> List[Any]:
+    from backend.app.modules.auth import security
+    from backend.benchmarks.scenarios import Target
+    expires = timedelta(hours=6)
+    return [
+        Target(token=security.create_access_token({"sub": t.email, "tenant_id": t.tenant_id}, expires),
+               account_ids=t.account_ids, holding_ids=t.holding_ids)
+        for t in seeded["tenants"]
+    ]
+
+
+def _targets_from_server(client, tenants: int) -> List[Any]:
+    """Log in as the seeded owners of a running server and discover their ids through the API."""
+    from backend.benchmarks.scenarios import API, Target
+    from backend.benchmarks.seed import PASSWORD
+    targets = []
+    for n in range(tenants):
+        response = client.post(f"{API}/auth/login", data={"username": f"bench-{n}@bench.local", "password": PASSWORD})
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        accounts = client.get(f"{API}/finance/accounts", headers=headers).json()
+        portfolio = client.get(f"{API}/finance/mutual-funds/portfolio", headers=headers).json()
+        targets.append(Target(token=headers["Authorization"][7:], account_ids=[a["id"] for a in accounts],
+                              holding_ids=[h["id"] for h in portfolio if isinstance(h, dict) and h.get("id")]))
+    return targets
+
+
+def drive(base_url: str, targets: List[Any], mix: List[Any], requests: int, concurrency: int,
+          warmup: int, seed: int) -> Dict[str, Any]:
+    """Runs `requests` calls (after `warmup` unrecorded ones) over `concurrency` client threads."""
+    import httpx
+
+    rng = random.Random(seed)
+    from backend.benchmarks.scenarios import pick
+    plan = [(pick(mix, rng), rng.choice(targets), random.Random(rng.getrandbits(32))) for _ in range(warmup + requests)]
+    local = threading.local()
+    samples: List[Optional[dict]] = [None] * len(plan)
+
+    def call(i: int):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = httpx.Client(base_url=base_url, timeout=120.0)
+        scenario, target, req_rng = plan[i]
+        req = scenario.build(target, req_rng)
+        started = time.perf_counter()
+        try:
+            response = client.request(req.method, req.path, params=req.params, json=req.json,
+                                      headers={"Authorization": f"Bearer {target.token}"})
+            status = response.status_code
+            timing = SERVER_TIMING.search(response.headers.get("server-timing", ""))
+        except httpx.HTTPError:
+            status, timing = 0, None
+        samples[i] = {
+            "name": scenario.name,
+            "status": status,
+            "ms": (time.perf_counter() - started) * 1000,
+            "db_ms": float(timing.group(1)) if timing else None,
+            "queries": int(timing.group(2)) if timing else None,
+        }
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(warmup)))
+        started = time.perf_counter()
+        list(pool.map(call, range(warmup, len(plan))))
+        elapsed = time.perf_counter() - started
+
+    recorded = samples[warmup:]
+    by_name = defaultdict(list)
+    for s in recorded:
+        by_name[s["name"]].append(s)
+    overall = _summarize(recorded)
+    overall["throughput_per_s"] = round(len(recorded) / elapsed, 2) if elapsed else 0.0
+    return {
+        "overall": overall,
+        "endpoints": {name: _summarize(rows) for name, rows in sorted(by_name.items())},
+        "elapsed_s": round(elapsed, 3),
+    }
+
+
+def _flatten(report: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """Same rules as the parser benchmark: relative threshold plus an absolute noise floor per metric."""
+    now, then = _flatten(current.get("load", {})), _flatten(baseline.get("load", {}))
+    rows = []
+    for name, old in then.items():
+        suffix = name.rsplit(".", 1)[-1]
+        if suffix not in DIRECTIONS or name not in now:
+            continue
+        direction, floor = DIRECTIONS[suffix]
+        delta = now[name] - old
+        change = delta / old if old else 0.0
+        worse = delta < 0 if direction == "higher" else delta > 0
+        rows.append({"metric": name, "baseline": old, "current": now[name], "change": round(change, 4),
+                     "regression": worse and abs(change) > threshold and abs(delta) > floor})
+    rows.sort(key=lambda r: (not r["regression"], -abs(r["change"])))
+    return rows
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    load = report["load"]
+    lines = [f"{'endpoint':<52} {'n':>6} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'qry':>6} {'db ms':>7}"]
+    for name, e in list(load["endpoints"].items()) + [("ALL", load["overall"])]:
+        lines.append(f"{name:<52} {e['count']:>6} {e['errors']:>4} {e['p50_ms'] or 0:>8.1f} {e['p95_ms'] or 0:>8.1f} "
+                     f"{e['p99_ms'] or 0:>8.1f} {e['queries_avg'] or 0:>6.1f} {e['db_ms_avg'] or 0:>7.1f}")
+    lines.append(f"throughput: {load['overall']['throughput_per_s']} req/s over {load['elapsed_s']}s")
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[dict], limit: int = 25) -> str:
+    lines = [f"{'metric':<70} {'baseline':>10} {'current':>10} {'change':>8}"]
+    for row in rows[:limit]:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['metric']:<70} {row['baseline']:>10.2f} {row['current']:>10.2f} {row['change']:>+8.1%}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    scale = parser.add_argument_group("seeding")
+    scale.add_argument("--tenants", type=int, default=2)
+    scale.add_argument("--accounts", type=int, default=4, help="accounts per tenant")
+    scale.add_argument("--years", type=float, default=1.0, help="years of history")
+    scale.add_argument("--txns-per-day", type=float, default=4.0)
+    scale.add_argument("--schemes", type=int, default=200, help="schemes in the stub's master")
+    scale.add_argument("--funds", type=int, default=6, help="SIP schemes per tenant")
+    scale.add_argument("--seed", type=int, default=42)
+    scale.add_argument("--database", help="DuckDB file (default: a temp file); reused as-is if it exists")
+    scale.add_argument("--seed-only", action="store_true", help="seed --database and exit")
+    load = parser.add_argument_group("load")
+    from backend.benchmarks.scenarios import MIXES
+    load.add_argument("--mix", choices=sorted(MIXES), default="read")
+    load.add_argument("--requests", type=int, default=500)
+    load.add_argument("--concurrency", type=int, default=4)
+    load.add_argument("--warmup", type=int, default=20)
+    load.add_argument("--base-url", help="drive an already running server instead of an in-process one")
+    load.add_argument("--mfapi-latency-ms", type=float, default=0.0, help="simulated mfapi.in latency")
+    out = parser.add_argument_group("output")
+    out.add_argument("--output", help="write the JSON report here")
+    out.add_argument("--compare", help="baseline report to compare against")
+    out.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    from backend.benchmarks.mfapi_stub import MfapiStub
+    stub = MfapiStub(schemes=args.schemes, latency_ms=args.mfapi_latency_ms).start()
+    database = args.database or os.path.join(tempfile.mkdtemp(prefix="backend-bench-"), "bench.duckdb")
+    reuse = os.path.exists(database)
+    os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+    configure_environment(os.path.abspath(database), stub.base_url)
+
+    from backend.benchmarks.seed import ScaleSpec, seed
+    spec = ScaleSpec(tenants=args.tenants, accounts=args.accounts, years=args.years, txns_per_day=args.txns_per_day,
+                     schemes=args.schemes, funds_per_tenant=args.funds, seed=args.seed)
+    report: Dict[str, Any] = {
+        "config": {**spec.as_dict(), "mix": args.mix, "requests": args.requests, "concurrency": args.concurrency,
+                   "warmup": args.warmup, "mfapi_latency_ms": args.mfapi_latency_ms},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count(), "recorded_at": datetime.utcnow().isoformat(timespec="seconds")},
+    }
+
+    try:
+        seeded = None
+        if not args.base_url:
+            from backend.app.main import app  # creates the schema
+            from backend.app.core.database import SessionLocal
+            if reuse and not args.seed_only:
+                print(f"reusing {database}", file=sys.stderr)
+            else:
+                started = time.perf_counter()
+                db = SessionLocal()
+                try:
+                    seeded = seed(db, spec)
+                finally:
+                    db.close()
+                report["seed"] = {"rows": seeded["rows"], "timings_s": seeded["timings_s"],
+                                  "total_s": round(time.perf_counter() - started, 3), "database": database}
+                print(f"seeded {database} in {report['seed']['total_s']}s: {seeded['rows']}", file=sys.stderr)
+            if args.seed_only:
+                return 0
+
+        import httpx
+        if args.base_url:
+            with httpx.Client(base_url=args.base_url, timeout=60.0) as client:
+                targets = _targets_from_server(client, args.tenants)
+            report["load"] = drive(args.base_url, targets, MIXES[args.mix], args.requests, args.concurrency,
+                                   args.warmup, args.seed)
+        else:
+            with InProcessServer(app, _free_port()) as server:
+                if seeded:
+                    targets = _targets_from_seed(seeded)
+                else:
+                    with httpx.Client(base_url=server.base_url, timeout=60.0) as client:
+                        targets = _targets_from_server(client, args.tenants)
+                report["load"] = drive(server.base_url, targets, MIXES[args.mix], args.requests, args.concurrency,
+                                       args.warmup, args.seed)
+                with httpx.Client(base_url=server.base_url, timeout=60.0) as client:
+                    report["slow_queries"] = client.get("/metrics/debug").json().get("slow_queries", [])[-20:]
+        report["mfapi_requests"] = stub.requests
+    finally:
+        stub.stop()
+
+    print(format_report(report))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare) as f:
+            stored = json.load(f)
+        differs = {k: (stored.get("config", {}).get(k), v) for k, v in report["config"].items()
+                   if stored.get("config", {}).get(k) != v}
+        if differs:
+            print(f"warning: baseline was recorded with a different config: {differs}", file=sys.stderr)
+        rows = compare(report, stored, args.threshold)
+        print(format_comparison(rows))
+        if any(r["regression"] for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
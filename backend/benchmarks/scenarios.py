@@ -0,0 +1,120 @@
+"""
+Scripted request mixes.
+
+A Scenario is one endpoint call with a weight; a mix is a weighted list of them. Each
+request picks a random tenant, so concurrent users spread over the seeded families the
+way real traffic does. `name` is the reporting key (path templates, not concrete URLs).
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+API = "/api/v1"
+SEARCH_TERMS = ["swiggy", "uber", "amazon", "wigg", "netflix", "bigbasket", "salary", "bill payment", "zomato food"]
+
+
+@dataclass
+class Target:
+    """What a scenario needs to know about a tenant to build its request."""
+    token: str
+    account_ids: List[str]
+    holding_ids: List[str]
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    params: Optional[dict] = None
+    json: Optional[dict] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    weight: float
+    build: Callable[[Target, random.Random], Request]
+    write: bool = False
+
+
+def _get(path: str, params: Optional[Callable[[Target, random.Random], dict]] = None):
+    return lambda t, rng: Request("GET", path, params(t, rng) if params else None)
+
+
+def _month(rng: random.Random) -> dict:
+    back = datetime.utcnow() - timedelta(days=30 * rng.randint(0, 11))
+    return {"month": back.month, "year": back.year}
+
+
+def _date_window(rng: random.Random) -> dict:
+    end = datetime.utcnow() - timedelta(days=rng.randint(0, 180))
+    return {"start_date": (end - timedelta(days=30)).isoformat(), "end_date": end.isoformat()}
+
+
+def _holding(t: Target, rng: random.Random) -> Request:
+    if not t.holding_ids:
+        return Request("GET", f"{API}/finance/mutual-funds/portfolio")
+    return Request("GET", f"{API}/finance/mutual-funds/holdings/{rng.choice(t.holding_ids)}")
+
+
+def _import(t: Target, rng: random.Random) -> Request:
+    # Fresh merchant text per batch keeps the rows out of the dedup path
+    day = datetime.utcnow() - timedelta(days=rng.randint(0, 60))
+    batch = rng.randint(10, 40)
+    rows = [{
+        "date": (day - timedelta(minutes=i)).isoformat(),
+        "description": f"BENCH IMPORT {rng.getrandbits(48):x}",
+        "recipient": rng.choice(["Swiggy", "Amazon", "Uber", "DMart"]),
+        "amount": -round(rng.uniform(50, 5000), 2),
+        "type": "DEBIT",
+    } for i in range(batch)]
+    return Request("POST", f"{API}/ingestion/csv/import",
+                   json={"account_id": rng.choice(t.account_ids), "transactions": rows, "source": "CSV"})
+
+
+DASHBOARD = [
+    Scenario("GET /finance/metrics", 10, _get(f"{API}/finance/metrics")),
+    Scenario("GET /finance/metrics?window", 4, _get(f"{API}/finance/metrics", lambda t, rng: _date_window(rng))),
+    Scenario("GET /finance/forecast", 3, _get(f"{API}/finance/forecast", lambda t, rng: {"days": rng.choice([30, 90])})),
+    Scenario("GET /finance/budget-history", 3, _get(f"{API}/finance/budget-history")),
+    Scenario("GET /finance/net-worth-timeline", 3, _get(f"{API}/finance/net-worth-timeline",
+                                                          lambda t, rng: {"days": rng.choice([30, 90, 365])})),
+    Scenario("GET /finance/spending-trend", 3, _get(f"{API}/finance/spending-trend")),
+    Scenario("GET /finance/heatmap", 2, _get(f"{API}/finance/heatmap")),
+    Scenario("GET /finance/transactions", 10, _get(f"{API}/finance/transactions",
+                                                    lambda t, rng: {"page": rng.randint(1, 5), "limit": 50})),
+    Scenario("GET /finance/transactions?cursor", 6, _get(f"{API}/finance/transactions",
+                                                          lambda t, rng: {"cursor": "", "limit": 50})),
+    Scenario("GET /finance/transactions?account", 4, _get(f"{API}/finance/transactions", lambda t, rng: {
+        "account_id": rng.choice(t.account_ids), "page": 1, "limit": 50})),
+    Scenario("GET /finance/transactions/search", 6, _get(f"{API}/finance/transactions/search",
+                                                          lambda t, rng: {"q": rng.choice(SEARCH_TERMS)})),
+    Scenario("GET /mobile/dashboard", 8, _get(f"{API}/mobile/dashboard", lambda t, rng: _month(rng))),
+]
+
+FUNDS = [
+    Scenario("GET /mutual-funds/portfolio", 8, _get(f"{API}/finance/mutual-funds/portfolio")),
+    Scenario("GET /mutual-funds/analytics", 4, _get(f"{API}/finance/mutual-funds/analytics")),
+    Scenario("GET /mutual-funds/analytics/performance-timeline", 3, _get(
+        f"{API}/finance/mutual-funds/analytics/performance-timeline",
+        lambda t, rng: rng.choice([{"period": "1y", "granularity": "1w"}, {"period": "3y", "granularity": "1m"}]))),
+    Scenario("GET /mutual-funds/holdings/{id}", 3, _holding),
+    Scenario("GET /mobile/funds", 5, _get(f"{API}/mobile/funds")),
+]
+
+WRITES = [
+    Scenario("POST /ingestion/csv/import", 1, _import, write=True),
+]
+
+MIXES: Dict[str, List[Scenario]] = {
+    "read": DASHBOARD + FUNDS,
+    "dashboard": DASHBOARD,
+    "funds": FUNDS,
+    "mixed": DASHBOARD + FUNDS + [Scenario(s.name, 4, s.build, s.write) for s in WRITES],
+    "import": WRITES,
+}
+
+
+def pick(mix: List[Scenario], rng: random.Random) -> Scenario:
+    return rng.choices(mix, weights=[s.weight for s in mix])[0]
@@ -0,0 +1,280 @@
+"""
+Scalable, deterministic seeder for load tests.
+
+Builds N tenants x M accounts x K years of history: signed transactions (salary, card
+bills as linked transfer pairs, loan EMIs, daily spends), categories + budgets, recurring
+items, and monthly SIP orders into schemes served by the local mfapi stub. Rows go in
+through Core multi-row INSERTs in batches, then the derived state is built with the same
+services the app uses (search index, holdings, NAV refresh), so the API sees a database
+indistinguishable from one that grew organically.
+
+Every tenant's owner logs in as bench-<n>@bench.local / bench123.
+"""
+import random
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from backend.app.modules.auth.models import Tenant, User, UserRole
+from backend.app.modules.auth.security import get_password_hash
+from backend.app.modules.finance.models import (
+    Account, AccountType, Budget, Category, Frequency, Loan, LoanType, MutualFundHolding, MutualFundOrder,
+    MutualFundsMeta, RecurringTransaction, Transaction, TransactionType
+)
+from backend.app.modules.finance.services.mf_holdings import HoldingsEngine
+from backend.app.modules.finance.services.nav_refresh import NavRefreshService, parse_nav_history
+from backend.app.modules.finance.services.scheme_master import SchemeMaster
+from backend.app.modules.finance.services.transaction_search import TransactionSearch
+from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator
+from backend.benchmarks import mfapi_stub
+
+BATCH = 1000
+PASSWORD = "bench123"
+
+ACCOUNT_CYCLE = [AccountType.BANK, AccountType.CREDIT_CARD, AccountType.WALLET, AccountType.LOAN, AccountType.BANK,
+                 AccountType.CREDIT_CARD]
+EXPENSE_CATEGORIES = {
+    "Food": ["Swiggy", "Zomato", "Dominos", "Starbucks", "Haldiram's"],
+    "Groceries": ["BigBasket", "Blinkit", "DMart", "Zepto", "Reliance Fresh"],
+    "Transport": ["Uber", "Ola", "Indian Oil", "HP Petrol", "Rapido"],
+    "Shopping": ["Amazon", "Flipkart", "Myntra", "Decathlon", "Croma"],
+    "Utilities": ["BESCOM", "Airtel", "Jio", "Tata Play", "ACT Fibernet"],
+    "Entertainment": ["Netflix", "BookMyShow", "Spotify", "PVR", "Hotstar"],
+    "Health": ["Apollo Pharmacy", "1mg", "Practo", "Cult Fit", "Manipal Hospital"],
+}
+INCOME_CATEGORIES = ["Salary", "Interest"]
+TRANSFER_CATEGORY = "Transfers"
+SUBSCRIPTIONS = [("Netflix", 649, "Entertainment"), ("Spotify", 119, "Entertainment"), ("Airtel Postpaid", 999, "Utilities"),
+                 ("Cult Fit", 1500, "Health"), ("ACT Fibernet", 1180, "Utilities")]
+
+
+@dataclass
+class ScaleSpec:
+    tenants: int = 2
+    accounts: int = 4
+    years: float = 1.0
+    txns_per_day: float = 4.0
+    schemes: int = 200  # size of the stub's scheme master
+    funds_per_tenant: int = 6
+    seed: int = 42
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+@dataclass
+class SeededTenant:
+    tenant_id: str
+    user_id: str
+    email: str
+    account_ids: List[str] = field(default_factory=list)
+    bank_account_id: str = ""
+    holding_ids: List[str] = field(default_factory=list)
+
+
+# Parents before children (DuckDB checks foreign keys per statement)
+INSERT_ORDER = (MutualFundsMeta, Tenant, User, Account, Loan, Category, Budget, RecurringTransaction, Transaction,
+                MutualFundOrder)
+
+
+class _Batcher:
+    """Buffers rows per model and writes them as multi-row INSERTs, parents first."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.rows: Dict[type, List[dict]] = defaultdict(list)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def add(self, model, **values):
+        rows = self.rows[model]
+        rows.append(values)
+        if len(rows) >= BATCH:
+            self.flush()
+
+    def flush(self):
+        for model in INSERT_ORDER:
+            rows = self.rows.pop(model, [])
+            for i in range(0, len(rows), BATCH):
+                self.db.execute(insert(model).values(rows[i:i + BATCH]))
+            self.counts[model.__tablename__] += len(rows)
+
+
+def _stub_fetch(codes: List[str]) -> List[dict]:
+    return [row for row in (parse_nav_history(c, mfapi_stub.history(c)) for c in codes) if row]
+
+
+def _seed_tenant(out: _Batcher, rng: random.Random, spec: ScaleSpec, n: int, password_hash: str,
+                 start: datetime, end: datetime, now: datetime) -> SeededTenant:
+    tenant_id = str(uuid.uuid4())
+    owner = SeededTenant(tenant_id, str(uuid.uuid4()), f"bench-{n}@bench.local")
+    spouse_id = str(uuid.uuid4())
+    out.add(Tenant, id=tenant_id, name=f"Bench Family {n}", created_at=start)
+    out.add(User, id=owner.user_id, tenant_id=tenant_id, email=owner.email, password_hash=password_hash,
+            full_name=f"Bench Owner {n}", role=UserRole.OWNER)
+    out.add(User, id=spouse_id, tenant_id=tenant_id, email=f"bench-{n}-adult@bench.local", password_hash=password_hash,
+            full_name=f"Bench Adult {n}", role=UserRole.ADULT)
+
+    # Accounts (the first is always the salary bank account)
+    accounts = []
+    for i in range(max(spec.accounts, 1)):
+        acc_type = ACCOUNT_CYCLE[i % len(ACCOUNT_CYCLE)]
+        acc = {"id": str(uuid.uuid4()), "type": acc_type, "owner": owner.user_id if i % 3 else None,
+               "name": f"{acc_type.value.title().replace('_', ' ')} {i + 1}", "mask": f"XX{rng.randint(1000, 9999)}"}
+        accounts.append(acc)
+    bank = accounts[0]
+    owner.bank_account_id = bank["id"]
+    owner.account_ids = [a["id"] for a in accounts]
+    cards = [a for a in accounts if a["type"] == AccountType.CREDIT_CARD]
+    loans = [a for a in accounts if a["type"] == AccountType.LOAN]
+    spend_accounts = [a for a in accounts if a["type"] in (AccountType.BANK, AccountType.CREDIT_CARD, AccountType.WALLET)]
+
+    # Categories + budgets
+    category_ids = {}
+    for name in list(EXPENSE_CATEGORIES) + INCOME_CATEGORIES + [TRANSFER_CATEGORY]:
+        category_ids[name] = str(uuid.uuid4())
+        out.add(Category, id=category_ids[name], tenant_id=tenant_id, name=name,
+                type="income" if name in INCOME_CATEGORIES else "expense")
+    for name in EXPENSE_CATEGORIES:
+        out.add(Budget, id=str(uuid.uuid4()), tenant_id=tenant_id, category=name,
+                amount_limit=rng.choice([3000, 5000, 8000, 12000, 20000]))
+
+    loan_ids = {}
+    for acc in loans:
+        loan_ids[acc["id"]] = str(uuid.uuid4())
+        out.add(Loan, id=loan_ids[acc["id"]], tenant_id=tenant_id, account_id=acc["id"],
+                principal_amount=rng.choice([800000, 2500000, 5000000]), interest_rate=rng.choice([8.5, 9.1, 10.5]),
+                start_date=start, tenure_months=240, emi_amount=rng.choice([12000, 24000, 43391]), emi_date=5,
+                bank_account_id=bank["id"], loan_type=LoanType.HOME_LOAN)
+
+    # Transactions are held back until the accounts (whose balances they determine) are queued
+    balances = defaultdict(float)
+    txns = []
+
+    def txn(account, amount, when, description, category, recipient=None, **extra):
+        amount = round(amount, 2)
+        balances[account["id"]] += amount
+        values = dict(
+            id=extra.pop("id", None) or str(uuid.uuid4()), tenant_id=tenant_id, account_id=account["id"],
+            type=TransactionType.DEBIT if amount < 0 else TransactionType.CREDIT, amount=amount, date=when,
+            description=description, recipient=recipient, category=category, source=extra.pop("source", "SMS"),
+            content_hash=TransactionDeduplicator.generate_hash(tenant_id, account["id"], when, amount, description, recipient),
+            created_at=when, **extra
+        )
+        txns.append(values)
+        return values["id"]
+
+    salary = rng.choice([65000, 85000, 120000, 180000])
+    day = start
+    while day < end:
+        if day.day == 1:
+            txn(bank, salary, day.replace(hour=9), "SALARY CREDIT ACME CORP", "Salary", "ACME Corp")
+        if day.day == 5:
+            for acc in loans:
+                emi = -float(rng.choice([12000, 24000, 43391]))
+                txn(bank, emi, day.replace(hour=7), "EMI DEBIT HOME LOAN", TRANSFER_CATEGORY, "HDFC Home Loan",
+                    is_emi=True, loan_id=loan_ids[acc["id"]])
+        if day.day == 20:
+            for card in cards:
+                # Card bill: both legs of a linked transfer, excluded from spend
+                bill = round(rng.uniform(5000, 40000), 2)
+                debit_id, credit_id = str(uuid.uuid4()), str(uuid.uuid4())
+                txn(bank, -bill, day.replace(hour=11), "CREDIT CARD BILL PAYMENT", TRANSFER_CATEGORY, card["name"],
+                    id=debit_id, is_transfer=True, linked_transaction_id=credit_id)
+                txn(card, bill, day.replace(hour=11), "PAYMENT RECEIVED THANK YOU", TRANSFER_CATEGORY, None,
+                    id=credit_id, is_transfer=True, linked_transaction_id=debit_id)
+        count = int(spec.txns_per_day) + (1 if rng.random() < spec.txns_per_day % 1 else 0)
+        for _ in range(count):
+            category = rng.choice(list(EXPENSE_CATEGORIES))
+            merchant = rng.choice(EXPENSE_CATEGORIES[category])
+            when = day.replace(hour=rng.randint(7, 22), minute=rng.randint(0, 59), second=rng.randint(0, 59))
+            amount = -round(rng.lognormvariate(6.2, 1.0), 2)
+            txn(rng.choice(spend_accounts), max(amount, -150000.0), when, f"UPI/{merchant.upper()}/{rng.randint(10**8, 10**9)}",
+                category, merchant)
+        day += timedelta(days=1)
+
+    for acc in accounts:
+        balance = balances[acc["id"]]
+        out.add(Account, id=acc["id"], tenant_id=tenant_id, owner_id=acc["owner"], name=acc["name"], type=acc["type"],
+                account_mask=acc["mask"], balance=round(-balance if acc["type"] == AccountType.CREDIT_CARD else balance, 2),
+                credit_limit=200000 if acc["type"] == AccountType.CREDIT_CARD else None, created_at=start)
+    for values in txns:
+        out.add(Transaction, **values)
+
+    for name, amount, category in SUBSCRIPTIONS:
+        next_run = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=rng.randint(1, 28))
+        out.add(RecurringTransaction, id=str(uuid.uuid4()), tenant_id=tenant_id, name=name, amount=amount,
+                type=TransactionType.DEBIT, category=category, account_id=rng.choice(spend_accounts)["id"],
+                frequency=Frequency.MONTHLY, start_date=start, next_run_date=next_run)
+
+    # Monthly SIPs, priced at the stub's NAV on the order date
+    codes = mfapi_stub.scheme_codes(spec.schemes)
+    for code in rng.sample(codes, min(spec.funds_per_tenant, len(codes))):
+        user_id = rng.choice([owner.user_id, spouse_id])
+        folio = f"{rng.randint(10**7, 10**8)}/{rng.randint(10, 99)}"
+        sip = rng.choice([1000, 2500, 5000, 10000])
+        sip_day = start.replace(day=rng.randint(1, 28))
+        while sip_day < end:
+            nav = mfapi_stub.nav_on(code, sip_day.date())
+            out.add(MutualFundOrder, id=str(uuid.uuid4()), tenant_id=tenant_id, user_id=user_id, scheme_code=code,
+                    folio_number=folio, type="BUY", amount=sip, units=round(sip / nav, 4), nav=nav, order_date=sip_day,
+                    status="COMPLETED", import_source="CAS_PDF", created_at=sip_day)
+            sip_day = (sip_day.replace(day=1) + timedelta(days=32)).replace(day=sip_day.day)
+    return owner
+
+
+def seed(db: Session, spec: ScaleSpec) -> dict:
+    """Seeds `spec` into an empty database. Returns per-phase timings, row counts and the tenants."""
+    rng = random.Random(spec.seed)
+    timings = {}
+    now = datetime.combine(date.today(), datetime.min.time())
+    end = now - timedelta(days=1)
+    start = (end - timedelta(days=int(365 * spec.years))).replace(day=1)
+    password_hash = get_password_hash(PASSWORD)  # bcrypt once; every bench user shares it
+
+    started = time.perf_counter()
+    SchemeMaster.refresh(db, fetch=lambda: [
+        {k: s[k] for k in ("schemeCode", "schemeName", "isinGrowth", "isinDivReinvestment")}
+        for s in map(mfapi_stub.scheme, mfapi_stub.scheme_codes(spec.schemes))
+    ])
+    out = _Batcher(db)
+    for code in mfapi_stub.scheme_codes(spec.schemes):
+        s = mfapi_stub.scheme(code)
+        out.add(MutualFundsMeta, scheme_code=code, scheme_name=s["schemeName"], isin_growth=s["isinGrowth"],
+                isin_reinvest=s["isinDivReinvestment"], fund_house=s["fundHouse"], category=s["schemeCategory"])
+    out.flush()
+    timings["scheme_master_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    tenants = []
+    for n in range(spec.tenants):
+        tenants.append(_seed_tenant(out, rng, spec, n, password_hash, start, end, now))
+    out.flush()
+    db.commit()
+    timings["rows_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for tenant in tenants:
+        TransactionSearch.rebuild(db, tenant.tenant_id)
+    timings["search_index_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for tenant in tenants:
+        HoldingsEngine.rebuild(db, tenant.tenant_id)
+    db.commit()
+    NavRefreshService.refresh(db, fetch=_stub_fetch)
+    for tenant in tenants:
+        tenant.holding_ids = [h for (h,) in db.query(MutualFundHolding.id).filter(MutualFundHolding.tenant_id == tenant.tenant_id)]
+    timings["holdings_s"] = time.perf_counter() - started
+
+    return {
+        "spec": spec.as_dict(),
+        "rows": dict(out.counts),
+        "timings_s": {k: round(v, 3) for k, v in timings.items()},
+        "tenants": tenants,
+    }
@@ -113,6 +113,25 @@ CREATE TABLE transactions (
 CREATE INDEX ix_transactions_query ON transactions (tenant_id, account_id, date);
 CREATE INDEX ix_transactions_category ON transactions (tenant_id, category);
 
+-- Transaction search index (token inverted index + vocabulary trigrams)
+CREATE TABLE transaction_search_tokens (
+	tenant_id VARCHAR NOT NULL, 
+	token VARCHAR NOT NULL, 
+	transaction_id VARCHAR NOT NULL
+);
+
+CREATE TABLE transaction_search_vocab (
+	tenant_id VARCHAR NOT NULL, 
+	token VARCHAR NOT NULL, 
+	gram VARCHAR NOT NULL
+);
+
+CREATE TABLE transaction_search_state (
+	tenant_id VARCHAR NOT NULL, 
+	built_at TIMESTAMP WITHOUT TIME ZONE, 
+	PRIMARY KEY (tenant_id)
+);
+
 -- Expense Groups
 CREATE TABLE expense_groups (
 	id VARCHAR NOT NULL, 
@@ -190,6 +209,24 @@ CREATE TABLE mutual_funds_meta (
 	PRIMARY KEY (scheme_code)
 );
 
+CREATE TABLE mutual_fund_schemes (
+	scheme_code VARCHAR NOT NULL, 
+	scheme_name VARCHAR NOT NULL, 
+	isin_growth VARCHAR, 
+	isin_reinvest VARCHAR, 
+	updated_at TIMESTAMP WITHOUT TIME ZONE, 
+	PRIMARY KEY (scheme_code)
+);
+
+CREATE TABLE mutual_fund_navs (
+	scheme_code VARCHAR NOT NULL, 
+	nav NUMERIC(15, 4) NOT NULL, 
+	nav_date TIMESTAMP WITHOUT TIME ZONE, 
+	sparkline VARCHAR, 
+	refreshed_at TIMESTAMP WITHOUT TIME ZONE, 
+	PRIMARY KEY (scheme_code)
+);
+
 
 CREATE TABLE investment_goals (
 	id VARCHAR NOT NULL, 
@@ -0,0 +1,35 @@
+"""
+Backend tests run against a throwaway DuckDB: the URL is set before any backend module
+reads settings, and importing the app creates the schema (create_all + migrations).
+"""
+import os
+import tempfile
+import uuid
+
+import pytest
+
+os.environ["APP_DATABASE_URL"] = "duckdb:///" + os.path.join(tempfile.mkdtemp(prefix="backend-tests-"), "test.duckdb")
+os.environ.setdefault("METRICS_ENABLED", "false")
+
+from backend.app.main import app  # noqa: E402,F401  (registers models, creates tables)
+from backend.app.core.database import SessionLocal  # noqa: E402
+from backend.app.modules.auth.models import Tenant  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def tenant_id(db) -> str:
+    """A fresh tenant per test, so tests never see each other's rows."""
+    tenant = Tenant(id=str(uuid.uuid4()), name="test")
+    db.add(tenant)
+    db.commit()
+    return tenant.id
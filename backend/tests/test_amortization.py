@@ -0,0 +1,39 @@
+"""
+build_schedule: due dates and strategy validation.
+"""
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from backend.app.modules.finance.schemas import LoanScenario
+from backend.app.modules.finance.utils.amortization import REDUCE_EMI, _add_months, build_schedule, standard_emi
+
+
+def test_month_end_dates_stay_anchored():
+    start = datetime(2024, 1, 31)
+    assert [_add_months(start, i).date().isoformat() for i in range(4)] == [
+        "2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"
+    ]
+
+
+def test_schedule_pays_off():
+    emi = standard_emi(100000, 12, 12)
+    schedule = build_schedule(100000.0, 12.0, datetime(2024, 1, 31), 12, emi)
+    assert len(schedule) == 12
+    assert schedule.closing_balance[-1] == 0
+    assert schedule.due_dates[2] == datetime(2024, 3, 31)
+
+
+def test_reduce_emi_keeps_tenure():
+    emi = standard_emi(100000, 12, 12)
+    schedule = build_schedule(100000.0, 12.0, datetime(2024, 1, 1), 12, emi, prepayments=((3, 20000.0),), strategy=REDUCE_EMI)
+    assert len(schedule) == 12
+    assert schedule.emi[4] < schedule.emi[0]
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError, match="Unknown strategy"):
+        build_schedule(100000.0, 12.0, datetime(2024, 1, 1), 12, 8884.88, strategy="REDUCE_BOTH")
+    with pytest.raises(ValidationError):
+        LoanScenario(strategy="REDUCE_BOTH")
@@ -0,0 +1,116 @@
+"""
+Bulk triage approval must leave the same state as approving the same items one by one:
+transactions, account balances (including statement-balance overrides) and leftover triage rows.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from backend.app.modules.auth.models import Tenant
+from backend.app.modules.finance import models
+from backend.app.modules.finance.services.transaction_service import TransactionService
+from backend.app.modules.ingestion.deduplicator import TransactionDeduplicator
+from backend.app.modules.ingestion.models import PendingTransaction
+
+D1, D2, D3, D4 = (datetime(2024, 5, d, 10) for d in (1, 2, 3, 4))
+
+CONFIRMED = [
+    ("Bank", -50, D1, "Coffee", None, "123"),
+    ("Bank", -70, D2, None, None, "T2"),
+    ("Bank", -60, D2, "Groceries", "BigBazaar", "T3"),
+]
+
+# Triage rows outside the batch
+OUTSIDE = [
+    ("Bank", -1, D4, "Other", None, "555"),           # ref match for "555"
+    ("Bank", -35, D3, None, "Petrol Pump", "O2"),      # fields match for a NULL-description item
+    ("Bank", -30, D3, "Fuel", None, "O3"),             # must not match a NULL-description item
+    ("Bank", -60, D2, "Other", "DMart", "O4"),         # hash match for "Groceries"/"DMart"
+]
+
+# (account, amount, date, description, recipient, external_id, balance, credit_limit), in request order
+BATCH = [
+    ("Bank", -50, D1, "Coffee", None, "000123", None, None),       # confirmed ref
+    ("Bank", -70, D2, None, None, "P7", 900, None),                 # confirmed hash, statement balance
+    ("Bank", -20, D1, "Lunch", None, "P2", None, None),             # new
+    ("Bank", -50, D1, "Coffee", None, "P3", None, None),            # confirmed hash
+    ("Bank", -50, D1, "Coffee", None, "555", None, None),           # triage ref beats confirmed hash
+    ("Bank", -30, D3, None, None, "P5", None, None),                # new: "Fuel" is not a NULL description
+    ("Bank", -35, D3, None, None, "P5B", None, None),               # triage fields (description IS NULL)
+    ("Bank", -60, D2, "Groceries", "DMart", "P8", None, None),      # triage hash beats confirmed fields
+    ("Card", -100, D4, "Flight", None, "P6", 500, 1000),            # new, statement balance and limit
+]
+
+
+def _hash(tenant_id, account_id, amount, date, description, recipient):
+    return TransactionDeduplicator.generate_hash(tenant_id, account_id, date, Decimal(amount), description, recipient)
+
+
+def _scenario(db):
+    """A fresh tenant with the fixture rows; returns (tenant_id, batch ids in request order)."""
+    tenant = Tenant(id=str(uuid.uuid4()), name="bulk")
+    db.add(tenant)
+    db.flush()
+    accounts = {
+        "Bank": models.Account(tenant_id=tenant.id, name="Bank", type=models.AccountType.BANK, balance=1000),
+        "Card": models.Account(tenant_id=tenant.id, name="Card", type=models.AccountType.CREDIT_CARD, balance=200),
+    }
+    db.add_all(accounts.values())
+    db.flush()
+    for name, amount, date, description, recipient, ref in CONFIRMED:
+        account_id = accounts[name].id
+        db.add(models.Transaction(
+            tenant_id=tenant.id, account_id=account_id, amount=amount, date=date, description=description,
+            recipient=recipient, external_id=ref, category="Food",
+            content_hash=_hash(tenant.id, account_id, amount, date, description, recipient),
+        ))
+
+    def pending(name, amount, date, description, recipient, ref, balance=None, credit_limit=None):
+        account_id = accounts[name].id
+        row = PendingTransaction(
+            tenant_id=tenant.id, account_id=account_id, amount=amount, date=date, description=description,
+            recipient=recipient, external_id=ref, source="SMS", balance=balance, credit_limit=credit_limit,
+            content_hash=_hash(tenant.id, account_id, amount, date, description, recipient),
+        )
+        db.add(row)
+        return row
+
+    for row in OUTSIDE:
+        pending(*row)
+    batch = [pending(*row) for row in BATCH]
+    db.commit()
+    return tenant.id, [p.id for p in batch]
+
+
+def _state(db, tenant_id):
+    db.rollback()
+    accounts = {a.id: a for a in db.query(models.Account).filter(models.Account.tenant_id == tenant_id)}
+    transactions = sorted(
+        (accounts[t.account_id].name, t.amount, t.date, t.description, t.recipient, t.category, t.external_id)
+        for t in db.query(models.Transaction).filter(models.Transaction.tenant_id == tenant_id)
+    )
+    balances = sorted((a.name, a.balance, a.credit_limit) for a in accounts.values())
+    triage = sorted(
+        p.external_id for p in db.query(PendingTransaction).filter(PendingTransaction.tenant_id == tenant_id)
+    )
+    return {"transactions": transactions, "balances": balances, "triage": triage}
+
+
+def test_bulk_approve_matches_one_by_one_approval(db):
+    bulk_tenant, bulk_ids = _scenario(db)
+    results = TransactionService.bulk_approve_pending_transactions(db, bulk_ids, bulk_tenant)
+    assert [r["status"] for r in results] == [
+        "duplicate", "duplicate", "approved", "duplicate", "skipped", "approved", "skipped", "skipped", "approved",
+    ]
+
+    single_tenant, single_ids = _scenario(db)
+    for pending_id in single_ids:
+        try:
+            TransactionService.approve_pending_transaction(db, pending_id, single_tenant)
+        except ValueError:
+            db.rollback()  # triage duplicate: the item stays in triage
+
+    bulk, single = _state(db, bulk_tenant), _state(db, single_tenant)
+    assert bulk == single
+    assert bulk["triage"] == sorted(["555", "555", "O2", "O3", "O4", "P5B", "P8"])
+    assert bulk["balances"] == [("Bank", Decimal("850.00"), None), ("Card", Decimal("500.00"), Decimal("1000.00"))]
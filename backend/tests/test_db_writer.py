@@ -0,0 +1,171 @@
+"""
+DbWriter: group commit, failed-unit isolation, nesting and timeouts.
+
+Each test uses its own DbWriter; units insert Tenant rows so outcomes are visible in the DB.
+"""
+import threading
+import time
+import uuid
+
+import pytest
+
+from backend.app.core.config import settings
+from backend.app.core.database import SessionLocal
+from backend.app.core.db_writer import DbWriter, WriterTurnRevoked
+from backend.app.modules.auth.models import Tenant
+
+
+@pytest.fixture
+def writer():
+    w = DbWriter()
+    yield w
+    w.stop()
+
+
+def _insert(tenant_id):
+    return lambda s: s.add(Tenant(id=tenant_id, name="w")) or tenant_id
+
+
+def _exists(db, tenant_id) -> bool:
+    db.rollback()  # fresh snapshot
+    return db.get(Tenant, tenant_id) is not None
+
+
+class _Holder:
+    """Holds the writer from another thread so units pile up behind it."""
+
+    def __init__(self, writer: DbWriter):
+        self.entered, self.leave = threading.Event(), threading.Event()
+        self.thread = threading.Thread(target=self._hold, args=(writer,))
+
+    def _hold(self, writer):
+        with writer.exclusive():
+            self.entered.set()
+            self.leave.wait(10)
+
+    def __enter__(self):
+        self.thread.start()
+        assert self.entered.wait(10)
+        return self
+
+    def __exit__(self, *exc):
+        self.leave.set()
+        self.thread.join(10)
+
+
+def test_queued_units_share_one_commit(writer, db):
+    ids = [str(uuid.uuid4()) for _ in range(5)]
+    with _Holder(writer):
+        futures = [writer.run(_insert(i), wait=False) for i in ids]
+    assert [f.result(10) for f in futures] == ids
+    stats = writer.snapshot()
+    assert stats["units"] == 5 and stats["commits"] == 1
+    assert all(_exists(db, i) for i in ids)
+
+
+def test_failing_unit_fails_alone(writer, db):
+    good_a, good_b = str(uuid.uuid4()), str(uuid.uuid4())
+
+    def boom(session):
+        raise ValueError("bad unit")
+
+    with _Holder(writer):
+        futures = [writer.run(_insert(good_a), wait=False), writer.run(boom, wait=False),
+                   writer.run(_insert(good_b), wait=False)]
+    assert futures[0].result(10) == good_a
+    with pytest.raises(ValueError):
+        futures[1].result(10)
+    assert futures[2].result(10) == good_b
+    assert _exists(db, good_a) and _exists(db, good_b)
+    assert writer.snapshot()["failed_units"] == 1
+
+
+def test_nested_exclusive_and_run_do_not_deadlock(writer, db):
+    outer, inner, from_unit = (str(uuid.uuid4()) for _ in range(3))
+    with writer.exclusive():
+        with writer.exclusive():
+            assert writer.run(_insert(inner)) == inner
+        assert writer.run(_insert(outer)) == outer
+    # A unit that itself calls run() is already on the writer thread
+    writer.run(lambda s: writer.run(_insert(from_unit)))
+    assert _exists(db, outer) and _exists(db, inner) and _exists(db, from_unit)
+
+
+def test_timed_out_unit_is_dropped(writer, db, monkeypatch):
+    monkeypatch.setattr(settings, "DB_WRITER_TIMEOUT_SECONDS", 0.1)
+    late = str(uuid.uuid4())
+    with _Holder(writer):
+        with pytest.raises(TimeoutError):
+            writer.run(_insert(late))
+    after = str(uuid.uuid4())
+    monkeypatch.setattr(settings, "DB_WRITER_TIMEOUT_SECONDS", 10)
+    writer.run(_insert(after))
+    assert _exists(db, after)
+    assert not _exists(db, late)
+
+
+def test_exclusive_turn_times_out_and_is_skipped(writer, db, monkeypatch):
+    monkeypatch.setattr(settings, "DB_WRITER_TIMEOUT_SECONDS", 0.1)
+    with _Holder(writer):
+        with pytest.raises(TimeoutError):
+            with writer.exclusive():
+                pass
+    monkeypatch.setattr(settings, "DB_WRITER_TIMEOUT_SECONDS", 10)
+    after = str(uuid.uuid4())
+    assert writer.run(_insert(after)) == after
+
+
+def test_overlong_exclusive_block_is_revoked_not_interleaved(writer, db, monkeypatch):
+    monkeypatch.setattr(settings, "DB_WRITER_MAX_HOLD_SECONDS", 0.1)
+    late, queued = str(uuid.uuid4()), str(uuid.uuid4())
+    revoked, leave, errors = threading.Event(), threading.Event(), []
+
+    def hold():
+        session = SessionLocal()
+        try:
+            with writer.exclusive(session):
+                revoked.set()
+                leave.wait(10)
+                session.add(Tenant(id=late, name="w"))
+                for write in (session.commit, lambda: writer.run(_insert(str(uuid.uuid4())))):
+                    try:
+                        write()
+                    except WriterTurnRevoked as e:
+                        errors.append(e)
+        finally:
+            session.close()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    assert revoked.wait(10)
+    future = writer.run(_insert(queued), wait=False)
+    time.sleep(0.5)  # well past the hold deadline
+    # The writer still holds the turn: the queued unit has not run alongside the block
+    assert not future.done()
+    leave.set()
+    holder.join(10)
+    assert future.result(10) == queued
+    assert len(errors) == 2  # the commit and the inline run() were both refused
+    assert _exists(db, queued) and not _exists(db, late)
+
+
+def test_service_writes_wait_for_the_writer(db, tenant_id):
+    from backend.app.core.db_writer import db_writer
+    from backend.app.modules.finance.services.transaction_search import TransactionSearch
+
+    done = threading.Event()
+
+    def rebuild():
+        session = SessionLocal()
+        try:
+            TransactionSearch.rebuild(session, tenant_id)
+        finally:
+            session.close()
+            done.set()
+
+    with _Holder(db_writer):
+        thread = threading.Thread(target=rebuild)
+        thread.start()
+        assert not done.wait(0.3)  # queued behind the held turn
+    thread.join(10)
+    assert done.is_set()
@@ -0,0 +1,68 @@
+"""
+Metrics endpoints: off unless enabled, token-gated when a token is configured.
+"""
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from backend.app.core.config import settings
+from backend.app.core.instrumentation import install_instrumentation
+
+
+def _app(token=""):
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    @app.get("/finance/{item_id}")
+    def item(item_id: str):
+        return {"id": item_id}
+
+    @app.get("/files/{name:path}")
+    def file(name: str):
+        return {"name": name}
+
+    loans = APIRouter(prefix="/loans")
+
+    @loans.get("/{loan_id}")
+    def loan(loan_id: str):
+        return {"id": loan_id}
+
+    app.include_router(loans, prefix="/api/v1/finance")
+    install_instrumentation(app, create_engine("duckdb:///:memory:"), service="test", token=token)
+    return TestClient(app)
+
+
+def test_metrics_off_by_default():
+    assert type(settings).model_fields["METRICS_ENABLED"].default is False
+
+
+def test_metrics_open_without_token():
+    client = _app()
+    client.get("/ping")
+    body = client.get("/metrics").text
+    assert 'route="/ping"' in body
+
+
+def test_metrics_require_configured_token():
+    client = _app(token="s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics/debug", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_route_label_is_the_route_template():
+    client = _app()
+    # A param value that prefixes a static segment must not rewrite it
+    client.get("/finance/fin")
+    client.get("/files/a/b.txt")
+    client.get("/api/v1/finance/loans/fin")
+    client.get("/nope")
+    body = client.get("/metrics").text
+    assert 'route="/finance/{item_id}"' in body
+    assert 'route="/files/{name}"' in body
+    assert 'route="/api/v1/finance/loans/{loan_id}"' in body
+    assert 'route="unmatched"' in body
+    assert "{item_id}ance" not in body and "/nope" not in body
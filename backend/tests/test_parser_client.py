@@ -0,0 +1,113 @@
+"""
+ParserClient + CircuitBreaker: a half-open probe is always handed back, slots are shared by
+sync and async callers, and per-loop async clients are closed.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from backend.app.modules.ingestion import parser_client
+from backend.app.modules.ingestion.parser_client import CircuitBreaker, ParserClient, ParserUnavailable
+
+
+def _half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    return breaker
+
+
+def _client(handler, breaker, max_concurrency=2) -> ParserClient:
+    client = ParserClient("http://parser.test", max_concurrency=max_concurrency, breaker=breaker)
+    client._client = httpx.Client(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_probe_released_on_non_http_error():
+    breaker = _half_open_breaker()
+
+    def broken(request):
+        raise ValueError("bad payload")
+
+    client = _client(broken, breaker)
+    with pytest.raises(ValueError):
+        client.request("POST", "/v1/ingest/sms", "sms")
+    assert breaker.allow() == "probe"
+
+
+def test_slot_timeout_does_not_take_the_probe(monkeypatch):
+    monkeypatch.setattr(parser_client, "SLOT_WAIT_SECONDS", 0.05)
+    breaker = _half_open_breaker()
+    client = _client(lambda request: httpx.Response(200), breaker, max_concurrency=1)
+    client._slots.acquire()
+    with pytest.raises(ParserUnavailable):
+        client.request("POST", "/v1/ingest/sms", "sms")
+    client._slots.release()
+    assert client.request("POST", "/v1/ingest/sms", "sms").status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_cancelled_async_probe_is_released(monkeypatch):
+    breaker = _half_open_breaker()
+    started = asyncio.Event()
+
+    async def slow(request):
+        started.set()
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    client = ParserClient("http://parser.test", max_concurrency=2, breaker=breaker)
+
+    async def scenario():
+        async_client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(slow))
+        monkeypatch.setattr(client, "_async_client", lambda: async_client)
+        task = asyncio.create_task(client.arequest("POST", "/v1/ingest/sms", "sms"))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await async_client.aclose()
+
+    asyncio.run(scenario())
+    assert breaker.allow() == "probe"
+
+
+def test_open_circuit_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    client = _client(lambda request: httpx.Response(200), breaker)
+    with pytest.raises(ParserUnavailable):
+        client.request("POST", "/v1/ingest/sms", "sms")
+
+
+def test_async_callers_share_the_process_wide_slots(monkeypatch):
+    monkeypatch.setattr(parser_client, "SLOT_WAIT_SECONDS", 0.05)
+    client = ParserClient("http://parser.test", max_concurrency=1, breaker=CircuitBreaker())
+    client._slots.acquire()  # a sync call in flight
+    started = time.monotonic()
+    with pytest.raises(ParserUnavailable):
+        asyncio.run(client.arequest("POST", "/v1/ingest/file", "cas"))  # 120s read timeout
+    assert time.monotonic() - started < 1.0
+    client._slots.release()
+    client.close()
+
+
+def test_async_clients_are_closed_when_replaced_and_on_close():
+    client = ParserClient("http://parser.test", max_concurrency=2, breaker=CircuitBreaker())
+
+    async def current():
+        return client._async_client()
+
+    async def replace():
+        fresh = client._async_client()
+        await asyncio.sleep(0.01)  # let the retired client's aclose() run
+        return fresh
+
+    first = asyncio.run(current())
+    second = asyncio.run(replace())
+    assert second is not first and first.is_closed
+    assert len(client._async_clients) == 1
+    client.close()
+    assert second.is_closed and not client._async_clients
@@ -0,0 +1,43 @@
+"""
+SchemeMaster.get_index(): a failed first download must not pin an empty index.
+"""
+import pytest
+
+from backend.app.modules.finance.services import scheme_master
+from backend.app.modules.finance.services.scheme_master import SchemeMaster
+
+
+@pytest.fixture(autouse=True)
+def fresh_master(monkeypatch):
+    monkeypatch.setattr(SchemeMaster, "_index", None)
+    monkeypatch.setattr(SchemeMaster, "_retry_at", 0.0)
+    monkeypatch.setattr(SchemeMaster, "_retry_delay", scheme_master.EMPTY_RETRY_MIN_SECONDS)
+
+
+def test_failed_first_refresh_is_retried_after_backoff(monkeypatch):
+    calls = []
+
+    def offline(*args, **kwargs):
+        calls.append(1)
+        raise OSError("offline")
+
+    monkeypatch.setattr(scheme_master.httpx, "get", offline)
+    assert len(SchemeMaster.get_index()) == 0
+    assert SchemeMaster._index is None
+    assert SchemeMaster._retry_delay == 2 * scheme_master.EMPTY_RETRY_MIN_SECONDS
+
+    # Within the backoff window: no new download
+    assert len(SchemeMaster.get_index()) == 0
+    assert len(calls) == 1
+
+    class Response:
+        @staticmethod
+        def json():
+            return [{"schemeCode": 990001, "schemeName": "Test Liquid Fund - Growth",
+                     "isinGrowth": "INF000T01001", "isinDivReinvestment": None}]
+
+    monkeypatch.setattr(scheme_master.httpx, "get", lambda *a, **k: Response())
+    monkeypatch.setattr(SchemeMaster, "_retry_at", 0.0)
+    index = SchemeMaster.get_index()
+    assert index.get_by_code("990001")["schemeName"] == "Test Liquid Fund - Growth"
+    assert SchemeMaster._index is index
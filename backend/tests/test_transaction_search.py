@@ -0,0 +1,198 @@
+"""
+TransactionSearch: index-served filters must return exactly what the ILIKE scans return,
+and every write path must leave the index equal to a fresh rebuild.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete
+
+from backend.app.modules.auth.models import User
+from backend.app.modules.finance import models
+from backend.app.modules.finance.services import transaction_search
+from backend.app.modules.finance.services.transaction_search import TransactionSearch, _ilike
+from backend.app.modules.finance.services.transaction_service import TransactionService
+from backend.app.modules.ingestion.models import PendingTransaction
+
+TEXTS = [
+    ("UPI/123456/SWIGGY INSTAMART", "Swiggy"),
+    ("POS 4321 AMAZON.IN", "Amazon"),
+    ("NEFT-HDFC0001234-Rent", None),
+    ("Salary credit ACME Corp", "ACME"),
+    ("ATM WDL 1234", None),
+    ("swiggy dineout", "Swiggy"),
+    ("Zomato order 99", "zomato"),
+    ("a/c xx1234 debited", None),
+    ("Transfer to A/C 5678", "Self"),
+    ("SWIGGY*FOOD", None),
+    ("Amazon Pay India", "amazon pay"),
+    (None, "BigBasket"),
+]
+
+QUERIES = [
+    "wigg", "swi", "SWIGGY", "swiggy instamart", "instamart swiggy", "amazon.in", "amazon pay",
+    "a/c", "1234", "xx1234", "hdfc000", "upi/123", "gy", "y*f", "rent", "acme corp", "in",
+    "bigbasket", "zzz", "-", "swiggy 99",
+]
+
+
+@pytest.fixture
+def tenant(db, tenant_id):
+    """Accounts for the CHILD/user filters and 60 transactions over three accounts, index built."""
+    user = User(tenant_id=tenant_id, email=f"{uuid.uuid4()}@test", password_hash="x")
+    db.add(user)
+    db.flush()
+    accounts = [
+        models.Account(tenant_id=tenant_id, name="Shared Bank", type=models.AccountType.BANK),
+        models.Account(tenant_id=tenant_id, name="User Investments", type=models.AccountType.INVESTMENT, owner_id=user.id),
+        models.Account(tenant_id=tenant_id, name="Own Bank", type=models.AccountType.BANK, owner_id=user.id),
+    ]
+    db.add_all(accounts)
+    db.flush()
+    start = datetime(2024, 1, 1)
+    for i in range(60):
+        description, recipient = TEXTS[i % len(TEXTS)]
+        db.add(models.Transaction(
+            tenant_id=tenant_id, account_id=accounts[i % 3].id, amount=10 + i % 7,
+            # Repeated dates so pages have ties that only the id key breaks
+            date=start + timedelta(days=i // 4), description=description, recipient=recipient
+        ))
+    db.commit()
+    TransactionSearch.rebuild(db, tenant_id)
+    return {"id": tenant_id, "user_id": user.id}
+
+
+def _ids(query):
+    return {t.id for t in query}
+
+
+def _postings(db, tenant_id):
+    return set(db.query(models.TransactionSearchToken.token, models.TransactionSearchToken.transaction_id).filter(
+        models.TransactionSearchToken.tenant_id == tenant_id
+    ).all())
+
+
+def _assert_index_matches_rebuild(db, tenant_id):
+    db.commit()
+    maintained = _postings(db, tenant_id)
+    TransactionSearch.rebuild(db, tenant_id)
+    assert maintained == _postings(db, tenant_id)
+
+
+def _scan_only(monkeypatch):
+    monkeypatch.setattr(TransactionSearch, "_candidate_ids", staticmethod(lambda *a, **k: None))
+
+
+# --- Equivalence with ILIKE ---
+@pytest.mark.parametrize("phrase", QUERIES)
+def test_match_filter_equals_ilike(db, tenant, phrase):
+    base = db.query(models.Transaction).filter(models.Transaction.tenant_id == tenant["id"])
+    indexed = _ids(base.filter(TransactionSearch.match_filter(db, tenant["id"], [phrase])))
+    scanned = _ids(base.filter(_ilike(models.Transaction, [phrase])))
+    assert indexed == scanned
+
+
+def test_match_filter_or_of_phrases_equals_ilike(db, tenant):
+    phrases = ["swiggy", "zomato", "amazon.in"]
+    base = db.query(models.Transaction).filter(models.Transaction.tenant_id == tenant["id"])
+    assert _ids(base.filter(TransactionSearch.match_filter(db, tenant["id"], phrases))) == \
+        _ids(base.filter(_ilike(models.Transaction, phrases)))
+
+
+def test_selective_search_uses_the_index(db, tenant):
+    assert TransactionSearch.hits_entity(db, tenant["id"], "instamart") is not None
+    assert TransactionSearch.hits_entity(db, tenant["id"], "1234") is None  # digits: scan
+
+
+def _all_pages(db, tenant_id, **filters):
+    ids, cursor = [], None
+    while True:
+        items, cursor = TransactionService.get_transactions_page(db, tenant_id, cursor=cursor, limit=4, **filters)
+        ids.extend(t.id for t in items)
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize("scope", [{}, {"user_role": "CHILD"}, {"user_id": "owner"}, {"user_role": "CHILD", "user_id": "owner"}])
+@pytest.mark.parametrize("sort", [("date", "desc"), ("amount", "asc"), ("recipient", "desc")])
+@pytest.mark.parametrize("phrase", ["swiggy", "amazon", "wigg", "a/c", "1234"])
+def test_keyset_pages_equal_scan(db, tenant, monkeypatch, scope, sort, phrase):
+    filters = {k: (tenant["user_id"] if v == "owner" else v) for k, v in scope.items()}
+    filters.update(search=phrase, sort_by=sort[0], sort_order=sort[1])
+    indexed = _all_pages(db, tenant["id"], **filters)
+    with monkeypatch.context() as m:
+        _scan_only(m)
+        scanned = _all_pages(db, tenant["id"], **filters)
+    assert indexed == scanned
+    assert len(indexed) == len(set(indexed))
+
+
+def test_ranked_search_requires_every_term(db, tenant):
+    hits = TransactionSearch.search(db, tenant["id"], "swiggy instamart", limit=50)
+    assert hits and all("instamart" in (t.description or "").lower() for t in hits)
+
+
+# --- Maintenance ---
+def test_orm_writes_keep_index_in_sync(db, tenant):
+    account_id = db.query(models.Account.id).filter(models.Account.tenant_id == tenant["id"]).first()[0]
+    txn = models.Transaction(tenant_id=tenant["id"], account_id=account_id, amount=5, date=datetime(2024, 6, 1),
+                             description="Chaayos cafe", recipient="Chaayos")
+    db.add(txn)
+    db.commit()
+    assert [t.id for t in TransactionSearch.search(db, tenant["id"], "chaay")] == [txn.id]
+
+    txn.description = "Blue Tokai coffee"
+    txn.recipient = None
+    db.commit()
+    assert TransactionSearch.search(db, tenant["id"], "chaay") == []
+    assert [t.id for t in TransactionSearch.search(db, tenant["id"], "tokai")] == [txn.id]
+
+    db.delete(txn)
+    _assert_index_matches_rebuild(db, tenant["id"])
+
+
+def test_bulk_delete_drops_postings(db, tenant):
+    doomed = [t.id for t in TransactionSearch.search(db, tenant["id"], "swiggy", limit=100)]
+    assert doomed
+    TransactionService.bulk_delete_transactions(db, doomed, tenant["id"])
+    assert db.query(models.Transaction).filter(models.Transaction.id.in_(doomed)).count() == 0
+    _assert_index_matches_rebuild(db, tenant["id"])
+
+
+def test_core_delete_drops_postings(db, tenant):
+    db.execute(delete(models.Transaction).where(
+        models.Transaction.tenant_id == tenant["id"], models.Transaction.recipient == "Amazon"
+    ))
+    _assert_index_matches_rebuild(db, tenant["id"])
+
+
+def test_bulk_rename_reindexes(db, tenant):
+    expected = TransactionService.bulk_rename(db, "Swiggy", "Swiggy Genie", tenant["id"], preview=True)
+    assert expected and not TransactionSearch.search(db, tenant["id"], "genie", limit=100)
+    assert TransactionService.bulk_rename(db, "Swiggy", "Swiggy Genie", tenant["id"]) == expected
+    assert TransactionSearch.search(db, tenant["id"], "genie", limit=100)
+    _assert_index_matches_rebuild(db, tenant["id"])
+
+
+def test_bulk_approve_reindexes(db, tenant):
+    account_id = db.query(models.Account.id).filter(models.Account.tenant_id == tenant["id"]).first()[0]
+    pending = [
+        PendingTransaction(tenant_id=tenant["id"], account_id=account_id, amount=99 + i, date=datetime(2024, 7, 1 + i),
+                           description=f"Decathlon store {i}", recipient="Decathlon", source="SMS")
+        for i in range(3)
+    ]
+    db.add_all(pending)
+    db.commit()
+    results = TransactionService.bulk_approve_pending_transactions(db, [p.id for p in pending], tenant["id"])
+    assert {r["status"] for r in results} == {"approved"}
+    assert len(TransactionSearch.search(db, tenant["id"], "decath")) == 3
+    _assert_index_matches_rebuild(db, tenant["id"])
+
+
+def test_stale_postings_do_not_count_against_the_cap(db, tenant, monkeypatch):
+    monkeypatch.setattr(transaction_search, "MAX_CANDIDATES", 5)
+    swiggy = [t.id for t in TransactionSearch.search(db, tenant["id"], "swiggy", limit=100)]
+    assert len(swiggy) > 5 and TransactionSearch.candidates(db, tenant["id"], "swiggy") is None
+    TransactionService.bulk_delete_transactions(db, swiggy[:-2], tenant["id"])
+    assert len(TransactionSearch.candidates(db, tenant["id"], "swiggy")) == 2
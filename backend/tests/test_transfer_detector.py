@@ -0,0 +1,121 @@
+"""
+TransferMatcher precedence, and TransferMatcherCache invalidation: only matcher inputs, only
+the tenant, only at transaction end.
+"""
+import json
+import re
+import uuid
+
+import pytest
+
+from backend.app.modules.auth.models import Tenant
+from backend.app.modules.finance.models import Account, AccountType, CategoryRule
+from backend.app.modules.ingestion.transfer_detector import TransferMatcher, TransferMatcherCache
+
+
+@pytest.fixture
+def account(db, tenant_id):
+    acc = Account(tenant_id=tenant_id, name="HDFC Savings", type=AccountType.BANK, account_mask="XX1234")
+    db.add(acc)
+    db.commit()
+    return acc
+
+
+def _cached(tenant_id):
+    entry = TransferMatcherCache._entries.get(tenant_id)
+    return entry[1] if entry else None
+
+
+def test_balance_change_keeps_matcher(db, tenant_id, account):
+    matcher = TransferMatcherCache.get(db, tenant_id)
+    account.balance = 500
+    db.commit()
+    db.query(Account).filter(Account.id == account.id).update({"balance": 750})
+    db.commit()
+    assert _cached(tenant_id) is matcher
+
+
+def test_name_change_invalidates_at_commit(db, tenant_id, account):
+    TransferMatcherCache.get(db, tenant_id)
+    account.name = "Salary Account"
+    db.flush()
+    assert _cached(tenant_id) is not None  # not committed yet
+    db.commit()
+    assert _cached(tenant_id) is None
+    assert TransferMatcherCache.get(db, tenant_id).match("to salary account", None) == (True, account.id)
+
+
+def test_rollback_drops_matcher_built_from_uncommitted_rows(db, tenant_id, account):
+    account.account_mask = "XX9999"
+    db.flush()
+    assert TransferMatcherCache.get(db, tenant_id).match_mask("9999") == account.id
+    db.rollback()
+    assert _cached(tenant_id) is None
+    assert TransferMatcherCache.get(db, tenant_id).match_mask("9999") is None
+
+
+def test_only_the_changed_tenant_is_dropped(db, tenant_id, account):
+    other = Tenant(id=str(uuid.uuid4()), name="other")
+    db.add(other)
+    db.commit()
+    other_matcher = TransferMatcherCache.get(db, other.id)
+    TransferMatcherCache.get(db, tenant_id)
+
+    db.add(CategoryRule(tenant_id=tenant_id, name="Rent", category="Transfer",
+                        keywords=json.dumps(["landlord"]), is_transfer=True, to_account_id=account.id))
+    db.commit()
+    assert _cached(tenant_id) is None
+    assert _cached(other.id) is other_matcher
+
+
+def test_bulk_update_of_matcher_input_invalidates(db, tenant_id, account):
+    TransferMatcherCache.get(db, tenant_id)
+    db.query(Account).filter(Account.id == account.id).update({"name": "Renamed"})
+    assert _cached(tenant_id) is not None
+    db.commit()
+    assert _cached(tenant_id) is None
+
+
+def _sequential_detect(text, accounts, rules):
+    """The per-item checks TransferMatcher replaced: rules, then each account's mask and name."""
+    text = text.lower()
+    for rule in rules:
+        if rule.is_transfer and any(k.lower() in text for k in json.loads(rule.keywords)):
+            return True, rule.to_account_id
+    for acc in accounts:
+        if acc.account_mask:
+            mask = acc.account_mask.lower().replace("x", "").replace("*", "")
+            if len(mask) >= 4 and re.search(mask, text):
+                return True, acc.id
+        if len(acc.name) > 3 and acc.name.lower() in text:
+            return True, acc.id
+    return False, None
+
+
+def test_matcher_keeps_sequential_precedence():
+    accounts = [
+        Account(id="savings", name="Savings Main", account_mask="XX1111"),
+        Account(id="card", name="Travel Card", account_mask="XX5678"),
+        Account(id="wallet", name="Wallet", account_mask=None),
+    ]
+    rules = [
+        CategoryRule(keywords=json.dumps(["rent"]), is_transfer=True, to_account_id="wallet"),
+        CategoryRule(keywords=json.dumps(["landlord"]), is_transfer=True, to_account_id="card"),
+        CategoryRule(keywords=json.dumps(["savings"]), is_transfer=False, to_account_id="card"),
+    ]
+    matcher = TransferMatcher.build(accounts, rules)
+    cases = {
+        # An earlier account's name beats a later account's mask
+        "paid card xx5678 from savings main": (True, "savings"),
+        # Within one account the mask beats the name
+        "travel card bill 5678": (True, "card"),
+        "travel card 1111": (True, "savings"),
+        # Rules in list order, wherever their keyword sits in the text
+        "landlord rent": (True, "wallet"),
+        "landlord via savings main": (True, "card"),
+        "savings transfer": (False, None),
+        "upi to wallet": (True, "wallet"),
+        "grocery store": (False, None),
+    }
+    for text, expected in cases.items():
+        assert matcher.match(text, None) == expected == _sequential_detect(text, accounts, rules), text
@@ -0,0 +1 @@
+"""Code shared by the backend and the parser service (both ship in the same image)."""
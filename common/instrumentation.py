@@ -0,0 +1,309 @@
+"""
+Low-overhead request instrumentation shared by the backend and the parser service, so both
+export the same metric names. Service-specific metrics are plugged in with
+MetricsRegistry.add_collector (the backend's live in backend/app/core/instrumentation.py).
+
+- ASGI middleware: per-route latency histograms + optional `Server-Timing` header
+- SQLAlchemy cursor hooks: statement count / DB time per request, slow query capture
+- In-process ring buffers, exported as Prometheus text (`/metrics`) and JSON (`/metrics/debug`)
+
+Everything is in memory and bounded. The endpoints expose routes and SQL text, so they are
+off unless METRICS_ENABLED is set, and require `Authorization: Bearer <METRICS_TOKEN>` when a
+token is configured.
+"""
+import bisect
+import contextvars
+import hmac
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Prometheus-style latency buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _RequestStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+# Set by the middleware; sync handlers run in the threadpool with a copy of this context,
+# and since the value is a mutable holder, their DB hooks update the request's stats.
+_current_request: contextvars.ContextVar[Optional[_RequestStats]] = contextvars.ContextVar(
+    "instrumentation_request", default=None
+)
+_current_route: contextvars.ContextVar[str] = contextvars.ContextVar("instrumentation_route", default="-")
+
+
+class MetricsRegistry:
+    """Thread-safe counters, histograms and ring buffers for one service."""
+
+    def __init__(self, service: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 recent_size: int = 500, slow_query_size: int = 100, slow_query_ms: float = 200.0):
+        self.service = service
+        self.buckets = tuple(sorted(buckets))
+        self.slow_query_seconds = slow_query_ms / 1000.0
+        self._lock = threading.Lock()
+        # (method, route) -> [bucket counts..., +Inf], sum, count, queries, db_time, errors
+        self._routes: Dict[Tuple[str, str], dict] = {}
+        self._recent = deque(maxlen=recent_size)
+        self._slow_queries = deque(maxlen=slow_query_size)
+        self._slow_query_total = 0
+        self._statements_total = 0
+        self._db_time_total = 0.0
+        # name -> object with render_prometheus(service) -> lines and snapshot() -> dict
+        self._collectors: Dict[str, object] = {}
+
+    def add_collector(self, name: str, collector):
+        """Export another component's metrics (e.g. the DB writer) on the same endpoints."""
+        self._collectors[name] = collector
+
+    # --- Recording ---
+    def observe_request(self, method: str, route: str, status: int, duration: float, stats: _RequestStats):
+        idx = bisect.bisect_left(self.buckets, duration)
+        with self._lock:
+            entry = self._routes.get((method, route))
+            if entry is None:
+                entry = self._routes[(method, route)] = {
+                    "buckets": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0, "count": 0, "queries": 0, "db_time": 0.0, "errors": 0
+                }
+            entry["buckets"][idx] += 1
+            entry["sum"] += duration
+            entry["count"] += 1
+            entry["queries"] += stats.queries
+            entry["db_time"] += stats.db_time
+            if status >= 500:
+                entry["errors"] += 1
+            self._recent.append((time.time(), method, route, status, duration, stats.queries, stats.db_time))
+
+    def observe_query(self, statement: str, duration: float):
+        with self._lock:
+            self._statements_total += 1
+            self._db_time_total += duration
+            if duration >= self.slow_query_seconds:
+                self._slow_query_total += 1
+                self._slow_queries.append((time.time(), _current_route.get(), duration, statement[:500]))
+
+    # --- Export ---
+    def render_prometheus(self) -> str:
+        lines = []
+        svc = self.service
+        with self._lock:
+            routes = {k: {**v, "buckets": list(v["buckets"])} for k, v in self._routes.items()}
+            statements, db_time, slow = self._statements_total, self._db_time_total, self._slow_query_total
+
+        lines.append("# HELP http_request_duration_seconds Request latency by route.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), e in sorted(routes.items()):
+            labels = f'service="{svc}",method="{method}",route="{route}"'
+            cumulative = 0
+            for bound, n in zip(self.buckets, e["buckets"]):
+                cumulative += n
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {e["count"]}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {e["sum"]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {e["count"]}')
+
+        for name, key, help_text in (
+            ("http_request_db_statements_total", "queries", "SQL statements issued while serving the route."),
+            ("http_request_db_seconds_total", "db_time", "Time spent in SQL while serving the route."),
+            ("http_request_errors_total", "errors", "Responses with status >= 500."),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, route), e in sorted(routes.items()):
+                value = f'{e[key]:.6f}' if isinstance(e[key], float) else e[key]
+                lines.append(f'{name}{{service="{svc}",method="{method}",route="{route}"}} {value}')
+
+        lines.append("# TYPE db_statements_total counter")
+        lines.append(f'db_statements_total{{service="{svc}"}} {statements}')
+        lines.append("# TYPE db_seconds_total counter")
+        lines.append(f'db_seconds_total{{service="{svc}"}} {db_time:.6f}')
+        lines.append("# TYPE db_slow_queries_total counter")
+        lines.append(f'db_slow_queries_total{{service="{svc}"}} {slow}')
+        for collector in self._collectors.values():
+            lines.extend(collector.render_prometheus(svc))
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """JSON-friendly view: per-route aggregates with percentiles from the recent ring buffer."""
+        with self._lock:
+            recent = list(self._recent)
+            slow = list(self._slow_queries)
+            routes = {k: dict(v) for k, v in self._routes.items()}
+
+        durations: Dict[Tuple[str, str], List[float]] = {}
+        for _, method, route, _, duration, _, _ in recent:
+            durations.setdefault((method, route), []).append(duration)
+
+        def pct(values: List[float], q: float) -> Optional[float]:
+            if not values:
+                return None
+            values = sorted(values)
+            return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+
+        summary = []
+        for (method, route), e in sorted(routes.items(), key=lambda kv: -kv[1]["sum"]):
+            window = durations.get((method, route), [])
+            summary.append({
+                "method": method,
+                "route": route,
+                "count": e["count"],
+                "errors": e["errors"],
+                "avg_ms": round(e["sum"] / e["count"] * 1000, 2) if e["count"] else 0,
+                "p50_ms": pct(window, 0.50),
+                "p95_ms": pct(window, 0.95),
+                "p99_ms": pct(window, 0.99),
+                "avg_queries": round(e["queries"] / e["count"], 2) if e["count"] else 0,
+                "avg_db_ms": round(e["db_time"] / e["count"] * 1000, 2) if e["count"] else 0,
+            })
+
+        return {
+            "service": self.service,
+            "routes": summary,
+            "recent": [
+                {"at": at, "method": m, "route": r, "status": s, "duration_ms": round(d * 1000, 2),
+                 "queries": q, "db_ms": round(dbt * 1000, 2)}
+                for at, m, r, s, d, q, dbt in recent[-100:]
+            ],
+            "slow_queries": [
+                {"at": at, "route": r, "duration_ms": round(d * 1000, 2), "statement": stmt}
+                for at, r, d, stmt in slow
+            ],
+            **{name: collector.snapshot() for name, collector in self._collectors.items()},
+        }
+
+
+def _route_label(scope) -> str:
+    """
+    Route template for a served request, e.g. /api/v1/finance/loans/{loan_id}, taken from the
+    matched route rather than by rewriting the raw path. Newer FastAPI versions match an
+    included router's routes against the path after its prefix, so the prefix is recovered as
+    the part of the path in front of the route's own match (checked against path_params).
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"  # never the raw path: keeps label cardinality bounded
+    template = getattr(route, "path_format", None) or route.path
+    regex = getattr(route, "path_regex", None)
+    path = scope.get("path", "")
+    if regex is None:
+        return template
+    params = {name: str(value) for name, value in (scope.get("path_params") or {}).items()}
+    for start in (i for i, ch in enumerate(path) if ch == "/"):
+        match = regex.match(path[start:])
+        if match and all(params.get(name) == value for name, value in match.groupdict().items()):
+            return path[:start] + template
+    return template
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware (no BaseHTTPMiddleware overhead / body buffering)."""
+
+    def __init__(self, app, registry: MetricsRegistry, server_timing: bool = False, exclude_paths: Tuple[str, ...] = ()):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats()
+        stats_token = _current_request.set(stats)
+        route_token = _current_route.set(scope.get("path", "-"))
+        start = time.perf_counter()
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+                if self.server_timing:
+                    elapsed = (time.perf_counter() - start) * 1000
+                    value = f'app;dur={elapsed:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"'
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            self.registry.observe_request(scope.get("method", "-"), _route_label(scope), status_holder[0], duration, stats)
+            _current_request.reset(stats_token)
+            _current_route.reset(route_token)
+
+
+def instrument_engine(engine: Engine, registry: MetricsRegistry):
+    """Count statements and DB time; attributed to the active request when there is one."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_instr_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("_instr_start")
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        stats = _current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += duration
+        registry.observe_query(statement, duration)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("_instr_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+def _require_token(token: Optional[str]):
+    def check(request: Request):
+        if token and not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+            raise HTTPException(status_code=401, detail="Metrics token required")
+    return check
+
+
+def metrics_router(registry: MetricsRegistry, prefix: str = "", token: Optional[str] = None) -> APIRouter:
+    router = APIRouter(prefix=prefix, tags=["Metrics"], dependencies=[Depends(_require_token(token))])
+
+    @router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    def prometheus_metrics():
+        return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    @router.get("/metrics/debug", include_in_schema=False)
+    def metrics_debug():
+        return registry.snapshot()
+
+    return router
+
+
+def install_instrumentation(app, engine: Engine, service: str, server_timing: bool = False,
+                            slow_query_ms: float = 200.0, prefix: str = "", token: Optional[str] = None) -> MetricsRegistry:
+    """Wire middleware, engine hooks and the metrics endpoints into a FastAPI app."""
+    registry = MetricsRegistry(service, slow_query_ms=slow_query_ms)
+    instrument_engine(engine, registry)
+    app.add_middleware(
+        InstrumentationMiddleware,
+        registry=registry,
+        server_timing=server_timing,
+        exclude_paths=(f"{prefix}/metrics", f"{prefix}/metrics/debug"),
+    )
+    app.include_router(metrics_router(registry, prefix=prefix, token=token))
+    return registry
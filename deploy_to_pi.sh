@@ -29,6 +29,7 @@ mkdir -p $STAGING_DIR
 cp -r backend $STAGING_DIR/
 cp -r frontend $STAGING_DIR/
 cp -r parser $STAGING_DIR/
+cp -r common $STAGING_DIR/
 cp -r scripts $STAGING_DIR/
 cp Dockerfile $STAGING_DIR/
 cp docker-compose.yml $STAGING_DIR/
@@ -131,6 +131,12 @@ export const financeApi = {
     parseCsv: (formData: FormData) => apiClient.post('/ingestion/csv/parse', formData, {
         headers: { 'Content-Type': 'multipart/form-data' }
     }),
+    submitImportJob: (formData: FormData) => apiClient.post('/ingestion/csv/jobs', formData, {
+        headers: { 'Content-Type': 'multipart/form-data' }
+    }),
+    getImportJob: (jobId: string) => apiClient.get(`/ingestion/csv/jobs/${jobId}`),
+    getImportJobResults: (jobId: string, after: number = -1, limit: number = 500) =>
+        apiClient.get(`/ingestion/csv/jobs/${jobId}/results`, { params: { after, limit } }),
     importCsv: (data: any) => apiClient.post('/ingestion/csv/import', data),
 
     // Email Automations
@@ -149,6 +155,7 @@ export const financeApi = {
     getTriage: (params?: { limit?: number, skip?: number, sort_by?: string, sort_order?: string }) => apiClient.get('/ingestion/triage', { params }),
     approveTriage: (id: string, data: { category?: string, is_transfer?: boolean, to_account_id?: string, create_rule?: boolean, exclude_from_reports?: boolean }) => apiClient.post(`/ingestion/triage/${id}/approve`, data),
     rejectTriage: (id: string, createIgnoreRule: boolean = false) => apiClient.delete(`/ingestion/triage/${id}`, { params: { create_ignore_rule: createIgnoreRule } }),
+    bulkApproveTriage: (ids: string[], data: { category?: string, exclude_from_reports?: boolean } = {}) => apiClient.post('/ingestion/triage/bulk-approve', { pending_ids: ids, ...data }),
     bulkRejectTriage: (ids: string[], createIgnoreRules: boolean = false) => apiClient.post('/ingestion/triage/bulk-reject', { pending_ids: ids, create_ignore_rules: createIgnoreRules }),
     getTraining: (params?: { limit?: number, skip?: number }) => apiClient.get('/ingestion/training', { params }),
     labelMessage: (id: string, data: any) => apiClient.post(`/ingestion/training/${id}/label`, data),
@@ -21,6 +21,7 @@ class _TransactionListScreenState extends State<TransactionListScreen> {
   bool _isLoading = false;
   bool _hasMore = true;
   int _page = 1;
+  String? _cursor;
   final ScrollController _scrollController = ScrollController();
 
   @override
@@ -50,6 +51,7 @@ class _TransactionListScreenState extends State<TransactionListScreen> {
     final url = Uri.parse('${config.backendUrl}/api/v1/mobile/transactions').replace(queryParameters: {
       'page': _page.toString(),
       'page_size': '20',
+      if (_cursor != null) 'cursor': _cursor!,
     });
 
     try {
@@ -68,6 +70,7 @@ class _TransactionListScreenState extends State<TransactionListScreen> {
         setState(() {
           _transactions.addAll(newItems);
           _page++;
+          _cursor = data['next_cursor'];
           _hasMore = nextPage != null;
         });
       }
@@ -173,6 +176,7 @@ class _TransactionListScreenState extends State<TransactionListScreen> {
        if (updated == true) {
          setState(() {
             _page = 1;
+            _cursor = null;
             _transactions.clear();
             _hasMore = true;
          });
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, Header, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any, List
 from pydantic import BaseModel
 import json
 import hashlib
+import time
 
 from parser.db.database import get_db
 from parser.core.pipeline import IngestionPipeline
+from parser.core.executor import run_cpu, run_db, Overloaded, JobTimeout, PoolUnavailable
+from parser.core.import_jobs import ACTIVE_STATUSES, ImportJobService, file_item, job_progress
+from parser.core.request_log import RequestLogWriter
 from parser.schemas.transaction import IngestionResult, ParsedItem, TransactionMeta
 from parser.parsers.bank.hdfc import HdfcSmsParser, HdfcEmailParser
 from parser.parsers.bank.icici import IciciSmsParser, IciciEmailParser
@@ -122,6 +127,38 @@ def ingest_email(
     result = pipeline.run(payload.body_text, "EMAIL", sender=payload.sender, subject=payload.subject, date_hint=payload.received_at)
     return result
 
+def _saved_mapping(db: Session, account_fingerprint: Optional[str]):
+    if not account_fingerprint:
+        return None
+    saved = db.query(FileParsingConfig).filter(FileParsingConfig.fingerprint == account_fingerprint).first()
+    return (saved.columns_json, saved.header_row_index) if saved else None
+
+def _log_request(db: Session, **fields):
+    db.add(RequestLogWriter.new(**fields))
+    db.commit()
+
+def _file_output(db: Session, file_hash: str, filename: str, raw_txns: List[dict], skipped_logs: List[str],
+                 started: Optional[float] = None) -> IngestionResult:
+    pipeline = IngestionPipeline(db)
+    results = [file_item(pipeline, t_dict) for t_dict in raw_txns]
+
+    # Log once for the entire file
+    output = IngestionResult(
+        status="success" if results else "failed", 
+        results=results, 
+        logs=skipped_logs
+    )
+    _log_request(
+        db,
+        input_hash=file_hash,
+        source="FILE",
+        status=output.status,
+        input_payload={"filename": filename, "op": "parse"},
+        output_payload=output.model_dump(mode='json'),
+        started=started
+    )
+    return output
+
 @router.post("/file", response_model=IngestionResult)
 async def ingest_file(
     file: UploadFile = File(...),
@@ -131,22 +168,23 @@ async def ingest_file(
     password: Optional[str] = Form(None),
     db: Session = Depends(get_db)
 ):
-    
-    
+    """
+    pandas parsing runs in the parse process pool and DB work in the DB thread pool, so a large
+    statement never blocks the event loop. Saturated pools answer 429, slow jobs 504.
+    """
+    started = time.perf_counter()
     content = await file.read()
     file_hash = hashlib.sha256(content).hexdigest()
     filename = file.filename
-    from parser.db.models import RequestLog
     
     mapping = {}
     header_idx = header_row_index or 0
     
-    if account_fingerprint:
-        saved = db.query(FileParsingConfig).filter(FileParsingConfig.fingerprint == account_fingerprint).first()
-        if saved:
-            mapping = saved.columns_json
-            if header_row_index is None:
-                header_idx = saved.header_row_index
+    saved = await run_db(_saved_mapping, db, account_fingerprint)
+    if saved:
+        mapping = saved[0]
+        if header_row_index is None:
+            header_idx = saved[1]
             
     if mapping_override:
         try:
@@ -155,130 +193,224 @@ async def ingest_file(
 
     if not mapping:
         try:
-            analysis = UniversalParser.analyze(content, filename)
-            db.add(RequestLog(
-                input_hash=file_hash, 
-                source="FILE", 
-                input_payload={"filename": filename, "op": "analyze"},
-                status="success",
-                output_payload={"status": "analysis_required", "analysis": analysis}
-            ))
-            db.commit()
-            return IngestionResult(status="analysis_required", results=[], logs=["No mapping found. Analysis: " + json.dumps(analysis, default=str)])
+            analysis = await run_cpu(UniversalParser.analyze, content, filename)
+        except (Overloaded, JobTimeout, PoolUnavailable):
+            raise
         except Exception as e:
-            db.add(RequestLog(
+            await run_db(
+                _log_request, db,
                 input_hash=file_hash, 
                 source="FILE", 
                 status="failed",
                 input_payload={"filename": filename, "op": "analyze"},
-                output_payload={"error": str(e)}
-            ))
-            db.commit()
+                output_payload={"error": str(e)},
+                started=started
+            )
             return IngestionResult(status="failed", results=[], logs=[str(e)])
+        await run_db(
+            _log_request, db,
+            input_hash=file_hash, 
+            source="FILE", 
+            input_payload={"filename": filename, "op": "analyze"},
+            status="success",
+            output_payload={"status": "analysis_required", "analysis": analysis},
+            started=started
+        )
+        return IngestionResult(status="analysis_required", results=[], logs=["No mapping found. Analysis: " + json.dumps(analysis, default=str)])
 
     try:
-        raw_txns, skipped_logs = UniversalParser.parse(content, filename, mapping, header_idx, password=password)
-        pipeline = IngestionPipeline(db)
-        results = []
-        
-        for t_dict in raw_txns:
-            t = pipeline._convert_to_schema_txn(t_dict)
-            item = ParsedItem(
-                status="extracted",
-                transaction=t,
-                metadata=TransactionMeta(
-                    confidence=1.0, 
-                    parser_used="UniversalParser", 
-                    source_original="FILE",
-                    units=t_dict.get("units"),
-                    nav=t_dict.get("nav")
-                )
-            )
-            results.append(item)
-
-        # Log once for the entire file
-        output = IngestionResult(
-            status="success" if results else "failed", 
-            results=results, 
-            logs=skipped_logs
-        )
-        
-        db.add(RequestLog(
-            input_hash=file_hash,
-            source="FILE",
-            status=output.status,
-            input_payload={"filename": filename, "op": "parse"},
-            output_payload=output.model_dump(mode='json')
-        ))
-        
-        db.commit()
-        return output
+        raw_txns, skipped_logs = await run_cpu(UniversalParser.parse, content, filename, mapping, header_idx, password=password)
+        return await run_db(_file_output, db, file_hash, filename, raw_txns, skipped_logs, started)
+    except (Overloaded, JobTimeout, PoolUnavailable):
+        raise
     except Exception as e:
-        db.add(RequestLog(
+        await run_db(
+            _log_request, db,
             input_hash=file_hash,
             source="FILE",
             status="failed",
             input_payload={"filename": filename, "op": "parse"},
-            output_payload={"error": str(e)}
-        ))
-        db.commit()
+            output_payload={"error": str(e)},
+            started=started
+        )
         return IngestionResult(status="failed", results=[], logs=[str(e)])
 
+# --- Background import jobs ---
+
+@router.post("/file/jobs")
+async def submit_file_job(
+    file: UploadFile = File(...),
+    account_fingerprint: Optional[str] = Form(None),
+    mapping_override: Optional[str] = Form(None),
+    header_row_index: Optional[int] = Form(None),
+    scope: Optional[str] = Form(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a statement for chunked background parsing and return its job id immediately.
+    Resubmitting the same file with the same mapping returns the existing job (deduplicated=true).
+    Run /file without a mapping first to get the header analysis.
+    """
+    content = await file.read()
+
+    mapping = {}
+    header_idx = header_row_index or 0
+    saved = await run_db(_saved_mapping, db, account_fingerprint)
+    if saved:
+        mapping = saved[0]
+        if header_row_index is None:
+            header_idx = saved[1]
+    if mapping_override:
+        try:
+            mapping = json.loads(mapping_override)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="mapping_override is not valid JSON")
+    if not mapping:
+        raise HTTPException(status_code=400, detail="A column mapping is required for import jobs")
+
+    job, deduplicated = await run_db(ImportJobService.submit, db, content, file.filename, mapping, header_idx, scope)
+    ImportJobService.start(job.id)
+    return {**job_progress(job), "deduplicated": deduplicated}
+
+@router.get("/file/jobs/{job_id}")
+def get_file_job(job_id: str, scope: Optional[str] = None, db: Session = Depends(get_db)):
+    job = ImportJobService.get(db, job_id, scope)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job_progress(job)
+
+@router.get("/file/jobs/{job_id}/results")
+def get_file_job_results(
+    job_id: str,
+    after: int = -1,
+    limit: int = 500,
+    kind: str = "item",
+    scope: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Page through a job's output in order: kind=item returns ParsedItems, kind=skip the skipped-row
+    messages. Pass next_after back as `after` until it is null; while the job runs it stays set
+    (an empty page repeats `after`) and rows appear as chunks finish.
+    """
+    job = ImportJobService.get(db, job_id, scope)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    items, next_after = ImportJobService.results(
+        db, job_id, after=after, limit=min(limit, 5000), kind=kind, finished=job.status not in ACTIVE_STATUSES
+    )
+    return {"job_id": job_id, "status": job.status, "items": items, "next_after": next_after}
+
+def _cas_item(pipeline: IngestionPipeline, t_dict: Dict[str, Any]) -> ParsedItem:
+    return ParsedItem(
+        status="extracted",
+        transaction=pipeline._convert_to_schema_txn(t_dict),
+        metadata=TransactionMeta(
+            confidence=1.0, 
+            parser_used="CasParser", 
+            source_original="CAS",
+            units=t_dict.get("units"),
+            nav=t_dict.get("nav"),
+            amfi=t_dict.get("amfi"),
+            isin=t_dict.get("isin")
+        )
+    )
+
+def _cas_output(db: Session, file_hash: str, filename: str, data: List[Dict[str, Any]],
+                started: Optional[float] = None) -> IngestionResult:
+    pipeline = IngestionPipeline(db)
+    results = [_cas_item(pipeline, t_dict) for t_dict in data]
+        
+    output = IngestionResult(
+        status="success" if results else "failed",
+        results=results,
+        logs=[]
+    )
+    _log_request(
+        db,
+        input_hash=file_hash,
+        source="CAS",
+        status=output.status,
+        input_payload={"filename": filename},
+        output_payload=output.model_dump(mode='json'),
+        started=started
+    )
+    return output
+
 @router.post("/cas", response_model=IngestionResult)
 async def ingest_cas(
     file: UploadFile = File(...),
     password: str = Form(...),
     db: Session = Depends(get_db)
 ):
+    started = time.perf_counter()
     content = await file.read()
     file_hash = hashlib.sha256(content).hexdigest()
-    from parser.db.models import RequestLog
     
     try:
-        data = CasParser.parse(content, password)
-        pipeline = IngestionPipeline(db)
-        results = []
-        
-        for t_dict in data:
-            t = pipeline._convert_to_schema_txn(t_dict)
-            item = ParsedItem(
-                status="extracted",
-                transaction=t,
-                metadata=TransactionMeta(
-                    confidence=1.0, 
-                    parser_used="CasParser", 
-                    source_original="CAS",
-                    units=t_dict.get("units"),
-                    nav=t_dict.get("nav"),
-                    amfi=t_dict.get("amfi"),
-                    isin=t_dict.get("isin")
-                )
-            )
-            results.append(item)
-            
-        output = IngestionResult(
-            status="success" if results else "failed",
-            results=results,
-            logs=[]
-        )
-        
-        db.add(RequestLog(
+        data = await CasParser.parse_async(content, password)
+        return await run_db(_cas_output, db, file_hash, file.filename, data, started)
+    except (Overloaded, JobTimeout, PoolUnavailable):
+        raise
+    except Exception as e:
+        await run_db(
+            _log_request, db,
             input_hash=file_hash,
             source="CAS",
-            status=output.status,
-            input_payload={"filename": file.filename},
-            output_payload=output.model_dump(mode='json')
-        ))
-        
-        db.commit()
-        return output
+            status="failed",
+            output_payload={"error": str(e)},
+            started=started
+        )
+        # Still return 400 for errors like wrong password in CAS
+        raise HTTPException(status_code=400, detail=f"CAS Parse Failed: {str(e)}")
+
+@router.post("/cas/stream")
+async def ingest_cas_stream(
+    file: UploadFile = File(...),
+    password: str = Form(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Same parse as /cas, returned as NDJSON (one ParsedItem per line). The parse itself is not
+    incremental: the worker returns the whole transaction list first. Streaming covers the
+    response only: items are converted and serialized one line at a time instead of as one
+    IngestionResult body, and the caller can consume rows as they arrive. Only a summary
+    is logged.
+    """
+    started = time.perf_counter()
+    content = await file.read()
+    file_hash = hashlib.sha256(content).hexdigest()
+
+    try:
+        data = await CasParser.parse_async(content, password)
+    except (Overloaded, JobTimeout, PoolUnavailable):
+        raise
     except Exception as e:
-        db.add(RequestLog(
+        await run_db(
+            _log_request, db,
             input_hash=file_hash,
             source="CAS",
             status="failed",
-            output_payload={"error": str(e)}
-        ))
-        db.commit()
-        # Still return 400 for errors like wrong password in CAS
+            output_payload={"error": str(e)},
+            started=started
+        )
         raise HTTPException(status_code=400, detail=f"CAS Parse Failed: {str(e)}")
+
+    await run_db(
+        _log_request, db,
+        input_hash=file_hash,
+        source="CAS",
+        status="success" if data else "failed",
+        input_payload={"filename": file.filename, "op": "stream"},
+        output_payload={"transactions": len(data)},
+        started=started
+    )
+
+    pipeline = IngestionPipeline(db)
+
+    # Sync generator: Starlette iterates it in a worker thread, off the event loop
+    def ndjson_lines():
+        for t_dict in data:
+            yield _cas_item(pipeline, t_dict).model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
@@ -71,7 +71,7 @@ class PatternTestResult(BaseModel):
 
 # Endpoints
 @router.get("")
-async def list_patterns(
+def list_patterns(
     bank: Optional[str] = Query(None),
     is_ai_generated: Optional[bool] = Query(None),
     search: Optional[str] = Query(None),
@@ -117,7 +117,7 @@ async def list_patterns(
 
 
 @router.get("/{pattern_id}")
-async def get_pattern(pattern_id: str, db: Session = Depends(get_db)):
+def get_pattern(pattern_id: str, db: Session = Depends(get_db)):
     """Get a single pattern by ID."""
     pattern = db.query(PatternRule).filter(PatternRule.id == pattern_id).first()
     
@@ -136,7 +136,7 @@ async def get_pattern(pattern_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("", status_code=201)
-async def create_pattern(pattern: PatternCreate, db: Session = Depends(get_db)):
+def create_pattern(pattern: PatternCreate, db: Session = Depends(get_db)):
     """Create a new pattern manually."""
     new_pattern = PatternRule(
         source=pattern.bank_name,  # Store bank_name as source
@@ -163,7 +163,7 @@ async def create_pattern(pattern: PatternCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/{pattern_id}")
-async def update_pattern(
+def update_pattern(
     pattern_id: str, 
     update: PatternUpdate,
     db: Session = Depends(get_db)
@@ -200,7 +200,7 @@ async def update_pattern(
 
 
 @router.delete("/{pattern_id}")
-async def delete_pattern(pattern_id: str, db: Session = Depends(get_db)):
+def delete_pattern(pattern_id: str, db: Session = Depends(get_db)):
     """Delete a pattern."""
     pattern = db.query(PatternRule).filter(PatternRule.id == pattern_id).first()
     
@@ -215,7 +215,7 @@ async def delete_pattern(pattern_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("/test")
-async def test_pattern(test: PatternTest):
+def test_pattern(test: PatternTest):
     """Test a regex pattern against sample text."""
     try:
         regex = re.compile(test.regex_pattern, re.IGNORECASE)
@@ -256,7 +256,7 @@ async def test_pattern(test: PatternTest):
 
 
 @router.get("/banks/list")
-async def get_banks(db: Session = Depends(get_db)):
+def get_banks(db: Session = Depends(get_db)):
     """Get list of unique bank names from patterns."""
     banks = db.query(PatternRule.source)\
         .filter(PatternRule.source.isnot(None))\
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from parser.db.database import get_db
 from parser.db.models import RequestLog
+from parser.core.request_log import RequestLogWriter
 
 router = APIRouter(prefix="/v1", tags=["System"])
 
@@ -19,7 +20,8 @@ def list_logs(
     db: Session = Depends(get_db)
 ):
     """
-    List ingestion logs with filtering and pagination.
+    List ingestion logs with filtering and pagination. Rows carry the fixed summary columns
+    only; GET /logs/{id} returns the full input/output payloads.
     """
     
     
@@ -51,4 +53,4 @@ def get_log(log_id: str, db: Session = Depends(get_db)):
     if not log:
         raise HTTPException(status_code=404, detail="Log not found")
         
-    return log
+    return RequestLogWriter.detail(log)
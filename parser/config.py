@@ -14,6 +14,46 @@ class Settings(BaseSettings):
     # Default to data folder in root
     PARSER_DATABASE_URL: str = "duckdb:///data/ingestion_engine_parser.duckdb"
 
+    # Instrumentation (/metrics, /metrics/debug)
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str = ""  # when set, /metrics* require 'Authorization: Bearer <token>'
+    SERVER_TIMING_ENABLED: bool = False
+    SLOW_QUERY_MS: float = 200.0
+
+    # Execution pools (parser/core/executor.py). File/CAS parsing is CPU bound and runs in
+    # processes; blocking DB work from async handlers runs in threads. Jobs beyond
+    # workers + queue depth are refused with 429.
+    PARSE_PROCESS_WORKERS: int = 2
+    PARSE_QUEUE_DEPTH: int = 8
+    PARSE_JOB_TIMEOUT_SECONDS: float = 120.0
+    DB_THREAD_WORKERS: int = 8
+    DB_QUEUE_DEPTH: int = 64
+    DB_JOB_TIMEOUT_SECONDS: float = 30.0
+
+    # Background file-import jobs (/v1/ingest/file/jobs): uploads are kept on local disk
+    # and parsed in chunks; finished jobs are purged after the retention window.
+    IMPORT_JOB_DIR: str = "data/import_jobs"
+    IMPORT_CHUNK_ROWS: int = 2000
+    IMPORT_JOB_WORKERS: int = 2
+    IMPORT_JOB_RETENTION_HOURS: int = 72
+
+    # Request logs: payloads are compressed into per-day directories; retention drops whole
+    # days (today plus LOG_RETENTION_DAYS previous days are kept).
+    LOG_PAYLOAD_DIR: str = "data/parser_payloads"
+    LOG_PAYLOAD_COMPRESSION: int = 6
+    LOG_RETENTION_DAYS: int = 1
+
+    # /v1/stats rollups: counters flushed every STATS_FLUSH_SECONDS, kept per minute for
+    # STATS_MINUTE_RESOLUTION_HOURS, then per hour until STATS_RETENTION_DAYS
+    STATS_FLUSH_SECONDS: int = 30
+    STATS_MINUTE_RESOLUTION_HOURS: int = 2
+    STATS_RETENTION_DAYS: int = 30
+
+    # Duplicate-submission window for /v1/ingest/sms|email, answered from an in-memory map
+    # of recent input hashes (bounded to IDEMPOTENCY_MAX_ENTRIES, oldest evicted first)
+    IDEMPOTENCY_WINDOW_SECONDS: int = 300
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000
+
     @property
     def DATABASE_URL(self):
         return self.PARSER_DATABASE_URL
@@ -1,18 +1,98 @@
 import re
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+
+class Signal(NamedTuple):
+    name: str  # The source pattern, e.g. r"\bdebited\b"
+    group: str  # "block" | "strong" | "positive" | "penalty"
+    weight: float
+
+
+class KeywordScanner:
+    """
+    Finds every keyword of a signal set in one pass over the text.
+
+    Patterns must be literals, optionally wrapped in \\b (e.g. r"\\bpaid\\b", r"rs\\.").
+    They are compiled into a single trie-shaped regex inside a lookahead: at each offset
+    the engine follows at most one branch per character instead of trying every keyword,
+    and matches may overlap ("vouchers." still yields "rs."). Each keyword ends in an
+    empty group, so match.lastindex says which one matched. Keywords that start at the
+    same offset report only the longest.
+    """
+
+    def __init__(self, signals: Sequence[Signal]):
+        self.signals = tuple(signals)
+        bounded, free = [], []
+        for index, signal in enumerate(self.signals):
+            literal, word_start, word_end = self._parse(signal.name)
+            (bounded if word_start else free).append((literal, word_end, index))
+        branches = []
+        if bounded:
+            branches.append(r"\b" + self._trie(bounded))
+        if free:
+            branches.append(self._trie(free))
+        self._regex = re.compile(f"(?=(?:{'|'.join(branches)}))")
+        # Group n+1 is the marker of signal n
+        self._group_to_signal = {self._regex.groupindex[f"s{i}"]: i for i in range(len(self.signals))}
+
+    @staticmethod
+    def _parse(pattern: str) -> Tuple[str, bool, bool]:
+        word_start = pattern.startswith(r"\b")
+        word_end = pattern.endswith(r"\b") and len(pattern) > 2
+        body = pattern[2 if word_start else 0:len(pattern) - (2 if word_end else 0)]
+        # Plain characters or escaped punctuation only (no classes, quantifiers or groups)
+        if not re.fullmatch(r"(?:[^\\.^$*+?{}\[\]|()]|\\[^\w\s])+", body):
+            raise ValueError(f"Not a literal keyword pattern: {pattern!r}")
+        return re.sub(r"\\(.)", r"\1", body), word_start, word_end
+
+    @staticmethod
+    def _trie(keywords: List[Tuple[str, bool, int]]) -> str:
+        root: Dict = {}
+        for literal, word_end, index in keywords:
+            node = root
+            for ch in literal:
+                node = node.setdefault(ch, {})
+            node.setdefault(None, []).append((word_end, index))
+
+        def emit(node: Dict) -> str:
+            # Children before leaves, so the longer keyword wins at a shared offset
+            alternatives = [re.escape(ch) + emit(child) for ch, child in sorted(
+                (k, v) for k, v in node.items() if k is not None)]
+            alternatives += [(r"\b" if word_end else "") + f"(?P<s{index}>)" for word_end, index in node.get(None, [])]
+            return alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+
+        return emit(root)
+
+    def iter_hits(self, text: str) -> Iterable[int]:
+        """Signal indices in order of occurrence (repeats included)."""
+        lookup = self._group_to_signal
+        for match in self._regex.finditer(text):
+            yield lookup[match.lastindex]
+
+    def hits(self, text: str) -> Set[int]:
+        return set(self.iter_hits(text))
+
+    def scan(self, text: str) -> List[int]:
+        """0/1 feature vector aligned with self.signals."""
+        vector = [0] * len(self.signals)
+        for index in self.iter_hits(text):
+            vector[index] = 1
+        return vector
+
 
 class FinancialClassifier:
-    
+
     # Keywords that suggest a financial transaction
     POSITIVE_KEYWORDS = [
-        r"\bdebited\b", r"\bcredited\b", r"\bspent\b", r"\bpaid\b", r"\bsent\b", 
-        r"\breceived\b", r"\btxn\b", r"\btransaction\b", r"\bacct\b", r"\ba/c\b", 
-        r"\bbank\b", r"\bupi\b", r"\bwithdraw\b", r"\bpurchase\b", r"\bbill\b", 
+        r"\bdebited\b", r"\bcredited\b", r"\bspent\b", r"\bpaid\b", r"\bsent\b",
+        r"\breceived\b", r"\btxn\b", r"\btransaction\b", r"\bacct\b", r"\ba/c\b",
+        r"\bbank\b", r"\bupi\b", r"\bwithdraw\b", r"\bpurchase\b", r"\bbill\b",
         r"\bpayment\b"
     ]
 
     # Keywords that suggest noise (OTP, Promos, Notifications)
     NEGATIVE_KEYWORDS = [
-        r"otp", r"login", r"password", r"verification code", 
+        r"otp", r"login", r"password", r"verification code",
         r"lucky winner", r"loan offer", r"apply now", r"your statement is ready",
         r"pre-approved", r"congratulations", r"cashback points", r"exclusive offer",
         r"click here", r"know more", r"vouchers", r"reward points", r"kyc update"
@@ -23,45 +103,73 @@ class FinancialClassifier:
         r"click here", r"know more", r"unsubscribe", r"mobile app", r"social media"
     ]
 
+    # High-confidence noise: OTPs and login alerts are never transactions we want to track
+    FAST_FAIL_KEYWORDS = [r"otp", r"login", r"password", r"verification code", r"kyc update"]
+
+    # A rupee amount is a strong signal on its own
+    CURRENCY_KEYWORDS = [r"rs\.", r"inr"]
+
+    POSITIVE_WEIGHT = 1.0
+    CURRENCY_WEIGHT = 2.0
+    PENALTY_WEIGHT = -0.5  # Soft penalty per keyword list a noise keyword appears in
+    THRESHOLD = 1.0
+
+    _scanner = None
+
+    @classmethod
+    def scanner(cls) -> KeywordScanner:
+        """All signal groups in one compiled scanner (built on first use)."""
+        if cls._scanner is None:
+            penalties: Dict[str, float] = {}
+            for kw in cls.NEGATIVE_KEYWORDS + cls.CLEANUP_KEYWORDS:
+                if kw not in cls.FAST_FAIL_KEYWORDS:
+                    penalties[kw] = penalties.get(kw, 0.0) + cls.PENALTY_WEIGHT
+            cls._scanner = KeywordScanner(
+                [Signal(kw, "block", 0.0) for kw in cls.FAST_FAIL_KEYWORDS]
+                + [Signal(kw, "strong", cls.CURRENCY_WEIGHT) for kw in cls.CURRENCY_KEYWORDS]
+                + [Signal(kw, "positive", cls.POSITIVE_WEIGHT) for kw in cls.POSITIVE_KEYWORDS]
+                + [Signal(kw, "penalty", weight) for kw, weight in penalties.items()]
+            )
+        return cls._scanner
+
+    @staticmethod
+    def features(content: str) -> List[int]:
+        """0/1 feature vector over FinancialClassifier.scanner().signals."""
+        return FinancialClassifier.scanner().scan(content.lower())
+
+    @staticmethod
+    def score(features: Sequence[int]) -> Tuple[bool, float]:
+        """(is_financial, weighted score) for a feature vector; blocked messages score -inf."""
+        signals = FinancialClassifier.scanner().signals
+        total, strong = 0.0, False
+        for hit, signal in zip(features, signals):
+            if hit:
+                if signal.group == "block":
+                    return False, float("-inf")
+                strong = strong or signal.group == "strong"
+                total += signal.weight
+        # Strong signal (a rupee amount): keep it despite footer noise.
+        # Otherwise the positive score must outweigh the noise.
+        return strong or total >= FinancialClassifier.THRESHOLD, total
+
     @staticmethod
     def is_financial(content: str, source: str = "SMS") -> bool:
         """
         Heuristic check: filters noise while preserving valid bank alerts.
+        One scan of the lowercased content; stops at the first fast-fail keyword.
         """
-        content_lower = content.lower()
-        
-        # 1. High-Confidence Noise Check (Fast Fail)
-        # OTPs and Login alerts are never transactions we want to track
-        for kw in [r"otp", r"login", r"password", r"verification code", r"kyc update"]:
-            if re.search(kw, content_lower):
+        scanner = FinancialClassifier.scanner()
+        signals = scanner.signals
+        seen: Set[int] = set()
+        for index in scanner.iter_hits(content.lower()):
+            if signals[index].group == "block":
                 return False
-        
-        # 2. Positive Scoring
-        score = 0
-        strong_signals = {r"debited", r"credited", r"rs.", r"inr", r"spent", r"paid", r"received"}
-        has_strong_signal = False
-        
-        for kw in FinancialClassifier.POSITIVE_KEYWORDS:
-            if re.search(kw, content_lower):
-                score += 1
-                if kw in strong_signals:
-                    has_strong_signal = True
-        
-        # Currency bonus
-        if "rs." in content_lower or "inr" in content_lower:
-            score += 2
-            has_strong_signal = True
-
-        # 3. Negative Scoring (Penalties instead of fast-fail for common footer noise)
-        penalty = 0
-        for kw in FinancialClassifier.NEGATIVE_KEYWORDS + FinancialClassifier.CLEANUP_KEYWORDS:
-            if re.search(kw, content_lower):
-                penalty += 0.5 # Soft penalty
-        
-        # Threshold Logic:
-        # - If it has a strong signal (debited/credited + rs.), we usually want it.
-        # - Otherwise, positive score must outweigh noise.
-        if has_strong_signal:
-            return True
-        
-        return (score - penalty) >= 1
+            seen.add(index)
+        strong = any(signals[i].group == "strong" for i in seen)
+        return strong or sum(signals[i].weight for i in seen) >= FinancialClassifier.THRESHOLD
+
+    @staticmethod
+    def classify_batch(contents: Iterable[str], source: str = "SMS") -> List[bool]:
+        """is_financial over a list of messages, sharing the compiled scanner."""
+        is_financial = FinancialClassifier.is_financial
+        return [is_financial(content, source) for content in contents]
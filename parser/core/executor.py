@@ -0,0 +1,166 @@
+"""
+Execution model for the parser service.
+
+The event loop only accepts requests and awaits results:
+- CPU-bound parsing (pandas statements, casparser PDFs) runs in a bounded process pool
+- blocking SQLAlchemy/DuckDB work from async handlers runs in a bounded thread pool
+
+Each pool admits at most `workers + queue_depth` jobs; beyond that callers get
+Overloaded (HTTP 429) instead of queueing without limit. Every job has a timeout
+(HTTP 504). A timed-out job that already started keeps its worker until it finishes -
+processes are not killed mid-parse - but the slot it holds is still counted, so a
+burst of slow files cannot grow the backlog.
+
+A worker process that dies (OOM, segfault in a native parser) breaks a ProcessPoolExecutor
+for good; the pool then drops it and the next job starts a fresh one. Jobs that were in
+flight on the broken executor fail with PoolUnavailable (HTTP 503).
+"""
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from parser.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Pool queue is full; the client should retry later."""
+
+    def __init__(self, pool: str, retry_after: int = 5):
+        super().__init__(f"{pool} pool is saturated")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class JobTimeout(Exception):
+    def __init__(self, pool: str, timeout: float):
+        super().__init__(f"{pool} job exceeded {timeout:.0f}s")
+        self.pool = pool
+
+
+class PoolUnavailable(Exception):
+    """The executor broke (a worker died) while running the job; retrying is safe."""
+
+    def __init__(self, pool: str, retry_after: int = 2):
+        super().__init__(f"{pool} pool worker died; retry")
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+class BoundedPool:
+    """Lazily created executor with an admission limit and per-job timeouts."""
+
+    def __init__(self, name: str, factory: Callable[[], Executor], workers: int, queue_depth: int, timeout: float):
+        self.name = name
+        self.workers = workers
+        self.limit = workers + queue_depth
+        self.timeout = timeout
+        self._factory = factory
+        self._executor: Optional[Executor] = None
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._factory()
+        return self._executor
+
+    def _discard(self, executor: Executor):
+        """Drop a broken executor so the next job creates a fresh one."""
+        with self._lock:
+            if self._executor is not executor:
+                return  # already replaced by another caller
+            self._executor = None
+        logger.error(f"{self.name} pool executor is broken; recreating it")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._inflight -= 1
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs):
+        with self._lock:
+            if self._inflight >= self.limit:
+                raise Overloaded(self.name)
+            self._inflight += 1
+
+        job = functools.partial(fn, *args, **kwargs)
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(job)
+            except BrokenExecutor:
+                # Broken by an earlier job; this one has not started, so it can go to a fresh pool
+                self._discard(executor)
+                executor = self._get_executor()
+                future = executor.submit(job)
+        except BrokenExecutor:
+            self._release()
+            raise PoolUnavailable(self.name)
+        except Exception:
+            self._release()
+            raise
+        # The slot is freed when the job really ends, not when the caller stops waiting
+        future.add_done_callback(self._release)
+
+        timeout = timeout or self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            future.cancel()  # Only effective while still queued
+            logger.warning(f"{self.name} job {getattr(fn, '__qualname__', fn)} timed out after {timeout}s")
+            raise JobTimeout(self.name, timeout)
+        except BrokenExecutor:
+            self._discard(executor)
+            raise PoolUnavailable(self.name)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# spawn, not fork: forked workers inherit the server's listening socket and, if the server is
+# killed, keep the port bound so it cannot restart
+cpu_pool = BoundedPool(
+    "parse",
+    lambda: ProcessPoolExecutor(max_workers=settings.PARSE_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn")),
+    workers=settings.PARSE_PROCESS_WORKERS,
+    queue_depth=settings.PARSE_QUEUE_DEPTH,
+    timeout=settings.PARSE_JOB_TIMEOUT_SECONDS,
+)
+
+db_pool = BoundedPool(
+    "db",
+    lambda: ThreadPoolExecutor(max_workers=settings.DB_THREAD_WORKERS, thread_name_prefix="parser-db"),
+    workers=settings.DB_THREAD_WORKERS,
+    queue_depth=settings.DB_QUEUE_DEPTH,
+    timeout=settings.DB_JOB_TIMEOUT_SECONDS,
+)
+
+
+async def run_cpu(fn: Callable, *args, **kwargs):
+    """Run a picklable, module-level function in the parse process pool."""
+    return await cpu_pool.run(fn, *args, **kwargs)
+
+
+async def run_db(fn: Callable, *args, **kwargs):
+    """Run blocking DB work in the DB thread pool."""
+    return await db_pool.run(fn, *args, **kwargs)
+
+
+def shutdown_pools():
+    cpu_pool.shutdown()
+    db_pool.shutdown()
@@ -0,0 +1,92 @@
+"""
+Recent-submission filter for IngestionPipeline.
+
+Input hashes seen in the last IDEMPOTENCY_WINDOW_SECONDS are kept in an in-memory map,
+so a duplicate SMS/email is rejected without a query and a new one costs no lookup.
+On first use the map is warmed from request_logs (input_hash and created_at of the
+window only), so a restart does not forget submissions that are still inside it.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from parser.config import settings
+from parser.db.models import RequestLog
+
+
+class RecentSubmissions:
+    """Thread-safe TTL set of input hashes; one instance per process."""
+
+    def __init__(self, window_seconds: Optional[int] = None, max_entries: Optional[int] = None):
+        self.window = window_seconds if window_seconds is not None else settings.IDEMPOTENCY_WINDOW_SECONDS
+        self.max_entries = max_entries if max_entries is not None else settings.IDEMPOTENCY_MAX_ENTRIES
+        self._lock = threading.Lock()
+        # input_hash -> monotonic expiry. The window is fixed, so insertion order is expiry order.
+        self._expiry: "OrderedDict[str, float]" = OrderedDict()
+        self._warmed = False
+
+    def claim(self, input_hash: str, db: Optional[Session] = None) -> bool:
+        """
+        True if input_hash is new, and reserve it for the window (concurrent identical
+        submissions: exactly one wins). False if it was submitted within the window.
+        """
+        if not self._warmed and db is not None:
+            self.warm(db)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            if input_hash in self._expiry:
+                return False
+            self._expiry[input_hash] = now + self.window
+            while len(self._expiry) > self.max_entries:
+                self._expiry.popitem(last=False)
+            return True
+
+    def release(self, input_hash: str):
+        """Forget a claim, e.g. when its request was rolled back and may be retried."""
+        with self._lock:
+            self._expiry.pop(input_hash, None)
+
+    def warm(self, db: Session):
+        """Load the hashes logged within the window (oldest first)."""
+        utc_now = datetime.utcnow()
+        rows = db.query(RequestLog.input_hash, RequestLog.created_at).filter(
+            RequestLog.created_at >= utc_now - timedelta(seconds=self.window),
+            RequestLog.input_hash.isnot(None)
+        ).order_by(RequestLog.created_at).all()
+        now = time.monotonic()
+        with self._lock:
+            if self._warmed:
+                return
+            # Rows go in front of anything claimed meanwhile, keeping the map in expiry order
+            claimed = list(self._expiry.items())
+            self._expiry.clear()
+            for input_hash, created_at in rows:
+                age = (utc_now - created_at).total_seconds()
+                self._expiry.pop(input_hash, None)
+                self._expiry[input_hash] = now + self.window - age
+            for input_hash, expiry in claimed:
+                self._expiry.pop(input_hash, None)
+                self._expiry[input_hash] = expiry
+            while len(self._expiry) > self.max_entries:
+                self._expiry.popitem(last=False)
+            self._warmed = True
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.monotonic())
+            return len(self._expiry)
+
+    def _expire(self, now: float):
+        while self._expiry:
+            input_hash, expiry = next(iter(self._expiry.items()))
+            if expiry > now:
+                break
+            self._expiry.popitem(last=False)
+
+
+recent_submissions = RecentSubmissions()
@@ -0,0 +1,263 @@
+"""
+Background file-import jobs.
+
+Submission stores the upload under IMPORT_JOB_DIR and returns a job id at once. A worker
+then parses the statement IMPORT_CHUNK_ROWS frame rows at a time in the parse process pool
+and appends each chunk's ParsedItems to import_job_rows together with the job's progress,
+in one commit. A crash or restart therefore resumes from the last persisted chunk, and
+resubmitting the same file (same scope, mapping and header row) returns the existing job
+instead of parsing again.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from parser.config import settings
+from parser.core.executor import Overloaded, run_cpu, run_db
+from parser.core.pipeline import IngestionPipeline
+from parser.db.database import SessionLocal
+from parser.db.models import ImportJob, ImportJobRow
+from parser.parsers.file.universal_parser import count_file_rows, parse_file_chunk
+from parser.schemas.transaction import ParsedItem, TransactionMeta
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def file_item(pipeline: IngestionPipeline, t_dict: Dict[str, Any]) -> ParsedItem:
+    return ParsedItem(
+        status="extracted",
+        transaction=pipeline._convert_to_schema_txn(t_dict),
+        metadata=TransactionMeta(
+            confidence=1.0,
+            parser_used="UniversalParser",
+            source_original="FILE",
+            units=t_dict.get("units"),
+            nav=t_dict.get("nav")
+        )
+    )
+
+
+def job_progress(job: ImportJob) -> Dict[str, Any]:
+    percent = None
+    if job.total_rows is not None:
+        percent = 100.0 if not job.total_rows else round(100.0 * job.processed_rows / job.total_rows, 1)
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        "parsed_rows": job.parsed_rows,
+        "skipped_rows": job.skipped_rows,
+        "percent": percent,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+class ImportJobService:
+    _tasks: Dict[str, asyncio.Task] = {}
+    _slots: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    def job_key(scope: Optional[str], file_hash: str, mapping: Dict[str, Any], header_row_index: int) -> str:
+        raw = json.dumps([scope, file_hash, mapping, header_row_index], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _store_upload(content: bytes, file_hash: str, filename: str) -> str:
+        os.makedirs(settings.IMPORT_JOB_DIR, exist_ok=True)
+        ext = os.path.splitext(filename)[1].lower()
+        path = os.path.join(settings.IMPORT_JOB_DIR, f"{file_hash}{ext}")
+        if not os.path.exists(path):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        return path
+
+    @staticmethod
+    def submit(db, content: bytes, filename: str, mapping: Dict[str, Any], header_row_index: int = 0,
+               scope: Optional[str] = None) -> Tuple[ImportJob, bool]:
+        """
+        Returns (job, deduplicated). An existing job for the same key is returned as is; a
+        failed one is re-queued and resumes where it stopped.
+        """
+        file_hash = hashlib.sha256(content).hexdigest()
+        key = ImportJobService.job_key(scope, file_hash, mapping, header_row_index)
+
+        job = db.query(ImportJob).filter(ImportJob.job_key == key).order_by(ImportJob.created_at.desc()).first()
+        if job:
+            if job.status == "failed":
+                job.storage_path = ImportJobService._store_upload(content, file_hash, filename)
+                job.status, job.error = "queued", None
+                db.commit()
+            return job, True
+
+        job = ImportJob(
+            job_key=key,
+            input_hash=file_hash,
+            scope=scope,
+            filename=filename,
+            storage_path=ImportJobService._store_upload(content, file_hash, filename),
+            mapping_json=mapping,
+            header_row_index=header_row_index,
+            status="queued",
+        )
+        db.add(job)
+        db.commit()
+        return job, False
+
+    @staticmethod
+    def get(db, job_id: str, scope: Optional[str] = None) -> Optional[ImportJob]:
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if not job or job.scope != scope:
+            return None
+        return job
+
+    @staticmethod
+    def results(db, job_id: str, after: int = -1, limit: int = 500, kind: str = "item",
+                finished: bool = True) -> Tuple[List[Any], Optional[int]]:
+        """
+        Rows with seq > after, in order. next_after is the last seq served (`after` for an empty
+        page), so a client polling a running job resumes exactly where it stopped; it is None
+        only once the job is finished (status read before this call) and the page is short.
+        """
+        rows = db.query(ImportJobRow.seq, ImportJobRow.payload).filter(
+            ImportJobRow.job_id == job_id,
+            ImportJobRow.kind == kind,
+            ImportJobRow.seq > after
+        ).order_by(ImportJobRow.seq).limit(limit).all()
+        if finished and len(rows) < limit:
+            return [payload for _, payload in rows], None
+        return [payload for _, payload in rows], rows[-1].seq if rows else after
+
+    # --- Worker ---
+    @staticmethod
+    def start(job_id: str):
+        """Schedule the job on the running loop unless it is already being worked on."""
+        task = ImportJobService._tasks.get(job_id)
+        if task and not task.done():
+            return
+        ImportJobService._tasks[job_id] = asyncio.get_running_loop().create_task(ImportJobService._run(job_id))
+
+    @staticmethod
+    def resume_pending():
+        """Restart queued/running jobs left behind by a previous process (called at startup)."""
+        with SessionLocal() as db:
+            job_ids = [j for (j,) in db.query(ImportJob.id).filter(ImportJob.status.in_(ACTIVE_STATUSES)).all()]
+        for job_id in job_ids:
+            ImportJobService.start(job_id)
+        return len(job_ids)
+
+    @staticmethod
+    async def _cpu(fn, *args):
+        # Background work waits for pool capacity instead of surfacing a 429
+        delay = 0.5
+        while True:
+            try:
+                return await run_cpu(fn, *args)
+            except Overloaded:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10.0)
+
+    @staticmethod
+    async def _run(job_id: str):
+        if ImportJobService._slots is None:
+            ImportJobService._slots = asyncio.Semaphore(settings.IMPORT_JOB_WORKERS)
+        async with ImportJobService._slots:
+            try:
+                job = await run_db(ImportJobService._begin, job_id)
+                if job is None:
+                    return
+                path, filename, mapping, header_idx, processed, total = job
+                if total is None:
+                    total = await ImportJobService._cpu(count_file_rows, path, filename, header_idx)
+                    await run_db(ImportJobService._update, job_id, total_rows=total)
+
+                while processed < total:
+                    stop = min(processed + settings.IMPORT_CHUNK_ROWS, total)
+                    rows, skipped = await ImportJobService._cpu(parse_file_chunk, path, filename, mapping, header_idx, processed, stop)
+                    await run_db(ImportJobService._persist_chunk, job_id, stop, rows, skipped)
+                    processed = stop
+
+                await run_db(ImportJobService._update, job_id, status="completed")
+            except Exception as e:
+                logger.error(f"Import job {job_id} failed: {e}")
+                await run_db(ImportJobService._update, job_id, status="failed", error=str(e))
+            finally:
+                ImportJobService._tasks.pop(job_id, None)
+
+    @staticmethod
+    def _begin(job_id: str):
+        with SessionLocal() as db:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            if not job or job.status not in ACTIVE_STATUSES:
+                return None
+            job.status = "running"
+            db.commit()
+            return job.storage_path, job.filename, job.mapping_json, job.header_row_index or 0, job.processed_rows or 0, job.total_rows
+
+    @staticmethod
+    def _update(job_id: str, **values):
+        with SessionLocal() as db:
+            db.query(ImportJob).filter(ImportJob.id == job_id).update(
+                {**values, "updated_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+
+    @staticmethod
+    def _persist_chunk(job_id: str, stop: int, rows: List[dict], skipped: List[str]):
+        """Append one chunk's output and advance the resume point in the same commit."""
+        with SessionLocal() as db:
+            job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+            pipeline = IngestionPipeline(db)
+            seq = (job.parsed_rows or 0) + (job.skipped_rows or 0)
+            values = []
+            for t_dict in rows:
+                values.append({"job_id": job_id, "seq": seq, "kind": "item", "payload": file_item(pipeline, t_dict).model_dump(mode="json")})
+                seq += 1
+            for message in skipped:
+                values.append({"job_id": job_id, "seq": seq, "kind": "skip", "payload": message})
+                seq += 1
+            if values:
+                db.execute(insert(ImportJobRow), values)
+            job.processed_rows = stop
+            job.parsed_rows = (job.parsed_rows or 0) + len(rows)
+            job.skipped_rows = (job.skipped_rows or 0) + len(skipped)
+            db.commit()
+
+    # --- Retention ---
+    @staticmethod
+    def cleanup(db, older_than_hours: Optional[int] = None) -> int:
+        """Drop finished jobs past retention, their rows, and uploads no other job uses."""
+        hours = older_than_hours if older_than_hours is not None else settings.IMPORT_JOB_RETENTION_HOURS
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        jobs = db.query(ImportJob).filter(
+            ImportJob.status.notin_(ACTIVE_STATUSES),
+            ImportJob.updated_at < cutoff
+        ).all()
+        if not jobs:
+            return 0
+        job_ids = [j.id for j in jobs]
+        paths = {j.storage_path for j in jobs}
+        db.query(ImportJobRow).filter(ImportJobRow.job_id.in_(job_ids)).delete(synchronize_session=False)
+        db.query(ImportJob).filter(ImportJob.id.in_(job_ids)).delete(synchronize_session=False)
+        db.commit()
+
+        in_use = {p for (p,) in db.query(ImportJob.storage_path).filter(ImportJob.storage_path.in_(list(paths))).all()}
+        for path in paths - in_use:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return len(job_ids)
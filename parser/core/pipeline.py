@@ -1,3 +1,4 @@
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from typing import Optional, Any
 from parser.core.classifier import FinancialClassifier
@@ -5,6 +6,7 @@ from parser.parsers.registry import ParserRegistry
 from parser.db.models import RequestLog, PatternRule
 import hashlib
 import json
+import time
 from datetime import datetime, timedelta
 from rapidfuzz import fuzz
 from decimal import Decimal
@@ -14,6 +16,8 @@ from parser.parsers.ai.gemini_parser import GeminiParser
 from parser.core.normalizer import MerchantNormalizer
 from parser.core.validator import TransactionValidator
 from parser.core.guesser import CategoryGuesser
+from parser.core.idempotency import recent_submissions
+from parser.core.request_log import PayloadStore, RequestLogWriter
 
 class IngestionPipeline:
 
@@ -108,36 +112,48 @@ class IngestionPipeline:
                     is_active=True
                 )
                 self.db.add(new_rule)
-                self.db.commit()
+                # Committed with the request's log row
+                self.db.flush()
         except Exception as e:
             print(f"Error saving AI pattern: {e}")
             self.db.rollback()
 
+    def _log(self, source: str, input_hash: str, status: str, input_payload: dict,
+             output_payload: Optional[dict] = None, started: Optional[float] = None):
+        """The request's only log write: one row with its final status, in one commit."""
+        self.db.add(RequestLogWriter.new(source, input_hash, status, input_payload=input_payload,
+                                         output_payload=output_payload, started=started))
+        self.db.commit()
+
     def run(self, content: str, source: str, sender: Optional[str] = None, subject: Optional[str] = None, date_hint: Optional[str] = None) -> IngestionResult:
-        # 1. Idempotency Check
+        started = time.perf_counter()
+
+        # 1. Idempotency Check (in memory: duplicates never reach the database)
         input_hash = hashlib.sha256(f"{source}:{content}".encode()).hexdigest()
-        
-        # Check last 5 mins
-        cutoff = datetime.utcnow() - timedelta(minutes=5)
-        existing = self.db.query(RequestLog).filter(
-            RequestLog.input_hash == input_hash,
-            RequestLog.created_at >= cutoff
-        ).first()
-
-        if existing:
+        if not recent_submissions.claim(input_hash, self.db):
             return IngestionResult(status="duplicate_submission", results=[], logs=["Duplicate submission detected"])
 
-        # Create Log Entry
-        log = RequestLog(input_hash=input_hash, source=source, input_payload={"content": content, "sender": sender, "subject": subject, "date_hint": date_hint}, status="processing")
-        self.db.add(log)
-        self.db.commit()
+        input_payload = {"content": content, "sender": sender, "subject": subject, "date_hint": date_hint}
+        try:
+            result = self._extract(content, source, sender, subject, date_hint, input_hash)
+        except Exception as e:
+            # Not a duplicate if the client retries after an error
+            self.db.rollback()
+            recent_submissions.release(input_hash)
+            self._log(source, input_hash, "failed", input_payload, {"error": str(e)}, started=started)
+            raise
 
+        # Single-message results log their item (cross-source duplicates included)
+        output = result.results[0].model_dump(mode='json') if result.results else None
+        self._log(source, input_hash, result.status, input_payload, output, started=started)
+        return result
+
+    def _extract(self, content: str, source: str, sender: Optional[str], subject: Optional[str],
+                 date_hint: Optional[str], input_hash: str) -> IngestionResult:
         logs = []
 
         # 2. Classification
         if not FinancialClassifier.is_financial(content, source):
-            log.status = "ignored"
-            self.db.commit()
             return IngestionResult(status="ignored", results=[], logs=["Classified as non-financial"])
 
         # 3. Extraction Chain
@@ -288,77 +304,79 @@ class IngestionPipeline:
              # We check logs in the last 15 minutes for similar records
              duplicate_window = datetime.utcnow() - timedelta(minutes=15)
              
-             # Search previously successful extractions
-             # Note: output_payload is stored as JSON in DuckDB
-             # Using a slightly fuzzy match: same amount, mask, and merchant
-             # Due to DuckDB JSON limitations, we fetch and filter in Python for robustness
-             recent_successes = self.db.query(RequestLog).filter(
+             # Previously successful extractions, compared on the log's fixed summary
+             # columns. Multi-item logs (statements) only summarise their first row, so
+             # their stored payload is read back to compare every transaction.
+             recent_successes = self.db.query(
+                 RequestLog.id, RequestLog.item_count, RequestLog.output_ref, RequestLog.amount,
+                 RequestLog.ref_id, RequestLog.account_mask, RequestLog.merchant, RequestLog.txn_type
+             ).filter(
                  RequestLog.status == "success",
                  RequestLog.created_at >= duplicate_window,
-                 RequestLog.input_hash != input_hash # Not ourselves
+                 RequestLog.input_hash != input_hash, # Not ourselves
+                 or_(
+                     RequestLog.amount == parsed_txn.amount,
+                     RequestLog.ref_id.isnot(None),
+                     RequestLog.item_count > 1
+                 )
              ).all()
 
              is_cross_duplicate = False
              def get_digits(s): return "".join(filter(str.isdigit, str(s or "")))[-4:]
-             
+             curr_ref = str(parsed_txn.ref_id or "").strip().lstrip('0')
+             curr_mask = get_digits(parsed_txn.account.mask if parsed_txn.account else "")
+             m_curr = parsed_txn.merchant.cleaned or parsed_txn.description or ""
+
+             def candidates(rs):
+                 if (rs.item_count or 0) <= 1:
+                     return [(rs.amount, rs.ref_id, rs.account_mask, rs.merchant, rs.txn_type)]
+                 payload = PayloadStore.get(rs.output_ref) or {}
+                 return [
+                     (
+                         Decimal(str(t["amount"])), t.get("ref_id"), (t.get("account") or {}).get("mask"),
+                         (t.get("merchant") or {}).get("cleaned") or t.get("description"), t.get("type")
+                     )
+                     for t in (item.get("transaction") for item in payload.get("results", []))
+                     if t
+                 ]
+
              for rs in recent_successes:
                  try:
-                     payload = rs.output_payload or {}
-                     
-                     # Extract list of transactions from payload
-                     prev_txns = []
-                     if "results" in payload:
-                         for item in payload["results"]:
-                             if item.get("transaction"):
-                                 prev_txns.append(item["transaction"])
-                     elif "transaction" in payload:
-                         prev_txns.append(payload["transaction"])
-                     
-                     for prev_data in prev_txns:
-                         # Comparison criteria
-                         same_amt = Decimal(str(prev_data["amount"])) == parsed_txn.amount
-                         
+                     for amount, ref_id, mask, merchant, txn_type in candidates(rs):
                          # Check Reference ID if both have it
-                         prev_ref = str(prev_data.get("ref_id") or "").strip().lstrip('0')
-                         curr_ref = str(parsed_txn.ref_id or "").strip().lstrip('0')
-                         same_ref = prev_ref == curr_ref if (prev_ref and curr_ref) else False
-                         
-                         if same_ref: # High confidence match
+                         prev_ref = str(ref_id or "").strip().lstrip('0')
+                         if prev_ref and curr_ref and prev_ref == curr_ref: # High confidence match
                               is_cross_duplicate = True
                               logs.append(f"Matching Ref ID detected from {rs.id}")
                               break
 
+                         same_amt = amount is not None and Decimal(str(amount)) == parsed_txn.amount
+
                          # Robust mask check: compare last 4 digits
-                         prev_mask = get_digits(prev_data.get("account", {}).get("mask"))
-                         curr_mask = get_digits(parsed_txn.account.mask if parsed_txn.account else "")
+                         prev_mask = get_digits(mask)
                          same_mask = prev_mask == curr_mask if (prev_mask and curr_mask) else False
-                         
+
                          # Fuzzy merchant match
-                         m_prev = (prev_data.get("merchant", {}).get("cleaned") or prev_data.get("description") or "")
-                         m_curr = parsed_txn.merchant.cleaned or parsed_txn.description or ""
-                         same_merchant = fuzz.partial_ratio(m_prev, m_curr) > 90
-                         
+                         same_merchant = fuzz.partial_ratio(merchant or "", m_curr) > 90
+
                          # Same Type (Debit vs Credit)
-                         same_type = prev_data.get("type") == parsed_txn.type
-                         
+                         same_type = txn_type == parsed_txn.type
+
                          if same_amt and same_mask and same_merchant and same_type:
                              is_cross_duplicate = True
                              logs.append(f"Cross-source duplicate detected from {rs.id}")
                              break
-                     
+
                      if is_cross_duplicate:
                          break
                  except: continue
 
              if is_cross_duplicate:
-                 log.status = "success"
                  item = ParsedItem(
                     status="cross_source_duplicate",
                     transaction=parsed_txn,
                     metadata={"confidence": 1.0, "parser_used": "Deduplicator", "source_original": source}
                  )
-                 log.output_payload = item.model_dump(mode='json')
-                 self.db.commit()
                  return IngestionResult(status="success", results=[item], logs=logs)
 
              item = ParsedItem(
@@ -369,14 +387,7 @@ class IngestionPipeline:
                           "source_original": source}
             )
             
-             # Update Log
-             log.status = "success"
-             log.output_payload = item.model_dump(mode='json')
-             self.db.commit()
-            
              return IngestionResult(status="success", results=[item], logs=logs)
 
         # Failed
-        log.status = "failed"
-        self.db.commit()
         return IngestionResult(status="failed", results=[], logs=logs + ["No parser matched"])
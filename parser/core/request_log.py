@@ -0,0 +1,143 @@
+"""
+Compact request-log storage.
+
+request_logs keeps only narrow, fixed columns (status, source, parser_used, confidence,
+latency, amount and the first transaction's match keys), so stats and the cross-source
+dedup never parse JSON. Full input/output payloads are zlib-compressed and written once
+per content hash to LOG_PAYLOAD_DIR/<day>/<sha256>.json.z; the row only stores the ref.
+
+Retention works on whole days: a day's payload directory is removed in one rmtree and
+its rows go with a single range delete on the `day` column.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import zlib
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Optional
+
+from parser.config import settings
+from parser.core.stats_rollup import stats_aggregator
+from parser.db.models import RequestLog
+
+PREVIEW_CHARS = 200
+
+
+def _first_item(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    results = payload.get("results")
+    if results:
+        return results[0]
+    if "metadata" in payload:  # Single ParsedItem
+        return payload
+    return None
+
+
+def _amount(value: Any) -> Optional[Decimal]:
+    try:
+        return Decimal(str(value)) if value is not None else None
+    except InvalidOperation:
+        return None
+
+
+class PayloadStore:
+    @staticmethod
+    def put(day: date, payload: Any) -> str:
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()
+        digest = hashlib.sha256(raw).hexdigest()
+        ref = f"{day.isoformat()}/{digest}"
+        path = os.path.join(settings.LOG_PAYLOAD_DIR, f"{ref}.json.z")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(raw, settings.LOG_PAYLOAD_COMPRESSION))
+            os.replace(tmp, path)
+        return ref
+
+    @staticmethod
+    def get(ref: Optional[str]) -> Any:
+        if not ref:
+            return None
+        try:
+            with open(os.path.join(settings.LOG_PAYLOAD_DIR, f"{ref}.json.z"), "rb") as f:
+                return json.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def drop_before(cutoff: date) -> int:
+        """Remove every day directory older than cutoff. Returns the number of days dropped."""
+        if not os.path.isdir(settings.LOG_PAYLOAD_DIR):
+            return 0
+        dropped = 0
+        for name in os.listdir(settings.LOG_PAYLOAD_DIR):
+            try:
+                day = date.fromisoformat(name)
+            except ValueError:
+                continue
+            if day < cutoff:
+                shutil.rmtree(os.path.join(settings.LOG_PAYLOAD_DIR, name), ignore_errors=True)
+                dropped += 1
+        return dropped
+
+
+class RequestLogWriter:
+    @staticmethod
+    def new(source: str, input_hash: Optional[str], status: str,
+            input_payload: Any = None, output_payload: Any = None,
+            started: Optional[float] = None) -> RequestLog:
+        now = datetime.utcnow()
+        log = RequestLog(source=source, input_hash=input_hash, status=status, created_at=now, day=now.date())
+        if input_payload is not None:
+            RequestLogWriter.set_input(log, input_payload)
+        RequestLogWriter.finish(log, status, output_payload, started=started)
+        return log
+
+    @staticmethod
+    def finish(log: RequestLog, status: str, output_payload: Any = None, started: Optional[float] = None):
+        log.status = status
+        if output_payload is not None:
+            RequestLogWriter.set_output(log, output_payload)
+        if started is not None:
+            log.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        if status != "processing":
+            stats_aggregator.record(
+                log.source, status, parser_used=log.parser_used, confidence=log.confidence,
+                items=log.item_count or 0, latency_ms=log.latency_ms
+            )
+
+    @staticmethod
+    def set_input(log: RequestLog, payload: Dict[str, Any]):
+        preview = payload.get("content") or payload.get("filename") or ""
+        log.input_preview = preview[:PREVIEW_CHARS]
+        log.input_ref = PayloadStore.put(log.day, payload)
+
+    @staticmethod
+    def set_output(log: RequestLog, payload: Dict[str, Any]):
+        """Store the output payload and project its summary onto the fixed columns."""
+        results = payload.get("results")
+        first = _first_item(payload)
+        log.item_count = len(results) if results is not None else (1 if first else 0)
+        log.error = str(payload["error"])[:500] if payload.get("error") else None
+        if first:
+            meta = first.get("metadata") or {}
+            txn = first.get("transaction") or {}
+            log.parser_used = meta.get("parser_used")
+            log.confidence = meta.get("confidence")
+            log.amount = _amount(txn.get("amount"))
+            log.txn_type = txn.get("type")
+            log.ref_id = txn.get("ref_id")
+            log.account_mask = (txn.get("account") or {}).get("mask")
+            log.merchant = (txn.get("merchant") or {}).get("cleaned") or txn.get("description")
+        log.output_ref = PayloadStore.put(log.day, payload)
+
+    @staticmethod
+    def detail(log: RequestLog) -> Dict[str, Any]:
+        """Fixed columns plus the rehydrated payloads (one log, so the file reads are fine)."""
+        data = {c.name: getattr(log, c.name) for c in RequestLog.__table__.columns}
+        data["input_payload"] = PayloadStore.get(log.input_ref)
+        data["output_payload"] = PayloadStore.get(log.output_ref)
+        return data
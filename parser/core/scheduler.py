@@ -4,6 +4,7 @@ Handles periodic cleanup tasks and maintenance operations.
 """
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from parser.db.database import SessionLocal
+from parser.config import settings
 from sqlalchemy import text
 from datetime import datetime, timedelta
 import logging
@@ -13,26 +14,62 @@ logger = logging.getLogger(__name__)
 scheduler = AsyncIOScheduler()
 
 def cleanup_old_logs():
-    """Delete request logs older than 24 hours to save disk space and improve performance."""
+    """
+    Drop request logs by whole days: rows with day < cutoff go in one range delete and each
+    expired day's payload directory is removed with it. Today plus LOG_RETENTION_DAYS are kept.
+    """
     try:
+        from parser.core.request_log import PayloadStore
         with SessionLocal() as db:
-            cutoff = datetime.utcnow() - timedelta(hours=24)
+            cutoff = (datetime.utcnow() - timedelta(days=settings.LOG_RETENTION_DAYS)).date()
             
             # Use distinct parameters for safety
             result = db.execute(
-                text("DELETE FROM request_logs WHERE created_at < :cutoff"),
+                text("DELETE FROM request_logs WHERE day < :cutoff"),
                 {"cutoff": cutoff.isoformat()}
             )
             db.commit()
             
             deleted_count = result.rowcount
-            logger.info(f"🧹 Cleaned up {deleted_count} old logs (>24 hours)")
-            print(f"🧹 Cleaned up {deleted_count} old logs (>24 hours)")
+            dropped_days = PayloadStore.drop_before(cutoff)
+            logger.info(f"🧹 Cleaned up {deleted_count} old logs and {dropped_days} payload day(s) (before {cutoff})")
+            print(f"🧹 Cleaned up {deleted_count} old logs and {dropped_days} payload day(s) (before {cutoff})")
         
     except Exception as e:
         logger.error(f"❌ Log cleanup failed: {e}")
         print(f"❌ Log cleanup failed: {e}")
 
+def cleanup_import_jobs():
+    """Purge finished import jobs past IMPORT_JOB_RETENTION_HOURS, with their rows and stored uploads."""
+    try:
+        from parser.core.import_jobs import ImportJobService
+        with SessionLocal() as db:
+            deleted_count = ImportJobService.cleanup(db)
+        if deleted_count:
+            logger.info(f"🧹 Cleaned up {deleted_count} old import jobs")
+    except Exception as e:
+        logger.error(f"❌ Import job cleanup failed: {e}")
+
+def flush_request_stats(include_current: bool = False):
+    """Write closed minutes of the in-memory /v1/stats counters to request_stat_rollups."""
+    try:
+        from parser.core.stats_rollup import stats_aggregator
+        with SessionLocal() as db:
+            stats_aggregator.flush(db, include_current=include_current)
+    except Exception as e:
+        logger.error(f"❌ Stats flush failed: {e}")
+
+def compact_request_stats():
+    """Fold old minute rollups into hour buckets and expire those past STATS_RETENTION_DAYS."""
+    try:
+        from parser.core.stats_rollup import StatsRollupService
+        with SessionLocal() as db:
+            folded = StatsRollupService.compact(db)
+        if folded:
+            logger.info(f"🧹 Folded {folded} minute stat rollups into hours")
+    except Exception as e:
+        logger.error(f"❌ Stats compaction failed: {e}")
+
 def start_cleanup_job():
     """Start the background cleanup scheduler. Runs every hour."""
     try:
@@ -44,6 +81,27 @@ def start_cleanup_job():
             id='cleanup_logs',
             replace_existing=True
         )
+        scheduler.add_job(
+            cleanup_import_jobs,
+            'interval',
+            hours=1,
+            id='cleanup_import_jobs',
+            replace_existing=True
+        )
+        scheduler.add_job(
+            flush_request_stats,
+            'interval',
+            seconds=settings.STATS_FLUSH_SECONDS,
+            id='flush_request_stats',
+            replace_existing=True
+        )
+        scheduler.add_job(
+            compact_request_stats,
+            'interval',
+            hours=1,
+            id='compact_request_stats',
+            replace_existing=True
+        )
         
         scheduler.start()
         logger.info("✅ Cleanup scheduler started (runs every 1 hour)")
@@ -0,0 +1,202 @@
+"""
+Pre-aggregated request statistics for /v1/stats.
+
+Every completed request bumps an in-memory counter keyed by
+(minute, source, status, parser_used, confidence bucket). Closed minutes are flushed to
+request_stat_rollups as minute buckets; minute buckets older than
+STATS_MINUTE_RESOLUTION_HOURS are folded into hour buckets and hour buckets expire after
+STATS_RETENTION_DAYS. A window therefore reads at most that many minute rows plus one row
+per hour per key, regardless of request volume, and never touches request_logs.
+"""
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, text
+
+from parser.config import settings
+from parser.db.models import RequestStatRollup
+
+WINDOW_PATTERN = re.compile(r"^(\d+)([mhd])$")
+WINDOW_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+# (minute, source, status, parser_used, confidence_bucket)
+Key = Tuple[datetime, str, str, Optional[str], str]
+
+
+def confidence_bucket(confidence: Optional[float]) -> str:
+    if confidence is None:
+        return "none"
+    if confidence < 0.5:
+        return "low"
+    if confidence < 0.9:
+        return "medium"
+    return "high"
+
+
+def parse_window(window: str) -> timedelta:
+    """'90m', '1h', '24h', '7d' -> timedelta. Raises ValueError otherwise."""
+    match = WINDOW_PATTERN.match(window.strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid window '{window}', expected e.g. 1h, 24h or 7d")
+    return timedelta(**{WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+
+
+class StatsAggregator:
+    """Thread-safe per-minute counters with a DB flush; one instance per process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held from drain to commit, so readers never see counters that are in neither place
+        self._flush_lock = threading.Lock()
+        # key -> [requests, items, latency_ms_sum, latency_count]
+        self._counters: Dict[Key, List[float]] = {}
+
+    def record(self, source: str, status: str, parser_used: Optional[str] = None,
+               confidence: Optional[float] = None, items: int = 0,
+               latency_ms: Optional[float] = None, at: Optional[datetime] = None):
+        minute = (at or datetime.utcnow()).replace(second=0, microsecond=0)
+        key = (minute, source, status, parser_used, confidence_bucket(confidence))
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None:
+                entry = self._counters[key] = [0, 0, 0.0, 0]
+            entry[0] += 1
+            entry[1] += items or 0
+            if latency_ms is not None:
+                entry[2] += latency_ms
+                entry[3] += 1
+
+    def _drain(self, before: Optional[datetime]) -> Dict[Key, List[float]]:
+        with self._lock:
+            if before is None:
+                drained, self._counters = self._counters, {}
+            else:
+                drained = {k: v for k, v in self._counters.items() if k[0] < before}
+                for k in drained:
+                    del self._counters[k]
+        return drained
+
+    def _restore(self, drained: Dict[Key, List[float]]):
+        with self._lock:
+            for key, values in drained.items():
+                entry = self._counters.setdefault(key, [0, 0, 0.0, 0])
+                for i, v in enumerate(values):
+                    entry[i] += v
+
+    def flush(self, db, include_current: bool = False) -> int:
+        """Write closed minutes (all minutes on shutdown) as minute buckets. Returns rows written."""
+        before = None if include_current else datetime.utcnow().replace(second=0, microsecond=0)
+        with self._flush_lock:
+            return self._flush(db, before)
+
+    def _flush(self, db, before: Optional[datetime]) -> int:
+        drained = self._drain(before)
+        if not drained:
+            return 0
+        rows = [
+            {
+                "bucket_start": minute, "resolution": "minute", "source": source, "status": status,
+                "parser_used": parser_used, "confidence_bucket": bucket,
+                "requests": int(v[0]), "items": int(v[1]), "latency_ms_sum": v[2], "latency_count": int(v[3])
+            }
+            for (minute, source, status, parser_used, bucket), v in drained.items()
+        ]
+        try:
+            db.execute(insert(RequestStatRollup), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._restore(drained)  # Retried on the next flush
+            raise
+        return len(rows)
+
+    def pending(self, since: datetime) -> Dict[Key, List[float]]:
+        """Unflushed counters at or after `since` (normally just the current minute)."""
+        with self._lock:
+            return {k: list(v) for k, v in self._counters.items() if k[0] >= since}
+
+    def read_with_pending(self, read_rows: Callable[[], List[Any]], since: datetime) -> Tuple[List[Any], Dict[Key, List[float]]]:
+        """
+        read_rows() (the flushed rollups) and pending(since) with no flush committing in
+        between, so every counter is seen exactly once: in the DB or in memory.
+        """
+        with self._flush_lock:
+            return read_rows(), self.pending(since)
+
+
+stats_aggregator = StatsAggregator()
+
+
+class StatsRollupService:
+    @staticmethod
+    def compact(db, now: Optional[datetime] = None) -> int:
+        """Fold minute buckets older than the minute-resolution horizon into hour buckets."""
+        now = now or datetime.utcnow()
+        horizon = (now - timedelta(hours=settings.STATS_MINUTE_RESOLUTION_HOURS)).replace(minute=0, second=0, microsecond=0)
+        params = {"horizon": horizon}
+        db.execute(text("""
+            INSERT INTO request_stat_rollups
+                (bucket_start, resolution, source, status, parser_used, confidence_bucket,
+                 requests, items, latency_ms_sum, latency_count)
+            SELECT date_trunc('hour', bucket_start), 'hour', source, status, parser_used, confidence_bucket,
+                   SUM(requests), SUM(items), SUM(latency_ms_sum), SUM(latency_count)
+            FROM request_stat_rollups
+            WHERE resolution = 'minute' AND bucket_start < :horizon
+            GROUP BY 1, source, status, parser_used, confidence_bucket
+        """), params)
+        folded = db.execute(text(
+            "SELECT COUNT(*) FROM request_stat_rollups WHERE resolution = 'minute' AND bucket_start < :horizon"
+        ), params).scalar()
+        db.execute(text(
+            "DELETE FROM request_stat_rollups WHERE resolution = 'minute' AND bucket_start < :horizon"
+        ), params)
+        db.execute(text(
+            "DELETE FROM request_stat_rollups WHERE bucket_start < :expiry"
+        ), {"expiry": now - timedelta(days=settings.STATS_RETENTION_DAYS)})
+        db.commit()
+        return folded or 0
+
+    @staticmethod
+    def summary(db, window: timedelta) -> Dict[str, Any]:
+        """
+        Totals for the last `window`. Buckets are counted when they start inside the window,
+        so the edge resolves to a minute (recent) or an hour (older than the horizon).
+        """
+        since = datetime.utcnow() - window
+        rows, pending = stats_aggregator.read_with_pending(lambda: db.query(
+            RequestStatRollup.source, RequestStatRollup.status, RequestStatRollup.parser_used,
+            RequestStatRollup.confidence_bucket,
+            func.sum(RequestStatRollup.requests), func.sum(RequestStatRollup.items),
+            func.sum(RequestStatRollup.latency_ms_sum), func.sum(RequestStatRollup.latency_count)
+        ).filter(
+            RequestStatRollup.bucket_start >= since
+        ).group_by(
+            RequestStatRollup.source, RequestStatRollup.status, RequestStatRollup.parser_used,
+            RequestStatRollup.confidence_bucket
+        ).all(), since)
+        counters = [tuple(r) for r in rows]
+        counters += [(k[1], k[2], k[3], k[4], *v) for k, v in pending.items()]
+
+        status_breakdown, source_breakdown, parser_breakdown, confidence_breakdown = {}, {}, {}, {}
+        total = latency_sum = latency_count = 0
+        for source, status, parser_used, bucket, requests, items, lat_sum, lat_count in counters:
+            requests, items = int(requests or 0), int(items or 0)
+            total += requests
+            status_breakdown[status] = status_breakdown.get(status, 0) + requests
+            source_breakdown[source] = source_breakdown.get(source, 0) + requests
+            if status == "success" and parser_used:
+                parser_breakdown[parser_used] = parser_breakdown.get(parser_used, 0) + items
+                confidence_breakdown[bucket] = confidence_breakdown.get(bucket, 0) + items
+            latency_sum += lat_sum or 0.0
+            latency_count += int(lat_count or 0)
+
+        return {
+            "total_processed": total,
+            "status_breakdown": status_breakdown,
+            "source_breakdown": source_breakdown,
+            "parser_performance": parser_breakdown,
+            "confidence_breakdown": confidence_breakdown,
+            "avg_latency_ms": round(latency_sum / latency_count, 2) if latency_count else None,
+        }
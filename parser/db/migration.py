@@ -30,6 +30,19 @@ def run_auto_migrations(engine: Engine):
             safe_add_column("pattern_rules", "is_ai_generated", "BOOLEAN DEFAULT FALSE")
             safe_add_column("pattern_rules", "confidence", "JSON")
 
+            # 3. Compact request logs: fixed summary columns + payload refs. The legacy
+            # input_payload/output_payload JSON columns stay (DuckDB cannot drop columns of an
+            # indexed table) but are no longer written.
+            for col, type_def in [
+                ("day", "DATE"), ("parser_used", "VARCHAR"), ("confidence", "FLOAT"),
+                ("latency_ms", "FLOAT"), ("item_count", "INTEGER"), ("amount", "NUMERIC(15, 2)"),
+                ("txn_type", "VARCHAR"), ("ref_id", "VARCHAR"), ("account_mask", "VARCHAR"),
+                ("merchant", "VARCHAR"), ("error", "VARCHAR"), ("input_preview", "VARCHAR"),
+                ("input_ref", "VARCHAR"), ("output_ref", "VARCHAR"),
+            ]:
+                safe_add_column("request_logs", col, type_def)
+            connection.execute(text("UPDATE request_logs SET day = CAST(created_at AS DATE) WHERE day IS NULL"))
+
             # Explicitly commit if needed (DuckDB depends on connection mode)
             connection.commit()
             print("Parser Service migrations complete.")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, Boolean, JSON
+from sqlalchemy import Column, String, Integer, DateTime, Date, Text, Boolean, JSON, Float, Numeric
 from sqlalchemy.sql import func
 from parser.db.database import Base
 import uuid
@@ -12,13 +12,29 @@ class RequestLog(Base):
 
     id = Column(String, primary_key=True, default=generate_uuid)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    day = Column(Date, default=lambda: datetime.datetime.utcnow().date()) # Retention partition key
     source = Column(String, nullable=False) # SMS, EMAIL, FILE
     input_hash = Column(String, index=True) # For idempotency
-    input_payload = Column(JSON, nullable=True)
-    output_payload = Column(JSON, nullable=True)
     status = Column(String) # success, duplicate, failed
     parser_steps = Column(JSON, nullable=True) # Trace of execution
 
+    # Fixed summary columns, filled from the output payload (parser/core/request_log.py)
+    parser_used = Column(String, nullable=True)
+    confidence = Column(Float, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    item_count = Column(Integer, default=0)
+    amount = Column(Numeric(15, 2), nullable=True)
+    txn_type = Column(String, nullable=True)
+    ref_id = Column(String, nullable=True)
+    account_mask = Column(String, nullable=True)
+    merchant = Column(String, nullable=True)
+    error = Column(String, nullable=True)
+    input_preview = Column(String, nullable=True)
+
+    # Compressed payloads live in the payload store, keyed "<day>/<sha256>"
+    input_ref = Column(String, nullable=True)
+    output_ref = Column(String, nullable=True)
+
 class FileParsingConfig(Base):
     __tablename__ = "file_parsing_configs"
 
@@ -58,3 +74,54 @@ class MerchantAlias(Base):
     pattern = Column(String, nullable=False, unique=True) # The raw string to match (e.g. "BUNDL TECHNOLOGIES")
     alias = Column(String, nullable=False) # The clean name (e.g. "Swiggy")
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    job_key = Column(String, nullable=False, index=True) # sha256(scope, file hash, mapping, header row): resubmission key
+    input_hash = Column(String, nullable=False) # sha256 of the uploaded bytes, as in request_logs
+    scope = Column(String, nullable=True) # Caller-supplied owner (e.g. tenant id); results are only served to the same scope
+    filename = Column(String, nullable=False)
+    storage_path = Column(String, nullable=False) # Upload kept on local disk so the job can resume after a restart
+    mapping_json = Column(JSON, nullable=False)
+    header_row_index = Column(Integer, default=0)
+    status = Column(String, default="queued") # queued, running, completed, failed
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, default=0) # Frame rows handled; the resume point
+    parsed_rows = Column(Integer, default=0)
+    skipped_rows = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class ImportJobRow(Base):
+    """Parsed output of an import job, one row per ParsedItem (kind=item) or skip message (kind=skip)."""
+    __tablename__ = "import_job_rows"
+
+    # No database key: rows are only ever appended per chunk and read back by (job_id, seq)
+    job_id = Column(String, nullable=False)
+    seq = Column(Integer, nullable=False)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    __mapper_args__ = {"primary_key": [job_id, seq]}
+
+class RequestStatRollup(Base):
+    """Request counters per time bucket, written by parser/core/stats_rollup.py."""
+    __tablename__ = "request_stat_rollups"
+
+    # No database key: a bucket may be flushed in several increments (e.g. across a restart),
+    # and readers always SUM over the dimensions
+    bucket_start = Column(DateTime, nullable=False)
+    resolution = Column(String, nullable=False) # minute, hour
+    source = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    parser_used = Column(String, nullable=True)
+    confidence_bucket = Column(String, nullable=False)
+    requests = Column(Integer, default=0)
+    items = Column(Integer, default=0)
+    latency_ms_sum = Column(Float, default=0.0)
+    latency_count = Column(Integer, default=0)
+
+    __mapper_args__ = {"primary_key": [bucket_start, resolution, source, status, parser_used, confidence_bucket]}
@@ -1,5 +1,6 @@
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import sys
@@ -8,9 +9,12 @@ import os
 # Allow running from inside the 'parser' directory
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from parser.db.database import init_db
-from parser.core.scheduler import start_cleanup_job, stop_cleanup_job
+from parser.config import settings
+from parser.db.database import init_db, engine
+from parser.core.scheduler import start_cleanup_job, stop_cleanup_job, flush_request_stats
 from parser.api import ingestion, config, analytics, system, patterns
+from parser.core.executor import Overloaded, JobTimeout, PoolUnavailable, shutdown_pools
+from parser.core.import_jobs import ImportJobService
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -18,10 +22,13 @@ async def lifespan(app: FastAPI):
     print("Starting Parser Service...")
     init_db()
     start_cleanup_job()  # ✅ Enable cleanup scheduler
+    ImportJobService.resume_pending()
     yield
     # Shutdown
     print("Shutting down Parser Service...")
     stop_cleanup_job()  # ✅ Stop scheduler gracefully
+    flush_request_stats(include_current=True)
+    shutdown_pools()
 
 app = FastAPI(
     title="Financial Parser Microservice",
@@ -39,6 +46,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Back-pressure from the parse/DB pools
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+@app.exception_handler(PoolUnavailable)
+async def pool_unavailable_handler(request: Request, exc: PoolUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": str(exc.retry_after)})
+
+@app.exception_handler(JobTimeout)
+async def job_timeout_handler(request: Request, exc: JobTimeout):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+# Same metrics as the main backend: latency histograms, per-request query counts, /metrics
+if settings.METRICS_ENABLED:
+    from common.instrumentation import install_instrumentation
+    install_instrumentation(
+        app, engine, service="parser",
+        server_timing=settings.SERVER_TIMING_ENABLED,
+        slow_query_ms=settings.SLOW_QUERY_MS,
+        token=settings.METRICS_TOKEN
+    )
+
 # Categorized Routers
 app.include_router(system.router)
 app.include_router(ingestion.router)
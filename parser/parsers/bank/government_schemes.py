@@ -97,14 +97,14 @@ class NpsSmsParser(BaseSmsParser):
         return [
             # NPS Contribution
             TransactionPattern(
-                regex=re.compile(r"(?i)(?:NPS|PRAN)\s*(?:A/c|Account)?\s*([\d]+)\s*(?:has\s+been\s+)?credited\s*with\s*(?:INR|Rs\.?)\s*([\d,]+\.?\d*)\s*on\s*([\d-/]+)", re.IGNORECASE),
+                regex=re.compile(r"(?i)(?:NPS|PRAN)\s*(?:A/c|Account)?\s*([\d]+)\s*(?:has\s+been\s+)?credited\s*with\s*(?:INR|Rs\.?)\s*([\d,]+\.?\d*)\s*on\s*([\d/-]+)", re.IGNORECASE),
                 confidence=1.0,
                 txn_type="CREDIT",
                 field_map={"mask": 1, "amount": 2, "date": 3}
             ),
             # NPS Withdrawal
             TransactionPattern(
-                regex=re.compile(r"(?i)(?:NPS|PRAN)\s*(?:withdrawal|redemption)\s*(?:of\s+)?(?:INR|Rs\.?)\s*([\d,]+\.?\d*)\s*from\s*(?:PRAN|A/c)\s*([\d]+)\s*(?:credited|processed)\s*on\s*([\d-/]+)", re.IGNORECASE),
+                regex=re.compile(r"(?i)(?:NPS|PRAN)\s*(?:withdrawal|redemption)\s*(?:of\s+)?(?:INR|Rs\.?)\s*([\d,]+\.?\d*)\s*from\s*(?:PRAN|A/c)\s*([\d]+)\s*(?:credited|processed)\s*on\s*([\d/-]+)", re.IGNORECASE),
                 confidence=0.95,
                 txn_type="DEBIT",
                 field_map={"amount": 1, "mask": 2, "date": 3}
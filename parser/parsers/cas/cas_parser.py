@@ -1,127 +1,159 @@
-from typing import List, Dict, Any, Optional
-import casparser
-import tempfile
-import os
+from typing import List, Dict, Any, Optional, Iterator
+import hashlib
+import io
+import threading
+from collections import OrderedDict
 from datetime import datetime, date
-from decimal import Decimal
-from parser.schemas.transaction import Transaction, TransactionType, AccountInfo, MerchantInfo
+import casparser
+from casparser.exceptions import IncorrectPasswordError
+
+# Tried in order: default (pymupdf when available), pdfminer, then the looser options older/newer
+# casparser releases accept (a release that rejects a keyword just moves on to the next one)
+PARSE_STRATEGIES = ({"output": "dict"}, {"output": "dict", "force_pdfminer": True}, {"no_validate": True}, {})
+SKIP_DESCRIPTIONS = ("Stamp Duty", "STT", "Tax")
+RESULT_CACHE_SIZE = 32
+
+
+def _get(obj, key, default=None):
+    if obj is None: return default
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def _as_date(raw) -> Optional[date]:
+    if isinstance(raw, (datetime, date)):
+        return raw
+    date_str = str(raw).strip()
+    # Prefix lengths drop any time suffix ("2024-01-05T00:00:00", "05-Jan-2024 ...")
+    for fmt, length in (("%Y-%m-%d", 10), ("%d-%b-%Y", 11), ("%d-%m-%Y", 10)):
+        try:
+            return datetime.strptime(date_str[:length], fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _read_cas(file_bytes: bytes, password: str):
+    """Parse from memory (no temp file); a wrong password fails fast instead of trying every strategy."""
+    last_error = None
+    for strategy in PARSE_STRATEGIES:
+        try:
+            data = casparser.read_cas_pdf(io.BytesIO(file_bytes), password, **strategy)
+            if data:
+                return data
+        except IncorrectPasswordError:
+            raise ValueError("Incorrect CAS password.")
+        except Exception as e:
+            last_error = e
+    raise ValueError(f"Could not parse CAS PDF. Please verify the password. ({last_error})")
+
+
+def iter_transactions(data) -> Iterator[Dict[str, Any]]:
+    """
+    Yield flattened transactions straight from casparser's output (dicts or model objects),
+    one at a time - no intermediate deep copy of the statement.
+    """
+    for folio in _get(data, "folios") or []:
+        f_num = _get(folio, "folio") or _get(folio, "folio_no") or "Unknown"
+        for scheme in _get(folio, "schemes") or []:
+            s_name = _get(scheme, "scheme", "Unknown Scheme")
+            amfi, isin = _get(scheme, "amfi"), _get(scheme, "isin")
+
+            for txn in _get(scheme, "transactions") or []:
+                raw_date = _get(txn, "date")
+                t_date = _as_date(raw_date) if raw_date else None
+                if not t_date: continue
+
+                desc = _get(txn, "description", "") or ""
+                # Skip administrative or tax rows
+                if any(x in desc for x in SKIP_DESCRIPTIONS): continue
+
+                t_raw = str(_get(txn, "type", "")).upper()
+                amt = float(_get(txn, "amount", 0) or 0)
+
+                t_type = "BUY"
+                if any(x in t_raw for x in ["REDEMPTION", "SWITCH OUT"]) or amt < 0:
+                    t_type = "SELL"
+
+                yield {
+                    "date": t_date,
+                    "type": t_type,
+                    "amount": abs(amt),
+                    "units": abs(float(_get(txn, "units", 0) or 0)),
+                    "nav": float(_get(txn, "nav", 0) or 0),
+                    "scheme_name": s_name,
+                    "folio_number": f_num,
+                    "amfi": amfi,
+                    "isin": isin,
+                    "description": desc,
+                    "raw_message": f"{s_name} | {desc}",
+                    "external_id": str(_get(txn, "external_id") or _get(txn, "ref_id") or "")
+                }
+
+
+def parse_cas_bytes(file_bytes: bytes, password: str) -> List[Dict[str, Any]]:
+    """
+    Process-pool entry point: returns plain picklable dicts. casparser reads the whole
+    statement at once, so the full transaction list is built here and sent back in one piece.
+    """
+    return list(iter_transactions(_read_cas(file_bytes, password)))
+
+
+class _ResultCache:
+    """LRU of parse results keyed by (PDF content hash, password hash)."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(file_bytes: bytes, password: str) -> str:
+        # The password is part of the key so a cached result never bypasses decryption
+        return hashlib.sha256(file_bytes).hexdigest() + ":" + hashlib.sha256((password or "").encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: List[Dict[str, Any]]):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
 
 class CasParser:
     """
     Wrapper around casparser library to parse Mutual Fund CAS PDFs.
+    PDF parsing is CPU bound, so it runs in the shared parse process pool; results are cached by content hash.
     """
-    
-    @staticmethod
-    def parse(file_bytes: bytes, password: str) -> List[Dict[str, Any]]:
-        flattened_transactions = []
-        
-        def safe_to_dict(obj):
-            if obj is None: return None
-            # Core types to preserve
-            if isinstance(obj, (int, float, str, bool, Decimal, datetime, date)): return obj
-            
-            if isinstance(obj, list): return [safe_to_dict(i) for i in obj]
-            if isinstance(obj, dict): return {k: safe_to_dict(v) for k, v in obj.items()}
-            
-            # Pydantic or library objects
-            for method in ["model_dump", "dict", "to_dict"]:
-                if hasattr(obj, method):
-                    try:
-                        return safe_to_dict(getattr(obj, method)())
-                    except: continue
-            
-            if hasattr(obj, "__dict__"):
-                return safe_to_dict(vars(obj))
-            return obj
-
-        def safe_get(obj, key, default=None):
-            if obj is None: return default
-            if isinstance(obj, dict):
-                return obj.get(key, default)
-            return getattr(obj, key, default)
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as f:
-            f.write(file_bytes)
-            temp_path = f.name
-            
-        try:
-            data = None
-            # Try parsing with various successful strategies
-            for strategy in [{"output": "dict"}, {"output": "dict", "force_pdfminer": True}, {"no_validate": True}, {}]:
-                try:
-                    data = casparser.read_cas_pdf(temp_path, password, **strategy)
-                    if data: break
-                except: continue
-            
-            if not data:
-                raise ValueError("Could not parse CAS PDF. Please verify the password.")
-
-            # Force deep conversion to ensure we only have primitive types
-            data = safe_to_dict(data)
-
-            folios = safe_get(data, "folios", [])
-            for f_item in folios:
-                folio = safe_to_dict(f_item)
-                f_num = safe_get(folio, "folio") or safe_get(folio, "folio_no") or "Unknown"
-                schemes = safe_get(folio, "schemes", [])
-                
-                for s_item in schemes:
-                    scheme = safe_to_dict(s_item)
-                    s_name = safe_get(scheme, "scheme", "Unknown Scheme")
-                    
-                    transactions = safe_get(scheme, "transactions", [])
-                    if not transactions: continue
-                    
-                    for t_item in transactions:
-                        txn = safe_to_dict(t_item)
-                        
-                        raw_date = safe_get(txn, "date")
-                        if not raw_date: continue
-                        
-                        t_date = None
-                        try:
-                            if isinstance(raw_date, (datetime, date)): 
-                                t_date = raw_date
-                            else:
-                                # String parsing
-                                date_str = str(raw_date)[:10]
-                                for fmt in ("%Y-%m-%d", "%d-%b-%Y", "%d-%m-%Y"):
-                                    try:
-                                        t_date = datetime.strptime(date_str, fmt)
-                                        break
-                                    except: continue
-                        except: continue
-
-                        if not t_date: continue
-
-                        desc = safe_get(txn, "description", "")
-                        # Skip administrative or tax rows
-                        if any(x in desc for x in ["Stamp Duty", "STT", "Tax"]): continue
-
-                        t_raw = str(safe_get(txn, "type", "")).upper()
-                        amt = float(safe_get(txn, "amount", 0) or 0)
-                        
-                        t_type = "BUY"
-                        if any(x in t_raw for x in ["REDEMPTION", "SWITCH OUT"]) or amt < 0:
-                            t_type = "SELL"
-                        
-                        flattened_transactions.append({
-                            "date": t_date,
-                            "type": t_type,
-                            "amount": abs(amt),
-                            "units": abs(float(safe_get(txn, "units", 0) or 0)),
-                            "nav": float(safe_get(txn, "nav", 0) or 0),
-                            "scheme_name": s_name,
-                            "folio_number": f_num,
-                            "amfi": safe_get(scheme, "amfi"),
-                            "isin": safe_get(scheme, "isin"),
-                            "description": desc,
-                            "raw_message": f"{s_name} | {desc}",
-                            "external_id": str(safe_get(txn, "external_id") or safe_get(txn, "ref_id") or "")
-                        })
-        finally:
-            if os.path.exists(temp_path):
-                try: os.remove(temp_path)
-                except: pass
-                
-        return flattened_transactions
+    _cache = _ResultCache(RESULT_CACHE_SIZE)
+
+    @classmethod
+    def parse(cls, file_bytes: bytes, password: str) -> List[Dict[str, Any]]:
+        """Synchronous, in-process parse (scripts/tests). Shares the result cache."""
+        key = cls._cache.key(file_bytes, password)
+        cached = cls._cache.get(key)
+        if cached is not None:
+            return cached
+        result = parse_cas_bytes(file_bytes, password)
+        cls._cache.put(key, result)
+        return result
+
+    @classmethod
+    async def parse_async(cls, file_bytes: bytes, password: str) -> List[Dict[str, Any]]:
+        """Parse in the process pool without blocking the event loop (429/504 via executor errors)."""
+        from parser.core.executor import run_cpu
+        key = cls._cache.key(file_bytes, password)
+        cached = cls._cache.get(key)
+        if cached is not None:
+            return cached
+        result = await run_cpu(parse_cas_bytes, file_bytes, password)
+        cls._cache.put(key, result)
+        return result
@@ -4,6 +4,7 @@ from typing import List, Dict, Optional, Any
 from datetime import datetime
 from decimal import Decimal
 import os
+from collections import OrderedDict
 from parser.parsers.utils.recipient_parser import RecipientParser
 
 class UniversalParser:
@@ -80,29 +81,47 @@ class UniversalParser:
         except Exception as e:
             raise ValueError(f"Analysis failed: {str(e)}")
 
+    @staticmethod
+    def load_frame(file_content: bytes, filename: str, header_row_index: int = 0) -> pd.DataFrame:
+        """Read CSV/Excel into a DataFrame with empty rows dropped and headers stripped."""
+        # Detect format
+        if filename.lower().endswith('.csv'):
+            try:
+                df = pd.read_csv(io.BytesIO(file_content), header=header_row_index, on_bad_lines='skip')
+            except pd.errors.ParserError:
+                df = pd.read_csv(io.BytesIO(file_content), encoding='utf-8-sig', header=header_row_index, on_bad_lines='skip')
+        elif filename.lower().endswith(('.xls', '.xlsx')):
+            df = pd.read_excel(io.BytesIO(file_content), header=header_row_index)
+        else:
+            raise ValueError("Unsupported file format")
+
+        # Remove rows where ALL columns are NaN
+        df.dropna(how='all', inplace=True)
+        
+        # Normalize Headers (strip whitespace)
+        df.columns = df.columns.astype(str).str.strip()
+        return df
+
     @staticmethod
     def parse(file_content: bytes, filename: str, mapping: Dict[str, str], header_row_index: int = 0, password: Optional[str] = None) -> List[dict]:
         """
         Parse CSV/Excel content using pandas.
         """
         try:
-            # Detect format
-            if filename.lower().endswith('.csv'):
-                try:
-                    df = pd.read_csv(io.BytesIO(file_content), header=header_row_index, on_bad_lines='skip')
-                except pd.errors.ParserError:
-                    df = pd.read_csv(io.BytesIO(file_content), encoding='utf-8-sig', header=header_row_index, on_bad_lines='skip')
-            elif filename.lower().endswith(('.xls', '.xlsx')):
-                df = pd.read_excel(io.BytesIO(file_content), header=header_row_index)
-            else:
-                raise ValueError("Unsupported file format")
+            df = UniversalParser.load_frame(file_content, filename, header_row_index)
+        except Exception as e:
+            raise ValueError(f"Failed to parse file: {str(e)}")
+        return UniversalParser.parse_frame(df, mapping)
 
-            # Remove rows where ALL columns are NaN
-            df.dropna(how='all', inplace=True)
-            
-            # Normalize Headers (strip whitespace)
-            df.columns = df.columns.astype(str).str.strip()
-            
+    @staticmethod
+    def parse_frame(df: pd.DataFrame, mapping: Dict[str, str], start: int = 0, stop: Optional[int] = None):
+        """
+        Convert rows [start, stop) of a loaded frame. Returns (parsed_rows, skipped_rows);
+        row numbers in skip messages stay absolute, so chunked runs log the same lines.
+        """
+        if start or stop is not None:
+            df = df.iloc[start:stop]
+        try:
             parsed_rows = []
             skipped_rows = []  # Track skipped rows for debugging
             
@@ -324,3 +343,33 @@ class UniversalParser:
         except ValueError:
             return 0.0
     
+
+
+# --- Chunked parsing for import jobs (runs in the parse process pool) ---
+# Each worker process keeps the most recently loaded frames, so consecutive chunks of one
+# file are sliced from memory instead of re-reading the file.
+_FRAME_CACHE_SIZE = 2
+_frames: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+
+
+def _cached_frame(path: str, filename: str, header_row_index: int) -> pd.DataFrame:
+    key = (path, os.path.getmtime(path), header_row_index)
+    df = _frames.get(key)
+    if df is None:
+        with open(path, "rb") as f:
+            df = UniversalParser.load_frame(f.read(), filename, header_row_index)
+        _frames[key] = df
+        while len(_frames) > _FRAME_CACHE_SIZE:
+            _frames.popitem(last=False)
+    else:
+        _frames.move_to_end(key)
+    return df
+
+
+def count_file_rows(path: str, filename: str, header_row_index: int = 0) -> int:
+    return len(_cached_frame(path, filename, header_row_index))
+
+
+def parse_file_chunk(path: str, filename: str, mapping: Dict[str, str], header_row_index: int, start: int, stop: int):
+    """(parsed_rows, skipped_rows) for frame rows [start, stop) of a stored upload."""
+    return UniversalParser.parse_frame(_cached_frame(path, filename, header_row_index), mapping, start, stop)
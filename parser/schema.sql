@@ -4,12 +4,24 @@
 CREATE TABLE request_logs (
 	id VARCHAR NOT NULL, 
 	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	day DATE, 
 	source VARCHAR NOT NULL, 
 	input_hash VARCHAR, 
-	input_payload JSON, 
-	output_payload JSON, 
 	status VARCHAR, 
 	parser_steps JSON, 
+	parser_used VARCHAR, 
+	confidence FLOAT, 
+	latency_ms FLOAT, 
+	item_count INTEGER, 
+	amount NUMERIC(15, 2), 
+	txn_type VARCHAR, 
+	ref_id VARCHAR, 
+	account_mask VARCHAR, 
+	merchant VARCHAR, 
+	error VARCHAR, 
+	input_preview VARCHAR, 
+	input_ref VARCHAR, 
+	output_ref VARCHAR, 
 	PRIMARY KEY (id)
 );
 CREATE INDEX ix_request_logs_input_hash ON request_logs (input_hash);
@@ -54,3 +66,44 @@ CREATE TABLE merchant_aliases (
 	PRIMARY KEY (id), 
 	UNIQUE (pattern)
 );
+
+CREATE TABLE import_jobs (
+	id VARCHAR NOT NULL, 
+	job_key VARCHAR NOT NULL, 
+	input_hash VARCHAR NOT NULL, 
+	scope VARCHAR, 
+	filename VARCHAR NOT NULL, 
+	storage_path VARCHAR NOT NULL, 
+	mapping_json JSON NOT NULL, 
+	header_row_index INTEGER DEFAULT 0, 
+	status VARCHAR DEFAULT 'queued', 
+	total_rows INTEGER, 
+	processed_rows INTEGER DEFAULT 0, 
+	parsed_rows INTEGER DEFAULT 0, 
+	skipped_rows INTEGER DEFAULT 0, 
+	error VARCHAR, 
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	updated_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	PRIMARY KEY (id)
+);
+CREATE INDEX ix_import_jobs_job_key ON import_jobs (job_key);
+
+CREATE TABLE import_job_rows (
+	job_id VARCHAR NOT NULL, 
+	seq INTEGER NOT NULL, 
+	kind VARCHAR NOT NULL, 
+	payload JSON NOT NULL
+);
+
+CREATE TABLE request_stat_rollups (
+	bucket_start TIMESTAMP WITHOUT TIME ZONE NOT NULL, 
+	resolution VARCHAR NOT NULL, 
+	source VARCHAR NOT NULL, 
+	status VARCHAR NOT NULL, 
+	parser_used VARCHAR, 
+	confidence_bucket VARCHAR NOT NULL, 
+	requests INTEGER, 
+	items INTEGER, 
+	latency_ms_sum FLOAT, 
+	latency_count INTEGER
+);
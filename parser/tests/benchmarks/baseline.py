@@ -0,0 +1,92 @@
+"""
+JSON baselines and regression comparison.
+
+A report is flattened to dotted metric names; only the metrics listed in DIRECTIONS are
+compared. Lower is better for latencies and memory, higher for throughput. A metric
+regresses when it moves the wrong way by more than `threshold` (relative) and by more
+than its absolute noise floor, so microsecond-level stages do not flap.
+"""
+import json
+import os
+import platform
+from datetime import datetime
+from typing import Any, Dict, List
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_THRESHOLD = 0.25
+
+# metric suffix -> (direction, absolute noise floor)
+DIRECTIONS = {
+    "throughput_per_s": ("higher", 5.0),
+    "p50_ms": ("lower", 0.05),
+    "p95_ms": ("lower", 0.1),
+    "p99_ms": ("lower", 0.2),
+    "per_message_us": ("lower", 20.0),
+    "per_call_us": ("lower", 2.0),
+    "peak_kb": ("lower", 256.0),
+    "per_message_bytes": ("lower", 512.0),
+}
+
+
+def flatten(report: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = float(value)
+    return flat
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+    }
+
+
+def save(report: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "report": report}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)["report"]
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """One entry per comparable metric present in both reports, worst change first."""
+    now, then = flatten(current), flatten(baseline)
+    rows = []
+    for name, old in then.items():
+        suffix = name.rsplit(".", 1)[-1]
+        if suffix not in DIRECTIONS or name not in now:
+            continue
+        direction, floor = DIRECTIONS[suffix]
+        new = now[name]
+        delta = new - old
+        change = delta / old if old else 0.0
+        worse = delta < 0 if direction == "higher" else delta > 0
+        rows.append({
+            "metric": name,
+            "baseline": old,
+            "current": new,
+            "change": round(change, 4),
+            "regression": worse and abs(change) > threshold and abs(delta) > floor,
+        })
+    rows.sort(key=lambda r: (not r["regression"], -abs(r["change"])))
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]], limit: int = 25) -> str:
+    lines = [f"{'metric':<60} {'baseline':>12} {'current':>12} {'change':>8}"]
+    for row in rows[:limit]:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['metric']:<60} {row['baseline']:>12.2f} {row['current']:>12.2f} {row['change']:>+8.1%}{flag}")
+    return "\n".join(lines)
@@ -0,0 +1,442 @@
+"""
+Deterministic synthetic corpus of bank messages.
+
+Transaction messages are sampled from the registered parsers' own TransactionPatterns:
+every pattern of every bank SMS parser is walked with `re`'s parser, its field groups are
+filled with realistic values (amounts, masks, dates in the formats the pattern accepts,
+merchants, refs) and the result is kept only if that pattern actually extracts the
+intended amount. Patterns therefore stay covered as parsers change. Parsers without
+patterns (generic fallback, loose email matchers) get hand-written seeds.
+
+On top of that the corpus mixes in OTPs, promotions and other noise, email wrappers
+around the same transactions, and exact resubmissions. Same seed, same corpus.
+"""
+import random
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+DEFAULT_SEED = 20260115
+BASE_DATE = datetime(2026, 1, 15)
+
+MERCHANTS = [
+    "SWIGGY", "ZOMATO MEDIA", "AMAZON PAY INDIA", "UBER INDIA", "BIGBASKET", "NETFLIX COM",
+    "RELIANCE FRESH", "BHARTI AIRTEL", "TATA STARBUCKS", "FLIPKART INTERNET", "IRCTC",
+    "rahul sharma", "PAYTM MERCHANT", "DMART", "APOLLO PHARMACY", "INDIAN OIL"
+]
+VPAS = ["swiggy@icici", "zomato@hdfcbank", "amazonpay@apl", "rahul.s@okaxis", "bigbasket@ybl"]
+
+# Dates in every format the bank patterns and BaseParser._parse_date accept
+DATE_FORMATS = ["%d-%m-%y", "%d-%m-%Y", "%d/%m/%y", "%d/%m/%Y", "%d-%b-%y", "%d-%b-%Y",
+                "%d%b%y", "%d%b%Y", "%Y-%m-%d", "%Y-%m-%d:%H:%M:%S", "%y%m%d"]
+
+NOISE_TEMPLATES = [
+    "{otp} is your OTP for transaction of Rs.{amount} at {merchant}. Valid for 10 mins. Do not share with anyone. -{bank}",
+    "Dear Customer, your login to {bank} NetBanking was successful at {time}. If not you, call 1800-000-000.",
+    "Congratulations! You are pre-approved for a loan offer of Rs.{big} from {bank}. Apply now: bit.ly/x{otp}",
+    "Your statement is ready for card ending {mask}. Total due Rs.{amount}. Click here to view.",
+    "Exclusive offer: earn 5X reward points on {merchant} this weekend with your {bank} card. Know more.",
+    "Your KYC update is pending. Please visit your nearest {bank} branch.",
+    "Hi! Your order from {merchant} has been shipped and will arrive by Friday.",
+    "Reminder: your electricity bill is due on {date}. Ignore if already paid.",
+    "Use verification code {otp} to verify your email address.",
+]
+
+EMAIL_WRAPPER = (
+    "Dear Customer,\n\nGreetings from {bank}.\n\n{core}\n\n"
+    "If you have not done this transaction, please call our 24x7 helpline immediately.\n\n"
+    "Warm Regards,\n{bank}\n\nThis is a system generated e-mail. Please do not reply. "
+    "Follow us on social media | Download our mobile app | Unsubscribe"
+)
+
+
+@dataclass
+class Bank:
+    key: str
+    sms_parser: str
+    email_parser: Optional[str]
+    sender: str           # SMS sender id accepted by the parser's can_handle
+    display: str          # Name used in message bodies and email subjects
+    email_from: str
+
+
+BANKS = [
+    Bank("hdfc", "HdfcSmsParser", "HdfcEmailParser", "VM-HDFCBK", "HDFC Bank", "alerts@hdfcbank.net"),
+    Bank("icici", "IciciSmsParser", "IciciEmailParser", "AD-ICICIB", "ICICI Bank", "credit_cards@icicibank.com"),
+    Bank("sbi", "SbiSmsParser", "SbiEmailParser", "BZ-SBIINB", "SBI", "donotreply.sbiatm@alerts.sbi.co.in"),
+    Bank("axis", "AxisSmsParser", "AxisEmailParser", "VK-AXISBK", "Axis Bank", "alerts@axisbank.com"),
+    Bank("kotak", "KotakSmsParser", "KotakEmailParser", "VM-KOTAKB", "Kotak Mahindra Bank", "bankalerts@kotak.com"),
+    Bank("indusind", "IndusIndSmsParser", "IndusIndEmailParser", "JD-INDUSB", "IndusInd Bank", "transactionalert@indusind.com"),
+    Bank("yes", "YesBankSmsParser", "YesBankEmailParser", "VM-YESBNK", "Yes Bank", "alerts@yesbank.in"),
+    Bank("pnb", "PnbSmsParser", "PnbEmailParser", "VK-PNBSMS", "Punjab National Bank (PNB)", "alerts@pnb.co.in"),
+    Bank("bob", "BobSmsParser", "BobEmailParser", "BP-BOBTXN", "Bank of Baroda", "alerts@bankofbaroda.com"),
+    Bank("canara", "CanaraSmsParser", "CanaraEmailParser", "VM-CANBNK", "Canara Bank", "alerts@canarabank.com"),
+    Bank("union", "UnionBankSmsParser", "UnionBankEmailParser", "VM-UNIONB", "Union Bank of India", "alerts@unionbankofindia.bank"),
+    Bank("idfc", "IdfcSmsParser", "IdfcEmailParser", "VM-IDFCFB", "IDFC FIRST Bank", "alerts@idfcfirstbank.com"),
+    Bank("rbl", "RblSmsParser", "RblEmailParser", "VM-RBLBNK", "RBL Bank", "alerts@rblbank.com"),
+    Bank("federal", "FederalBankSmsParser", "FederalBankEmailParser", "AD-FEDBNK", "Federal Bank", "alerts@federalbank.co.in"),
+    Bank("idbi", "IdbiSmsParser", "IdbiEmailParser", "VM-IDBIBK", "IDBI Bank", "alerts@idbibank.co.in"),
+    Bank("indian", "IndianBankSmsParser", "IndianBankEmailParser", "VM-INDBNK", "Indian Bank", "alerts@indianbank.co.in"),
+    Bank("au", "AuSfbSmsParser", "AuSfbEmailParser", "VM-AUBANK", "AU Small Finance Bank (AU SFB)", "alerts@aubank.in"),
+    Bank("bandhan", "BandhanSmsParser", "BandhanEmailParser", "VM-BDNSMS", "Bandhan Bank", "alerts@bandhanbank.com"),
+    Bank("central", "CentralBankSmsParser", "CentralBankEmailParser", "VM-CENTRAL", "Central Bank of India", "alerts@centralbank.co.in"),
+    Bank("boi", "BoiSmsParser", "BoiEmailParser", "VM-BOIND", "Bank of India", "alerts@boi.co.in"),
+    Bank("epfo", "EpfoSmsParser", "EpfoEmailParser", "VM-EPFOHO", "EPFO Provident Fund", "no-reply@epfindia.gov.in"),
+    Bank("ppf", "PpfSmsParser", "PpfEmailParser", "VM-PPFSBI", "PPF Public Provident Fund", "alerts@ppf.gov.in"),
+    Bank("nps", "NpsSmsParser", "NpsEmailParser", "VM-NPSTRU", "NPS National Pension System", "cra@nsdl.co.in"),
+]
+
+# Parsers without TransactionPatterns, or formats the patterns do not describe
+SEED_MESSAGES = [
+    ("generic", "VM-MYBANK", "Rs.{amount} debited from your a/c XX{mask} to {merchant}. UPI Ref {ref}."),
+    ("generic", "VM-MYBANK", "Spent Rs.{amount} on your credit card XX{mask} at {merchant}. Ref: {ref}"),
+    ("generic", "VM-MYBANK", "Your a/c XX{mask} credited with INR {amount} from {merchant}. Ref No {ref}"),
+    ("icici", "AD-ICICIB", "ICICI Bank Acct XX{mask} debited for Rs {amount} on {date_dmy}; {merchant} credited. UPI:{ref}. Call 18002662 for dispute."),
+    ("sbi", "BZ-SBIINB", "Dear UPI user A/C X{mask} debited by {amount} on date {date_dmy} trf to {merchant} Refno {ref}. If not u? call 1800111109. -SBI"),
+]
+
+
+@dataclass
+class CorpusMessage:
+    id: int
+    source: str                     # SMS, EMAIL
+    bank: str
+    kind: str                       # transaction, noise, resubmit
+    body: str
+    sender: str
+    subject: Optional[str] = None
+    date_hint: Optional[str] = None
+    parser: Optional[str] = None    # Parser class the message was generated for
+    pattern: Optional[int] = None   # Index into that parser's get_patterns()
+    expected_amount: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class CorpusStats:
+    sampled_patterns: Dict[str, List[int]] = field(default_factory=dict)
+    unsampled_patterns: Dict[str, List[int]] = field(default_factory=dict)
+
+
+# --- Regex sampling ---
+
+_DIGITS = "0123456789"
+_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def _amount(rng: random.Random) -> str:
+    value = rng.choice([rng.randint(1, 99), rng.randint(100, 999), rng.randint(1000, 99999)])
+    if value >= 1000 and rng.random() < 0.6:
+        text = f"{value:,}"
+    else:
+        text = str(value)
+    return text + (f".{rng.randint(0, 99):02d}" if rng.random() < 0.7 else "")
+
+
+class RegexSampler:
+    """Produces a string matching a compiled pattern, with named field groups filled in."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def sample(self, pattern: re.Pattern, fields: Dict[int, str]) -> str:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+        return self._emit(list(parsed), fields)
+
+    def _emit(self, items, fields: Dict[int, str]) -> str:
+        out = []
+        for op, av in items:
+            out.append(self._emit_one(op, av, fields))
+        return "".join(out)
+
+    def _emit_one(self, op, av, fields) -> str:
+        c = sre_constants
+        if op is c.LITERAL:
+            return chr(av)
+        if op is c.NOT_LITERAL:
+            return "a" if chr(av) != "a" else "b"
+        if op is c.ANY:
+            return self.rng.choice(_LETTERS)
+        if op is c.IN:
+            return self._emit_in(av)
+        if op in (c.MAX_REPEAT, c.MIN_REPEAT) or op is getattr(c, "POSSESSIVE_REPEAT", None):
+            lo, hi, sub = av
+            sub = list(sub)
+            if len(sub) == 1 and sub[0][0] is c.ANY:
+                # Free-text gaps (.*?) stay empty so the message reads like an alert
+                count = lo
+            elif len(sub) == 1 and sub[0][0] is c.IN and self._is_space(sub[0][1]):
+                count = max(lo, 1)
+            elif lo == 0 and hi == 1:
+                count = self.rng.randint(0, 1)  # Optional parts: exercise both shapes
+            else:
+                count = self.rng.randint(lo, lo + 2 if hi == sre_constants.MAXREPEAT else min(hi, lo + 2))
+            return "".join(self._emit(sub, fields) for _ in range(count))
+        if op is c.BRANCH:
+            return self._emit(list(self.rng.choice(av[1])), fields)
+        if op is c.SUBPATTERN:
+            group, _, _, sub = av
+            if group is not None and group in fields:
+                return fields[group]
+            return self._emit(list(sub), fields)
+        if op is c.CATEGORY:
+            return self._emit_category(av)
+        # AT (anchors), ASSERT, GROUPREF, ...: emit nothing
+        return ""
+
+    def _is_space(self, items) -> bool:
+        return any(op is sre_constants.CATEGORY and av is sre_constants.CATEGORY_SPACE for op, av in items)
+
+    def _emit_category(self, cat) -> str:
+        c = sre_constants
+        if cat is c.CATEGORY_DIGIT:
+            return self.rng.choice(_DIGITS)
+        if cat is c.CATEGORY_SPACE:
+            return " "
+        if cat is c.CATEGORY_WORD:
+            return self.rng.choice(_LETTERS + _DIGITS)
+        return "a"
+
+    def _emit_in(self, items) -> str:
+        c = sre_constants
+        items = list(items)
+        if items and items[0][0] is c.NEGATE:
+            excluded = set()
+            for op, av in items[1:]:
+                if op is c.LITERAL:
+                    excluded.add(chr(av))
+            return next(ch for ch in "abcdefg" if ch not in excluded)
+        op, av = self.rng.choice(items)
+        if op is c.LITERAL:
+            return chr(av)
+        if op is c.RANGE:
+            return chr(self.rng.randint(av[0], av[1]))
+        if op is c.CATEGORY:
+            return self._emit_category(av)
+        return "a"
+
+
+# --- Corpus generation ---
+
+def _field_candidates(rng: random.Random, name: str, when: datetime, mask: str, amount: str, ref: str) -> List[str]:
+    if name == "amount":
+        return [amount]
+    if name == "mask":
+        return [f"XX{mask}", f"XXXXXXXX{mask}", mask, f"****{mask}", f"xx{mask}"]
+    if name == "date":
+        values = []
+        for fmt in DATE_FORMATS:
+            for value in (when.strftime(fmt), when.strftime(fmt).upper()):
+                if value not in values:
+                    values.append(value)
+        return values
+    if name == "recipient":
+        return [rng.choice(MERCHANTS), f"VPA {rng.choice(VPAS)}", rng.choice(MERCHANTS).title()]
+    if name == "ref_id":
+        return [ref, f"{rng.randint(10**5, 10**6 - 1)}"]
+    if name == "balance":
+        return [f"{rng.randint(1000, 500000):,}.{rng.randint(0, 99):02d}", str(rng.randint(1000, 500000))]
+    return []  # e.g. "type": sampled from the group's own alternatives
+
+
+def _sample_pattern(sampler: RegexSampler, rng: random.Random, parser, index: int, pattern, bank: Bank,
+                    attempts: int = 60) -> Optional[Tuple[str, str]]:
+    """A (message, amount as written) that `pattern` extracts with the intended amount, or None."""
+    for _ in range(attempts):
+        when = BASE_DATE - timedelta(days=rng.randint(0, 60), hours=rng.randint(0, 23), minutes=rng.randint(0, 59))
+        amount = _amount(rng)
+        mask = f"{rng.randint(1000, 9999)}"
+        ref = f"{rng.randint(10**11, 10**12 - 1)}"
+        fields = {}
+        for name, group in pattern.field_map.items():
+            candidates = _field_candidates(rng, name, when, mask, amount, ref)
+            if isinstance(group, int) and candidates:
+                fields[group] = rng.choice(candidates)
+        core = sampler.sample(pattern.regex, fields)
+        core = " ".join(core.split())
+        for body in (f"{core} -{bank.display}", core):
+            try:
+                matches = parser.parse_with_confidence(body, date_hint=BASE_DATE)
+            except Exception:
+                matches = []
+            if not pattern.regex.search(" ".join(body.split())):
+                continue
+            if _extracts(matches, amount):
+                return body, amount
+    return None
+
+
+def _extracts(matches, amount: str) -> bool:
+    expected = Decimal(amount.replace(",", ""))
+    return any(m.amount == expected for m in matches)
+
+
+def _revalue(rng: random.Random, template: dict, parser) -> Tuple[str, str]:
+    """
+    The template with a fresh amount, so reused templates are not byte-identical
+    resubmissions. Pattern templates are re-verified; on failure the original is kept.
+    """
+    amount = _amount(rng)
+    body = template["body"].replace(template["amount_text"], amount, 1)
+    if parser is not None:
+        try:
+            if not _extracts(parser.parse_with_confidence(body, date_hint=BASE_DATE), amount):
+                return template["body"], template["amount"]
+        except Exception:
+            return template["body"], template["amount"]
+    return body, amount.replace(",", "")
+
+
+def _noise(rng: random.Random, bank: Bank) -> str:
+    template = rng.choice(NOISE_TEMPLATES)
+    return template.format(
+        otp=rng.randint(100000, 999999), amount=_amount(rng), merchant=rng.choice(MERCHANTS),
+        bank=bank.display, time=f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+        big=f"{rng.randint(1, 20)},00,000", mask=rng.randint(1000, 9999),
+        date=(BASE_DATE + timedelta(days=rng.randint(1, 20))).strftime("%d-%b-%Y")
+    )
+
+
+def _seed(rng: random.Random, template: str) -> Tuple[str, str]:
+    amount = _amount(rng)
+    when = BASE_DATE - timedelta(days=rng.randint(0, 60))
+    body = template.format(
+        amount=amount, mask=rng.randint(1000, 9999), merchant=rng.choice(MERCHANTS),
+        ref=rng.randint(10**11, 10**12 - 1), date_dmy=when.strftime("%d-%m-%y")
+    )
+    return body, amount
+
+
+def _registered_parsers() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    import parser.api.ingestion  # noqa: F401  (registers the bank parsers)
+    from parser.parsers.registry import ParserRegistry
+    sms = {type(p).__name__: p for p in ParserRegistry.get_sms_parsers()}
+    email = {type(p).__name__: p for p in ParserRegistry.get_email_parsers()}
+    return sms, email
+
+
+def build_templates(seed: int = DEFAULT_SEED, variants_per_pattern: int = 3) -> Tuple[List[dict], CorpusStats]:
+    """
+    The distinct transaction templates: `variants_per_pattern` sampled messages for every
+    pattern of every bank SMS parser, plus the hand-written seeds.
+    """
+    rng = random.Random(seed)
+    sampler = RegexSampler(rng)
+    sms_parsers, _ = _registered_parsers()
+    stats = CorpusStats()
+    templates = []
+
+    for bank in BANKS:
+        parser = sms_parsers.get(bank.sms_parser)
+        if parser is None:
+            continue
+        for index, pattern in enumerate(parser.get_patterns()):
+            got = 0
+            for _ in range(variants_per_pattern):
+                sampled = _sample_pattern(sampler, rng, parser, index, pattern, bank)
+                if sampled:
+                    body, amount = sampled
+                    templates.append({"bank": bank.key, "body": body, "sender": bank.sender,
+                                      "parser": bank.sms_parser, "pattern": index,
+                                      "amount": amount.replace(",", ""), "amount_text": amount})
+                    got += 1
+            bucket = stats.sampled_patterns if got else stats.unsampled_patterns
+            bucket.setdefault(bank.sms_parser, []).append(index)
+
+    for bank_key, sender, template in SEED_MESSAGES:
+        for _ in range(variants_per_pattern):
+            body, amount = _seed(rng, template)
+            templates.append({"bank": bank_key, "body": body, "sender": sender, "parser": None,
+                              "pattern": None, "amount": amount.replace(",", ""), "amount_text": amount})
+    return templates, stats
+
+
+def generate_corpus(size: int = 2000, seed: int = DEFAULT_SEED, noise_ratio: float = 0.2,
+                    email_ratio: float = 0.25, resubmit_ratio: float = 0.05) -> Tuple[List[CorpusMessage], CorpusStats]:
+    """
+    `size` messages: transactions drawn round-robin from the templates (so every template
+    appears; later rounds get fresh amounts), wrapped as email for `email_ratio` of them,
+    plus noise and exact resubmissions.
+    """
+    templates, stats = build_templates(seed)
+    sms_parsers, _ = _registered_parsers()
+    rng = random.Random(seed + 1)
+    banks = {b.key: b for b in BANKS}
+    generic = Bank("generic", "GenericSmsParser", None, "VM-MYBANK", "MyBank", "alerts@mybank.example")
+    messages: List[CorpusMessage] = []
+    order = list(range(len(templates)))
+    rng.shuffle(order)
+    cursor = 0
+
+    while len(messages) < size:
+        msg_id = len(messages)
+        roll = rng.random()
+        if roll < resubmit_ratio and messages:
+            previous = rng.choice(messages)
+            messages.append(CorpusMessage(**{**previous.as_dict(), "id": msg_id, "kind": "resubmit"}))
+            continue
+        if roll < resubmit_ratio + noise_ratio:
+            bank = rng.choice(BANKS)
+            body = _noise(rng, bank)
+            if rng.random() < email_ratio:
+                messages.append(CorpusMessage(msg_id, "EMAIL", bank.key, "noise",
+                                              EMAIL_WRAPPER.format(bank=bank.display, core=body),
+                                              bank.email_from, subject=f"{bank.display} - Important information"))
+            else:
+                messages.append(CorpusMessage(msg_id, "SMS", bank.key, "noise", body, bank.sender))
+            continue
+
+        template = templates[order[cursor % len(order)]]
+        body, amount = template["body"], template["amount"]
+        if cursor >= len(order):
+            body, amount = _revalue(rng, template, sms_parsers.get(template["parser"]))
+        cursor += 1
+        bank = banks.get(template["bank"], generic)
+        date_hint = (BASE_DATE - timedelta(minutes=rng.randint(0, 60 * 24 * 30))).isoformat()
+        if bank.email_parser and rng.random() < email_ratio:
+            messages.append(CorpusMessage(
+                msg_id, "EMAIL", bank.key, "transaction",
+                EMAIL_WRAPPER.format(bank=bank.display, core=body),
+                bank.email_from, subject=f"{bank.display} Transaction Alert", date_hint=date_hint,
+                parser=bank.email_parser, expected_amount=amount
+            ))
+        else:
+            messages.append(CorpusMessage(
+                msg_id, "SMS", bank.key, "transaction", body, template["sender"],
+                date_hint=date_hint, parser=template["parser"], pattern=template["pattern"],
+                expected_amount=amount
+            ))
+    return messages, stats
+
+
+def statement_csv(rows: int = 2000, seed: int = DEFAULT_SEED) -> bytes:
+    """A bank-statement CSV (Date, Narration, Ref, Debit, Credit, Balance) for the file parser."""
+    rng = random.Random(seed)
+    balance = Decimal("250000.00")
+    lines = ["Date,Narration,Chq/Ref No,Withdrawal Amt,Deposit Amt,Closing Balance"]
+    for i in range(rows):
+        when = BASE_DATE - timedelta(days=rows - i)
+        amount = Decimal(_amount(rng).replace(",", ""))
+        debit = rng.random() < 0.75
+        balance += -amount if debit else amount
+        narration = f"UPI-{rng.choice(MERCHANTS)}-{rng.choice(VPAS)}-{rng.randint(10**11, 10**12 - 1)}"
+        lines.append(",".join([
+            when.strftime("%d/%m/%y"), narration, f"{rng.randint(10**9, 10**10 - 1)}",
+            str(amount) if debit else "", "" if debit else str(amount), str(balance)
+        ]))
+    return ("\n".join(lines) + "\n").encode()
+
+
+STATEMENT_MAPPING = {"date": "Date", "description": "Narration", "reference": "Chq/Ref No",
+                     "debit": "Withdrawal Amt", "credit": "Deposit Amt", "balance": "Closing Balance"}
@@ -0,0 +1,249 @@
+"""
+Per-stage timing and memory for the ingestion pipeline.
+
+StageProfiler wraps the pipeline's collaborators in place (classifier, bank parsers,
+user-pattern engine, normalizer/validator/guesser, payload store, session commit) and
+hooks SQLAlchemy's cursor events, keeping a stack so every stage records exclusive time:
+a normalizer alias lookup counts as `db`, not `normalize`. Whatever is left of a message's
+wall time is `pipeline`: hashing, ORM row hydration, schema conversion and the in-Python
+candidate comparison of the cross-source check.
+
+Session.execute (ORM compile + round trip) and cursor-level statements from flushes are
+`db`, except the idempotency and cross-source duplicate SELECTs on request_logs, which
+count as `dedup`.
+
+stub_ai() swaps the Gemini fallback for StubAIParser, so runs are hermetic and the `ai`
+stage measures only the pipeline's handling of an AI answer.
+"""
+import re
+import resource
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+STAGES = ("classify", "dispatch", "regex", "patterns", "ai", "normalize", "dedup", "db", "log_store", "pipeline")
+
+AMOUNT_PATTERN = re.compile(r"(?:Rs\.?|INR)\s*([\d,]+(?:\.\d{1,2})?)", re.IGNORECASE)
+
+
+class StubAIParser:
+    """Stand-in for GeminiParser: no network, answers from a plain amount regex."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def parse_with_pattern(self, content: str, source: str, date_hint: Optional[Any] = None) -> Dict[str, Any]:
+        with _active.stage("ai"):
+            match = AMOUNT_PATTERN.search(content)
+            if not match:
+                return {"error": "No amount found (benchmark AI stub)"}
+            debit = re.search(r"debit|spent|withdrawn|paid|sent", content, re.IGNORECASE)
+            return {"transaction": {
+                "amount": match.group(1).replace(",", ""),
+                "type": "DEBIT" if debit else "CREDIT",
+                "date": date_hint,
+                "merchant": None,
+                "description": content[:50],
+                "confidence": 0.85,
+            }}
+
+
+@contextmanager
+def stub_ai():
+    import parser.core.pipeline as pipeline
+    original = pipeline.GeminiParser
+    pipeline.GeminiParser = StubAIParser
+    try:
+        yield
+    finally:
+        pipeline.GeminiParser = original
+
+
+class StageProfiler:
+    def __init__(self):
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._stack: List[List] = []  # [stage, started, child_time]
+        self._restore: List[Callable[[], None]] = []
+        self._cursor_pushed: List[bool] = []
+        self._message_staged = 0.0
+
+    # --- Timing ---
+    def _push(self, stage: str):
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def _pop(self):
+        stage, started, child = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.totals[stage] += elapsed - child
+        self.calls[stage] += 1
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        else:
+            self._message_staged += elapsed
+
+    @contextmanager
+    def stage(self, name: str):
+        self._push(name)
+        try:
+            yield
+        finally:
+            self._pop()
+
+    @contextmanager
+    def message(self):
+        """Brackets one pipeline run; unstaged time is booked as `pipeline`."""
+        self._message_staged = 0.0
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.totals["pipeline"] += max(elapsed - self._message_staged, 0.0)
+
+    def breakdown(self, messages: int) -> Dict[str, Dict[str, float]]:
+        total = sum(self.totals.values()) or 1.0
+        return {
+            stage: {
+                "total_ms": round(self.totals[stage] * 1000, 3),
+                "per_message_us": round(self.totals[stage] * 1e6 / max(messages, 1), 2),
+                "share": round(self.totals[stage] / total, 4),
+                "calls": self.calls.get(stage, 0),
+            }
+            for stage in STAGES if stage in self.totals
+        }
+
+    # --- Instrumentation ---
+    def _wrap(self, stage: str, fn: Callable) -> Callable:
+        profiler = self
+
+        def timed(*args, **kwargs):
+            with profiler.stage(stage):
+                return fn(*args, **kwargs)
+
+        timed.__wrapped__ = fn
+        return timed
+
+    def _wrap_parse(self, fn: Callable) -> Callable:
+        # The pipeline picks the legacy parse() call form from co_varnames, so keep date_hint visible
+        if "date_hint" not in fn.__code__.co_varnames:
+            return self._wrap("regex", fn)
+        profiler = self
+
+        def timed(*args, date_hint=None, **kwargs):
+            with profiler.stage("regex"):
+                return fn(*args, date_hint=date_hint, **kwargs)
+
+        return timed
+
+    def _patch(self, owner: Any, name: str, replacement: Any, static: bool = False):
+        if isinstance(owner, type):
+            original = owner.__dict__[name]
+            self._restore.append(lambda: setattr(owner, name, original))
+        else:  # Instance attribute shadowing a method
+            self._restore.append(lambda: owner.__dict__.pop(name, None))
+        setattr(owner, name, staticmethod(replacement) if static else replacement)
+
+    @staticmethod
+    def _is_dedup(statement: str) -> bool:
+        # Both duplicate checks filter request_logs by created_at; attribute refreshes go by id
+        return statement.lstrip().upper().startswith("SELECT") and "request_logs.created_at" in statement
+
+    def _on_before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Statements issued inside Session.execute/commit already run in a db frame; a duplicate
+        # check relabels that frame so its ORM compile time counts as dedup too
+        if self._stack and self._stack[-1][0] in ("db", "dedup"):
+            self._cursor_pushed.append(False)
+            if self._is_dedup(statement):
+                self._stack[-1][0] = "dedup"
+            return
+        self._cursor_pushed.append(True)
+        self._push("dedup" if self._is_dedup(statement) else "db")
+
+    def _on_after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._cursor_pushed and self._cursor_pushed.pop():
+            self._pop()
+
+    def _on_error(self, context):
+        self._on_after_execute(None, None, None, None, None, None)
+
+    def install(self, engine):
+        from parser.core.classifier import FinancialClassifier
+        from parser.core.guesser import CategoryGuesser
+        from parser.core.normalizer import MerchantNormalizer
+        from parser.core.request_log import PayloadStore
+        from parser.core.validator import TransactionValidator
+        from parser.parsers.patterns.regex_engine import PatternParser
+        from parser.parsers.registry import ParserRegistry
+
+        global _active
+        _active = self
+
+        self._patch(FinancialClassifier, "is_financial", self._wrap("classify", FinancialClassifier.is_financial), static=True)
+        for cls, name in ((MerchantNormalizer, "normalize"), (CategoryGuesser, "guess"),
+                          (TransactionValidator, "validate"), (TransactionValidator, "enrich_time")):
+            self._patch(cls, name, self._wrap("normalize", getattr(cls, name)), static=True)
+        self._patch(PayloadStore, "put", self._wrap("log_store", PayloadStore.put), static=True)
+        self._patch(PatternParser, "parse", self._wrap("patterns", PatternParser.parse))
+        self._patch(Session, "commit", self._wrap("db", Session.commit))
+        self._patch(Session, "execute", self._wrap("db", Session.execute))
+
+        for parser in {id(p): p for p in ParserRegistry.get_sms_parsers() + ParserRegistry.get_email_parsers()}.values():
+            self._patch(parser, "can_handle", self._wrap("dispatch", parser.can_handle))
+            if hasattr(parser, "parse_with_confidence"):
+                self._patch(parser, "parse_with_confidence", self._wrap("regex", parser.parse_with_confidence))
+            if hasattr(parser, "parse"):
+                self._patch(parser, "parse", self._wrap_parse(parser.parse))
+
+        hooks = (("before_cursor_execute", self._on_before_execute),
+                 ("after_cursor_execute", self._on_after_execute),
+                 ("handle_error", self._on_error))
+        for name, fn in hooks:
+            event.listen(engine, name, fn)
+            self._restore.append(lambda name=name, fn=fn: event.remove(engine, name, fn))
+        return self
+
+    def uninstall(self):
+        global _active
+        while self._restore:
+            self._restore.pop()()
+        _active = _NullProfiler()
+
+
+class _NullProfiler:
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+
+_active: Any = _NullProfiler()
+
+
+def peak_rss_kb() -> int:
+    """Process high-water RSS in KiB (ru_maxrss is bytes on macOS, KiB on Linux)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+@contextmanager
+def traced_memory(result: Dict[str, Any]):
+    """Fills result with tracemalloc's current/peak KiB for the block."""
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    try:
+        yield result
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        if not was_tracing:
+            tracemalloc.stop()
+        result["retained_kb"] = round((current - before) / 1024, 1)
+        result["peak_kb"] = round((peak - before) / 1024, 1)
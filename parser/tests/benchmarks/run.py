@@ -0,0 +1,316 @@
+"""
+Parser engine benchmark runner.
+
+    python -m parser.tests.benchmarks.run                      # report only
+    python -m parser.tests.benchmarks.run --compare            # fail (exit 1) on regression
+    python -m parser.tests.benchmarks.run --save-baseline      # refresh the stored baseline
+
+Runs against a throwaway DuckDB file and payload directory, with the AI fallback stubbed,
+so nothing outside the temp directory is touched and no network calls are made.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_BASELINE = "parser_engine.json"
+
+
+def configure_environment(workdir: str):
+    """Point the parser service at `workdir`. Must run before parser.config is imported."""
+    os.environ["PARSER_DATABASE_URL"] = f"duckdb:///{os.path.join(workdir, 'bench.duckdb')}"
+    os.environ["LOG_PAYLOAD_DIR"] = os.path.join(workdir, "payloads")
+    os.environ["IMPORT_JOB_DIR"] = os.path.join(workdir, "import_jobs")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    ms = [s * 1000 for s in samples]
+    return {
+        "count": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 4) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 4),
+        "p95_ms": round(percentile(ms, 95), 4),
+        "p99_ms": round(percentile(ms, 99), 4),
+    }
+
+
+def seed_pattern_rules(db):
+    """A few user-trained rules so the pattern engine has work on every SMS/EMAIL run."""
+    from parser.db.models import PatternRule
+    rules = [
+        (r"Rs\.?\s*([\d,]+\.?\d*)\s+paid to\s+(.+?)\s+via", {"amount": 1, "merchant": 2, "type": "DEBIT"}),
+        (r"received\s+INR\s*([\d,]+\.?\d*)\s+from\s+(.+?)\.", {"amount": 1, "merchant": 2, "type": "CREDIT"}),
+        (r"wallet\s+debited\s+by\s+([\d,]+\.?\d*)", {"amount": 1, "type": "DEBIT"}),
+    ]
+    for source in ("SMS", "EMAIL"):
+        for regex, mapping in rules:
+            db.add(PatternRule(source=source, regex_pattern=regex, mapping_json=mapping, is_active=True))
+    db.commit()
+
+
+def _result_amount(result) -> Optional[Decimal]:
+    if result.results and result.results[0].transaction:
+        return Decimal(str(result.results[0].transaction.amount))
+    return None
+
+
+def run_pipeline(messages, profiler=None) -> Dict[str, Any]:
+    from parser.core.pipeline import IngestionPipeline
+    from parser.db.database import SessionLocal
+
+    latencies = defaultdict(list)
+    outcomes = Counter()
+    parsers = Counter()
+    correct = extracted_transactions = noise_extracted = 0
+    started = time.perf_counter()
+    for message in messages:
+        db = SessionLocal()
+        try:
+            t0 = time.perf_counter()
+            if profiler is not None:
+                with profiler.message():
+                    result = IngestionPipeline(db).run(message.body, message.source, sender=message.sender,
+                                                       subject=message.subject, date_hint=message.date_hint)
+            else:
+                result = IngestionPipeline(db).run(message.body, message.source, sender=message.sender,
+                                                   subject=message.subject, date_hint=message.date_hint)
+            elapsed = time.perf_counter() - t0
+        finally:
+            db.close()
+        latencies[message.source].append(elapsed)
+        latencies["all"].append(elapsed)
+        outcomes[result.status] += 1
+        if result.results:
+            parsers[result.results[0].metadata.parser_used.split(" (")[0]] += 1
+        if message.kind == "transaction":
+            amount = _result_amount(result)
+            extracted_transactions += amount is not None
+            correct += amount is not None and amount == Decimal(message.expected_amount)
+        elif message.kind == "noise":
+            noise_extracted += bool(result.results)
+    wall = time.perf_counter() - started
+
+    transactions = sum(1 for m in messages if m.kind == "transaction")
+    return {
+        "messages": len(messages),
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(messages) / wall, 1) if wall else 0.0,
+        "latency": {source: latency_summary(samples) for source, samples in latencies.items()},
+        "outcomes": dict(outcomes),
+        "parsers_used": dict(parsers.most_common()),
+        "extraction": {
+            "transactions": transactions,
+            "extracted": extracted_transactions,
+            "amount_correct": correct,
+            "amount_accuracy": round(correct / transactions, 4) if transactions else None,
+            "noise_extracted": noise_extracted,
+        },
+    }
+
+
+def time_calls(fn: Callable, inputs: List[Any], repeat: int = 5) -> Dict[str, float]:
+    """Best-of-`repeat` time per call over `inputs`."""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in inputs:
+            fn(item)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return {"calls": len(inputs), "per_call_us": round(best * 1e6 / max(len(inputs), 1), 3)}
+
+
+def run_components(messages, templates, seed: int, statement_rows: int) -> Dict[str, Any]:
+    from parser.core.classifier import FinancialClassifier
+    from parser.core.normalizer import MerchantNormalizer
+    from parser.db.database import SessionLocal
+    from parser.parsers.file.universal_parser import UniversalParser
+    from parser.parsers.patterns.regex_engine import PatternParser
+    from parser.parsers.registry import ParserRegistry
+    from parser.tests.benchmarks.corpus import MERCHANTS, STATEMENT_MAPPING, statement_csv
+
+    report: Dict[str, Any] = {}
+    report["classifier"] = time_calls(lambda m: FinancialClassifier.is_financial(m.body, m.source), messages)
+
+    by_parser = defaultdict(list)
+    for template in templates:
+        if template["parser"]:
+            by_parser[template["parser"]].append(template["body"])
+    bank = {}
+    for parser in ParserRegistry.get_sms_parsers():
+        bodies = by_parser.get(type(parser).__name__)
+        if bodies:
+            bank[type(parser).__name__] = time_calls(parser.parse_with_confidence, bodies)
+    report["bank_parsers"] = bank
+
+    raw_merchants = [f"UPI-{m}-{i}" for i, m in enumerate(MERCHANTS * 8)]
+    report["merchant_normalizer"] = time_calls(MerchantNormalizer.normalize, raw_merchants)
+
+    db = SessionLocal()
+    try:
+        bodies = [m.body for m in messages if m.source == "SMS"][:500]
+        pattern_parser = PatternParser(db, "SMS")
+        report["pattern_engine"] = time_calls(pattern_parser.parse, bodies)
+        report["pattern_engine_with_load"] = time_calls(lambda body: PatternParser(db, "SMS").parse(body), bodies[:100], repeat=1)
+    finally:
+        db.close()
+
+    content = statement_csv(statement_rows, seed)
+    t0 = time.perf_counter()
+    parsed, skipped = UniversalParser.parse(content, "statement.csv", STATEMENT_MAPPING)
+    elapsed = time.perf_counter() - t0
+    report["statement_csv"] = {
+        "rows": statement_rows,
+        "parsed": len(parsed),
+        "skipped": len(skipped),
+        "per_row_us": round(elapsed * 1e6 / max(statement_rows, 1), 2),
+        "per_call_us": round(elapsed * 1e6, 1),
+    }
+    return report
+
+
+def run_memory(messages) -> Dict[str, Any]:
+    from parser.tests.benchmarks.profiling import peak_rss_kb, traced_memory
+
+    memory: Dict[str, Any] = {}
+    with traced_memory(memory):
+        run_pipeline(messages)
+    memory["messages"] = len(messages)
+    memory["per_message_bytes"] = round(memory["peak_kb"] * 1024 / max(len(messages), 1), 1)
+    memory["max_rss_kb"] = peak_rss_kb()
+    return memory
+
+
+def build_report(size: int = 1000, seed: Optional[int] = None, memory_sample: int = 200,
+                 statement_rows: int = 2000, warmup: int = 50) -> Dict[str, Any]:
+    """Full run. Expects configure_environment() to have been called."""
+    from parser.db.database import SessionLocal, engine, init_db
+    from parser.tests.benchmarks.corpus import DEFAULT_SEED, build_templates, generate_corpus
+
+    seed = seed or DEFAULT_SEED
+    from parser.tests.benchmarks.profiling import StageProfiler, stub_ai
+
+    init_db()
+    db = SessionLocal()
+    try:
+        seed_pattern_rules(db)
+    finally:
+        db.close()
+
+    t0 = time.perf_counter()
+    messages, stats = generate_corpus(size, seed)
+    corpus_s = time.perf_counter() - t0
+    templates, _ = build_templates(seed)
+
+    with stub_ai():
+        # Warm imports, regex caches and the DB connection on messages outside the measured corpus
+        warm, _ = generate_corpus(warmup, seed + 1000)
+        run_pipeline(warm)
+
+        profiler = StageProfiler().install(engine)
+        try:
+            pipeline = run_pipeline(messages, profiler)
+            pipeline["stages"] = profiler.breakdown(len(messages))
+        finally:
+            profiler.uninstall()
+
+        mem_messages, _ = generate_corpus(memory_sample, seed + 2000)
+        memory = run_memory(mem_messages)
+
+    return {
+        "config": {"size": size, "seed": seed, "memory_sample": memory_sample, "statement_rows": statement_rows},
+        "corpus": {
+            "messages": len(messages),
+            "templates": len(templates),
+            "kinds": dict(Counter(f"{m.source}:{m.kind}" for m in messages)),
+            "patterns_sampled": sum(len(v) for v in stats.sampled_patterns.values()),
+            "patterns_unsampled": stats.unsampled_patterns,
+            "build_s": round(corpus_s, 3),
+        },
+        "pipeline": pipeline,
+        "components": run_components(messages, templates, seed, statement_rows),
+        "memory": memory,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    pipeline = report["pipeline"]
+    print(f"corpus: {report['corpus']['messages']} messages from {report['corpus']['templates']} templates "
+          f"({report['corpus']['patterns_sampled']} bank patterns)")
+    print(f"pipeline: {pipeline['throughput_per_s']} msg/s, outcomes {pipeline['outcomes']}")
+    for source, summary in pipeline["latency"].items():
+        print(f"  {source:<6} p50 {summary['p50_ms']:.3f} ms  p95 {summary['p95_ms']:.3f} ms  p99 {summary['p99_ms']:.3f} ms")
+    print(f"  extraction {pipeline['extraction']}")
+    print("stages (exclusive time):")
+    for stage, values in sorted(pipeline["stages"].items(), key=lambda kv: -kv[1]["share"]):
+        print(f"  {stage:<10} {values['per_message_us']:>10.1f} us/msg  {values['share']:>6.1%}  ({values['calls']} calls)")
+    components = report["components"]
+    print(f"components: classifier {components['classifier']['per_call_us']} us, "
+          f"normalizer {components['merchant_normalizer']['per_call_us']} us, "
+          f"patterns {components['pattern_engine']['per_call_us']} us, "
+          f"csv {components['statement_csv']['per_row_us']} us/row")
+    slowest = sorted(components["bank_parsers"].items(), key=lambda kv: -kv[1]["per_call_us"])[:5]
+    print("  slowest bank parsers: " + ", ".join(f"{name} {v['per_call_us']} us" for name, v in slowest))
+    memory = report["memory"]
+    print(f"memory: peak {memory['peak_kb']} KiB over {memory['messages']} messages "
+          f"({memory['per_message_bytes']} B/msg), max RSS {memory['max_rss_kb']} KiB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--memory-sample", type=int, default=200)
+    parser.add_argument("--statement-rows", type=int, default=2000)
+    parser.add_argument("--baseline", default=None, help="Baseline file (default: baselines/parser_engine.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true", help="Exit 1 if any metric regresses past the threshold")
+    parser.add_argument("--threshold", type=float, default=None)
+    parser.add_argument("--output", help="Also write the full JSON report here")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="parser-bench-")
+    configure_environment(workdir)
+
+    from parser.tests.benchmarks import baseline
+
+    report = build_report(args.size, args.seed, args.memory_sample, args.statement_rows)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    path = args.baseline or os.path.join(baseline.BASELINE_DIR, DEFAULT_BASELINE)
+    if args.save_baseline:
+        baseline.save(report, path)
+        print(f"baseline written to {path}")
+        return 0
+    if args.compare:
+        if not os.path.exists(path):
+            print(f"no baseline at {path}; run with --save-baseline first")
+            return 2
+        rows = baseline.compare(report, baseline.load(path), args.threshold or baseline.DEFAULT_THRESHOLD)
+        print(baseline.format_comparison(rows))
+        regressions = [r for r in rows if r["regression"]]
+        print(f"{len(regressions)} regression(s) against {path}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
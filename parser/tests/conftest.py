@@ -0,0 +1,11 @@
+"""
+Point the parser at a throwaway directory before any test imports parser.config, so tests
+never touch data/. Modules that need their own environment (test_benchmarks) still can.
+"""
+import sys
+import tempfile
+
+from parser.tests.benchmarks.run import configure_environment
+
+if "parser.config" not in sys.modules:
+    configure_environment(tempfile.mkdtemp(prefix="parser-tests-"))
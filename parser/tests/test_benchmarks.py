@@ -0,0 +1,96 @@
+"""
+Checks for the benchmark harness itself (corpus, profiler, comparator) on a small run.
+Timings are not asserted here; use `python -m parser.tests.benchmarks.run --compare`,
+or set PARSER_BENCH_COMPARE=1 to run the baseline comparison from pytest.
+"""
+import importlib.util
+import os
+import sys
+import tempfile
+
+import pytest
+
+from parser.tests.benchmarks.run import configure_environment
+
+if "parser.config" in sys.modules:
+    pytest.skip("parser settings already loaded; benchmark tests need a throwaway database", allow_module_level=True)
+configure_environment(tempfile.mkdtemp(prefix="parser-bench-test-"))
+
+from parser.tests.benchmarks import baseline  # noqa: E402
+from parser.tests.benchmarks.corpus import build_templates, generate_corpus  # noqa: E402
+from parser.tests.benchmarks.run import build_report  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def report():
+    return build_report(size=150, memory_sample=30, statement_rows=200, warmup=10)
+
+
+def test_corpus_is_deterministic():
+    first, _ = generate_corpus(200, seed=7)
+    second, _ = generate_corpus(200, seed=7)
+    other, _ = generate_corpus(200, seed=8)
+    assert [m.as_dict() for m in first] == [m.as_dict() for m in second]
+    assert [m.body for m in first] != [m.body for m in other]
+
+
+def test_corpus_covers_every_bank_pattern():
+    from parser.parsers.registry import ParserRegistry
+    templates, stats = build_templates()
+    assert not stats.unsampled_patterns
+    covered = {(t["parser"], t["pattern"]) for t in templates}
+    for parser in ParserRegistry.get_sms_parsers():
+        for index, _ in enumerate(parser.get_patterns()):
+            assert (type(parser).__name__, index) in covered
+
+
+def test_corpus_mix():
+    messages, _ = generate_corpus(500)
+    kinds = {(m.source, m.kind) for m in messages}
+    assert {("SMS", "transaction"), ("EMAIL", "transaction"), ("SMS", "noise"), ("EMAIL", "noise")} <= kinds
+    assert any(m.kind == "resubmit" for m in messages)
+
+
+def test_pipeline_report(report):
+    pipeline = report["pipeline"]
+    assert pipeline["messages"] == 150
+    assert sum(pipeline["outcomes"].values()) == 150
+    assert pipeline["extraction"]["amount_accuracy"] > 0.8
+    assert {"classify", "dispatch", "regex", "normalize", "dedup", "db"} <= set(pipeline["stages"])
+    assert abs(sum(s["share"] for s in pipeline["stages"].values()) - 1.0) < 0.01
+    assert report["memory"]["peak_kb"] > 0
+    assert report["components"]["statement_csv"]["parsed"] == 200
+
+
+def test_comparator_flags_regressions():
+    old = {"pipeline": {"throughput_per_s": 100.0, "latency": {"all": {"p95_ms": 10.0}}}}
+    slower = {"pipeline": {"throughput_per_s": 60.0, "latency": {"all": {"p95_ms": 15.0}}}}
+    faster = {"pipeline": {"throughput_per_s": 140.0, "latency": {"all": {"p95_ms": 5.0}}}}
+    assert all(r["regression"] for r in baseline.compare(slower, old))
+    assert not any(r["regression"] for r in baseline.compare(faster, old))
+    assert not any(r["regression"] for r in baseline.compare(old, old))
+
+
+def test_comparator_ignores_noise_floor():
+    old = {"stages": {"dispatch": {"per_message_us": 4.0}}}
+    new = {"stages": {"dispatch": {"per_message_us": 8.0}}}
+    assert not baseline.compare(new, old)[0]["regression"]
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pytest_benchmark") is None, reason="pytest-benchmark not installed")
+def test_bank_parser_throughput(benchmark):
+    from parser.parsers.registry import ParserRegistry
+    templates, _ = build_templates()
+    parsers = {type(p).__name__: p for p in ParserRegistry.get_sms_parsers()}
+    work = [(parsers[t["parser"]], t["body"]) for t in templates if t["parser"]]
+    benchmark(lambda: [parser.parse_with_confidence(body) for parser, body in work])
+
+
+@pytest.mark.skipif(not os.environ.get("PARSER_BENCH_COMPARE"), reason="set PARSER_BENCH_COMPARE=1")
+def test_no_regression_against_baseline():
+    from parser.tests.benchmarks.run import DEFAULT_BASELINE
+    path = os.path.join(baseline.BASELINE_DIR, DEFAULT_BASELINE)
+    stored = baseline.load(path)
+    current = build_report(**stored["config"])
+    rows = baseline.compare(current, stored)
+    assert not [r for r in rows if r["regression"]], baseline.format_comparison(rows)
@@ -0,0 +1,44 @@
+"""
+CAS parse strategies: fall back through every strategy, but fail fast on a wrong password.
+"""
+import pytest
+from casparser.exceptions import IncorrectPasswordError
+
+from parser.parsers.cas import cas_parser
+from parser.parsers.cas.cas_parser import PARSE_STRATEGIES, parse_cas_bytes
+
+STATEMENT = {"folios": [{"folio": "123/45", "schemes": [{
+    "scheme": "Test Fund - Growth", "amfi": "100001", "isin": "INF000T01001",
+    "transactions": [
+        {"date": "2024-01-05", "description": "Purchase", "type": "PURCHASE", "amount": 1000, "units": 10, "nav": 100},
+        {"date": "2024-01-05", "description": "Stamp Duty", "type": "STAMP_DUTY_TAX", "amount": 0.05},
+    ],
+}]}]}
+
+
+def test_falls_back_to_last_strategy(monkeypatch):
+    tried = []
+
+    def read_cas_pdf(fp, password, **strategy):
+        tried.append(strategy)
+        if strategy:
+            raise TypeError("unsupported option")
+        return STATEMENT
+
+    monkeypatch.setattr(cas_parser.casparser, "read_cas_pdf", read_cas_pdf)
+    rows = parse_cas_bytes(b"%PDF", "secret")
+    assert tried == list(PARSE_STRATEGIES)
+    assert [(r["type"], r["amount"], r["folio_number"]) for r in rows] == [("BUY", 1000.0, "123/45")]
+
+
+def test_wrong_password_is_not_retried(monkeypatch):
+    tried = []
+
+    def read_cas_pdf(fp, password, **strategy):
+        tried.append(strategy)
+        raise IncorrectPasswordError("bad password")
+
+    monkeypatch.setattr(cas_parser.casparser, "read_cas_pdf", read_cas_pdf)
+    with pytest.raises(ValueError, match="Incorrect CAS password"):
+        parse_cas_bytes(b"%PDF", "wrong")
+    assert len(tried) == 1
@@ -0,0 +1,42 @@
+"""
+FinancialClassifier: single-pass scanner vs. the keyword rules it encodes.
+"""
+import pytest
+
+from parser.core.classifier import FinancialClassifier, KeywordScanner, Signal
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("Rs.500.00 debited from a/c XX1234 at STARBUCKS on 13-01-26", True),
+    ("INR 2,000 credited to your account", True),
+    ("Your OTP for the transaction of Rs.500 is 123456", False),  # fast fail beats currency
+    ("New login to your bank account detected", False),
+    ("Paid via UPI", True),  # two positives
+    ("Bill payment: click here to know more", False),  # 2 positives - 2 penalties
+    ("Payment received. Unsubscribe", True),  # 2 positives - 0.5
+    ("Congratulations! You are a lucky winner", False),
+    ("Grab vouchers.", True),  # overlapping "rs." inside "vouchers."
+    ("Spending summary for the week", False),  # \b: "spent" only as a word
+])
+def test_is_financial(content, expected):
+    assert FinancialClassifier.is_financial(content) is expected
+
+
+def test_feature_vector_and_score():
+    vector = FinancialClassifier.features("Rs.500 debited from A/C; click here")
+    signals = FinancialClassifier.scanner().signals
+    assert len(vector) == len(signals)
+    hit = {s.name for s, v in zip(signals, vector) if v}
+    assert hit == {r"rs\.", r"\bdebited\b", r"\ba/c\b", "click here"}
+    # currency 2 + two positives - "click here" (listed as noise and as cleanup)
+    assert FinancialClassifier.score(vector) == (True, 3.0)
+
+
+def test_batch_matches_single():
+    messages = ["Rs.10 spent", "otp 1234", "know more", "UPI txn sent", ""]
+    assert FinancialClassifier.classify_batch(messages) == [FinancialClassifier.is_financial(m) for m in messages]
+
+
+def test_scanner_rejects_non_literal_patterns():
+    with pytest.raises(ValueError):
+        KeywordScanner([Signal(r"\d+ rs", "positive", 1.0)])
@@ -0,0 +1,48 @@
+"""
+BoundedPool: a dead worker process must not break the parse pool for good.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from parser.core.executor import BoundedPool, PoolUnavailable
+
+
+@pytest.fixture
+def pool():
+    pool = BoundedPool(
+        "parse",
+        lambda: ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")),
+        workers=1, queue_depth=2, timeout=60,
+    )
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_recovers_after_worker_death(pool):
+    async def scenario():
+        assert await pool.run(abs, -3) == 3
+        broken = pool._executor
+        with pytest.raises(PoolUnavailable):
+            await pool.run(os._exit, 1)
+        assert pool._executor is not broken
+        assert await pool.run(abs, -4) == 4
+
+    asyncio.run(scenario())
+    assert pool.inflight == 0
+
+
+def test_submit_to_broken_executor_goes_to_a_fresh_one(pool):
+    async def scenario():
+        await pool.run(abs, -1)
+        broken = pool._executor
+        with pytest.raises(PoolUnavailable):
+            await pool.run(os._exit, 1)
+        # Simulate a caller that still sees the broken executor
+        pool._executor = broken
+        assert await pool.run(abs, -5) == 5
+
+    asyncio.run(scenario())
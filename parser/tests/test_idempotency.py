@@ -0,0 +1,37 @@
+"""
+RecentSubmissions: in-memory duplicate filter in front of IngestionPipeline.
+"""
+import time
+
+from parser.core.idempotency import RecentSubmissions
+
+
+def test_claim_rejects_repeat_within_window():
+    recent = RecentSubmissions(window_seconds=60, max_entries=10)
+    assert recent.claim("a") is True
+    assert recent.claim("a") is False
+    assert recent.claim("b") is True
+    assert len(recent) == 2
+
+
+def test_claim_expires_after_window():
+    recent = RecentSubmissions(window_seconds=0.05, max_entries=10)
+    assert recent.claim("a")
+    time.sleep(0.06)
+    assert recent.claim("a")
+
+
+def test_release_allows_retry():
+    recent = RecentSubmissions(window_seconds=60, max_entries=10)
+    recent.claim("a")
+    recent.release("a")
+    assert recent.claim("a")
+
+
+def test_oldest_evicted_beyond_capacity():
+    recent = RecentSubmissions(window_seconds=60, max_entries=2)
+    for h in ("a", "b", "c"):
+        assert recent.claim(h)
+    assert len(recent) == 2
+    assert recent.claim("a")  # evicted, so accepted again
+    assert not recent.claim("c")
@@ -0,0 +1,59 @@
+"""
+ImportJobService.results(): the next_after cursor while a job runs and once it is finished.
+"""
+import pytest
+from sqlalchemy import insert
+
+from parser.core.import_jobs import ImportJobService
+from parser.db.database import SessionLocal, init_db
+from parser.db.models import ImportJob, ImportJobRow
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def job(db):
+    job = ImportJob(job_key="k", input_hash="h", filename="f.csv", storage_path="f.csv",
+                    mapping_json={}, header_row_index=0, status="running")
+    db.add(job)
+    db.commit()
+    return job
+
+
+def _append(db, job, kinds, start):
+    db.execute(insert(ImportJobRow), [
+        {"job_id": job.id, "seq": start + i, "kind": kind, "payload": {"n": start + i}}
+        for i, kind in enumerate(kinds)
+    ])
+    db.commit()
+
+
+def test_running_job_cursor_never_resets(db, job):
+    # Items and skips share the seq counter: seq 1 is a skip
+    _append(db, job, ["item", "skip", "item"], 0)
+    items, next_after = ImportJobService.results(db, job.id, limit=10, finished=False)
+    assert [i["n"] for i in items] == [0, 2]
+    assert next_after == 2
+
+    items, next_after = ImportJobService.results(db, job.id, after=2, limit=10, finished=False)
+    assert items == [] and next_after == 2
+
+    _append(db, job, ["item"], 3)
+    items, next_after = ImportJobService.results(db, job.id, after=2, limit=10, finished=False)
+    assert [i["n"] for i in items] == [3] and next_after == 3
+
+
+def test_finished_job_ends_on_short_page(db, job):
+    _append(db, job, ["item", "item", "item"], 0)
+    items, next_after = ImportJobService.results(db, job.id, limit=2, finished=True)
+    assert next_after == 1
+    items, next_after = ImportJobService.results(db, job.id, after=next_after, limit=2, finished=True)
+    assert [i["n"] for i in items] == [2] and next_after is None
@@ -0,0 +1,121 @@
+"""
+Compact request logs: payload store round trips, summary-column projection, the cross-source
+dedup reading multi-item payloads back, and whole-day retention.
+"""
+import os
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+import parser.api.ingestion  # noqa: F401  (registers the bank parsers)
+from parser.config import settings
+from parser.core import scheduler
+from parser.core.pipeline import IngestionPipeline
+from parser.core.request_log import PREVIEW_CHARS, PayloadStore, RequestLogWriter
+from parser.db.database import SessionLocal, init_db
+from parser.db.models import RequestLog
+
+HDFC_SMS = "IMPS of Rs 440 from HDFC Bank A/c ****1564 to VPA bigbasket@ybl on 09Dec25Ref:506464812976 -HDFC Bank"
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def _item(amount, ref_id, mask="1564", merchant="BigBasket", parser_used="HdfcSmsParser", confidence=1.0):
+    return {
+        "status": "extracted",
+        "transaction": {
+            "amount": amount, "type": "DEBIT", "ref_id": ref_id, "description": f"Paid {merchant}",
+            "account": {"mask": mask}, "merchant": {"raw": merchant.upper(), "cleaned": merchant},
+        },
+        "metadata": {"parser_used": parser_used, "confidence": confidence},
+    }
+
+
+def _payload_path(ref):
+    return os.path.join(settings.LOG_PAYLOAD_DIR, f"{ref}.json.z")
+
+
+def test_payload_store_spills_once_per_content_and_rehydrates():
+    day = date(2024, 3, 1)
+    payload = {"content": "hello", "amount": Decimal("10.50"), "nested": {"b": 1, "a": [1, 2]}}
+    ref = PayloadStore.put(day, payload)
+    assert ref.startswith("2024-03-01/")
+    # Same content (any key order) is stored once under the same ref
+    assert PayloadStore.put(day, {"nested": {"a": [1, 2], "b": 1}, "amount": Decimal("10.50"), "content": "hello"}) == ref
+    assert os.listdir(os.path.dirname(_payload_path(ref))) == [os.path.basename(_payload_path(ref))]
+    with open(_payload_path(ref), "rb") as f:
+        zlib.decompress(f.read())  # stored compressed
+    assert PayloadStore.get(ref) == {"content": "hello", "amount": "10.50", "nested": {"a": [1, 2], "b": 1}}
+    assert PayloadStore.get(None) is None
+    assert PayloadStore.get("2024-03-01/missing") is None
+
+
+def test_output_summary_is_projected_onto_fixed_columns():
+    output = {"status": "success", "results": [_item(440.0, "0042", merchant="Swiggy"), _item(99, "77")]}
+    log = RequestLogWriter.new("SMS", "h", "success", input_payload={"content": "x" * 500},
+                               output_payload=output)
+    assert log.item_count == 2
+    assert (log.parser_used, log.confidence) == ("HdfcSmsParser", 1.0)
+    assert (log.amount, log.txn_type, log.ref_id) == (Decimal("440.0"), "DEBIT", "0042")
+    assert (log.account_mask, log.merchant) == ("1564", "Swiggy")
+    assert log.error is None and log.input_preview == "x" * PREVIEW_CHARS
+    assert PayloadStore.get(log.input_ref) == {"content": "x" * 500}
+    assert PayloadStore.get(log.output_ref)["results"][1]["transaction"]["ref_id"] == "77"
+
+    failed = RequestLogWriter.new("SMS", "h2", "failed", output_payload={"status": "failed", "results": [],
+                                                                          "error": "boom"})
+    assert failed.item_count == 0 and failed.error == "boom" and failed.amount is None
+
+
+def test_cross_source_dedup_reads_multi_item_payloads(db):
+    # A statement log whose summary (first row) does not match; its third row is the SMS transaction
+    output = {"status": "success", "results": [
+        _item(1200, "900000000001", merchant="Rent"), _item(55, "900000000002", merchant="Uber"),
+        _item(440, "506464812976"),
+    ]}
+    log = RequestLogWriter.new("FILE", "statement-hash", "success", output_payload=output)
+    db.add(log)
+    db.commit()
+    try:
+        assert log.ref_id != "506464812976"
+        result = IngestionPipeline(db).run(HDFC_SMS, "SMS", sender="VM-HDFCBK")
+        assert result.results[0].status == "cross_source_duplicate"
+        assert f"Matching Ref ID detected from {log.id}" in result.logs
+    finally:
+        db.delete(log)
+        db.commit()
+
+
+def test_cleanup_drops_whole_days(db, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_RETENTION_DAYS", 2)
+    today = datetime.utcnow().date()
+    days = {"expired": today - timedelta(days=3), "edge": today - timedelta(days=2), "today": today}
+    logs = {}
+    for name, day in days.items():
+        log = RequestLog(source="SMS", input_hash=f"retention-{name}", status="success",
+                         created_at=datetime.combine(day, datetime.min.time()), day=day)
+        log.input_ref = PayloadStore.put(day, {"content": name})
+        logs[name] = log
+    db.add_all(logs.values())
+    db.commit()
+    ids = {name: log.id for name, log in logs.items()}
+    refs = {name: log.input_ref for name, log in logs.items()}
+
+    scheduler.cleanup_old_logs()
+
+    db.rollback()  # fresh snapshot
+    assert db.get(RequestLog, ids["expired"]) is None
+    assert not os.path.isdir(os.path.join(settings.LOG_PAYLOAD_DIR, days["expired"].isoformat()))
+    for name in ("edge", "today"):
+        assert db.get(RequestLog, ids[name]) is not None
+        assert PayloadStore.get(refs[name]) == {"content": name}
@@ -0,0 +1,170 @@
+"""
+/v1/stats rollups: in-memory counters, flush (and restore on failure), hour compaction and
+the summary, which must count every request exactly once even while a flush runs.
+"""
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, text
+
+from parser.config import settings
+from parser.core import stats_rollup
+from parser.core.stats_rollup import StatsAggregator, StatsRollupService
+from parser.db.database import SessionLocal, init_db
+from parser.db.models import RequestStatRollup
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    session.execute(text("DELETE FROM request_stat_rollups"))
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def aggregator(monkeypatch):
+    """A fresh process-wide aggregator, so counters from other tests never leak in."""
+    fresh = StatsAggregator()
+    monkeypatch.setattr(stats_rollup, "stats_aggregator", fresh)
+    return fresh
+
+
+def _minute(minutes_ago: int) -> datetime:
+    return datetime.utcnow().replace(second=0, microsecond=0) - timedelta(minutes=minutes_ago)
+
+
+def _rows(db):
+    db.rollback()  # fresh snapshot
+    return sorted(
+        (r.bucket_start, r.resolution, r.source, r.requests, r.items, r.latency_ms_sum, r.latency_count)
+        for r in db.query(
+            RequestStatRollup.bucket_start, RequestStatRollup.resolution, RequestStatRollup.source,
+            RequestStatRollup.requests, RequestStatRollup.items, RequestStatRollup.latency_ms_sum,
+            RequestStatRollup.latency_count,
+        )
+    )
+
+
+def test_record_accumulates_per_minute_key(aggregator):
+    at = _minute(3)
+    aggregator.record("SMS", "success", "Hdfc", 0.95, items=1, latency_ms=10.0, at=at + timedelta(seconds=5))
+    aggregator.record("SMS", "success", "Hdfc", 0.99, items=2, latency_ms=None, at=at + timedelta(seconds=50))
+    aggregator.record("SMS", "success", "Hdfc", 0.4, items=1, latency_ms=4.0, at=at)
+    assert aggregator.pending(at) == {
+        (at, "SMS", "success", "Hdfc", "high"): [2, 3, 10.0, 1],
+        (at, "SMS", "success", "Hdfc", "low"): [1, 1, 4.0, 1],
+    }
+
+
+def test_flush_writes_closed_minutes_only(db, aggregator):
+    closed, current = _minute(2), _minute(0)
+    aggregator.record("SMS", "success", items=1, latency_ms=5.0, at=closed)
+    aggregator.record("EMAIL", "failed", at=current)
+    assert aggregator.flush(db) == 1
+    assert _rows(db) == [(closed, "minute", "SMS", 1, 1, 5.0, 1)]
+    assert list(aggregator.pending(closed)) == [(current, "EMAIL", "failed", None, "none")]
+
+    assert aggregator.flush(db, include_current=True) == 1
+    assert aggregator.pending(closed) == {}
+    assert len(_rows(db)) == 2
+
+
+def test_failed_flush_restores_and_merges_counters(aggregator):
+    at = _minute(2)
+    aggregator.record("SMS", "success", items=1, latency_ms=5.0, at=at)
+
+    class BrokenSession:
+        rolled_back = False
+
+        def execute(self, *args, **kwargs):
+            raise RuntimeError("database is locked")
+
+        def rollback(self):
+            self.rolled_back = True
+
+    broken = BrokenSession()
+    with pytest.raises(RuntimeError):
+        aggregator.flush(broken)
+    assert broken.rolled_back
+    # Recorded while the flush was failing: merged with the restored counters
+    aggregator.record("SMS", "success", items=2, latency_ms=1.0, at=at)
+    assert aggregator.pending(at) == {(at, "SMS", "success", None, "none"): [2, 3, 6.0, 2]}
+
+
+def test_compact_folds_old_minutes_into_hours_and_expires(db, monkeypatch):
+    monkeypatch.setattr(settings, "STATS_MINUTE_RESOLUTION_HOURS", 2)
+    monkeypatch.setattr(settings, "STATS_RETENTION_DAYS", 30)
+    now = datetime(2024, 6, 10, 12, 30)
+    old_hour = datetime(2024, 6, 10, 9)
+
+    def row(bucket_start, resolution, requests, latency):
+        return {"bucket_start": bucket_start, "resolution": resolution, "source": "SMS", "status": "success",
+                "parser_used": "Hdfc", "confidence_bucket": "high", "requests": requests, "items": requests,
+                "latency_ms_sum": latency, "latency_count": requests}
+
+    db.execute(insert(RequestStatRollup), [
+        row(old_hour + timedelta(minutes=5), "minute", 2, 10.0),
+        row(old_hour + timedelta(minutes=40), "minute", 3, 20.0),
+        row(datetime(2024, 6, 10, 11, 15), "minute", 1, 1.0),   # inside the minute-resolution horizon
+        row(now - timedelta(days=31), "hour", 7, 7.0),          # past retention
+    ])
+    db.commit()
+
+    assert StatsRollupService.compact(db, now=now) == 2
+    assert _rows(db) == [
+        (old_hour, "hour", "SMS", 5, 5, 30.0, 5),
+        (datetime(2024, 6, 10, 11, 15), "minute", "SMS", 1, 1, 1.0, 1),
+    ]
+
+
+def test_summary_combines_flushed_and_pending_counters(db, aggregator):
+    aggregator.record("SMS", "success", "Hdfc", 0.95, items=2, latency_ms=10.0, at=_minute(5))
+    aggregator.record("EMAIL", "failed", latency_ms=30.0, at=_minute(4))
+    aggregator.flush(db)
+    aggregator.record("SMS", "success", "Icici", 0.6, items=1, latency_ms=20.0)
+    aggregator.record("SMS", "duplicate", at=_minute(90))  # outside the window
+
+    db.rollback()
+    assert StatsRollupService.summary(db, timedelta(hours=1)) == {
+        "total_processed": 3,
+        "status_breakdown": {"success": 2, "failed": 1},
+        "source_breakdown": {"SMS": 2, "EMAIL": 1},
+        "parser_performance": {"Hdfc": 2, "Icici": 1},
+        "confidence_breakdown": {"high": 2, "medium": 1},
+        "avg_latency_ms": 20.0,
+    }
+
+
+def test_summary_counts_a_concurrent_flush_once(db, aggregator, monkeypatch):
+    aggregator.record("SMS", "success", items=1, at=_minute(2))
+    aggregator.record("SMS", "success", items=1, at=_minute(1))
+    read_pending = aggregator.pending
+    flushed = threading.Event()
+
+    def flush():
+        session = SessionLocal()
+        try:
+            aggregator.flush(session)
+        finally:
+            session.close()
+            flushed.set()
+
+    def pending_after_flush(since):
+        # A scheduled flush fires between the rollup read and the in-memory read
+        threading.Thread(target=flush).start()
+        flushed.wait(0.5)
+        return read_pending(since)
+
+    monkeypatch.setattr(aggregator, "pending", pending_after_flush)
+    db.rollback()
+    assert StatsRollupService.summary(db, timedelta(hours=1))["total_processed"] == 2
+    assert flushed.wait(10)
+    monkeypatch.setattr(aggregator, "pending", read_pending)
+    db.rollback()
+    assert StatsRollupService.summary(db, timedelta(hours=1))["total_processed"] == 2